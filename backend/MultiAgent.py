@@ -3,22 +3,18 @@ import json
 import uuid
 import time
 import re
-import google.generativeai as genai
-from google.generativeai import caching
 from dotenv import load_dotenv
 from typing import List, Dict, Any
-
-# Optional OpenAI Import
-try:
-    from openai import OpenAI
-    HAS_OPENAI = True
-except ImportError:
-    HAS_OPENAI = False
-    print("⚠️ OpenAI library not found. (pip install openai)")
+from intent_matcher import matcher
+from flow_validator import validator
+from dataset_cache import get_file_schema
+from data_context import build_data_context, known_values, estimate_tokens
 
 # Load environment variables
 load_dotenv()
 
+from model_providers import build_provider
+
 # =========================================================================
 # SYSTEM INSTRUCTIONS (SHARED)
 # =========================================================================
@@ -169,7 +165,7 @@ You are the EXECUTOR AGENT. You build Node-based flows based on a Plan.
 **Replace Value**: {{ "label": "Replace Value", "typeLabel": "Replace Value", "config": {{ "column": "Status", "oldValue": "Pending", "newValue": "Done" }} }}
 **Rename Columns**: {{ "label": "Rename Columns", "typeLabel": "Rename Columns", "config": {{ "oldName": "col_1", "newName": "CustomerID" }} }}
 **Change Type**: {{ "label": "Change Data Type", "typeLabel": "Change Data Type", "config": {{ "column": "Price", "dtype": "float" }} }}
-**Merge/Join**: {{ "label": "Merge Datasets", "typeLabel": "Merge/Join", "config": {{ "how": "inner", "on": "CustomerID" }} }}
+**Merge/Join**: {{ "label": "Merge Datasets", "typeLabel": "Merge/Join", "config": {{ "how": "inner", "on": "CustomerID", "validate": "many_to_one" }} }} (two incoming edges: {{ "targetHandle": "left" }} and {{ "targetHandle": "right" }})
 **Filter Rows**: {{ "label": "Filter: Region", "typeLabel": "Filter Rows", "config": {{ "conditions": [{{ "column": "Region", "operator": "==", "value": "Americas" }}] }} }}
 **Filter Date**: {{"label": "Filter Date", "typeLabel": "Filter Date", "config": {{"dateRanges": [{{ "column": "Closed At", "startDate": "2025-02-04", "endDate": "2025-12-11"}}] }} }}
 **Select Columns**: {{"label": "Select Columns", "typeLabel": "Select Columns", "config": {{"columns": ["Region", "City", "TAT", "TAT Tgt."], "column": "Severity"}} }}      
@@ -178,17 +174,19 @@ You are the EXECUTOR AGENT. You build Node-based flows based on a Plan.
 **Group By**: {{"label": "Group By", "typeLabel": "Group By", "config": {{"groupColumns": ["Impact", "Urgency", "Severity", "Priority", "Type", "Category"], "aggregations": [{{"column": "Severity", "func": "sum"}}] }} }}
 **Pivot Table**: {{ "label": "Pivot Table", "typeLabel": "Pivot Table", "config": {{ "index": "Date", "columns": "Category", "values": "Sales", "aggFunc": "sum" }} }}
 **Value Counts:** {{ "label": "Value Counts", "typeLabel": "Value Counts", "config": {{ "column": "Status" }} }}
+  - For very high-cardinality columns add `"approximate": true, "topN": 50` (most frequent values only, from a sketch).
 **Sort Data**: {{ "label": "Sort Data", "typeLabel": "Sort Data", "config": {{ "column": "Date", "order": "desc" }} }}
 **Rank**: {{ "label": "Rank Data", "typeLabel": "Rank", "config": {{ "column": "Score", "method": "dense", "order": "desc" }} }}
 **Sentiment Analysis**: {{ "label": "Sentiment Analysis", "typeLabel": "Sentiment Analysis", "config": {{ "column": "Review_Text" }} }}
-**Clustering**: {{ "label": "K-Means Clustering", "typeLabel": "Clustering", "config": {{ "columns": ["Income", "Spend_Score"], "k": 3 }} }}
-**Forecast**: {{ "label": "Sales Forecast", "typeLabel": "Forecast", "config": {{ "dateColumn": "Order_Date", "periods": 30 }} }}    
+**Clustering**: {{ "label": "K-Means Clustering", "typeLabel": "Clustering", "config": {{ "columns": ["Income", "Spend_Score"], "k": 3, "scale": true }} }} (k may be "auto")
+**Forecast**: {{ "label": "Sales Forecast", "typeLabel": "Forecast", "config": {{ "dateColumn": "Order_Date", "valueColumn": "Sales", "periods": 30, "freq": "D", "groupColumn": "Region" }} }} (groupColumn optional; freq H/D/W/M/Q/Y)    
 **Word Count **:{{"label": "Word Count: Short Description", "typeLabel": "Word Count, "config": {{"column": "Short Description", "reportWidth": "half", "maxWords": "110", "title": "Word Cloud"}} }}
 **N-Grams**: {{"label": "N-Grams: Short Description", "typeLabel": "N-Grams", "config": {{"column": "Short Description"}} }}
 
 ##. DASHBOARD / VISUALIZATION & CONFIG SCHEMAS
 **Preview Data / Sample Data**: {{ "label": "Preview Data", "typeLabel": "Preview Data", "config": {{"n": "200", "mode": "random" ,"reportWidth": "half", "title": "Raw Tabled"}} }}
 **KPI Card**: {{ "label": "KPI: Total Revenue", "typeLabel": "KPI Card", "config": {{ "column": "Revenue", "operation": "sum", "label": "Total Revenue", "dashboardOrder": 1, "reportWidth": "third" }} }}
+  - KPI `operation`: sum, avg, min, max, count, distinct, median, p90, p95, p99. Add `"approximate": true` on very large data (distinct/percentiles from sketches, with error bounds).
 **Bar Chart**: {{ "label": "Sales by Region", "typeLabel": "Bar Chart", "config": {{ "column": "Region", "yAxis": "Sales", "title": "Sales by Region", "dashboardOrder": 2, "reportWidth": "half" }} }}
 **Line Chart**: {{ "label": "Growth Trend", "typeLabel": "Line Chart", "config": {{ "column": "Date", "yAxis": "Profit", "title": "Profit Over Time", "dashboardOrder": 3, "reportWidth": "full" }} }}
 **Pie Chart**: {{ "label": "Market Share", "typeLabel": "Pie/Donut Chart", "config": {{ "column": "Category", "yAxis": "Count", "title": "Category Dist.", "dashboardOrder": 4, "reportWidth": "half" }} }}
@@ -269,31 +267,13 @@ INSTRUCTIONS = {
 # MODEL MANAGER (HYBRID)
 # =========================================================================
 class ModelManager:
-    def __init__(self):
-        # 1. Setup Gemini
-        self.gemini_key = os.getenv("GOOGLE_API_KEY")
-        if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            self.gemini_model_name = "models/gemini-2.5-flash"
-        else:
-            print("⚠️ WARNING: GOOGLE_API_KEY not found.")
-
-        # 2. Setup OpenAI (Fallback)
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        self.openai_client = None
-        if self.openai_key and HAS_OPENAI:
-            try:
-                self.openai_client = OpenAI(api_key=self.openai_key)
-                self.openai_model_name = "gpt-4o" 
-            except Exception as e:
-                print(f"⚠️ OpenAI Init Failed: {e}")
-            
-    def get_gemini_model(self, agent_type):
-        instruction = INSTRUCTIONS.get(agent_type, "")
-        return genai.GenerativeModel(
-            model_name=self.gemini_model_name,
-            system_instruction=instruction
-        )
+    """Holds the active model provider (live, record, replay or mock; see model_providers)."""
+    def __init__(self, provider=None):
+        self.provider = provider or build_provider()
+        print(f"🧠 Model Provider: {self.provider.name}")
+
+    def set_provider(self, provider):
+        self.provider = provider
 
 # =========================================================================
 # MAIN AGENT
@@ -306,57 +286,21 @@ class MultiAgentWorkFlow:
         self.Domain = ""
         self.target_cols = []
 
-    def _call_llm(self, agent_type, prompt, retries=2):
+    def _call_llm(self, agent_type, prompt):
         """
-        Hybrid LLM Call: Tries Gemini first -> OpenAI Fallback -> Safe Empty Return
+        Provider Call: live = Gemini -> OpenAI Fallback, or record/replay/mock -> Safe Empty Return
         """
-        # 1. Try Gemini
-        for attempt in range(retries):
-            try:
-                model = self.manager.get_gemini_model(agent_type)
-                full_prompt = f"{prompt}\n\nIMPORTANT: Return VALID JSON ONLY. No Markdown."
-                
-                res = model.generate_content(full_prompt)
-                return self._parse_json(res.text)
-
-            except Exception as e:
-                error_msg = str(e).lower()
-                if "429" in error_msg or "quota" in error_msg:
-                    print(f"⚠️ Gemini Quota Exceeded. Switching to OpenAI...")
-                    break # Break to try OpenAI
-                
-                print(f"⚠️ Gemini Error (Attempt {attempt+1}): {e}")
-                time.sleep(1)
-
-        # 2. Try OpenAI Fallback
-        if self.manager.openai_client:
-            print(f"🔄 Activating OpenAI Fallback for {agent_type}...")
-            res = self._call_openai_fallback(agent_type, prompt)
-            if res: return res
-
-        # 3. Ultimate Failure (Return Empty to trigger Agent-Specific Fallbacks)
-        print(f"❌ All Models Failed for {agent_type}. Using Hardcoded Fallback.")
-        return {}
-
-    def _call_openai_fallback(self, agent_type, prompt):
+        system_text = INSTRUCTIONS.get(agent_type, "")
         try:
-            system_text = INSTRUCTIONS.get(agent_type, "You are a helpful AI.")
-            
-            response = self.manager.openai_client.chat.completions.create(
-                model=self.manager.openai_model_name,
-                messages=[
-                    {"role": "system", "content": system_text},
-                    {"role": "user", "content": f"{prompt}\n\nReturn JSON ONLY."}
-                ],
-                temperature=0.2,
-                response_format={ "type": "json_object" }
-            )
-            content = response.choices[0].message.content
-            return self._parse_json(content)
-
+            text = self.manager.provider.complete(agent_type, system_text, prompt)
+            print(f"🧮 Tokens [{agent_type}]: system≈{estimate_tokens(system_text)} prompt≈{estimate_tokens(prompt)} response≈{estimate_tokens(text)}")
+            if text: return self._parse_json(text)
         except Exception as e:
-            print(f"❌ OpenAI Connection Error: {e}")
-            return {}
+            print(f"⚠️ Provider Error ({self.manager.provider.name}): {e}")
+
+        # Ultimate Failure (Return Empty to trigger Agent-Specific Fallbacks)
+        print(f"❌ All Models Failed for {agent_type}. Using Hardcoded Fallback.")
+        return {}
 
     def _parse_json(self, text):
         try:
@@ -384,6 +328,10 @@ class MultiAgentWorkFlow:
         data_preview = context.get('dataPreview', [])
         current_nodes = context.get('currentNodes', [])
         latest_file = context.get('latestFile', None)
+        sheet = self._selected_sheet(latest_file, current_nodes)
+        if not columns and latest_file:
+            # No executed output on the client yet: use the cached header of the latest file
+            columns = list((get_file_schema(latest_file.get('path'), sheet) or {}).keys())
         
         selected_node = context.get('selectedNode', None)
         source_id = selected_node.get('id') if selected_node else None
@@ -393,8 +341,21 @@ class MultiAgentWorkFlow:
         if not source_id: source_id = "1" 
 
         has_context = "YES" if (columns and len(columns) > 0) else "NO"
-        
-        # 2. Manager Decision
+
+        # 2. Fast Path: common templates are built locally (no LLM / network needed)
+        # The data context profiles the whole file: only built when a filter template or a prompt needs it
+        context_args = (latest_file, columns, user_request, data_preview, sheet)
+        quick_flow = matcher.match(user_request, columns, file_info=latest_file, add_reader=not current_nodes,
+                                   known_values=lambda: known_values(build_data_context(*context_args)[2]))
+        if quick_flow:
+            validation = validator.validate(quick_flow, source_id, columns)
+            if validation["status"] in ("PASS", "REPAIRED"):
+                flow = self._apply_layout(validation["flow"], source_id)
+                flow["logs"] = [f"⚡ Fast path: {quick_flow['intent']} (hit ratio {matcher.hit_ratio():.0%})"]
+                return flow
+            print(f"⚠️ Fast path flow failed validation, using the agents: {validation['errors']}")
+
+        # 3. Manager Decision
         intent = self._manager_decide(user_request, has_context, columns, chat_history)
         
         # FAIL-SAFE: If Manager fails (empty dict), default to Chat
@@ -409,23 +370,10 @@ class MultiAgentWorkFlow:
             return {"nodes": [], "message": response_text}
         
         print(f"🤖 Manager Action: {action} -> Generating...")
-        
-        # 3. Data Context Prep
-        data_summary = "No Data"
-        self.target_cols = columns[:15] 
-
-        if columns and data_preview:
-            try:
-                # Only call column mapper if we have Gemini/OpenAI working
-                # We skip this if connection is flaky to save 1 call
-                unique_map = {}
-                cols_to_scan = columns[:10]
-                for col in cols_to_scan: 
-                    vals = [str(r.get(col)) for r in data_preview if r.get(col) is not None]
-                    unique_map[col] = list(set(vals))[:8]
-                data_summary = json.dumps(unique_map, default=str)
-            except Exception as e: print(f"⚠️ Data Prep Warning: {e}")
 
+        # Server-side data context from the cached profile of latestFile (token-budgeted)
+        data_summary, self.target_cols, _ = build_data_context(*context_args)
+        
         # 4. Planner
         request = f"{user_request}"
         plan = self._planner_agent(request, self.target_cols, data_summary, chat_history)
@@ -438,28 +386,44 @@ class MultiAgentWorkFlow:
         # 5. Executor & Validator Loop
         node_context = json.dumps([n.get('data', {}).get('typeLabel') for n in current_nodes]) if current_nodes else "None"
         
-        final_flow = self._run_executor_with_validation(plan, self.target_cols, data_summary, node_context, latest_file, source_id)
+        canvas_ids = [n.get('id') for n in current_nodes] if current_nodes else []
+        final_flow = self._run_executor_with_validation(plan, self.target_cols, data_summary, node_context, latest_file, source_id, columns, canvas_ids)
         
         # 6. Layout
         return self._apply_layout(final_flow, source_id)
 
-    def _run_executor_with_validation(self, plan, cols, data, current_nodes, file_info, source_id):
+    def _selected_sheet(self, latest_file, current_nodes):
+        """Sheet the canvas reads from the latest file (its Read Data node's selectedSheet), else the first."""
+        path = (latest_file or {}).get('path')
+        for n in current_nodes or []:
+            config = n.get('data', {}).get('config', {})
+            if n.get('data', {}).get('typeLabel') == 'Read Data' and (config.get('selectedFile') or {}).get('path') == path:
+                return config.get('selectedSheet', 0)
+        return 0
+
+    def _run_executor_with_validation(self, plan, cols, data, current_nodes, file_info, source_id, all_columns=None, canvas_ids=None):
         max_retries = 1 # Reduce retries to fail fast
+        feedback = None
         
         for attempt in range(max_retries + 1):
             print(f"⚙️ Executing Flow (Attempt {attempt+1})...")
             
             # 1. Execute
-            flow = self._executor_agent(plan, cols, data, current_nodes, file_info, source_id)
+            flow = self._executor_agent(plan, cols, data, current_nodes, file_info, source_id, feedback)
             
             # 2. Validate (Skip validation if flow is empty)
             if not flow or not flow.get("nodes"):
                 continue
 
-            # Optional: Validator Agent (Can skip to save tokens if connection is bad)
-            # validation = self._validator_agent(flow, source_id, cols)
-            # if validation.get("status") == "PASS": return flow
-            return flow # Assume success if we got nodes
+            # Local validator: checks + auto-repair in-process, no tokens spent
+            validation = validator.validate(flow, source_id, all_columns or cols, canvas_ids)
+            if validation["status"] in ("PASS", "REPAIRED"):
+                if validation["repairs"]: print(f"🛠️ Validator repaired {len(validation['repairs'])} issue(s)")
+                return validation["flow"]
+
+            # Repair failed -> only now go back to the LLM with the exact errors
+            print(f"⚠️ Validator FAIL: {validation['errors']}")
+            feedback = validation["errors"]
         
         # 3. Fallback (Safe Mode)
         print("🔥 All AI Models Failed. Activating Safe Fallback.")
@@ -477,15 +441,16 @@ class MultiAgentWorkFlow:
         prompt = f"REQ: {text}\nCOLS: {cols}\nDATA: {data}\nHIST: {hist_text}"
         return self._call_llm("planner", prompt)
 
-    def _executor_agent(self, plan, cols, data, current_nodes, file_info, source_id):
+    def _executor_agent(self, plan, cols, data, current_nodes, file_info, source_id, feedback=None):
         file_str = json.dumps(file_info) if file_info else "None"
+        fix_str = f"\n        VALIDATION_ERRORS (fix these): {json.dumps(feedback)}" if feedback else ""
         prompt = f"""
         PLAN: {json.dumps(plan)}
         FILE_INFO: {file_str}
         SOURCE_ID: "{source_id}"
         COLS: {cols}
         DATA: {data}
-        EXISTING_NODES: {current_nodes}
+        EXISTING_NODES: {current_nodes}{fix_str}
         GENERATE VALID JSON.
         """
         return self._call_llm("executor", prompt)
@@ -519,6 +484,7 @@ class MultiAgentWorkFlow:
         }
 
     def _apply_layout(self, flow, source_id):
+        # Wiring repairs (anchor edge, sequential chaining, orphans) now live in flow_validator
         nodes = flow.get("nodes", [])
         edges = flow.get("edges", [])
         start_x, start_y = 200, 100
@@ -539,19 +505,6 @@ class MultiAgentWorkFlow:
             y = start_y
             node["position"] = {"x": x, "y": y}
 
-        if len(cleaned_nodes) > 0:
-            has_anchor = any(e['source'] == source_id and e['target'] == cleaned_nodes[0]['id'] for e in edges)
-            if not has_anchor:
-                edges.insert(0, {"id": f"e_anchor_{uuid.uuid4().hex[:4]}", "source": source_id, "target": cleaned_nodes[0]['id']})
-
-            if len(edges) <= 1 and len(cleaned_nodes) > 1:
-                for i in range(len(cleaned_nodes) - 1):
-                    edges.append({
-                        "id": f"e_{uuid.uuid4().hex[:6]}",
-                        "source": cleaned_nodes[i]["id"],
-                        "target": cleaned_nodes[i+1]["id"]
-                    })
-
         return {"nodes": cleaned_nodes, "edges": edges}
 
 agent = MultiAgentWorkFlow()
\ No newline at end of file
@@ -0,0 +1,130 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# =========================================================================
+# AGGREGATION ENGINE (Group By / Pivot Table)
+# =========================================================================
+# 1. The keys are factorized once (sort=False, observed=True): one grouper
+#    is shared by every aggregation and key values are never sorted; only
+#    the small result is ordered. Rows with a null key are dropped, like
+#    groupby(dropna=True).
+# 2. All aggregations (incl. nunique, first/last and percentiles p50/p90/...)
+#    run as one named aggregation on that grouper.
+# 3. Above AGG_PARALLEL_ROWS rows the rows are hash-partitioned on the group
+#    code and the partitions are aggregated on a thread pool (the cython
+#    groupby kernels release the GIL). Partitions never share a group, so the
+#    results are simply concatenated: every aggregate stays exact.
+# Output matches the previous df.groupby(keys).agg(...) / pivot_table calls:
+# same column names, key order and dtypes.
+
+AGG_PARALLEL_ROWS = int(os.getenv("AGG_PARALLEL_ROWS", "1000000"))
+AGG_WORKERS = int(os.getenv("AGG_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+FUNC_ALIASES = {'avg': 'mean', 'average': 'mean', 'distinct': 'nunique', 'count_distinct': 'nunique',
+                'unique': 'nunique', 'len': 'size', 'total': 'sum'}
+SIMPLE_FUNCS = {'sum', 'mean', 'median', 'min', 'max', 'count', 'size', 'std', 'var', 'nunique', 'first', 'last', 'prod'}
+PERCENTILE_RE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+
+def normalize_func(func):
+    """'avg' -> 'mean', 'p90' stays 'p90'; raises ValueError for unknown functions."""
+    f = FUNC_ALIASES.get(str(func).strip().lower(), str(func).strip().lower())
+    if f == 'percentile': f = 'p50'
+    if f in SIMPLE_FUNCS or PERCENTILE_RE.match(f): return f
+    raise ValueError(f"Unsupported aggregation '{func}'")
+
+
+def agg_plan(aggs, keys=()):
+    """
+    [(output name, column, func)] with the naming the old agg_dict path produced; an aggregate of a group key is
+    named key_func so it never overwrites the key column.
+    """
+    per_col = {}
+    for a in aggs:
+        per_col.setdefault(a['column'], []).append(normalize_func(a['func']))
+    multi = any(len(funcs) > 1 for funcs in per_col.values()) # One list-valued entry made every name c_func
+    return [(f"{c}_{f}" if multi or c in keys else c, c, f) for c, funcs in per_col.items() for f in funcs]
+
+
+def _aggregate_block(grouped, plan):
+    """All aggregations of the plan in one named agg (+ percentiles); indexed by the group keys."""
+    named = {f"a{i}": (col, func) for i, (_, col, func) in enumerate(plan) if not PERCENTILE_RE.match(func)}
+    frame = grouped.agg(**named) if named else None
+    for i, (_, col, func) in enumerate(plan):
+        q = PERCENTILE_RE.match(func)
+        if not q: continue
+        values = grouped[col].quantile(float(q.group(1)) / 100)
+        if frame is None: frame = values.to_frame(f"a{i}")
+        else: frame[f"a{i}"] = values
+    return frame[[f"a{i}" for i in range(len(plan))]]
+
+
+def _aggregate_partitioned(grouped, df, plan):
+    """Hash partitions on the group code: disjoint groups, aggregated concurrently. Positional, group order."""
+    codes = grouped.ngroup() # float64 with NaN when some key is null
+    codes = (codes.fillna(-1) if codes.dtype.kind == 'f' else codes).to_numpy(dtype='int64')
+    valid = np.flatnonzero(codes >= 0)
+    part = codes[valid] % AGG_WORKERS
+    order = valid[np.argsort(part, kind='stable')]
+    bounds = np.cumsum(np.bincount(part, minlength=AGG_WORKERS))[:-1]
+    data = df[list(dict.fromkeys(col for _, col, _ in plan))]
+
+    def block(rows):
+        block_codes = codes[rows]
+        out = _aggregate_block(data.take(rows).groupby(block_codes, sort=False), plan)
+        return out.set_axis(pd.unique(block_codes))
+    with ThreadPoolExecutor(max_workers=AGG_WORKERS) as pool:
+        parts = list(pool.map(block, [rows for rows in np.split(order, bounds) if len(rows)]))
+    return pd.concat(parts).sort_index().reset_index(drop=True)
+
+
+def aggregate(df, keys, aggs=None, sort=True, parallel=True):
+    """
+    Group By: keys + one column per aggregation ({'column', 'func'}), or keys + Count when aggs is empty.
+    sort=True orders the result by the keys (the old groupby default); False keeps first-appearance order.
+    """
+    aggs = [a for a in aggs or [] if a.get('column') and a.get('func')]
+    grouped = df.groupby(keys, sort=False, observed=True, dropna=True)
+
+    if not aggs:
+        result = grouped.size().rename('Count').reset_index()
+    else:
+        plan = agg_plan(aggs, keys)
+        if parallel and len(df) >= AGG_PARALLEL_ROWS and AGG_WORKERS > 1:
+            values = _aggregate_partitioned(grouped, df, plan)
+            result = grouped.size().index.to_frame(index=False)
+        else:
+            frame = _aggregate_block(grouped, plan)
+            values = frame.reset_index(drop=True)
+            result = frame.index.to_frame(index=False)
+        for (name, _, _), col in zip(plan, values.columns): result[name] = values[col]
+
+    if sort and len(result):
+        try: result = result.sort_values(keys).reset_index(drop=True) # Keys are unique per row: any sort kind is exact
+        except TypeError: pass # Mixed-type keys cannot be ordered; keep first appearance
+    return result
+
+
+def pivot(df, index, columns, values, aggfunc='sum'):
+    """pivot_table(index, columns, values, aggfunc).reset_index() on top of aggregate()."""
+    func = normalize_func(aggfunc)
+    keys = [index] + ([columns] if columns else [])
+    agg_name = values if values not in keys else f"{values}_{func}"
+    long = aggregate(df, keys, [{'column': values, 'func': func}])
+    long = long.rename(columns={long.columns[-1]: agg_name})
+
+    # pivot_table casts back to the source int dtype when the aggregate is integral (gh-21133)
+    src, out = df[values].dtype, long[agg_name]
+    if pd.api.types.is_integer_dtype(src) and isinstance(src, np.dtype) and pd.api.types.is_float_dtype(out) \
+            and out.notna().all() and (out == np.round(out)).all():
+        long[agg_name] = out.astype(src)
+
+    long = long[long[agg_name].notna()]
+    if not columns:
+        return long.rename(columns={agg_name: values}).reset_index(drop=True)
+    table = long.set_index(keys)[agg_name].unstack(columns).sort_index(axis=1)
+    return table.dropna(how='all', axis=1).reset_index()
@@ -2,7 +2,9 @@ import os
 import shutil
 import math
 import json
-from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Form
+import time
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Form, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
@@ -10,7 +12,12 @@ import pandas as pd
 import numpy as np
 import database as db
 from MultiAgent import agent
-from engine import engine
+from intent_matcher import matcher
+from schema_inference import infer_flow_schema
+from engine import engine, WorkflowEngine
+from job_queue import JobQueue, FINAL_STATES
+from run_events import hub as run_events
+from artifact_store import store as artifacts, byte_range, CONTENT_TYPES
 
 
 
@@ -44,6 +51,10 @@ class FlowSaveRequest(BaseModel):
 class WorkflowRequest(BaseModel):
     nodes: List[Dict[str, Any]]
     edges: List[Dict[str, Any]]
+class JobRequest(WorkflowRequest):
+    user_id: Optional[int] = None
+    timeout: Optional[float] = None # Seconds; capped by JOB_TIMEOUT_S
+    mode: str = "exact" # "progressive": sampled preview first, then the exact result
 # Updated Context Model to be explicit
 class AIContext(BaseModel):
     columns: List[str] = []
@@ -68,6 +79,9 @@ def sanitize_for_json(obj):
     elif isinstance(obj, (np.float64, np.float32)):
         return None if np.isnan(obj) or np.isinf(obj) else float(obj)
     return obj
+jobs = JobQueue(WorkflowEngine, encode=sanitize_for_json) # Background runs, each on its own engine
+jobs.recover()
+
 def format_error_log(context: str, error: Exception):
     return f"❌ [{context}] Error: {str(error)}"
 # --- ROUTES ---
@@ -163,6 +177,116 @@ async def execute_workflow(workflow: WorkflowRequest):
 
 
 
+# --- BACKGROUND RUNS: submit, poll, fetch, cancel ---
+@app.post("/api/jobs")
+def submit_job(job: JobRequest):
+    run_id = jobs.submit(job.nodes, job.edges, job.user_id, job.timeout, job.mode)
+    return {"status": "queued", "run_id": run_id}
+
+@app.get("/api/jobs/user/{user_id}")
+def list_jobs(user_id: int):
+    return {"status": "success", "runs": db.get_user_runs(user_id)}
+
+@app.get("/api/jobs/{run_id}")
+def job_status(run_id: str):
+    run = jobs.status(run_id)
+    if not run: raise HTTPException(404, "Run not found (or its result expired)")
+    return run
+
+@app.get("/api/jobs/{run_id}/result")
+def job_result(run_id: str, response: Response):
+    run = jobs.result(run_id)
+    if not run: raise HTTPException(404, "Run not found (or its result expired)")
+    if run["status"] not in FINAL_STATES:
+        response.status_code = 202 # Not finished yet: poll again (a progressive run answers with its sampled preview)
+        return run["preview"] if run["preview"] is not None else {"status": run["status"], "run_id": run_id}
+    if run["result"] is not None: return run["result"]
+    return {"status": run["status"], "message": run["error"], "logs": [f"🛑 Run {run['status']}: {run['error']}"]}
+
+def _run_event_stream(run_id: str, after: int = 0):
+    """Async iterator over a run's events from seq `after`; just its run_finished event once the channel is gone."""
+    channel = run_events.get(run_id)
+    if channel: return channel.stream(after)
+    run = jobs.status(run_id)
+    if not run: return None
+    async def finished_only():
+        if run["status"] in FINAL_STATES:
+            yield {"event": "run_finished", "run_id": run_id, "status": run["status"], "error": run["error"],
+                   "done_nodes": run["done_nodes"], "total_nodes": run["total_nodes"], "seq": 0}
+    return finished_only()
+
+def _event_json(event):
+    return json.dumps(sanitize_for_json(event), default=str)
+
+@app.websocket("/api/jobs/{run_id}/ws")
+async def job_events_ws(websocket: WebSocket, run_id: str, after: int = 0):
+    stream = _run_event_stream(run_id, after)
+    if stream is None:
+        await websocket.close(code=4404, reason="Run not found")
+        return
+    await websocket.accept()
+    try:
+        async for event in stream:
+            if event is not None: await websocket.send_text(_event_json(event))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/api/jobs/{run_id}/events")
+async def job_events_sse(run_id: str, request: Request, after: int = 0):
+    last_id = request.headers.get("last-event-id") # EventSource resends it when reconnecting
+    stream = _run_event_stream(run_id, int(last_id) + 1 if last_id and last_id.isdigit() else after)
+    if stream is None: raise HTTPException(404, "Run not found (or its result expired)")
+    async def sse():
+        async for event in stream:
+            if event is None: yield ": keepalive\n\n"
+            else: yield f"id: {event['seq']}\nevent: {event['event']}\ndata: {_event_json(event)}\n\n"
+    return StreamingResponse(sse(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/jobs/{run_id}/cancel")
+def cancel_job(run_id: str):
+    if not jobs.cancel(run_id):
+        run = jobs.status(run_id)
+        if not run: raise HTTPException(404, "Run not found (or its result expired)")
+        return {"status": run["status"], "cancelled": False}
+    return {"status": "cancelling", "cancelled": True}
+
+@app.get("/api/artifacts/{name}")
+def get_artifact(name: str, request: Request):
+    # Content-addressed: the name is the SHA-256 of the bytes, so it is the ETag and never changes
+    path = artifacts.path(name)
+    if not path or not os.path.exists(path): raise HTTPException(status_code=404, detail="Artifact not found")
+    etag = f'"{name.split(".")[0]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable", "Accept-Ranges": "bytes"}
+    if etag in request.headers.get("if-none-match", ""): return Response(status_code=304, headers=headers)
+
+    size = os.path.getsize(path)
+    try:
+        span = byte_range(request.headers.get("range"), size) if request.headers.get("if-range", etag) == etag else None
+    except ValueError as e:
+        return Response(status_code=416, headers={**headers, "Content-Range": str(e)})
+    start, end = span or (0, size - 1)
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start + 1)
+    if span: headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=body, status_code=206 if span else 200, headers=headers, media_type=CONTENT_TYPES[name.rsplit(".", 1)[1]])
+
+
+@app.post("/api/schema")
+def infer_schema(workflow: WorkflowRequest):
+    # Static column/dtype propagation from cached file headers; nothing is executed
+    started = time.perf_counter()
+    try:
+        schemas = infer_flow_schema(workflow.nodes, workflow.edges)
+        return {
+            "status": "success",
+            "schemas": {nid: ({"columns": list(s.keys()), "dtypes": s} if s is not None else None) for nid, s in schemas.items()},
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+    except Exception as e:
+        return {"status": "error", "logs": [format_error_log("Schema", e)]}
+
 @app.post("/api/ai-chat")
 async def ai_chat(req: AIChatRequest):
     print("🤖 AI Agent Activated")
@@ -246,6 +370,10 @@ async def ai_chat(req: AIChatRequest):
     # except Exception as e:
     #     print(f"Server AI Error: {str(e)}")
     #     return {"type": "text", "message": f"AI System Error: {str(e)}"}
+@app.get("/api/ai-chat/stats")
+def ai_chat_stats():
+    return {"status": "success", "fast_path": matcher.stats()}
+
 @app.get("/api/chat/history/{user_id}/{flow_id}")
 def get_history(user_id: int, flow_id: int):
     try:
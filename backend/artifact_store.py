@@ -0,0 +1,88 @@
+import os
+import re
+import hashlib
+import tempfile
+
+from data_paths import data_path
+
+# =========================================================================
+# ARTIFACT STORE (rendered images served by /api/artifacts)
+# =========================================================================
+# Rendered outputs (Word Cloud PNGs, ...) are written once under the
+# SHA-256 of their bytes and referenced by URL instead of being inlined as
+# base64 in the execute response. The same bytes always map to the same
+# name, so the endpoint can hand out a strong ETag and let browsers cache
+# the file forever. Renderers also record render key -> artifact, where
+# the render key fingerprints everything the image depends on (input
+# frequencies, size, colors); a repeated key skips rendering entirely.
+
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", data_path("artifacts"))
+ARTIFACT_URL = "/api/artifacts"
+ARTIFACT_NAME = re.compile(r"^[0-9a-f]{64}\.(png|svg|json)$")
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "json": "application/json"}
+
+
+def render_key(*parts):
+    """Fingerprint of everything a rendering depends on."""
+    h = hashlib.sha256()
+    for p in parts: h.update(repr(p).encode("utf-8", "surrogatepass") + b"\x00")
+    return h.hexdigest()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f: f.write(data)
+    os.replace(tmp, path) # Readers never see a partial file
+
+
+class ArtifactStore:
+    """Content-addressed files: <dir>/<2 hex>/<sha256>.<ext>, plus render key -> name links."""
+
+    def __init__(self, root=ARTIFACT_DIR):
+        self.root = root
+
+    def path(self, name):
+        """Path of an artifact, or None for a name that is not a well-formed artifact name."""
+        if not ARTIFACT_NAME.match(name or ""): return None
+        return os.path.join(self.root, name[:2], name)
+
+    def put(self, data, ext="png"):
+        name = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        path = self.path(name)
+        if not os.path.exists(path): _write_atomic(path, data)
+        return name
+
+    def lookup(self, key):
+        """Artifact name recorded for a render key, if its file still exists."""
+        try:
+            with open(os.path.join(self.root, "keys", key), encoding="utf-8") as f: name = f.read().strip()
+        except OSError:
+            return None
+        path = self.path(name)
+        return name if path and os.path.exists(path) else None
+
+    def remember(self, key, name):
+        _write_atomic(os.path.join(self.root, "keys", key), name.encode("utf-8"))
+
+    def url(self, name):
+        return f"{ARTIFACT_URL}/{name}"
+
+
+def byte_range(header, size):
+    """
+    (start, end) inclusive for a single 'bytes=' Range header, None to send the whole file
+    (no header, or several ranges), or ValueError when it cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header: return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first == "": start, end = max(0, size - int(last)), size - 1 # Suffix: the last N bytes
+        else: start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None # Malformed: ignored, as RFC 9110 allows
+    if start >= size or start > end: raise ValueError(f"bytes */{size}")
+    return start, end
+
+
+store = ArtifactStore()
@@ -0,0 +1,71 @@
+"""
+Offline benchmark for MultiAgentWorkFlow.generate_flow_from_prompt.
+
+Runs the agent pipeline against the replay/mock model provider so throughput,
+concurrency and cache effects can be measured without keys or network.
+
+    python backend/benchmarks/bench_agents.py --requests 200 --concurrency 8 \
+        --provider mock --latency "lognormal:-1.2,0.4"
+    python backend/benchmarks/bench_agents.py --provider replay --recording agent_recordings.jsonl
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_providers import ReplayProvider, LatencyModel
+from intent_matcher import matcher
+from MultiAgent import MultiAgentWorkFlow
+
+COLUMNS = ["Ticket ID", "Status", "Priority", "City", "Agent", "TAT", "Created Date", "Short Description"]
+PROMPTS = [
+    "value counts of Status",
+    "top 10 Agent by TAT",
+    "trend of Created Date by month",
+    "filter City == New York",
+    "Generate a full report for this dataset",
+    "Which agents close tickets fastest in each city?",
+]
+
+
+def run(args):
+    provider = ReplayProvider(args.recording, LatencyModel(args.latency, args.seed), mock=(args.provider == "mock"))
+    workflow = MultiAgentWorkFlow()
+    workflow.manager.set_provider(provider)
+
+    context = {
+        "columns": COLUMNS,
+        "latestFile": {"name": "tickets.csv", "path": "temp_uploads/tickets.csv"},
+    }
+
+    def one(i):
+        started = time.perf_counter()
+        workflow.generate_flow_from_prompt(PROMPTS[i % len(PROMPTS)], dict(context), [])
+        return time.perf_counter() - started
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = sorted(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - wall
+
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f"\n📈 {args.requests} requests | concurrency={args.concurrency} | provider={provider.name} | latency={args.latency}")
+    print(f"   throughput : {args.requests / wall:.1f} req/s (wall {wall:.2f}s)")
+    print(f"   latency ms : p50={p(0.5):.1f} p95={p(0.95):.1f} max={latencies[-1] * 1000:.1f} mean={statistics.mean(latencies) * 1000:.1f}")
+    print(f"   llm calls  : {provider.calls} ({provider.calls / args.requests:.2f}/request) replay={provider.stats()}")
+    print(f"   fast path  : {matcher.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=120)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--provider", choices=["mock", "replay"], default="mock")
+    parser.add_argument("--recording", default=os.getenv("MODEL_RECORD_PATH", "agent_recordings.jsonl"))
+    parser.add_argument("--latency", default="fixed:0.05")
+    parser.add_argument("--seed", type=int, default=7)
+    run(parser.parse_args())
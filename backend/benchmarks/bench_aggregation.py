@@ -0,0 +1,89 @@
+"""
+Aggregation engine vs the original Group By (agg_dict + groupby(sort=True)).
+
+    python backend/benchmarks/bench_aggregation.py --rows 3000000 --groups 1000000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregation_engine
+from aggregation_engine import aggregate
+
+
+def legacy_group(df, cols, aggs):
+    """The pre-engine engine._apply_group."""
+    if not aggs: return df.groupby(cols).size().reset_index(name='Count')
+    agg_dict = {}
+    for agg in aggs:
+        c, f = agg['column'], agg['func']
+        if c in agg_dict:
+            if isinstance(agg_dict[c], list): agg_dict[c].append(f)
+            else: agg_dict[c] = [agg_dict[c], f]
+        else: agg_dict[c] = f
+    grouped = df.groupby(cols).agg(agg_dict).reset_index()
+    if isinstance(grouped.columns, pd.MultiIndex):
+        grouped.columns = ['_'.join(col).strip() if col[1] else col[0] for col in grouped.columns.values]
+    return grouped
+
+
+def make_frame(rows, groups, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Ticket Group': rng.integers(0, groups, rows),
+        'Region': rng.choice(['EU', 'US', 'APAC', 'LATAM'], rows),
+        'Priority': rng.choice(['P1', 'P2', 'P3', 'P4'], rows),
+        'TAT': rng.integers(0, 500, rows),
+        'Cost': rng.normal(100, 25, rows).round(2),
+    })
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(args):
+    df = make_frame(args.rows, args.groups)
+    basic = [{'column': 'TAT', 'func': 'sum'}, {'column': 'TAT', 'func': 'mean'}, {'column': 'Cost', 'func': 'max'}]
+    heavy = [{'column': 'Cost', 'func': 'median'}, {'column': 'Cost', 'func': 'std'}, {'column': 'TAT', 'func': 'nunique'}]
+    suites = {
+        "low cardinality, sum/mean/max": (['Region', 'Priority'], basic),
+        "high cardinality, sum/mean/max": (['Ticket Group'], basic),
+        "high cardinality, median/std/nunique": (['Ticket Group'], heavy),
+    }
+
+    print(f"\n🧪 {args.rows:,} rows | {args.groups:,} ticket groups | {aggregation_engine.AGG_WORKERS} workers")
+    for name, (keys, aggs) in suites.items():
+        t_old, old = timed(lambda: legacy_group(df, keys, aggs), args.repeat)
+        aggregation_engine.AGG_PARALLEL_ROWS = 10 ** 12
+        t_new, new = timed(lambda: aggregate(df, keys, aggs), args.repeat)
+        t_unsorted, _ = timed(lambda: aggregate(df, keys, aggs, sort=False), args.repeat)
+        aggregation_engine.AGG_PARALLEL_ROWS = 0
+        t_par, par = timed(lambda: aggregate(df, keys, aggs), args.repeat)
+        same = old.equals(new) and old.equals(par)
+        print(f"   {name:<38} legacy {t_old * 1000:8.1f} ms | engine {t_new * 1000:8.1f} ms | "
+              f"sort=False {t_unsorted * 1000:8.1f} ms | partitioned {t_par * 1000:8.1f} ms | same: {same}")
+
+    pivot_args = ('Region', 'Priority', 'TAT', 'mean')
+    t_old, old = timed(lambda: df.pivot_table(index='Region', columns='Priority', values='TAT', aggfunc='mean').reset_index(), args.repeat)
+    t_new, new = timed(lambda: aggregation_engine.pivot(df, *pivot_args), args.repeat)
+    print(f"   {'Pivot Table (Region x Priority)':<38} legacy {t_old * 1000:8.1f} ms | engine {t_new * 1000:8.1f} ms | same: {np.allclose(old.iloc[:, 1:].to_numpy(), new.iloc[:, 1:].to_numpy())}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--groups", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args())
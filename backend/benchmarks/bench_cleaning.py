@@ -0,0 +1,126 @@
+"""
+Cleaning kernels (Fill N/A, Replace Value, Change Data Type) vs the original per-column loops, on wide frames.
+
+    python backend/benchmarks/bench_cleaning.py --rows 200000 --cols 200
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cleaning_engine import fill_plan, fill_na, replace_rules, replace_values, cast_plan, change_types
+from typed_columns import TypedColumnCache
+
+
+def legacy_fill(df, method, value=None):
+    """The pre-kernel Fill N/A loop over every column (ffill/bfill via the ffill()/bfill() methods)."""
+    out = df.copy()
+    for col in df.columns:
+        if method == 'value':
+            if isinstance(out[col].dtype, pd.CategoricalDtype) and value not in out[col].cat.categories:
+                out[col] = out[col].cat.add_categories([value])
+            out[col] = out[col].fillna(value)
+        elif method in ('ffill', 'bfill'):
+            out[col] = getattr(out[col], method)()
+        elif pd.api.types.is_numeric_dtype(out[col]):
+            if method == 'mode':
+                impute = out[col].mode().iloc[0] if not out[col].mode().empty else None
+            else:
+                impute = getattr(out[col], method)()
+            if impute is not None: out[col] = out[col].fillna(impute)
+    return out
+
+
+def legacy_replace(df, rules):
+    """One pre-kernel Replace Value node per rule."""
+    for col, old, new in rules:
+        df = df.copy()
+        if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+            try:
+                old = float(old)
+                new = float(new)
+                df[col] = df[col].replace(old, new)
+            except: pass
+        if df[col].dtype == 'object' or df[col].dtype == 'string':
+            old, new = str(old), str(new)
+            df[col] = df[col].replace(old, new)
+        df[col] = df[col].replace(old, new)
+    return df
+
+
+def legacy_cast(df, plan):
+    """One pre-kernel Change Data Type node per column."""
+    typed = TypedColumnCache()
+    for col, dtype in plan.items():
+        df = df.copy()
+        if dtype == 'int': df[col] = typed.numeric(df[col]).fillna(0).astype(int)
+        elif dtype == 'float': df[col] = typed.numeric(df[col])
+        elif dtype == 'str': df[col] = df[col].astype(str)
+    return df
+
+
+def make_frame(rows, cols, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(cols):
+        kind = i % 4
+        if kind == 0: values = rng.normal(50, 10, rows).round(2)
+        elif kind == 1: values = rng.integers(0, 5, rows).astype(float)
+        elif kind == 2: values = rng.choice(['Open', 'Closed', 'Pending'], rows).astype(object)
+        else: values = rng.integers(0, 1000, rows).astype(str).astype(object)
+        mask = rng.random(rows) < 0.1
+        if kind < 2: values[mask] = np.nan
+        else: values[mask] = None
+        data[f"c{i:03d}_{['num', 'level', 'status', 'code'][kind]}"] = values
+    return pd.DataFrame(data)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def report(name, cells, t_old, t_new, same):
+    print(f"   {name:<34} legacy {t_old * 1000:8.1f} ms | kernel {t_new * 1000:8.1f} ms | "
+          f"{cells / t_new / 1e6:7.1f} M cells/s | same: {same}")
+
+
+def run(args):
+    df = make_frame(args.rows, args.cols)
+    cells = df.size
+    num_cols = [c for c in df.columns if c.endswith(('_num', '_level'))]
+    print(f"\n🧪 {args.rows:,} rows x {args.cols} columns ({cells / 1e6:.1f} M cells)")
+
+    for method, value in (('value', '0'), ('mean', None), ('mode', None), ('ffill', None)):
+        t_old, old = timed(lambda: legacy_fill(df, method, value), args.repeat)
+        t_new, (new, _) = timed(lambda: fill_na(df, fill_plan({'method': method, 'value': value}, df.columns)), args.repeat)
+        report(f"Fill N/A ({method}, all columns)", cells, t_old, t_new, old.equals(new))
+
+    config = {'replacements': [{'column': c, 'oldValue': old, 'newValue': new}
+                               for c in df.columns for old, new in ([('3', '30')] if c in num_cols else [('Open', 'Opened')])]}
+    rules = replace_rules(config)
+    t_old, old = timed(lambda: legacy_replace(df, rules), args.repeat)
+    t_new, (new, _) = timed(lambda: replace_values(df, rules), args.repeat)
+    report(f"Replace Value ({len(rules)} rules)", cells, t_old, t_new, old.equals(new))
+
+    plan = cast_plan({'casts': [{'column': c, 'dtype': 'str' if c in num_cols else 'float'} for c in df.columns]})
+    t_old, old = timed(lambda: legacy_cast(df, plan), args.repeat)
+    t_new, (new, _, _) = timed(lambda: change_types(df, plan, TypedColumnCache()), args.repeat)
+    report(f"Change Data Type ({len(plan)} columns)", cells, t_old, t_new, old.equals(new))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cols", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args())
@@ -0,0 +1,101 @@
+"""
+Compiled filter engine vs the original per-condition implementation.
+
+    python backend/benchmarks/bench_filters.py --rows 2000000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import filter_engine
+from filter_engine import compile_conditions, compile_date_ranges
+
+
+def legacy_multi_filter(df, conditions):
+    """The pre-compiler engine._apply_multi_filter: one slice + one to_numeric per condition."""
+    for cond in conditions:
+        col, op, val = cond.get('column'), cond.get('operator'), cond.get('value')
+        if not col: continue
+        if op == 'contains': df = df[df[col].astype(str).str.contains(str(val), na=False)]
+        else:
+            try: num_val = float(val)
+            except: num_val = val
+            if op == '==': df = df[df[col] == num_val]
+            elif op == '!=': df = df[df[col] != num_val]
+            elif op == '>': df = df[pd.to_numeric(df[col], errors='coerce') > num_val]
+            elif op == '<': df = df[pd.to_numeric(df[col], errors='coerce') < num_val]
+    return df
+
+
+def legacy_date_filter(df, date_ranges):
+    mask = pd.Series(True, index=df.index)
+    for r in date_ranges:
+        dates = pd.to_datetime(df[r['column']])
+        mask = mask & (dates >= r['startDate']) & (dates <= r['endDate'])
+    return df[mask]
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'City': rng.choice(['New York', 'Boston', 'Chicago', 'Austin'], rows),
+        'Status': rng.choice(['Open', 'Closed', 'Pending'], rows),
+        'TAT': rng.gamma(2.0, 3.0, rows).round(2),
+        'Cost': rng.normal(100, 25, rows).round(2).astype(str), # numbers stored as text, like CSV exports
+        'Created': pd.date_range('2023-01-01', periods=rows, freq='min').strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(args):
+    df = make_frame(args.rows)
+    suites = {
+        "mixed (==, >, <, contains)": [
+            {'column': 'City', 'operator': '==', 'value': 'Boston'},
+            {'column': 'TAT', 'operator': '>', 'value': '2'},
+            {'column': 'TAT', 'operator': '<', 'value': '12'},
+            {'column': 'Status', 'operator': 'contains', 'value': 'en'},
+        ],
+        "text-numeric column (> and < on Cost)": [
+            {'column': 'Cost', 'operator': '>', 'value': '80'},
+            {'column': 'Cost', 'operator': '<', 'value': '120'},
+        ],
+        "numeric only (numexpr path)": [
+            {'column': 'TAT', 'operator': '>', 'value': '1'},
+            {'column': 'TAT', 'operator': '<', 'value': '20'},
+        ],
+    }
+
+    print(f"\n🧪 {args.rows:,} rows | numexpr={'yes' if filter_engine.HAS_NUMEXPR else 'no'}")
+    for name, conds in suites.items():
+        t_old, old = timed(lambda: legacy_multi_filter(df, conds), args.repeat)
+        t_new, new = timed(lambda: compile_conditions(conds).apply(df), args.repeat)
+        same = old.index.equals(new.index)
+        print(f"   {name:<40} legacy {t_old * 1000:8.1f} ms | compiled {t_new * 1000:8.1f} ms | x{t_old / t_new:5.1f} | same rows: {same}")
+
+    ranges = [{'column': 'Created', 'startDate': '2023-02-01', 'endDate': '2023-06-30'},
+              {'column': 'Created', 'startDate': '2023-03-01', 'endDate': '2023-12-31'}]
+    t_old, old = timed(lambda: legacy_date_filter(df, ranges), args.repeat)
+    t_new, new = timed(lambda: compile_date_ranges(ranges).apply(df), args.repeat)
+    print(f"   {'Filter Date (2 ranges, same column)':<40} legacy {t_old * 1000:8.1f} ms | compiled {t_new * 1000:8.1f} ms | x{t_old / t_new:5.1f} | same rows: {old.index.equals(new.index)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    run(parser.parse_args())
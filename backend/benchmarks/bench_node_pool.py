@@ -0,0 +1,101 @@
+"""
+Process-pool execution of CPU-heavy nodes: a Read Data node fanning out to N heavy spokes
+(N-Grams, Clustering, Group By) run in-process vs on 2, 4, ... worker processes, plus the cost of
+handing a frame to a worker (pickle vs shared-memory Arrow).
+
+    python backend/benchmarks/bench_node_pool.py --rows 300000 --spokes 8 --max-workers 8
+"""
+import os
+import sys
+import time
+import pickle
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import node_pool
+from engine import WorkflowEngine
+from node_pool import write_frame, read_frame
+
+
+def make_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(2000)])
+    picks = rng.choice(words, (rows, 8))
+    return pd.DataFrame({'a': rng.random(rows), 'b': rng.normal(size=rows), 'g': rng.choice(list('abcdefgh'), rows),
+                         't': [" ".join(x) for x in picks]})
+
+
+def make_flow(path, spokes):
+    kinds = [('N-Grams', {'column': 't', 'n': 2}),
+             ('Clustering', {'columns': ['a', 'b'], 'k': 6}),
+             ('Group By', {'groupBy': ['g', 't'], 'aggregations': [{'column': 'a', 'func': 'mean'}]})]
+    nodes = [{'id': 'src', 'data': {'typeLabel': 'Read Data', 'config': {'selectedFile': {'path': path}}}}]
+    edges = []
+    for i in range(spokes):
+        kind, config = kinds[i % len(kinds)]
+        nodes.append({'id': f's{i}', 'data': {'typeLabel': kind, 'config': config}})
+        edges.append({'source': 'src', 'target': f's{i}'})
+    return nodes, edges
+
+
+def use_workers(n):
+    """Point node_pool at a fresh pool of n workers (1 = run every node in-process)."""
+    if node_pool._pool is not None: node_pool._pool.shutdown(wait=True)
+    node_pool._pool = None
+    node_pool.NODE_WORKERS = n
+    node_pool.NODE_OFFLOAD_MIN_ROWS = 0
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(args):
+    df = make_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.csv")
+        df.to_csv(path, index=False)
+        nodes, edges = make_flow(path, args.spokes)
+        print(f"\n🧪 {args.rows:,} rows, Read Data -> {args.spokes} heavy spokes, {os.cpu_count()} CPUs")
+        base = None
+        workers = 1
+        while workers <= args.max_workers:
+            use_workers(workers)
+            if workers > 1: asyncio.run(WorkflowEngine().execute_flow(nodes[:2], edges[:1])) # Start the pool outside the timing
+            t, result = timed(lambda: asyncio.run(WorkflowEngine().execute_flow(nodes, edges)), args.repeat)
+            base = base or t
+            errors = sum(1 for line in result['logs'] if line.startswith('❌'))
+            print(f"   {'in-process' if workers == 1 else f'{workers} workers':>12}  {t * 1000:9.1f} ms | speed-up {base / t:4.2f}x"
+                  f"{f' | {errors} errors' if errors else ''}")
+            workers *= 2
+        use_workers(1)
+
+    print(f"\n🧪 Handing a {df.memory_usage(deep=True).sum() / 1e6:,.0f} MB frame to a worker")
+    t_dump, blob = timed(lambda: pickle.dumps(df, protocol=5), args.repeat)
+    t_load, _ = timed(lambda: pickle.loads(blob), args.repeat)
+    print(f"   pickle               write {t_dump * 1000:8.1f} ms | read {t_load * 1000:8.1f} ms (a private copy per worker)")
+    t_write, arrow_path = timed(lambda: write_frame(df, node_pool.NODE_SHM_DIR), 1)
+    t_read, back = timed(lambda: read_frame(arrow_path), args.repeat)
+    os.unlink(arrow_path)
+    print(f"   shared-memory Arrow  write {t_write * 1000:8.1f} ms | read {t_read * 1000:8.1f} ms (mapped, shared by every worker) "
+          f"| same: {back.equals(df)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--spokes", type=int, default=6)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=1)
+    run(parser.parse_args())
@@ -0,0 +1,62 @@
+"""
+Approximate KPI Card / Value Counts: exact pandas vs the mergeable sketches (HyperLogLog distinct count,
+t-digest percentiles, Misra-Gries top values) on a high-cardinality column, with the error each sketch reports
+and the one it actually made.
+
+    python backend/benchmarks/bench_sketches.py --rows 5000000 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sketch_engine
+from sketch_engine import approx_distinct, approx_quantile, approx_value_counts
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    keys = pd.Series(rng.zipf(1.2, args.rows) % (args.rows // 2)) # Skewed, about rows / 3 distinct values
+    values = pd.Series(rng.lognormal(size=args.rows))
+    print(f"\n🧪 {args.rows:,} rows, chunks of {sketch_engine.SKETCH_CHUNK_ROWS:,} on {sketch_engine.SKETCH_WORKERS} threads")
+
+    t_exact, exact = timed(lambda: keys.nunique(), args.repeat)
+    t_approx, (est, info) = timed(lambda: approx_distinct(keys), args.repeat)
+    print(f"   distinct   exact {t_exact * 1000:8.1f} ms | sketch {t_approx * 1000:8.1f} ms | {est:,} vs {exact:,} "
+          f"(error {est / exact - 1:+.2%}, bound ±{info['rel_error_95']:.2%})")
+
+    for q in (0.5, 0.99):
+        t_exact, exact = timed(lambda: values.quantile(q), args.repeat)
+        t_approx, (est, info) = timed(lambda: approx_quantile(values, q), args.repeat)
+        print(f"   p{q * 100:<5g}     exact {t_exact * 1000:8.1f} ms | sketch {t_approx * 1000:8.1f} ms | {est:.4f} vs {exact:.4f} "
+              f"(bound {info['low']:.4f} .. {info['high']:.4f}: {'ok' if info['low'] <= exact <= info['high'] else 'MISSED'})")
+
+    t_exact, exact = timed(lambda: keys.value_counts(), args.repeat)
+    t_approx, (top, info) = timed(lambda: approx_value_counts(keys, args.top), args.repeat)
+    worst = int((exact.reindex(top.index) - top).max()) if len(top) else 0
+    print(f"   top {args.top:<6} exact {t_exact * 1000:8.1f} ms | sketch {t_approx * 1000:8.1f} ms | "
+          f"same values: {set(top.index) == set(exact.index[:args.top])} | worst undercount {worst:,} (bound {info['max_error']:,})")
+    print(f"   memory     exact value counts {exact.memory_usage(deep=True) / 1e6:,.1f} MB | "
+          f"sketch {sketch_engine.SKETCH_COUNTERS:,} counters, {2 ** sketch_engine.SKETCH_HLL_BITS:,} registers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=1)
+    run(parser.parse_args())
@@ -0,0 +1,68 @@
+"""
+Text engine (chunked top-k n-grams, byte-level word counts) vs the original CountVectorizer / str.split nodes.
+
+    python backend/benchmarks/bench_text.py --rows 500000 --vocab 50000
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_engine import top_terms, word_counts
+
+
+def legacy_ngrams(s, n):
+    """The pre-engine N-Grams node."""
+    vec = CountVectorizer(ngram_range=(n, n), stop_words='english', max_features=50)
+    sum_words = vec.fit_transform(s.dropna().astype(str)).sum(axis=0)
+    return sorted([(w, sum_words[0, i]) for w, i in vec.vocabulary_.items()], key=lambda x: x[1], reverse=True)
+
+
+def make_texts(rows, vocab, repeat_share, seed=0):
+    """Zipf-distributed words; repeat_share of the rows reuse earlier texts (templated tickets)."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(vocab)])
+    p = 1 / np.arange(1, vocab + 1) ** 1.1
+    lengths = rng.integers(3, 20, rows)
+    picks = rng.choice(words, lengths.sum(), p=p / p.sum())
+    texts = np.array([" ".join(x) for x in np.split(picks, np.cumsum(lengths)[:-1])], dtype=object)
+    reuse = rng.random(rows) < repeat_share
+    texts[reuse] = texts[rng.integers(0, max(1, rows // 100), reuse.sum())]
+    return pd.Series(texts)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, out
+
+
+def run(args):
+    for share in (0.0, 0.8):
+        s = make_texts(args.rows, args.vocab, share)
+        print(f"\n🧪 {args.rows:,} texts, {s.nunique():,} distinct, vocabulary {args.vocab:,}")
+        for n in (1, 2):
+            t_old, old = timed(lambda: legacy_ngrams(s, n), args.repeat)
+            t_new, (new, info) = timed(lambda: top_terms(s, n, 50), args.repeat)
+            print(f"   {n}-grams top 50        legacy {t_old * 1000:8.1f} ms | engine {t_new * 1000:8.1f} ms "
+                  f"({info['chunks']} chunks{', refined' if 'refined' in info else ''}) | same counts: {dict(old) == dict(new)}")
+        t_old, old = timed(lambda: s.astype(str).apply(lambda x: len(x.split())).to_numpy(), args.repeat)
+        t_new, new = timed(lambda: word_counts(s), args.repeat)
+        print(f"   word counts           legacy {t_old * 1000:8.1f} ms | engine {t_new * 1000:8.1f} ms | same: {(old == new).all()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--vocab", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    run(parser.parse_args())
@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# =========================================================================
+# CHART REDUCERS (Line / Area / Bar / Pie / Histogram / Scatter / Heatmap)
+# =========================================================================
+# A chart node's output frame keeps every row; what the browser receives
+# is a reduced frame computed from all of it, never the first N rows:
+#   Line / Area   sorted by X, then LTTB (shape-preserving) or min-max
+#                 (keeps every spike) down to CHART_MAX_POINTS points
+#   Bar / Pie     exact top-N by value, the remainder summed into "Other"
+#   Histogram     numpy histogram over the full column (CHART_MAX_BINS)
+#   Scatter       the points themselves up to CHART_MAX_POINTS, above that
+#                 a histogram2d grid of counts (CHART_GRID x CHART_GRID)
+#   Heatmap       counts over X x Y: numeric axes binned, categorical
+#                 axes top-N + "Other"
+# Each reducer returns (frame, meta); meta says how the data was reduced.
+
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "1000"))
+CHART_MAX_BINS = int(os.getenv("CHART_MAX_BINS", "50"))
+CHART_TOP_N = int(os.getenv("CHART_TOP_N", "20"))
+CHART_GRID = int(os.getenv("CHART_GRID", "64"))
+OTHER = "Other"
+
+
+def _as_float(values):
+    """Numeric view for geometry: datetimes as int64 ns, everything else as float."""
+    if pd.api.types.is_datetime64_any_dtype(values): return values.astype('int64').to_numpy(dtype='float64')
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64')
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of (x, y)."""
+    n = len(x)
+    if n <= n_out or n_out < 3: return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64) # n_out - 2 buckets between the fixed end points
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1], a = 0, n - 1, 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean() # Average of the next bucket
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, n_out):
+    """Indices of the end points and the min and max of (n_out - 2) // 2 equal buckets (in order): every extreme survives."""
+    n = len(y)
+    if n <= n_out or n_out < 4: return np.arange(n)
+    buckets = (n_out - 2) // 2
+    bounds = np.linspace(0, n, buckets + 1).astype(np.int64)
+    lo = np.minimum.reduceat(y, bounds[:-1])
+    hi = np.maximum.reduceat(y, bounds[:-1])
+    owner = np.repeat(np.arange(buckets), np.diff(bounds))
+    first_min = np.flatnonzero(y == lo[owner])
+    first_max = np.flatnonzero(y == hi[owner])
+    pick_min = first_min[np.unique(owner[first_min], return_index=True)[1]]
+    pick_max = first_max[np.unique(owner[first_max], return_index=True)[1]]
+    return np.unique(np.concatenate([[0, n - 1], pick_min, pick_max])) # End points keep the X range
+
+
+def reduce_line(df, x_col, y_col, method='lttb', max_points=CHART_MAX_POINTS):
+    """Line / Area data sorted by X and downsampled; X may be numeric, datetime or labels (kept in order)."""
+    frame = df[[x_col, y_col]].dropna()
+    sortable = pd.api.types.is_numeric_dtype(frame[x_col]) or pd.api.types.is_datetime64_any_dtype(frame[x_col])
+    if sortable: frame = frame.sort_values(x_col, kind='stable')
+    y = _as_float(frame[y_col])
+    x = _as_float(frame[x_col]) if sortable else np.arange(len(frame), dtype='float64')
+    idx = minmax(y, max_points) if method == 'minmax' else lttb(x, y, max_points)
+    return frame.iloc[idx].reset_index(drop=True), {"reducer": method if len(idx) < len(frame) else "none",
+                                                    "points": int(len(idx)), "source_rows": int(len(frame))}
+
+
+def top_n(df, x_col, value_col, n=CHART_TOP_N):
+    """The n largest values of an aggregated frame (exact) plus one "Other" row holding the rest."""
+    frame = df[[x_col, value_col]].dropna(subset=[value_col])
+    meta = {"reducer": "none", "points": int(len(frame)), "source_rows": int(len(frame))}
+    if len(frame) <= n: return frame.reset_index(drop=True), meta
+    order = np.argsort(-frame[value_col].to_numpy(dtype='float64'), kind='stable')
+    head, rest = frame.iloc[order[:n]], frame.iloc[order[n:]]
+    if pd.api.types.is_numeric_dtype(frame[x_col]) or pd.api.types.is_datetime64_any_dtype(frame[x_col]):
+        head = head.sort_values(x_col, kind='stable') # Ordered axes stay in axis order
+    other = pd.DataFrame({x_col: [OTHER], value_col: [rest[value_col].sum()]})
+    out = pd.concat([head.astype({x_col: object}), other], ignore_index=True)
+    return out, {**meta, "reducer": "top_n", "points": int(len(out)), "other_rows": int(len(rest))}
+
+
+def _bin_labels(edges):
+    return [f"[{lo:.4g}, {hi:.4g}{']' if i == len(edges) - 2 else ')'}" for i, (lo, hi) in enumerate(zip(edges[:-1], edges[1:]))]
+
+
+def histogram(values, bins=None, weights=None, max_bins=CHART_MAX_BINS):
+    """(labels, counts, edges) over every finite value; bins 'auto' (capped at max_bins) or an int."""
+    v = _as_float(values)
+    keep = np.isfinite(v)
+    w = None if weights is None else np.nan_to_num(_as_float(weights)[keep])
+    v = v[keep]
+    if len(v) == 0: return [], np.array([]), np.array([])
+    if bins in (None, '', 'auto'):
+        edges = np.histogram_bin_edges(v, bins='auto')
+        bins = min(max_bins, len(edges) - 1)
+    counts, edges = np.histogram(v, bins=max(1, int(bins)), weights=w)
+    return _bin_labels(edges), counts, edges
+
+
+def reduce_histogram(df, x_col, y_col=None, bins=None):
+    """Binned numeric column (sum of y_col per bin when given); categorical columns fall back to top-N counts."""
+    s = df[x_col]
+    if not (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s)) or pd.api.types.is_bool_dtype(s):
+        counts = s.value_counts(dropna=True).rename_axis(x_col).reset_index(name='Count')
+        return top_n(counts, x_col, 'Count')
+    value_name = y_col if y_col else 'Count'
+    labels, counts, edges = histogram(s, bins, df[y_col] if y_col else None)
+    out = pd.DataFrame({x_col: labels, value_name: counts if y_col else counts.astype(np.int64),
+                        'Bin Start': edges[:-1], 'Bin End': edges[1:]})
+    return out, {"reducer": "histogram", "points": int(len(out)), "source_rows": int(s.notna().sum())}
+
+
+def reduce_scatter(df, x_col, y_col, color_col=None, max_points=CHART_MAX_POINTS, grid=CHART_GRID):
+    """Points as they are while they fit, otherwise a histogram2d grid: cell centres with their counts."""
+    cols = [x_col, y_col] + ([color_col] if color_col and color_col in df.columns else [])
+    frame = df[cols].dropna(subset=[x_col, y_col])
+    meta = {"reducer": "none", "points": int(len(frame)), "source_rows": int(len(frame))}
+    if len(frame) <= max_points: return frame.reset_index(drop=True), meta
+    x, y = _as_float(frame[x_col]), _as_float(frame[y_col])
+    counts, xe, ye = np.histogram2d(x, y, bins=grid)
+    ix, iy = np.nonzero(counts)
+    out = pd.DataFrame({x_col: (xe[ix] + xe[ix + 1]) / 2, y_col: (ye[iy] + ye[iy + 1]) / 2, 'Count': counts[ix, iy].astype(np.int64)})
+    return out, {**meta, "reducer": "histogram2d", "points": int(len(out)), "grid": grid}
+
+
+def _axis(values, max_cells):
+    """(codes, labels) for one heatmap axis: few distinct values as they are, many numbers binned, many labels top-N + Other."""
+    s = values.reset_index(drop=True)
+    numeric = (pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)) or pd.api.types.is_datetime64_any_dtype(s)
+    codes, uniques = pd.factorize(s, sort=True)
+    if len(uniques) <= max_cells: return codes, [str(u) for u in uniques]
+    if numeric:
+        v = _as_float(s)
+        edges = np.histogram_bin_edges(v[np.isfinite(v)], bins=max_cells)
+        codes = np.where(np.isfinite(v), np.clip(np.searchsorted(edges, v, side='right') - 1, 0, max_cells - 1), -1)
+        return codes, _bin_labels(edges)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    top = np.sort(np.argsort(-sizes, kind='stable')[:max_cells - 1])
+    remap = np.full(len(uniques), max_cells - 1)
+    remap[top] = np.arange(len(top))
+    return np.where(codes >= 0, remap[np.maximum(codes, 0)], -1), [str(uniques[t]) for t in top] + [OTHER]
+
+
+def reduce_heatmap(df, x_col, y_col, max_cells=CHART_TOP_N + 10):
+    """Row counts per (x, y) cell in long form: x label, y label, Count (non-empty cells only)."""
+    cx, x_labels = _axis(df[x_col], max_cells)
+    cy, y_labels = _axis(df[y_col], max_cells)
+    keep = (cx >= 0) & (cy >= 0)
+    grid = np.bincount(cx[keep] * len(y_labels) + cy[keep], minlength=len(x_labels) * len(y_labels)).reshape(len(x_labels), len(y_labels))
+    ix, iy = np.nonzero(grid)
+    out = pd.DataFrame({x_col: np.asarray(x_labels, dtype=object)[ix], y_col: np.asarray(y_labels, dtype=object)[iy],
+                        'Count': grid[ix, iy].astype(np.int64)})
+    return out, {"reducer": "heatmap", "points": int(len(out)), "source_rows": int(keep.sum()),
+                 "x_labels": x_labels, "y_labels": y_labels}
@@ -0,0 +1,161 @@
+import pandas as pd
+
+# =========================================================================
+# CLEANING KERNELS (Fill N/A, Replace Value, Change Data Type)
+# =========================================================================
+# Each node accepts per-column rules (config.rules / replacements / casts,
+# plus a `columns` list) on top of its original single-column config. The
+# rules are resolved to one plan per column and applied as a few
+# vectorized calls instead of one call per column:
+#   Fill N/A          one DataFrame.fillna({column: value}); statistics come
+#                     from one DataFrame.agg / mode over the numeric columns;
+#                     ffill / bfill run once over their column block
+#   Replace Value     one DataFrame.replace({column: {old: new}})
+#   Change Data Type  one astype per target type over its column block;
+#                     numeric / datetime parsing goes through the typed cache
+# Results are written into a shallow copy, so untouched columns are shared
+# with the input. Values are coerced per column exactly as the
+# single-column nodes did, so an old config produces the same output.
+
+FILL_STATS = ('mean', 'median', 'mode', 'min', 'max')
+CAST_TYPES = ('int', 'float', 'datetime', 'str')
+
+
+def _target_columns(config, columns):
+    """config.columns / config.column, or every column when neither is set (the Fill N/A default)."""
+    cols = config.get('columns') or ([config['column']] if config.get('column') else None)
+    return list(columns) if cols is None else [c for c in cols if c in columns]
+
+
+# --- FILL N/A ---
+
+def fill_plan(config, columns):
+    """{column: (method, value)}: the node-level method/value first, then config.rules ({column, method, value})."""
+    method, value = config.get('method', 'value'), config.get('value')
+    plan = {c: (method, value) for c in _target_columns(config, columns)} if config.get('method') or not config.get('rules') else {}
+    for rule in config.get('rules') or []:
+        if isinstance(rule, dict) and rule.get('column') in columns:
+            plan[rule['column']] = (rule.get('method', 'value'), rule.get('value'))
+    return plan
+
+
+def fill_na(df, plan):
+    """
+    Returns (frame, filled columns). Like the single-column node, a fill value a column
+    rejects skips that column, and statistics only fill numeric columns.
+    """
+    values, forward, backward, stats = {}, [], [], {}
+    for col, (method, value) in plan.items():
+        if method == 'value':
+            if value is not None and value != '': values[col] = value
+        elif method == 'ffill': forward.append(col)
+        elif method == 'bfill': backward.append(col)
+        elif method in FILL_STATS and pd.api.types.is_numeric_dtype(df[col]): stats.setdefault(method, []).append(col)
+
+    for method, cols in stats.items():
+        block = df[cols]
+        if method == 'mode':
+            modes = block.mode()
+            found = block.notna().any() # An all-null column has no mode: left as is
+            computed = modes.iloc[0][found] if len(modes) else pd.Series(dtype=object)
+        else:
+            computed = block.agg(method)
+        values.update(computed.to_dict())
+
+    out = df.copy(deep=False)
+    for col, value in values.items():
+        if isinstance(out[col].dtype, pd.CategoricalDtype) and value not in out[col].cat.categories:
+            out[col] = out[col].cat.add_categories([value])
+    if values:
+        try:
+            out = out.fillna(values)
+        except (TypeError, ValueError):
+            for col, value in list(values.items()): # One column rejects its value: fill the rest one by one
+                try: out[col] = out[col].fillna(value)
+                except (TypeError, ValueError): del values[col]
+    if forward: out[forward] = out[forward].ffill()
+    if backward: out[backward] = out[backward].bfill()
+    return out, [c for c in plan if c in values or c in forward or c in backward]
+
+
+# --- REPLACE VALUE ---
+
+def replace_rules(config):
+    """[(column, old, new)]: the node-level column/oldValue/newValue, then config.replacements."""
+    rules = []
+    for r in [config] + [r for r in config.get('replacements') or [] if isinstance(r, dict)]:
+        if r.get('column') and r.get('oldValue') is not None: rules.append((r['column'], r['oldValue'], r.get('newValue')))
+    return rules
+
+
+def _coerce_pair(s, old, new):
+    """(old, new) typed for the column: numbers for numeric columns, text for text columns."""
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        try:
+            old = float(old)
+            new = float(new)
+        except (TypeError, ValueError):
+            pass
+    elif s.dtype == 'object' or s.dtype == 'string':
+        old, new = str(old), str(new)
+    return old, new
+
+
+def replace_values(df, rules):
+    """Returns (frame, replaced columns): every rule in one mapping-based DataFrame.replace."""
+    mapping = {}
+    for col, old, new in rules:
+        if col not in df.columns: continue
+        s = df[col]
+        base = s.cat.categories.to_series() if isinstance(s.dtype, pd.CategoricalDtype) else s # Typed like the unoptimized column
+        old, new = _coerce_pair(base, old, new)
+        mapping.setdefault(col, {})[old] = new
+    if not mapping: return df, []
+    out = df.copy(deep=False)
+    for col, pairs in mapping.items(): # Like fill_na: a category column takes the new values as categories first
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            added = list(dict.fromkeys(v for v in pairs.values() if pd.notna(v) and v not in out[col].cat.categories))
+            if added: out[col] = out[col].cat.add_categories(added)
+    return out.replace(mapping), list(mapping)
+
+
+# --- CHANGE DATA TYPE ---
+
+def cast_plan(config):
+    """{column: dtype}: column/columns with config.dtype, then config.casts ({column, dtype})."""
+    dtype = config.get('dtype')
+    cols = config.get('columns') or ([config['column']] if config.get('column') else [])
+    plan = {c: dtype for c in cols} if dtype else {}
+    for r in config.get('casts') or []:
+        if isinstance(r, dict) and r.get('column') and r.get('dtype'): plan[r['column']] = r['dtype']
+    return plan
+
+
+def _cast_block(df, cols, dtype, typed):
+    if dtype == 'str': return df[cols].astype(str)
+    if dtype == 'int': return pd.DataFrame({c: typed.numeric(df[c]) for c in cols}, index=df.index).fillna(0).astype(int)
+    if dtype == 'float': return pd.DataFrame({c: typed.numeric(df[c]) for c in cols}, index=df.index)
+    return pd.DataFrame({c: typed.datetime(df[c]) for c in cols}, index=df.index)
+
+
+def change_types(df, plan, typed):
+    """Returns (frame, cast columns, {column: error}). A column that fails does not stop the others."""
+    by_type, failed = {}, {}
+    for col, dtype in plan.items():
+        if col not in df.columns: failed[col] = "column not found"
+        elif dtype not in CAST_TYPES: failed[col] = f"unsupported type '{dtype}'"
+        else: by_type.setdefault(dtype, []).append(col)
+
+    out, cast = df.copy(deep=False), []
+    for dtype, cols in by_type.items():
+        try:
+            out[cols] = _cast_block(df, cols, dtype, typed)
+            cast += cols
+        except Exception:
+            for col in cols:
+                try:
+                    out[col] = _cast_block(df, [col], dtype, typed)[col]
+                    cast.append(col)
+                except Exception as e:
+                    failed[col] = str(e)
+    return out, cast, failed
@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+# =========================================================================
+# CLUSTERING (Clustering node)
+# =========================================================================
+# K-Means over the selected numeric columns, sized for large inputs:
+# 1. Features are coerced through the typed cache; rows with a missing
+#    feature get no cluster. Columns are standardized unless scale is off.
+# 2. Up to CLUSTER_MINIBATCH_ROWS rows are fitted with KMeans, above that
+#    with MiniBatchKMeans, which only ever looks at one batch at a time.
+# 3. Labels are assigned CLUSTER_CHUNK_ROWS rows at a time, so the
+#    rows x k distance matrix stays small.
+# 4. k = "auto" fits every candidate in 2..maxK on one uniform sample of
+#    CLUSTER_SAMPLE_ROWS rows, in parallel, and keeps the best silhouette.
+# Clusters are numbered by size (0 = largest). The summary (size, share and
+# centroid in the original units per cluster) goes to the dashboard.
+
+CLUSTER_MINIBATCH_ROWS = int(os.getenv("CLUSTER_MINIBATCH_ROWS", "100000"))
+CLUSTER_SAMPLE_ROWS = int(os.getenv("CLUSTER_SAMPLE_ROWS", "50000"))
+CLUSTER_CHUNK_ROWS = int(os.getenv("CLUSTER_CHUNK_ROWS", "100000"))
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", str(min(4, os.cpu_count() or 1))))
+SILHOUETTE_ROWS = 5000 # Silhouette is O(n^2): scored on a sample
+MAX_K = 8
+SEED = 42
+
+
+def cluster_columns(config, df, typed):
+    """{column: float values} for config.columns (every numeric column when empty); non-numeric columns are skipped."""
+    cols = config.get('columns') or [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+    features = {}
+    for c in cols:
+        if c not in df.columns: continue
+        values = typed.numeric(df[c]).to_numpy(dtype='float64', na_value=np.nan)
+        if not np.isnan(values).all(): features[c] = values
+    return features
+
+
+def _model(k, rows):
+    if rows > CLUSTER_MINIBATCH_ROWS:
+        return MiniBatchKMeans(n_clusters=k, batch_size=4096, n_init=3, random_state=SEED), 'minibatch'
+    return KMeans(n_clusters=k, n_init='auto', random_state=SEED), 'kmeans'
+
+
+def _sample(X, size):
+    if len(X) <= size: return X
+    return X[np.sort(np.random.default_rng(SEED).choice(len(X), size, replace=False))]
+
+
+def predict_chunked(model, X):
+    labels = np.empty(len(X), dtype='int64')
+    for start in range(0, len(X), CLUSTER_CHUNK_ROWS):
+        labels[start:start + CLUSTER_CHUNK_ROWS] = model.predict(X[start:start + CLUSTER_CHUNK_ROWS])
+    return labels
+
+
+def _silhouette(sample, k):
+    labels = KMeans(n_clusters=k, n_init='auto', random_state=SEED).fit_predict(sample)
+    if len(set(labels)) < 2: return k, -1.0
+    return k, float(silhouette_score(sample, labels, sample_size=min(SILHOUETTE_ROWS, len(sample)), random_state=SEED))
+
+
+def choose_k(X, max_k=MAX_K):
+    """(best k, {k: silhouette}) over 2..max_k, each candidate fitted on the same sample in parallel."""
+    sample = _sample(X, CLUSTER_SAMPLE_ROWS)
+    candidates = range(2, max(2, min(max_k, len(np.unique(sample, axis=0)) - 1)) + 1)
+    with ThreadPoolExecutor(max_workers=max(1, CLUSTER_WORKERS)) as pool: # KMeans releases the GIL in its Cython loops
+        scores = dict(pool.map(lambda k: _silhouette(sample, k), candidates))
+    return max(scores, key=scores.get), scores
+
+
+def cluster_frame(features, k=3, scale=True, max_k=MAX_K):
+    """
+    Returns (labels Int64 array aligned with the input rows, summary DataFrame, info).
+    summary: Cluster, Size, Share, then the centroid of every feature.
+    info: {"k", "rows", "skipped", "method", "inertia", "scores"}.
+    """
+    cols = list(features)
+    X = np.column_stack([features[c] for c in cols])
+    valid = ~np.isnan(X).any(axis=1)
+    X = X[valid]
+    distinct = len(np.unique(_sample(X, CLUSTER_SAMPLE_ROWS), axis=0))
+    if distinct < 2: raise ValueError(f"needs at least 2 distinct rows, got {distinct}")
+
+    scaler = StandardScaler().fit(X) if scale else None
+    Xs = scaler.transform(X) if scale else X
+    scores = None
+    if str(k).lower() == 'auto': k, scores = choose_k(Xs, int(max_k))
+    k = max(1, min(int(k), len(X)))
+
+    model, method = _model(k, len(Xs))
+    model.fit(Xs)
+    raw = predict_chunked(model, Xs)
+
+    sizes = np.bincount(raw, minlength=k)
+    order = np.argsort(-sizes, kind='stable') # Renumber: 0 = largest cluster
+    rank = np.empty(k, dtype='int64')
+    rank[order] = np.arange(k)
+    centers = model.cluster_centers_[order]
+    if scale: centers = scaler.inverse_transform(centers)
+
+    labels = pd.array(np.full(len(valid), pd.NA), dtype='Int64')
+    labels[valid] = rank[raw]
+    summary = pd.DataFrame(centers, columns=cols)
+    summary.insert(0, 'Cluster', np.arange(k))
+    summary.insert(1, 'Size', sizes[order])
+    summary.insert(2, 'Share', (sizes[order] / max(1, len(X))).round(4))
+    info = {"k": k, "rows": int(len(X)), "skipped": int((~valid).sum()), "method": method,
+            "inertia": float(model.inertia_), "scores": scores}
+    return labels, summary, info
@@ -0,0 +1,110 @@
+import os
+import re
+import json
+from typing import List, Dict
+
+import pandas as pd
+
+from dataset_cache import get_profile, profile_frame
+
+# =========================================================================
+# SERVER-SIDE DATA CONTEXT FOR THE AGENTS
+# =========================================================================
+# Replaces the client-shipped `dataPreview` rows. The summary is built from the
+# cached profile of the user's latest file and packed into a token budget:
+# columns the request mentions come first, then low-cardinality categoricals
+# (the values the Executor must spell exactly), dates, numerics and free text.
+
+DATA_SUMMARY_TOKENS = int(os.getenv("DATA_SUMMARY_TOKENS", "1200"))
+COLUMN_LIST_TOKENS = int(os.getenv("COLUMN_LIST_TOKENS", "400"))
+MAX_VALUE_CHARS = 40
+
+
+def estimate_tokens(text):
+    """~4 characters per token; good enough for budgeting and logging."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def _mentioned(col, request):
+    return bool(request) and re.search(rf"(?<!\w){re.escape(str(col).lower())}(?!\w)", request.lower()) is not None
+
+
+def _rank(col, st, request):
+    if _mentioned(col, request): return 0
+    distinct = st.get("distinct")
+    if st.get("min") is None and distinct is not None and distinct <= 50: return 1 # Categorical
+    if "date" in str(col).lower() or "time" in str(col).lower(): return 2
+    if st.get("min") is not None: return 3 # Numeric
+    return 4 # High-cardinality text
+
+
+def _describe(st, k):
+    entry = {"dtype": st["dtype"]}
+    if st.get("min") is not None:
+        entry["range"] = [round(st["min"], 4), round(st["max"], 4)]
+        if st.get("distinct") is not None and st["distinct"] <= 20:
+            entry["values"] = [v for v, _ in st["top"][:k]]
+        return entry
+    entry["distinct"] = st["distinct"] if st.get("distinct") is not None else ">5000"
+    values = [v for v, _ in st["top"][:k]] if st.get("top") else st.get("examples", [])[:3]
+    entry["top" if st.get("top") else "examples"] = [str(v)[:MAX_VALUE_CHARS] for v in values]
+    if st.get("nulls"): entry["nulls"] = st["nulls"]
+    return entry
+
+
+def summarize_profile(profile, request="", budget=DATA_SUMMARY_TOKENS):
+    """
+    Packs a profile into JSON within `budget` tokens. Tries 8 top values per
+    column, then fewer, before dropping the lowest-ranked columns.
+    """
+    if not profile or not profile.get("columns"): return "No Data"
+    ordered = sorted(profile["columns"].items(), key=lambda kv: _rank(kv[0], kv[1], request))
+    header = {"rows": profile["rows"]}
+
+    for k in (8, 5, 3, 1):
+        summary = {}
+        for col, st in ordered:
+            summary[col] = _describe(st, k)
+            text = json.dumps({**header, "columns": summary}, default=str)
+            if estimate_tokens(text) > budget:
+                del summary[col]
+                break
+        if len(summary) == len(ordered) or k == 1:
+            return json.dumps({**header, "columns": summary}, default=str)
+
+
+def budget_columns(columns: List[str], request="", budget=COLUMN_LIST_TOKENS):
+    """Column-name list for the prompts: mentioned columns first, cut at the token budget (not at a fixed count)."""
+    ordered = sorted(columns, key=lambda c: 0 if _mentioned(c, request) else 1)
+    kept, used = [], 2
+    for c in ordered:
+        used += estimate_tokens(json.dumps(c)) + 1
+        if used > budget: break
+        kept.append(c)
+    return kept
+
+
+def build_data_context(latest_file=None, columns=None, request="", data_preview=None, sheet=0):
+    """
+    Returns (data_summary, target_cols, profile). Prefers the server-side profile
+    of latest_file (its `sheet` for Excel); falls back to client preview rows for older clients.
+    """
+    profile = None
+    if latest_file:
+        profile = get_profile(latest_file.get("path"), sheet)
+    if not profile and data_preview:
+        try: profile = profile_frame([pd.DataFrame(data_preview)])
+        except Exception as e: print(f"⚠️ Data Prep Warning: {e}")
+
+    if columns and profile:
+        # Client is looking at a specific node: only describe the columns it actually has
+        keep = [c for c in columns if c in profile["columns"]]
+        if keep: profile = {**profile, "columns": {c: profile["columns"][c] for c in keep}}
+    all_cols = list(columns) if columns else (list(profile["columns"].keys()) if profile else [])
+    return summarize_profile(profile, request), budget_columns(all_cols, request), profile
+
+
+def known_values(profile) -> Dict[str, List[str]]:
+    """Exact spellings of frequent values per column (used for Filter/Replace matching)."""
+    if not profile: return {}
+    return {c: [v for v, _ in st.get("top", [])] for c, st in profile["columns"].items() if st.get("top")}
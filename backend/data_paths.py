@@ -0,0 +1,14 @@
+import os
+
+# =========================================================================
+# DATA DIRECTORY (caches and state the backend writes at run time)
+# =========================================================================
+# Artifacts, stored samples, incremental-refresh state and the sentiment
+# cache all live under DATA_DIR (git-ignored) unless their own variable
+# points them elsewhere.
+
+DATA_DIR = os.getenv("DATA_DIR", "data")
+
+
+def data_path(*parts):
+    return os.path.join(DATA_DIR, *parts)
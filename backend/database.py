@@ -53,6 +53,32 @@ def init_db():
             FOREIGN KEY(user_id) REFERENCES users(id)
         )
     ''')
+    # Workflow Runs Table (background jobs, see job_queue)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER,
+            status TEXT NOT NULL,
+            request TEXT NOT NULL,
+            timeout REAL,
+            total_nodes INTEGER DEFAULT 0,
+            done_nodes INTEGER DEFAULT 0,
+            current_node TEXT,
+            progress TEXT,
+            cancel_requested INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            expires_at REAL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_runs_expires ON runs (expires_at)")
+    # Columns added after the runs table first shipped
+    existing = {r[1] for r in c.execute("PRAGMA table_info(runs)")}
+    for column, kind in (("mode", "TEXT DEFAULT 'exact'"), ("preview", "TEXT")):
+        if column not in existing: c.execute(f"ALTER TABLE runs ADD COLUMN {column} {kind}")
     conn.commit()
     conn.close()
 
@@ -185,5 +211,105 @@ def get_chat_history(user_id, flow_id):
     conn.close()
     return [{"role": r[0], "content": r[1]} for r in rows]
 
+# --- WORKFLOW RUN FUNCTIONS ---
+RUN_FIELDS = ("id", "user_id", "status", "mode", "timeout", "total_nodes", "done_nodes", "current_node", "progress",
+              "cancel_requested", "error", "created_at", "started_at", "finished_at", "expires_at")
+
+def create_run(run_id, user_id, request, timeout, created_at, mode='exact'):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("INSERT INTO runs (id, user_id, status, mode, request, timeout, created_at) VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+              (run_id, user_id, mode, json.dumps(request), timeout, created_at))
+    conn.commit()
+    conn.close()
+
+def update_run(run_id, **fields):
+    # progress and preview are stored as JSON; everything else as given
+    for key in ("progress", "preview"):
+        if key in fields: fields[key] = json.dumps(fields[key], default=str)
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f"UPDATE runs SET {', '.join(f'{k}=?' for k in fields)} WHERE id = ?", (*fields.values(), run_id))
+    conn.commit()
+    conn.close()
+
+def start_run(run_id, started_at):
+    # Only a run that is still queued starts (it may have been cancelled while waiting)
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("UPDATE runs SET status='running', started_at=? WHERE id = ? AND status = 'queued'", (started_at, run_id))
+    started = c.rowcount > 0
+    conn.commit()
+    conn.close()
+    return started
+
+def finish_run(run_id, status, finished_at, expires_at, result=None, error=None, from_states=('queued', 'running')):
+    """Moves a run to a final state unless it already is in one (a cancelled run stays cancelled)."""
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f"UPDATE runs SET status=?, result=?, error=?, finished_at=?, expires_at=?, current_node=NULL "
+              f"WHERE id = ? AND status IN ({', '.join('?' * len(from_states))})",
+              (status, json.dumps(result, default=str) if result is not None else None, error, finished_at, expires_at, run_id, *from_states))
+    finished = c.rowcount > 0
+    conn.commit()
+    conn.close()
+    return finished
+
+def get_run(run_id, with_result=False):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    blobs = "request, result, preview" if with_result else "NULL, NULL, NULL" # Status polls skip the big JSON columns
+    c.execute(f"SELECT {', '.join(RUN_FIELDS)}, preview IS NOT NULL, {blobs} FROM runs WHERE id = ?", (run_id,))
+    r = c.fetchone()
+    conn.close()
+    if not r: return None
+    run = dict(zip(RUN_FIELDS, r))
+    run["progress"] = json.loads(run["progress"]) if run["progress"] else []
+    run["cancel_requested"] = bool(run["cancel_requested"])
+    run["preview_ready"] = bool(r[len(RUN_FIELDS)])
+    if with_result:
+        run["request"] = json.loads(r[-3])
+        run["result"] = json.loads(r[-2]) if r[-2] else None
+        run["preview"] = json.loads(r[-1]) if r[-1] else None
+    return run
+
+def get_runs_by_status(statuses):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f"SELECT id, status FROM runs WHERE status IN ({', '.join('?' * len(statuses))}) ORDER BY created_at ASC", tuple(statuses))
+    rows = c.fetchall()
+    conn.close()
+    return rows
+
+def get_user_runs(user_id, limit=50):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(RUN_FIELDS)} FROM runs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit))
+    rows = c.fetchall()
+    conn.close()
+    runs = [dict(zip(RUN_FIELDS, r)) for r in rows]
+    for run in runs:
+        run["progress"] = json.loads(run["progress"]) if run["progress"] else []
+        run["cancel_requested"] = bool(run["cancel_requested"])
+    return runs
+
+def request_run_cancel(run_id):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("UPDATE runs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')", (run_id,))
+    flagged = c.rowcount > 0
+    conn.commit()
+    conn.close()
+    return flagged
+
+def purge_expired_runs(now):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute("DELETE FROM runs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+    purged = c.rowcount
+    conn.commit()
+    conn.close()
+    return purged
+
 # Initialize on load
 init_db()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict, Counter
+
+import pandas as pd
+
+# =========================================================================
+# DATASET CACHE (file headers / dtypes / profiles keyed by path + mtime + size)
+# =========================================================================
+# Lets the API answer "what columns does this file have" and "what values are
+# in it" without the client shipping rows. Entries are invalidated
+# automatically when the file changes.
+
+HEADER_SAMPLE_ROWS = 500 # Rows read to infer dtypes the same way pd.read_csv would
+PROFILE_CHUNK_ROWS = 200_000
+PROFILE_MAX_TRACKED = 5000 # Stop counting values of a column past this many distinct values
+PROFILE_TOP_K = 20
+MAX_ENTRIES = 64
+
+_lock = threading.Lock()
+_schemas = OrderedDict()
+_profiles = OrderedDict()
+
+
+def resolve_path(path):
+    """Same fallback the engine uses: stale absolute paths are looked up in temp_uploads."""
+    if not path: return None
+    if not os.path.exists(path): path = os.path.join("temp_uploads", os.path.basename(path))
+    return path if os.path.exists(path) else None
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def get_file_schema(path, sheet=0):
+    """Returns {column: dtype_name} for a CSV/Excel file, or None if it cannot be read."""
+    path = resolve_path(path)
+    if not path: return None
+    key = file_signature(path) + (sheet,)
+
+    with _lock:
+        if key in _schemas:
+            _schemas.move_to_end(key)
+            return _schemas[key]
+
+    try:
+        if path.endswith(('.xlsx', '.xls')):
+            sample = pd.read_excel(path, sheet_name=sheet or 0, nrows=HEADER_SAMPLE_ROWS)
+        else:
+            sample = pd.read_csv(path, nrows=HEADER_SAMPLE_ROWS)
+    except Exception as e:
+        print(f"⚠️ Header Read Failed ({path}): {e}")
+        return None
+
+    schema = {str(c): str(t) for c, t in sample.dtypes.items()}
+    _cache_put(_schemas, key, schema)
+    return schema
+
+
+def _cache_put(cache, key, value):
+    with _lock:
+        cache[key] = value
+        while len(cache) > MAX_ENTRIES: cache.popitem(last=False)
+
+
+def profile_frame(chunks):
+    """
+    Streams DataFrame chunks into a compact profile:
+    {"rows", "columns": {col: {"dtype", "nulls", "distinct", "top": [[value, count]], "min", "max"}}}
+    distinct is None when the column has more than PROFILE_MAX_TRACKED values.
+    """
+    rows, stats = 0, {}
+    for chunk in chunks:
+        rows += len(chunk)
+        for col in chunk.columns:
+            series = chunk[col]
+            st = stats.setdefault(str(col), {"dtype": str(series.dtype), "nulls": 0, "counts": Counter(), "min": None, "max": None})
+            st["dtype"] = str(series.dtype)
+            st["nulls"] += int(series.isna().sum())
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                lo, hi = series.min(), series.max()
+                if pd.notna(lo): st["min"] = lo if st["min"] is None else min(st["min"], lo)
+                if pd.notna(hi): st["max"] = hi if st["max"] is None else max(st["max"], hi)
+            if st["counts"] is not None:
+                st["counts"].update(series.dropna().astype(str).value_counts().to_dict())
+                if len(st["counts"]) > PROFILE_MAX_TRACKED:
+                    st["examples"] = [v for v, _ in st["counts"].most_common(5)]
+                    st["counts"] = None
+
+    columns = {}
+    for col, st in stats.items():
+        counts = st.pop("counts")
+        st["distinct"] = len(counts) if counts is not None else None
+        st["top"] = [[v, int(c)] for v, c in counts.most_common(PROFILE_TOP_K)] if counts is not None else []
+        for k in ("min", "max"):
+            if st[k] is not None: st[k] = float(st[k])
+        columns[col] = st
+    return {"rows": rows, "columns": columns}
+
+
+def get_profile(path, sheet=0):
+    """Cached full-file profile (distinct values, top-k, dtypes) used to build agent context."""
+    path = resolve_path(path)
+    if not path: return None
+    key = file_signature(path) + (sheet,)
+
+    with _lock:
+        if key in _profiles:
+            _profiles.move_to_end(key)
+            return _profiles[key]
+
+    try:
+        if path.endswith(('.xlsx', '.xls')):
+            profile = profile_frame([pd.read_excel(path, sheet_name=sheet or 0)])
+        else:
+            profile = profile_frame(pd.read_csv(path, chunksize=PROFILE_CHUNK_ROWS))
+    except Exception as e:
+        print(f"⚠️ Profile Failed ({path}): {e}")
+        return None
+
+    _cache_put(_profiles, key, profile)
+    return profile
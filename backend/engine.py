@@ -2,18 +2,33 @@ import pandas as pd
 import numpy as np
 import os
 import networkx as nx
-from textblob import TextBlob
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from sklearn.preprocessing import MinMaxScaler
 from sklearn.ensemble import IsolationForest
-from sklearn.cluster import KMeans
-from sklearn.feature_extraction.text import CountVectorizer # NEW
 from scipy import stats
-import re, io,base64
-from wordcloud import WordCloud
+import re, io
+import time
 from datetime import datetime, timedelta
 import requests
-import io
-import pandas as pd
+from filter_engine import compile_conditions, compile_date_ranges, ColumnCoercer
+from typed_columns import TypedColumnCache
+from expression_engine import calculations_from_config, check_calculations, evaluate_calculations
+from memory_optimizer import optimize_mode, optimize_frame, summarize_report, value_counts
+from aggregation_engine import aggregate, pivot
+from cleaning_engine import fill_plan, fill_na, replace_rules, replace_values, cast_plan, change_types
+from sentiment_engine import score_sentiment
+from clustering_engine import cluster_columns, cluster_frame
+from forecast_engine import forecast_frame
+from text_engine import top_terms, word_counts
+from artifact_store import store as artifacts, render_key
+from chart_engine import CHART_TOP_N, reduce_line, top_n, reduce_histogram, reduce_scatter, reduce_heatmap
+from join_engine import INPUT_PORTS, input_ports, join_keys, merge_frames, concat_frames
+from node_pool import NodeOffloader
+from flow_optimizer import FLOW_OPTIMIZE, EXPORT_NODES, optimize_flow
+import sample_engine
+import incremental_engine
+from incremental_engine import ROW_WISE
+from sketch_engine import QUANTILE_OPS, approx_distinct, approx_quantile, approx_value_counts
+from concurrent.futures.process import BrokenProcessPool
 
 
 
@@ -26,551 +41,769 @@ except ImportError:
 # --- GOOGLE DRIVE SETUP ---
 SERVICE_ACCOUNT_FILE = 'service_account.json'
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+# --- NODES THAT WILL SEND DATA TO FRONTEND REPORT/PANEL ---
+DISPLAY_NODES = [
+    'Preview Data', 'Describe Stats', 'Get Data Types', 'Correlation', 
+    'Bar Chart', 'Line Chart', 'Pie/Donut Chart', 
+    'Histogram', 'Scatter Plot', 'Heatmap', 'Sentiment Analysis', 
+    'Forecast', 'Clustering', 'KPI Card', 'Pivot Table', 'Rank', 'Area Chart',
+    'Value Counts', 'Get Shape', 'N-Grams', 'Word Count','Word Cloud'
+]
+
+_type_ms = {} # typeLabel -> smoothed run time (ms), to estimate what skipping a node saves
+
+def is_output_node(node_type):
+    """Display and export nodes: what the optimizer keeps alive."""
+    return any(x in node_type for x in DISPLAY_NODES) or node_type in EXPORT_NODES
+
+def _graph(nodes, edges):
+    """(G, incoming, execution order) of a flow."""
+    G = nx.DiGraph()
+    for n in nodes: G.add_node(n['id'], **n['data'])
+    incoming = {} # target -> its edges in order; multi-input nodes read them per port
+    for e in edges:
+        G.add_edge(e['source'], e['target'])
+        incoming.setdefault(e['target'], []).append(e)
+    try: execution_order = list(nx.topological_sort(G))
+    except: execution_order = [n['id'] for n in nodes] 
+    return G, incoming, execution_order
+
+def kpi_frame(config, val):
+    """One-cell KPI Card output, labelled like the node."""
+    col, op = config.get('column'), config.get('operation', 'count')
+    label = config.get('label') or (f"{op} {col}" if col else "Total Rows")
+    return pd.DataFrame([{ label: round(val, 2) if isinstance(val, (int, float)) else val }])
+
 class WorkflowEngine:
     def __init__(self):
         self.context_data = {} 
-
-    async def execute_flow(self, nodes, edges):
+        self.typed = TypedColumnCache()
+        self.timings = {}
+        self.sample_rows = None # Set for the preview pass of a progressive run
+        self.samples, self.scales = {}, {} # Sampling factor (1 / fraction) of every node's frame, None when unknown
+        self.graph = nx.DiGraph()
+        self.lineage, self.deltas = {}, {} # Nodes fed by a tracked source, and their appended rows (see incremental_engine)
+
+    async def execute_flow(self, nodes, edges, progress=None, events=None, sample_rows=None):
+        """
+        Runs every node in topological order. progress(order, i), when given, is called before node i
+        and once more with i == len(order) after the last one; an exception it raises stops the run.
+        events(event), when given, receives a node_started and a node_finished dict for every node.
+        sample_rows runs the flow on a sample of each source; the result is then flagged "sampled".
+        """
         execution_log = []
         self.context_data = {} 
+        self.typed = TypedColumnCache() # numeric/datetime coercions shared by every node of this run
+        self.timings = {}
+        self.sample_rows, self.samples, self.scales = sample_rows, {}, {}
+        self.lineage, self.deltas = {}, {}
         node_outputs = {} 
-        # --- NODES THAT WILL SEND DATA TO FRONTEND REPORT/PANEL ---
-        DISPLAY_NODES = [
-            'Preview Data', 'Describe Stats', 'Get Data Types', 'Correlation', 
-            'Bar Chart', 'Line Chart', 'Pie/Donut Chart', 
-            'Histogram', 'Scatter Plot', 'Heatmap', 'Sentiment Analysis', 
-            'Forecast', 'Clustering', 'KPI Card', 'Pivot Table', 'Rank', 'Area Chart',
-            'Value Counts', 'Get Shape', 'N-Grams', 'Word Count','Word Cloud'
-        ]
-        G = nx.DiGraph()
-        node_map = {n['id']: n for n in nodes}
         
         if not nodes: return {"status": "error", "message": "Empty Workflow", "logs": []}
 
-        for n in nodes: G.add_node(n['id'], **n['data'])
-        for e in edges: G.add_edge(e['source'], e['target'])
+        G, incoming, execution_order = _graph(nodes, edges)
+        final_id = execution_order[-1] if execution_order else None
+        plan, all_nodes = None, nodes
+        if FLOW_OPTIMIZE: # Merge duplicate nodes, drop nodes that feed no output (see flow_optimizer)
+            nodes, edges, plan = optimize_flow(nodes, edges, is_output_node, keep={final_id})
+            if plan and (plan["merged"] or plan["skipped"]): G, incoming, execution_order = _graph(nodes, edges)
+        node_map = {n['id']: n for n in nodes}
+        self.graph = G
+
+        offload = NodeOffloader() if NodeOffloader.enabled() else None # CPU-heavy nodes run in worker processes (see node_pool)
+        try:
+            for step, node_id in enumerate(execution_order):
+                if progress: progress(execution_order, step) # Between nodes: progress reporting, cancellation, time limits
+                node = node_map.get(node_id)
+                if not node: continue
+
+                node_type = node.get('data', {}).get('typeLabel')
+                config = node.get('data', {}).get('config', {})
+
+                predecessors = list(G.predecessors(node_id))
+                if offload: self._collect(offload, node_map, predecessors, execution_log, node_outputs, events)
+                input_df = self.context_data.get(predecessors[0]) if predecessors else None
+                started = time.perf_counter()
+                if events: events({"event": "node_started", "node_id": node_id, "type": node_type, "step": step, "total": len(execution_order)})
+
+                try:
+                    if len(predecessors) == 1 and predecessors[0] in self.lineage: # Downstream of an append-only source
+                        ran, output_df = self._incremental(node_id, node, predecessors[0], input_df, execution_log)
+                        if ran:
+                            self._snapshot(node_id, node_type, config, output_df, None, started, node_outputs, events)
+                            continue
+                    if offload and offload.accepts(node_type, input_df, predecessors) and offload.submit(node_id, node, predecessors[0], input_df, started):
+                        continue # Collected when a node reads it, or at the end
+                    output_df = self._run_node(node_id, node, predecessors, input_df, node_map, incoming, execution_log)
+                    self._snapshot(node_id, node_type, config, output_df, None, started, node_outputs, events)
+
+                except Exception as e:
+                    self._node_failed(node_id, node_type, e, started, execution_log, events)
+                    continue
+
+            if offload: self._collect(offload, node_map, None, execution_log, node_outputs, events)
+        finally:
+            if offload: offload.close()
+
+        if plan and (plan["merged"] or plan["skipped"]):
+            self._apply_plan(plan, {n['id']: n for n in all_nodes}, node_outputs, execution_log, events)
+        if progress: progress(execution_order, len(execution_order))
+        cache_stats = self.typed.stats()
+        if cache_stats["hits"]:
+            execution_log.append(f"🗃️ Typed columns: {cache_stats['conversions']} conversions, {cache_stats['hits']} reused")
 
-        try: execution_order = list(nx.topological_sort(G))
-        except: execution_order = [n['id'] for n in nodes] 
+        # FINAL OUTPUT
+        final_df = self.context_data.get(final_id)
+        
+        stats_dict = {}
+        if final_df is not None:
+            final_df = final_df.replace([np.inf, -np.inf], np.nan).where(pd.notnull(final_df), None)
+            try: stats_dict = final_df.describe(include=[np.number]).to_dict()
+            except: pass
 
-        for node_id in execution_order:
-            node = node_map.get(node_id)
-            if not node: continue
+        result = { "status": "success", "logs": execution_log, "node_outputs": node_outputs, "optimizer": plan, "final_output": {"rows": len(final_df) if final_df is not None else 0, "preview": final_df.head(100).to_dict(orient='records') if final_df is not None else [], "stats": stats_dict} }
+        if sample_rows: # Approximate: every output was computed from the sampled sources
+            result["sampled"] = self.samples
+            for output in node_outputs.values(): output["sampled"] = True
+        return result
+
+    def _run_node(self, node_id, node, predecessors, input_df, node_map, incoming, execution_log):
+        """Output frame of one node; side outputs (images, charts, clusters...) go to context_data[f"{node_id}_..."]."""
+        node_type = node.get('data', {}).get('typeLabel')
+        config = node.get('data', {}).get('config', {})
+        output_df = input_df 
+
+        # --- 1. INPUTS ---
+        if node_type == 'Read Data':
+            if self.sample_rows:
+                output_df = self._load_sample(node_id, node, predecessors, node_map)
+                info = self.samples.get(node_id, {})
+                execution_log.append(f"🎲 [Step {node_id}] Sampled {len(output_df)} of {'~' if info.get('estimated') else ''}"
+                                     f"{info.get('source_rows') or '?'} rows ({info.get('method')})")
+            else:
+                output_df = self._load_data(node, predecessors, node_map, node_id)
+                refresh = self.context_data.get(f"{node_id}_refresh")
+                if refresh and refresh["mode"] == "append":
+                    execution_log.append(f"♻️ [Step {node_id}] Source grew: read {refresh['new_rows']} appended rows "
+                                         f"({refresh['read_bytes'] / 2 ** 20:.1f} of {refresh['size'] / 2 ** 20:.1f} MB), {len(output_df)} rows in total")
+                elif refresh and refresh["mode"] == "unchanged":
+                    execution_log.append(f"♻️ [Step {node_id}] Source unchanged: {len(output_df)} rows from the incremental cache")
+                else:
+                    execution_log.append(f"✅ [Step {node_id}] Loaded {len(output_df)} rows")
+            mode = optimize_mode(config)
+            if mode: self.lineage.pop(node_id, None) # Optimized dtypes depend on all the rows: downstream recomputes
+            if mode and not output_df.empty:
+                output_df, report = optimize_frame(output_df, mode)
+                self.context_data[f"{node_id}_memory"] = report
+                execution_log.append(f"🧮 [Step {node_id}] Memory optimized ({mode}): {summarize_report(report)}")
             
-            node_type = node.get('data', {}).get('typeLabel')
-            config = node.get('data', {}).get('config', {})
+        # --- MULTI-INPUT NODES (named ports, see join_engine) ---
+        elif node_type in INPUT_PORTS:
+            output_df = self._apply_multi_input(node_id, node_type, config, input_ports(node_type, incoming.get(node_id, [])), execution_log)
+
+        # --- SAFETY CHECK FOR ALL OTHER NODES ---
+        elif input_df is None:
+            execution_log.append(f"⚠️ [Step {node_id}] Skipped '{node_type}': No input data from previous step.")
+            output_df = None # Propagate None
             
-            predecessors = list(G.predecessors(node_id))
-            input_df = self.context_data.get(predecessors[0]) if predecessors else None
-
-            try:
-                output_df = input_df 
-
-                # --- 1. INPUTS ---
-                if node_type == 'Read Data':
-                    output_df = self._load_data(node, predecessors, node_map)
-                    execution_log.append(f"✅ [Step {node_id}] Loaded {len(output_df)} rows")
-                    
-                # --- SAFETY CHECK FOR ALL OTHER NODES ---
-                elif input_df is None:
-                    execution_log.append(f"⚠️ [Step {node_id}] Skipped '{node_type}': No input data from previous step.")
-                    output_df = None # Propagate None
-                    
-                elif node_type == 'Fill N/A':
-                    # Retrieve configuration settings
-                    method = config.get('method', 'value')
-                    fill_value = config.get('value') 
-                    target_column = config.get('column') # Can be None/'' for all columns
-
-                    # 1. Determine the target columns
-                    if target_column:
-                        target_cols = [target_column]
-                    else:
-                        # If no specific column is chosen, target all columns in the DataFrame
-                        target_cols = input_df.columns.tolist()
-
-                    # 2. Check for columns that actually exist in the DataFrame
-                    valid_target_cols = [col for col in target_cols if col in input_df.columns]
-
-                    if not valid_target_cols:
-                        execution_log.append(f"⚠️ [Step {node_id}] No valid columns found to fill N/A. Skipping.")
-                        output_df = input_df
+        elif node_type == 'Fill N/A':
+            # One plan per column (method/value/column(s) + config.rules), applied as one dict fillna (see cleaning_engine)
+            method = config.get('method', 'value')
+            plan = fill_plan(config, input_df.columns)
+
+            if not plan:
+                execution_log.append(f"⚠️ [Step {node_id}] No valid columns found to fill N/A. Skipping.")
+                output_df = input_df
+            else:
+                try:
+                    output_df, filled = fill_na(input_df, plan)
+                    if filled:
+                        methods = sorted({plan[c][0] for c in filled})
+                        execution_log.append(f"✅ [Step {node_id}] Filled N/A using {', '.join(methods)} on columns: {', '.join(map(str, filled))}")
                     else:
-                        try:
-                            # Initialize a new DataFrame copy to work on
-                            output_df = input_df.copy()
-                            
-                            imputation_applied = False
-                            
-                            if method == 'value':
-                                if fill_value is not None and fill_value != '':
-                                    # Attempt to convert fill_value to numeric if all target columns are numeric
-                                    for col in valid_target_cols:
-                                        try:
-                                            # Try to impute with the specific value
-                                            output_df[col] = output_df[col].fillna(fill_value)
-                                            imputation_applied = True
-                                        except Exception:
-                                            # If conversion fails or other error, just skip this specific column
-                                            pass
-                                
-                            elif method in ['ffill', 'bfill']:
-                                # Forward Fill (ffill) or Backward Fill (bfill)
-                                for col in valid_target_cols:
-                                    output_df[col] = output_df[col].fillna(method=method)
-                                imputation_applied = True
-                                
-                            elif method in ['mean', 'median', 'mode', 'min', 'max']:
-                                # Statistical methods (only apply to numeric columns)
-                                # Note: mode requires special handling as it returns a Series
-                                for col in valid_target_cols:
-                                    if pd.api.types.is_numeric_dtype(output_df[col]):
-                                        if method == 'mode':
-                                            # Mode is the most frequent value. [0] is used to take the first mode
-                                            impute_val = output_df[col].mode().iloc[0] if not output_df[col].mode().empty else None
-                                        else:
-                                            # Calculate the aggregate function (mean, median, min, max)
-                                            impute_val = getattr(output_df[col], method)()
-                                            
-                                        if impute_val is not None:
-                                            output_df[col] = output_df[col].fillna(impute_val)
-                                            imputation_applied = True
-
-                            if imputation_applied:
-                                log_message = f"✅ [Step {node_id}] Filled N/A using {method} on columns: {', '.join(valid_target_cols)}"
-                                execution_log.append(log_message)
-                            else:
-                                execution_log.append(f"⚠️ [Step {node_id}] Imputation method '{method}' applied but no changes made (e.g., non-numeric data).")
-                                output_df = input_df # Restore original if no imputation occurred
-
-                        except Exception as e:
-                            execution_log.append(f"❌ [Step {node_id}] Error applying fill N/A ({method}): {e}")
-                            output_df = input_df # Fallback to original DataFrame    
+                        execution_log.append(f"⚠️ [Step {node_id}] Imputation method '{method}' applied but no changes made (e.g., non-numeric data).")
+                        output_df = input_df # Restore original if no imputation occurred
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Error applying fill N/A ({method}): {e}")
+                    output_df = input_df # Fallback to original DataFrame    
+            
+        elif node_type == 'Drop Null': # Assuming the node type is 'Drop Null' or similar
+            # Configuration for pandas df.dropna()
+            # Assuming frontend provides config keys: 'subset' and 'how'
+            subset_cols = config.get('subset', []) # List of columns to consider (optional)
+            how_option = config.get('how', 'any')   # 'any' (default) or 'all'
+            
+            # 1. Validate inputs
+            if how_option not in ['any', 'all']:
+                execution_log.append(f"❌ [Step {node_id}] Invalid 'how' option '{how_option}'. Must be 'any' or 'all'.")
+                output_df = input_df
+            else:
+                # 2. Prepare subset list for pandas
+                if subset_cols:
+                    # Filter subset_cols to only include columns existing in the DataFrame
+                    valid_subset = [col for col in subset_cols if col in input_df.columns]
+                else:
+                    valid_subset = None # Pass None to check all columns (pandas default)
                     
-                elif node_type == 'Drop Null': # Assuming the node type is 'Drop Null' or similar
-                    # Configuration for pandas df.dropna()
-                    # Assuming frontend provides config keys: 'subset' and 'how'
-                    subset_cols = config.get('subset', []) # List of columns to consider (optional)
-                    how_option = config.get('how', 'any')   # 'any' (default) or 'all'
+                try:
+                    # 3. Apply dropna operation
+                    output_df = input_df.dropna(
+                        how=how_option,
+                        subset=valid_subset
+                    )
                     
-                    # 1. Validate inputs
-                    if how_option not in ['any', 'all']:
-                        execution_log.append(f"❌ [Step {node_id}] Invalid 'how' option '{how_option}'. Must be 'any' or 'all'.")
-                        output_df = input_df
-                    else:
-                        # 2. Prepare subset list for pandas
-                        if subset_cols:
-                            # Filter subset_cols to only include columns existing in the DataFrame
-                            valid_subset = [col for col in subset_cols if col in input_df.columns]
+                    rows_dropped = len(input_df) - len(output_df)
+                    execution_log.append(f"✅ [Step {node_id}] Dropped {rows_dropped} rows with null values (how='{how_option}'). Retained {len(output_df)} rows.")
+
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Failed to drop null values: {e}")
+                    output_df = input_df # Pass the original DataFrame if operation fails
+        elif node_type in ['SQL Database', 'MongoDB', 'OneDrive', 'Stream / Kafka']:
+            # In a real app, these would connect to external sources.
+            # Here we pass a mock empty DF or rely on Read Data to handle the actual fetch
+            # For simulation, we treat them as configuration nodes that Read Data uses.
+            execution_log.append(f"🔗 [Step {node_id}] {node_type} Configured")
+            output_df = None # These are sources, they don't output data directly until 'Read Data' uses them
+        
+
+        
+                        
+        elif node_type == 'Get Data Types':
+            output_df = pd.DataFrame(input_df.dtypes.astype(str)).reset_index()
+            output_df.columns = ['Column', 'Type']
+            
+        elif node_type == 'Get Shape':
+            output_df = pd.DataFrame([{'Rows': input_df.shape[0], 'Columns': input_df.shape[1]}])
+        
+        elif node_type == 'Word Cloud':
+            col = config.get('column')
+            max_words = int(config.get('maxWords', 100))
+            # GET HEIGHT FROM CONFIG (Default to 400 if missing)
+            img_height = int(config.get('height', 400)) 
+            
+            if HAS_WORDCLOUD and col and col in input_df.columns:
+                try:
+                    # Word frequencies from the shared text engine instead of one giant joined string
+                    freqs, info = top_terms(input_df[col], 1, max_words)
+                    if freqs:
+                        # Same frequencies and look -> same image: reuse the stored artifact, no rendering
+                        key = render_key('Word Cloud', freqs, 800, img_height, '#1e293b', 'Blues', max_words)
+                        name = artifacts.lookup(key)
+                        if name:
+                            execution_log.append(f"♻️ [Step {node_id}] Word Cloud unchanged, reusing {name[:12]}")
                         else:
-                            valid_subset = None # Pass None to check all columns (pandas default)
-                            
-                        try:
-                            # 3. Apply dropna operation
-                            output_df = input_df.dropna(
-                                how=how_option,
-                                subset=valid_subset
-                            )
-                            
-                            rows_dropped = len(input_df) - len(output_df)
-                            execution_log.append(f"✅ [Step {node_id}] Dropped {rows_dropped} rows with null values (how='{how_option}'). Retained {len(output_df)} rows.")
-
-                        except Exception as e:
-                            execution_log.append(f"❌ [Step {node_id}] Failed to drop null values: {e}")
-                            output_df = input_df # Pass the original DataFrame if operation fails
-                elif node_type in ['SQL Database', 'MongoDB', 'OneDrive', 'Stream / Kafka']:
-                    # In a real app, these would connect to external sources.
-                    # Here we pass a mock empty DF or rely on Read Data to handle the actual fetch
-                    # For simulation, we treat them as configuration nodes that Read Data uses.
-                    execution_log.append(f"🔗 [Step {node_id}] {node_type} Configured")
-                    output_df = None # These are sources, they don't output data directly until 'Read Data' uses them
+                            wc = WordCloud(
+                                width=800, 
+                                height=img_height,  # <--- UPDATED HERE
+                                background_color='#1e293b', 
+                                colormap='Blues',
+                                max_words=max_words
+                            ).generate_from_frequencies(dict(freqs))
+                            buffer = io.BytesIO()
+                            wc.to_image().save(buffer, format="PNG")
+                            name = artifacts.put(buffer.getvalue(), "png")
+                            artifacts.remember(key, name)
+                        
+                        # Store image URL (served by /api/artifacts with ETag / Range support)
+                        self.context_data[f"{node_id}_image"] = artifacts.url(name)
+                        output_df = pd.DataFrame([{"Status": "Generated"}]) 
+                except Exception as e:
+                    execution_log.append(f"❌ WordCloud Error: {e}")
+            else:
+                execution_log.append("⚠️ WordCloud skipped (Lib missing or no column)")
+                output_df = pd.DataFrame([{"Result": "Skipped"}])
+
+        # --- 2. CLEANING ---
+        elif node_type == 'Drop Duplicates':
+            cols = config.get('columns', [])
+            keep = config.get('keep', 'first')
+            if keep == 'false': keep = False
+            
+            if cols: output_df = input_df.drop_duplicates(subset=cols, keep=keep)
+            else: output_df = input_df.drop_duplicates(keep=keep)
+            execution_log.append(f"✅ Dropped duplicates. New count: {len(output_df)}")
+
+        elif node_type == 'Replace Value':
+            # column/oldValue/newValue + config.replacements, typed per column and applied as one mapping replace
+            rules = replace_rules(config)
+            if rules:
+                output_df, replaced = replace_values(input_df, rules)
+                missing = sorted({c for c, _, _ in rules} - set(replaced))
+                if replaced: execution_log.append(f"✅ [Step {node_id}] Replaced values in {', '.join(map(str, replaced))}")
+                if missing: execution_log.append(f"⚠️ [Step {node_id}] Replace Value: column(s) not found: {', '.join(missing)}")
+
+        elif node_type == 'Rename Columns':
+            old_name = config.get('oldName')
+            new_name = config.get('newName')
+            if old_name and new_name:
+                output_df = input_df.rename(columns={old_name: new_name})
+                execution_log.append(f"✅ [Step {node_id}] Renamed {old_name} to {new_name}")
+
+        elif node_type == 'Change Data Type':
+            # column(s) + dtype and config.casts: one astype per target type (see cleaning_engine)
+            plan = cast_plan(config)
+            output_df, cast, failed = change_types(input_df, plan, self.typed)
+            for dtype in dict.fromkeys(plan[c] for c in cast):
+                cols = [c for c in cast if plan[c] == dtype]
+                execution_log.append(f"✅ [Step {node_id}] Changed data type of {', '.join(map(str, cols))} to {dtype}")
+            for col, err in failed.items():
+                execution_log.append(f"⚠️ Type cast failed for {col}: {err}")
                 
-
+        elif node_type == 'Filter Date':
+                # Check for the new dateRanges configuration established in the frontend
+            date_ranges = config.get('dateRanges', [])
+            
+            if date_ranges:
+                try:
+                    # Assumes a new method to handle multiple date range conditions
+                    output_df = self._apply_date_range_filter(input_df, date_ranges)
+                    execution_log.append(f"✅ [Step {node_id}] Filtered date ranges down to {len(output_df)} rows")
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Failed to apply date range filter: {e}")
+                    # If filtering fails, we might want to stop or pass the original DataFrame
+                    output_df = input_df
+        # --- 3. FILTERING ---
+        elif node_type == 'Filter Rows':
+            conditions = config.get('conditions', [])
+            if conditions:
+                output_df = self._apply_multi_filter(input_df, conditions, config.get('logic', 'AND'))
+                execution_log.append(f"✅ [Step {node_id}] Filtered to {len(output_df)} rows")
+
+        # --- SELECT COLUMNS ---
+        elif node_type in ['Select Columns', 'List Columns']:
+            # Get the list of columns from the checkbox config
+            cols_to_keep = config.get('columns', [])
+            
+            if cols_to_keep and isinstance(cols_to_keep, list):
+                # Safety Check: Only keep columns that actually exist in the current dataframe
+                # This prevents crashes if a column was renamed or dropped earlier in the flow
+                valid_cols = [c for c in cols_to_keep if c in input_df.columns]
                 
-                                
-                elif node_type == 'Get Data Types':
-                    output_df = pd.DataFrame(input_df.dtypes.astype(str)).reset_index()
-                    output_df.columns = ['Column', 'Type']
-                    
-                elif node_type == 'Get Shape':
-                    output_df = pd.DataFrame([{'Rows': input_df.shape[0], 'Columns': input_df.shape[1]}])
+                if valid_cols:
+                    output_df = input_df[valid_cols].copy()
+                    execution_log.append(f"✅ Selected {len(valid_cols)} columns")
+                else:
+                    # Warning if none of the selected columns exist
+                    execution_log.append("⚠️ Warning: None of the selected columns were found in the data")
+                    output_df = pd.DataFrame() # Return empty DF to avoid downstream crashes
+            else:
+                # If user unchecked everything, return empty DF (or you could choose to return all)
+                execution_log.append("ℹ️ No columns selected")
+                output_df = input_df[[]].copy()
+
+        # --- 4. GROUPING & AGGREGATION ---
+        elif node_type == 'Group By':
+            output_df = self._apply_group(input_df, config)
+            execution_log.append(f"✅ [Step {node_id}] Grouped Data")
+
+        elif node_type == 'Pivot Table':
+            idx, c, v = config.get('index'), config.get('columns'), config.get('values')
+            if idx and v and idx in input_df.columns and v in input_df.columns: 
+                output_df = pivot(input_df, idx, c, v, config.get('aggFunc', 'sum'))
+            else:
+                output_df = input_df.copy()
+            execution_log.append(f"✅ [Step {node_id}] Pivot Table Created")
+        
+        elif node_type == 'Calculated Field':
+            # One or more {newColumn, expression} pairs, compiled by the safe expression engine (no eval)
+            calcs = calculations_from_config(config)
+            errors, _ = check_calculations(calcs, {c: str(t) for c, t in input_df.dtypes.items()})
+            if not calcs or errors:
+                execution_log.append(f"❌ [Step {node_id}] Calculated Field: {'; '.join(errors) or 'requires a newColumn name and an expression'}. Skipping.")
+                output_df = input_df
+            else:
+                try:
+                    output_df = evaluate_calculations(input_df, calcs, self.typed)
+                    execution_log.append(f"✅ [Step {node_id}] Created {', '.join(repr(n) for n, _ in calcs)} using: {'; '.join(e for _, e in calcs)}")
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Failed to evaluate calculation: {e}")
+                    output_df = input_df
+        
+        elif node_type == 'Sentiment Analysis':
+            col = config.get('column')
+            if col and col in input_df.columns:
+                try:
+                    # Each distinct text scored once, cached on disk by text hash (see sentiment_engine)
+                    scores, st = score_sentiment(input_df[col], float(config.get('threshold', 0.0)))
+                    output_df = input_df.assign(**{c: scores[c] for c in scores.columns})
+                    execution_log.append(f"✅ [Step {node_id}] Sentiment on {col}: {st['rows']} rows, {st['distinct']} distinct texts "
+                                         f"({st['cached']} cached, {st['scored']} scored" + (f" on {st['workers']} workers)" if st['workers'] > 1 else ")"))
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Sentiment Analysis failed: {e}")
+            else:
+                execution_log.append(f"⚠️ [Step {node_id}] Sentiment Analysis skipped: select a text column.")
+
+        elif node_type == 'Clustering':
+            features = cluster_columns(config, input_df, self.typed)
+            if features:
+                try:
+                    # MiniBatch fit above CLUSTER_MINIBATCH_ROWS, chunked label assignment (see clustering_engine)
+                    labels, summary, info = cluster_frame(features, config.get('k', 3), config.get('scale', True) is not False,
+                                                          config.get('maxK', 8))
+                    output_df = input_df.assign(Cluster=labels)
+                    self.context_data[f"{node_id}_clusters"] = summary.round(4).to_dict(orient='records')
+                    sizes = ', '.join(str(s) for s in summary['Size'])
+                    execution_log.append(f"✅ [Step {node_id}] Clustering ({info['method']}): k={info['k']} on {', '.join(features)} "
+                                         f"| sizes {sizes}" + (f" | {info['skipped']} rows with missing values unassigned" if info['skipped'] else "")
+                                         + (f" | auto-k silhouette {info['scores'][info['k']]:.3f}" if info['scores'] else ""))
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Clustering failed: {e}")
+            else:
+                execution_log.append(f"⚠️ [Step {node_id}] Clustering skipped: select numeric columns.")
+
+        elif node_type == 'Forecast':
+            date_col, value_col, group_col = config.get('dateColumn'), config.get('valueColumn'), config.get('groupColumn')
+            if date_col in input_df.columns and (not value_col or value_col in input_df.columns):
+                try:
+                    # Per-group fits on a process pool, fitted models cached by series fingerprint (see forecast_engine)
+                    output_df, info = forecast_frame(input_df, date_col, value_col, int(config.get('periods', 30)), config.get('freq', 'D'),
+                                                     config.get('agg', 'sum'), group_col if group_col in input_df.columns else None, self.typed)
+                    execution_log.append(f"✅ [Step {node_id}] Forecast {value_col or 'row count'} ({info['freq']}) {config.get('periods', 30)} periods ahead "
+                                         f"for {info['groups']} series: {info['fitted']} fitted" + (f" on {info['workers']} workers" if info['workers'] > 1 else "")
+                                         + f", {info['cached']} from cache")
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Forecast failed: {e}")
+            else:
+                execution_log.append(f"⚠️ [Step {node_id}] Forecast skipped: select a date column (and a numeric value column).")
+
+        # --- NEW: N-GRAMS ANALYSIS ---
+        elif node_type == 'N-Grams':
+            col = config.get('column')
+            n_val = int(config.get('n', 2)) # Default Bigram
+            if col and col in input_df.columns:
+                # Chunked top-k counting, each distinct text tokenized once (see text_engine)
+                terms, info = top_terms(input_df[col], n_val, 50)
+                if terms:
+                    output_df = pd.DataFrame(terms, columns=['N-Gram', 'Frequency'])
+                    execution_log.append(f"✅ Generated {n_val}-Grams from {info['distinct']} distinct texts in {info['chunks']} chunk(s)")
+
+        # --- NEW: WORD COUNT ---
+        elif node_type == 'Word Count':
+            col = config.get('column')
+            if col and col in input_df.columns:
+                output_df = input_df.assign(Word_Count=word_counts(input_df[col]))
+                execution_log.append(f"✅ Word counts calculated for {col}")
                 
-                elif node_type == 'Word Cloud':
-                    col = config.get('column')
-                    max_words = int(config.get('maxWords', 100))
-                    # GET HEIGHT FROM CONFIG (Default to 400 if missing)
-                    img_height = int(config.get('height', 400)) 
-                    
-                    if HAS_WORDCLOUD and col and col in input_df.columns:
-                        try:
-                            # Drop NAs and join text
-                            text_series = input_df[col].dropna().astype(str)
-                            if not text_series.empty:
-                                text = " ".join(text_series.tolist())
-                                
-                                # Generate with dynamic height
-                                wc = WordCloud(
-                                    width=800, 
-                                    height=img_height,  # <--- UPDATED HERE
-                                    background_color='#1e293b', 
-                                    colormap='Blues',
-                                    max_words=max_words
-                                ).generate(text)
-                                
-                                # Convert to Base64
-                                buffer = io.BytesIO()
-                                wc.to_image().save(buffer, format="PNG")
-                                img_str = base64.b64encode(buffer.getvalue()).decode()
-                                
-                                # Store image
-                                self.context_data[f"{node_id}_image"] = f"data:image/png;base64,{img_str}"
-                                output_df = pd.DataFrame([{"Status": "Generated"}]) 
-                        except Exception as e:
-                            execution_log.append(f"❌ WordCloud Error: {e}")
-                    else:
-                        execution_log.append("⚠️ WordCloud skipped (Lib missing or no column)")
-                        output_df = pd.DataFrame([{"Result": "Skipped"}])
-
-                # --- 2. CLEANING ---
-                elif node_type == 'Drop Duplicates':
-                    cols = config.get('columns', [])
-                    keep = config.get('keep', 'first')
-                    if keep == 'false': keep = False
-                    
-                    if cols: output_df = input_df.drop_duplicates(subset=cols, keep=keep)
-                    else: output_df = input_df.drop_duplicates(keep=keep)
-                    execution_log.append(f"✅ Dropped duplicates. New count: {len(output_df)}")
-
-                elif node_type == 'Replace Value':
-                    col = config.get('column')
-                    old_val = config.get('oldValue')
-                    new_val = config.get('newValue')
-                    if col and old_val is not None:
-                        output_df = input_df.copy()
-                        # Basic type inference for replacement
-                        if output_df[col].dtype == 'int64' or output_df[col].dtype == 'float64':
-                            try: 
-                                old_val = float(old_val)
-                                new_val = float(new_val)
-                                output_df[col] = output_df[col].replace(old_val, new_val)
-                            
-                            except: pass
-                        if output_df[col].dtype == 'object' or output_df[col].dtype == 'string':
-                            try: old_val = str(old_val); new_val = str(new_val); output_df[col] = output_df[col].replace(old_val, new_val)
-                            except: pass
-                        output_df[col] = output_df[col].replace(old_val, new_val)
-                        execution_log.append(f"✅ [Step {node_id}] Replaced values in {col}")
-
-                elif node_type == 'Rename Columns':
-                    old_name = config.get('oldName')
-                    new_name = config.get('newName')
-                    if old_name and new_name:
-                        output_df = input_df.rename(columns={old_name: new_name})
-                        execution_log.append(f"✅ [Step {node_id}] Renamed {old_name} to {new_name}")
-
-                elif node_type == 'Change Data Type':
-                    col = config.get('column')
-                    dtype = config.get('dtype')
-                    output_df = input_df.copy()
-                    if col and dtype and col in output_df.columns:
-                        try:
-                            if dtype == 'int': output_df[col] = pd.to_numeric(output_df[col], errors='coerce').fillna(0).astype(int)
-                            elif dtype == 'float': output_df[col] = pd.to_numeric(output_df[col], errors='coerce')
-                            elif dtype == 'datetime': output_df[col] = pd.to_datetime(output_df[col], errors='coerce')
-                            elif dtype == 'str': output_df[col] = output_df[col].astype(str)
-                            execution_log.append(f"✅ [Step {node_id}] Changed data type of {col} to {dtype}")
-                        except Exception as e:
-                            execution_log.append(f"⚠️ Type cast failed: {e}")
-                        
-                elif node_type == 'Filter Date':
-                        # Check for the new dateRanges configuration established in the frontend
-                    date_ranges = config.get('dateRanges', [])
-                    
-                    if date_ranges:
-                        try:
-                            # Assumes a new method to handle multiple date range conditions
-                            output_df = self._apply_date_range_filter(input_df, date_ranges)
-                            execution_log.append(f"✅ [Step {node_id}] Filtered date ranges down to {len(output_df)} rows")
-                        except Exception as e:
-                            execution_log.append(f"❌ [Step {node_id}] Failed to apply date range filter: {e}")
-                            # If filtering fails, we might want to stop or pass the original DataFrame
-                            output_df = input_df
-                # --- 3. FILTERING ---
-                elif node_type == 'Filter Rows':
-                    conditions = config.get('conditions', [])
-                    if conditions:
-                        output_df = self._apply_multi_filter(input_df, conditions)
-                        execution_log.append(f"✅ [Step {node_id}] Filtered to {len(output_df)} rows")
-
-                # --- SELECT COLUMNS ---
-                elif node_type in ['Select Columns', 'List Columns']:
-                    # Get the list of columns from the checkbox config
-                    cols_to_keep = config.get('columns', [])
-                    
-                    if cols_to_keep and isinstance(cols_to_keep, list):
-                        # Safety Check: Only keep columns that actually exist in the current dataframe
-                        # This prevents crashes if a column was renamed or dropped earlier in the flow
-                        valid_cols = [c for c in cols_to_keep if c in input_df.columns]
-                        
-                        if valid_cols:
-                            output_df = input_df[valid_cols].copy()
-                            execution_log.append(f"✅ Selected {len(valid_cols)} columns")
-                        else:
-                            # Warning if none of the selected columns exist
-                            execution_log.append("⚠️ Warning: None of the selected columns were found in the data")
-                            output_df = pd.DataFrame() # Return empty DF to avoid downstream crashes
+        # --- 6. SORTING & RANKING ---
+        elif node_type == 'Sort Data':
+            col = config.get('column')
+            order = config.get('order', 'asc')
+            if col:
+                output_df = input_df.sort_values(by=col, ascending=(order=='asc'), kind='stable') # Same tie order for every dtype
+                execution_log.append(f"✅ [Step {node_id}] Sorted by {col}")
+                
+        elif node_type == 'Trend Analysis':
+            date_col, period, agg = config.get('dateColumn'), config.get('period', 'ME'), config.get('agg', 'count')
+            val_col = config.get('valueColumn')
+            if date_col:
+                temp = input_df.copy()
+                temp[date_col] = dates = self.typed.datetime(input_df[date_col])
+                unparsed = int((dates.isna() & input_df[date_col].notna()).sum()) # Coerced to NaT, not missing
+                temp = temp[dates.notna()].set_index(date_col)
+                if agg == 'count': output_df = temp.resample(period).size().reset_index(name='Count')
+                else: output_df = temp.resample(period)[val_col].agg(agg).reset_index()
+                execution_log.append(f"✅ [Step {node_id}] Trend Analysis" + (f" | {unparsed} rows with unparseable {date_col} dropped" if unparsed else ""))
+                
+        elif node_type == 'Rank':
+            col = config.get('column')
+            method = config.get('method', 'average')
+            asc = config.get('order', 'asc') == 'asc'
+            if col:
+                output_df = input_df.copy()
+                output_df[f'{col}_rank'] = output_df[col].rank(method=method, ascending=asc)
+                execution_log.append(f"✅ [Step {node_id}] Ranked {col}")
+
+        # --- FALLBACK FOR VISUALIZATION ---
+        # Output keeps all (aggregated) rows; the chart payload is reduced from all of them (see chart_engine)
+        elif node_type in ['Bar Chart', 'Line Chart', 'Pie/Donut Chart', 'Area Chart']:
+            x_col = config.get('column')
+            y_col = config.get('yAxis')
+            
+            if x_col and x_col in input_df.columns:
+                # 1. Clean Data (Remove Nulls in X)
+                keep = input_df[x_col].notna().to_numpy()
+                temp_df = input_df[keep]
+                
+                # 2. Smart Aggregation logic:
+                # If X is categorical and not unique, we probably need to group it.
+                is_unique = temp_df[x_col].is_unique
+                if not is_unique:
+                    if y_col and y_col in temp_df.columns:
+                        # If Y exists, Group by X and Sum/Mean Y
+                        y_vals = self.typed.numeric(input_df[y_col])[keep]
+                        output_df = pd.DataFrame({x_col: temp_df[x_col], y_col: y_vals}).groupby(x_col, observed=True)[y_col].sum().reset_index()
                     else:
-                        # If user unchecked everything, return empty DF (or you could choose to return all)
-                        execution_log.append("ℹ️ No columns selected")
-                        output_df = input_df[[]].copy()
-
-                # --- 4. GROUPING & AGGREGATION ---
-                elif node_type == 'Group By':
-                    output_df = self._apply_group(input_df, config)
-                    execution_log.append(f"✅ [Step {node_id}] Grouped Data")
-
-                elif node_type == 'Pivot Table':
-                    idx, c, v = config.get('index'), config.get('columns'), config.get('values')
-                    if idx and v and idx in input_df.columns and v in input_df.columns: 
-                        output_df = input_df.pivot_table(index=idx, columns=c, values=v, aggfunc=config.get('aggFunc', 'sum')).reset_index()
+                        # If No Y, just Count occurrences of X
+                        output_df = value_counts(temp_df[x_col]).reset_index()
+                        output_df.columns = [x_col, 'Count'] # Standardize Y name
+                else:
+                    # Already unique/aggregated? Just pass it through.
+                    output_df = temp_df
+
+                # 3. Bounded chart payload
+                value_col = y_col if y_col in output_df.columns else ('Count' if 'Count' in output_df.columns else None)
+                if value_col:
+                    chart_df = output_df.assign(**{value_col: self.typed.numeric(output_df[value_col])})
+                    if node_type in ['Line Chart', 'Area Chart']:
+                        chart = reduce_line(chart_df, x_col, value_col, config.get('downsample', 'lttb'))
                     else:
-                        output_df = input_df.copy()
-                    execution_log.append(f"✅ [Step {node_id}] Pivot Table Created")
+                        chart = top_n(chart_df, x_col, value_col, int(config.get('topN', CHART_TOP_N)))
+                    self.context_data[f"{node_id}_chart"] = chart
+            execution_log.append(f"📊 [Step {node_id}] Chart Configured" + self._chart_note(node_id))
+
+        elif node_type == 'Histogram':
+            x_col = config.get('column')
+            y_col = config.get('yAxis')
+            if x_col and x_col in input_df.columns:
+                weights = y_col if y_col in input_df.columns else None
+                data = input_df.assign(**{weights: self.typed.numeric(input_df[weights])}) if weights else input_df
+                output_df, meta = reduce_histogram(data, x_col, weights, config.get('bins'))
+                self.context_data[f"{node_id}_chart"] = (output_df, meta)
+            execution_log.append(f"📊 [Step {node_id}] Histogram binned" + self._chart_note(node_id))
+
+        elif node_type == 'Scatter Plot':
+            output_df = input_df.copy()
+            # Ensure selected cols are numeric for scatter
+            x = config.get('column')
+            y = config.get('yAxis')
+            if x and y:
+                output_df[x] = self.typed.numeric(input_df[x])
+                output_df[y] = self.typed.numeric(input_df[y])
+                output_df = output_df.dropna(subset=[x, y])
+                self.context_data[f"{node_id}_chart"] = reduce_scatter(output_df, x, y, config.get('colorBy'))
+            execution_log.append(f"📊 [Step {node_id}] Scatter plot executed" + self._chart_note(node_id))
+
+        elif node_type == 'Heatmap':
+            x, y = config.get('column'), config.get('yAxis')
+            if x in input_df.columns and y in input_df.columns:
+                output_df, meta = reduce_heatmap(input_df, x, y)
+                self.context_data[f"{node_id}_chart"] = (output_df, meta)
+                execution_log.append(f"📊 [Step {node_id}] Heatmap {len(meta['x_labels'])} x {len(meta['y_labels'])} cells over {meta['source_rows']} rows")
+            else:
+                execution_log.append(f"⚠️ [Step {node_id}] Heatmap skipped: select an X and a Y column.")
                 
-                elif node_type == 'Calculated Field':
-                    # Retrieve configuration settings
-                    new_column = config.get('newColumn')
-                    expression = config.get('expression')
-                    
-                    # Check for mandatory inputs
-                    if not new_column or not expression:
-                        execution_log.append(f"❌ [Step {node_id}] Calculated Field requires a 'newColumn' name and an 'expression'. Skipping.")
-                        output_df = input_df
+        elif node_type == 'KPI Card':
+            col = config.get('column')
+            op = config.get('operation', 'count')
+            val = 0
+
+            if not col:
+                val = len(input_df)
+            elif col in input_df.columns:
+                approx = bool(config.get('approximate'))
+                try:
+                    if op == 'distinct': # Any column type, not just numbers
+                        if approx: val, self.context_data[f"{node_id}_approx"] = approx_distinct(input_df[col])
+                        else: val = input_df[col].nunique()
                     else:
-                        try:
-                            # Create a shallow copy of the DataFrame to operate on, ensuring input_df is not mutated
-                            output_df = input_df.copy()
-                            
-                            # Context for evaluation: only expose the DataFrame (df)
-                            # This is a critical security measure to prevent arbitrary code execution
-                            local_vars = {'df': output_df} 
-                            
-                            # Execute the expression and assign the result to the new column
-                            # The result of the expression (e.g., a pandas Series) is calculated using eval
-                            # and then assigned to the new column in the output_df.
-                            output_df[new_column] = eval(expression, {}, local_vars)
-                            
-                            execution_log.append(f"✅ [Step {node_id}] Created new column '{new_column}' using expression: {expression}")
-
-                        except KeyError as e:
-                            execution_log.append(f"❌ [Step {node_id}] Error: Column {e} not found in the DataFrame.")
-                            output_df = input_df
-                            
-                        except Exception as e:
-                            execution_log.append(f"❌ [Step {node_id}] Failed to execute calculation expression '{expression}': {e}")
-                            output_df = input_df
-                
-                # --- NEW: N-GRAMS ANALYSIS ---
-                elif node_type == 'N-Grams':
-                    col = config.get('column')
-                    n_val = int(config.get('n', 2)) # Default Bigram
-                    if col and col in input_df.columns:
-                        # Drop NA and ensure string
-                        text_data = input_df[col].dropna().astype(str)
-                        if not text_data.empty:
-                            vec = CountVectorizer(ngram_range=(n_val, n_val), stop_words='english', max_features=50)
-                            bag_of_words = vec.fit_transform(text_data)
-                            sum_words = bag_of_words.sum(axis=0) 
-                            words_freq = [(word, sum_words[0, idx]) for word, idx in vec.vocabulary_.items()]
-                            words_freq = sorted(words_freq, key = lambda x: x[1], reverse=True)
-                            output_df = pd.DataFrame(words_freq, columns=['N-Gram', 'Frequency'])
-                            execution_log.append(f"✅ Generated {n_val}-Grams")
-
-                # --- NEW: WORD COUNT ---
-                elif node_type == 'Word Count':
-                    col = config.get('column')
-                    if col and col in input_df.columns:
-                        output_df = input_df.copy()
-                        output_df['Word_Count'] = output_df[col].astype(str).apply(lambda x: len(x.split()))
-                        execution_log.append(f"✅ Word counts calculated for {col}")
-                        
-                # --- 6. SORTING & RANKING ---
-                elif node_type == 'Sort Data':
-                    col = config.get('column')
-                    order = config.get('order', 'asc')
-                    if col:
-                        output_df = input_df.sort_values(by=col, ascending=(order=='asc'))
-                        execution_log.append(f"✅ [Step {node_id}] Sorted by {col}")
-                        
-                elif node_type == 'Trend Analysis':
-                    date_col, period, agg = config.get('dateColumn'), config.get('period', 'M'), config.get('agg', 'count')
-                    val_col = config.get('valueColumn')
-                    if date_col:
-                        temp = input_df.copy()
-                        temp[date_col] = pd.to_datetime(temp[date_col])
-                        temp = temp.set_index(date_col)
-                        if agg == 'count': output_df = temp.resample(period).size().reset_index(name='Count')
-                        else: output_df = temp.resample(period)[val_col].agg(agg).reset_index()
-                        execution_log.append(f"✅ [Step {node_id}] Trend Analysis")
-                        
-                elif node_type == 'Rank':
-                    col = config.get('column')
-                    method = config.get('method', 'average')
-                    asc = config.get('order', 'asc') == 'asc'
-                    if col:
-                        output_df = input_df.copy()
-                        output_df[f'{col}_rank'] = output_df[col].rank(method=method, ascending=asc)
-                        execution_log.append(f"✅ [Step {node_id}] Ranked {col}")
-
-                # --- FALLBACK FOR VISUALIZATION ---
-                elif node_type in ['Bar Chart', 'Line Chart', 'Pie/Donut Chart', 'Histogram']:
-                    x_col = config.get('column')
-                    y_col = config.get('yAxis')
-                    
-                    if x_col and x_col in input_df.columns:
-                        temp_df = input_df.copy()
+                        clean_col = self.typed.numeric(input_df[col])
+                        if op == 'sum': val = clean_col.sum()
+                        elif op == 'avg': val = clean_col.mean()
+                        elif op == 'max': val = clean_col.max()
+                        elif op == 'min': val = clean_col.min()
+                        elif op == 'count': val = clean_col.count()
+                        elif op in QUANTILE_OPS:
+                            if approx: val, self.context_data[f"{node_id}_approx"] = approx_quantile(clean_col, QUANTILE_OPS[op])
+                            else: val = clean_col.quantile(QUANTILE_OPS[op])
+                except: val = len(input_df)
+                if f"{node_id}_approx" in self.context_data:
+                    info = self.context_data[f"{node_id}_approx"]
+                    execution_log.append(f"🎲 [Step {node_id}] KPI {op} of {col} ≈ {val:,.4g} ({info['method']}, between {info['low']:,.4g} and {info['high']:,.4g})")
+            output_df = kpi_frame(config, val)
+
+        elif node_type in ['Preview Data', 'Sample Data']:
+                # Retrieve configuration settings
+            mode = config.get('mode', 'head') # Default to 'head'
+            try:
+                # Ensure 'n' is an integer, defaulting to 10 if not found or invalid
+                n_rows = int(config.get('n', 10)) 
+            except ValueError:
+                execution_log.append(f"❌ [Step {node_id}] Invalid value provided for 'Number of Rows'. Using default (10).")
+                n_rows = 10
+            
+            # Check if the number of rows is positive
+            if n_rows <= 0:
+                execution_log.append(f"❌ [Step {node_id}] Number of Rows (n) must be a positive integer.")
+                output_df = input_df
+            else:
+                try:
+                    # Determine the sampling method based on the configuration mode
+                    if mode == 'head':
+                        # Select the first N rows
+                        output_df = input_df.head(n_rows)
                         
-                        # 1. Clean Data (Remove Nulls in X)
-                        temp_df = temp_df.dropna(subset=[x_col])
+                    elif mode == 'tail':
+                        # Select the last N rows
+                        output_df = input_df.tail(n_rows)
                         
-                        # 2. Smart Aggregation logic:
-                        # If X is categorical and not unique, we probably need to group it.
-                        is_unique = temp_df[x_col].is_unique
-                        if not is_unique:
-                            if y_col and y_col in temp_df.columns:
-                                # If Y exists, Group by X and Sum/Mean Y
-                                temp_df[y_col] = pd.to_numeric(temp_df[y_col], errors='coerce')
-                                output_df = temp_df.groupby(x_col)[y_col].sum().reset_index()
-                            else:
-                                # If No Y, just Count occurrences of X
-                                output_df = temp_df[x_col].value_counts().reset_index()
-                                output_df.columns = [x_col, 'Count'] # Standardize Y name
-                        else:
-                            # Already unique/aggregated? Just pass it through.
-                            output_df = temp_df
-                    execution_log.append(f"📊 [Step {node_id}] Chart Configured")
-                elif node_type == 'Scatter Plot':
-                    output_df = input_df.copy()
-                    # Ensure selected cols are numeric for scatter
-                    x = config.get('column')
-                    y = config.get('yAxis')
-                    if x and y:
-                        output_df[x] = pd.to_numeric(output_df[x], errors='coerce')
-                        output_df[y] = pd.to_numeric(output_df[y], errors='coerce')
-                        output_df = output_df.dropna(subset=[x, y])
-                    execution_log.append(f"📊 [Step {node_id}] Scatter plot executed")
+                    elif mode == 'random':
+                        # Select a random sample of N rows
+                        # Ensure n_rows does not exceed the total number of rows
+                        n_actual = min(n_rows, len(input_df))
+                        output_df = input_df.sample(n=n_actual, random_state=42) # Using a fixed random_state for reproducibility
                         
-                elif node_type == 'KPI Card':
-                    col = config.get('column')
-                    op = config.get('operation', 'count')
-                    val = 0
-                    label = config.get('label') or f"{op} {col if col else 'Rows'}"
-
-                    if not col:
-                        val = len(input_df)
-                        label = config.get('label') or "Total Rows"
-                    elif col in input_df.columns:
-                        try:
-                            clean_col = pd.to_numeric(input_df[col], errors='coerce')
-                            if op == 'sum': val = clean_col.sum()
-                            elif op == 'avg': val = clean_col.mean()
-                            elif op == 'max': val = clean_col.max()
-                            elif op == 'min': val = clean_col.min()
-                            elif op == 'count': val = clean_col.count()
-                        except: val = len(input_df)
-                    output_df = pd.DataFrame([{ label: round(val, 2) if isinstance(val, (int, float)) else val }])
-
-                elif node_type in ['Preview Data', 'Sample Data']:
-                        # Retrieve configuration settings
-                    mode = config.get('mode', 'head') # Default to 'head'
-                    try:
-                        # Ensure 'n' is an integer, defaulting to 10 if not found or invalid
-                        n_rows = int(config.get('n', 10)) 
-                    except ValueError:
-                        execution_log.append(f"❌ [Step {node_id}] Invalid value provided for 'Number of Rows'. Using default (10).")
-                        n_rows = 10
-                    
-                    # Check if the number of rows is positive
-                    if n_rows <= 0:
-                        execution_log.append(f"❌ [Step {node_id}] Number of Rows (n) must be a positive integer.")
-                        output_df = input_df
                     else:
-                        try:
-                            # Determine the sampling method based on the configuration mode
-                            if mode == 'head':
-                                # Select the first N rows
-                                output_df = input_df.head(n_rows)
-                                
-                            elif mode == 'tail':
-                                # Select the last N rows
-                                output_df = input_df.tail(n_rows)
-                                
-                            elif mode == 'random':
-                                # Select a random sample of N rows
-                                # Ensure n_rows does not exceed the total number of rows
-                                n_actual = min(n_rows, len(input_df))
-                                output_df = input_df.sample(n=n_actual, random_state=42) # Using a fixed random_state for reproducibility
-                                
-                            else:
-                                execution_log.append(f"❌ [Step {node_id}] Invalid selection mode '{mode}'. Defaulting to input data.")
-                                output_df = input_df
-
-                            # Log the successful operation
-                            execution_log.append(f"✅ [Step {node_id}] Sampled data using '{mode}' mode, resulting in {len(output_df)} rows.")
-
-                        except Exception as e:
-                            execution_log.append(f"❌ [Step {node_id}] Failed to sample data: {e}")
-                            output_df = input_df
-
-                elif node_type == 'Value Counts':
-                    col = config.get('column')
-                    # print("values counts columns is :",col)
-                    if col: output_df = input_df[col].value_counts().reset_index(name='Count').rename(columns={'index': col})
-                    execution_log.append(f"📊 [Step {node_id}] value counts executed on {col} column")
-                # SNAPSHOT
-                self.context_data[node_id] = output_df
-                
-                if output_df is not None and not output_df.empty:
-                    safe_df = output_df.replace([np.inf, -np.inf], np.nan).where(pd.notnull(output_df), None)
-                    is_display = any(x in node_type for x in DISPLAY_NODES)
-                    custom_image = self.context_data.get(f"{node_id}_image")
-                    # node_outputs[node_id] = {
-                    #     "id": node_id, "type": node_type, "config": config,
-                    #     "rows": len(safe_df), "columns": list(safe_df.columns),
-                    #     "preview": safe_df.head(100).to_dict(orient='records')
-                    # }
-                    node_outputs[node_id] = {
-                        "id": node_id, "type": node_type, "config": config,
-                        "rows": len(safe_df), "columns": list(safe_df.columns),
-                        "preview": safe_df.head(100).to_dict(orient='records') if is_display else [],
-                        "stats": safe_df.describe().to_dict() if not safe_df.empty else {},
-                        "image": custom_image # <--- CRITICAL: Pass to frontend
-                    }
-
-            except Exception as e:
-                execution_log.append(f"❌ Error at {node_type}: {str(e)}")
-                continue
+                        execution_log.append(f"❌ [Step {node_id}] Invalid selection mode '{mode}'. Defaulting to input data.")
+                        output_df = input_df
 
-        # FINAL OUTPUT
-        final_id = execution_order[-1] if execution_order else None
-        final_df = self.context_data.get(final_id)
+                    # Log the successful operation
+                    execution_log.append(f"✅ [Step {node_id}] Sampled data using '{mode}' mode, resulting in {len(output_df)} rows.")
+
+                except Exception as e:
+                    execution_log.append(f"❌ [Step {node_id}] Failed to sample data: {e}")
+                    output_df = input_df
+
+        elif node_type == 'Value Counts':
+            col = config.get('column')
+            # print("values counts columns is :",col)
+            if col and config.get('approximate'):
+                counts, info = approx_value_counts(input_df[col], int(config.get('topN') or 100))
+                output_df = counts.rename_axis(col).reset_index(name='Count')
+                self.context_data[f"{node_id}_approx"] = info
+                if output_df.empty: execution_log.append(f"⚠️ [Step {node_id}] approximate value counts on {col}: no value occurs more than "
+                                                         f"{info['max_error']:,} times in {info['rows']:,} rows (~{info['distinct']:,} distinct)")
+                else: execution_log.append(f"🎲 [Step {node_id}] approximate value counts on {col}: top {len(output_df)} of ~{info['distinct']:,} values, "
+                                           f"counts at most {info['max_error']:,} low")
+            else:
+                if col: output_df = value_counts(input_df[col]).reset_index(name='Count').rename(columns={'index': col})
+                execution_log.append(f"📊 [Step {node_id}] value counts executed on {col} column")
+        return output_df
+
+    def _snapshot(self, node_id, node_type, config, output_df, output, started, node_outputs, events):
+        """Records a finished node: its frame for the nodes downstream, its report output, its node_finished event."""
+        if self.sample_rows and output_df is not None:
+            scaled = self._estimate(node_id, node_type, config, output_df)
+            if scaled is not output_df: output_df, output = scaled, None # Worker output was built from the sample-scale frame
+        # SNAPSHOT
+        self.context_data[node_id] = output_df
+        ms = self.timings[node_id] = (time.perf_counter() - started) * 1000
+        _type_ms[node_type] = ms if node_type not in _type_ms else 0.7 * _type_ms[node_type] + 0.3 * ms
+        if output is None: output = self._node_output(node_id, node_type, config, output_df)
+        if output: node_outputs[node_id] = output
+        if events: events(self._finished_event(node_id, node_type, output_df, output, started))
+
+    def _estimate(self, node_id, node_type, config, df):
+        """
+        Preview pass: sums and counts of an aggregating node scaled from sample to full scale by the sampling
+        factor of its inputs (1 / fraction); flagged as not estimable when that factor is unknown.
+        """
+        if node_type == 'Read Data':
+            fraction = self.samples.get(node_id, {}).get('fraction')
+            self.scales[node_id] = 1 / fraction if fraction else None
+            return df
+        parents = list(self.graph.predecessors(node_id)) if self.graph.has_node(node_id) else []
+        factors = {self.scales.get(p) for p in parents} or {1.0} # No input: not read from a sample
+        factor = factors.pop() if len(factors) == 1 and node_type != 'Merge/Join' else None # A join of two samples shrinks by both
+        columns = sample_engine.additive_columns(node_type, config, df)
+        if not columns:
+            self.scales[node_id] = factor
+            return df
+        self.scales[node_id] = 1.0 if factor else None # Aggregates are full-scale estimates from here on
+        self.context_data[f"{node_id}_estimate"] = {"columns": columns, "scale": factor, "estimable": factor is not None}
+        return sample_engine.scale_up(df, columns, factor) if factor and factor != 1.0 else df
+
+    def _apply_plan(self, plan, node_map, node_outputs, execution_log, events):
+        """Gives merged nodes their twin's frame and output, reports what the optimizer eliminated and saved."""
+        saved = 0.0
+        for node_id, twin in plan["merged"].items():
+            node = node_map[node_id]
+            self.context_data[node_id] = self.context_data.get(twin)
+            if twin in node_outputs:
+                node_outputs[node_id] = {**node_outputs[twin], "id": node_id, "config": node.get('data', {}).get('config', {})}
+            saved += self.timings.get(twin, 0.0)
+            if events: events({"event": "node_finished", "node_id": node_id, "type": node.get('data', {}).get('typeLabel'),
+                               "status": "merged", "merged_into": twin, "ms": 0.0,
+                               "rows": node_outputs.get(twin, {}).get("rows", 0)})
+        for node_id in plan["skipped"]:
+            node_type = node_map[node_id].get('data', {}).get('typeLabel')
+            saved += _type_ms.get(node_type, 0.0) # Estimated from earlier runs of that node type
+            if events: events({"event": "node_finished", "node_id": node_id, "type": node_type, "status": "skipped", "ms": 0.0})
+        plan["saved_ms"] = round(saved, 1)
+        parts = []
+        if plan["merged"]: parts.append(f"merged {len(plan['merged'])} duplicate node(s) ({', '.join(f'{a}→{b}' for a, b in plan['merged'].items())})")
+        if plan["skipped"]: parts.append(f"skipped {len(plan['skipped'])} node(s) feeding no output ({', '.join(plan['skipped'])})")
+        execution_log.append(f"🧹 Optimizer: {'; '.join(parts)} | {plan['before']} → {plan['after']} nodes, ~{saved:.0f} ms saved")
+
+    def _node_failed(self, node_id, node_type, error, started, execution_log, events):
+        execution_log.append(f"❌ Error at {node_type}: {str(error)}")
+        if events: events({"event": "node_finished", "node_id": node_id, "type": node_type, "status": "error",
+                           "message": str(error), "ms": round((time.perf_counter() - started) * 1000, 1)})
+
+    def _collect(self, offload, node_map, needed, execution_log, node_outputs, events):
+        """Takes in the offloaded nodes that are done, waiting for those in `needed` (all when None)."""
+        for node_id, input_df, started, outcome in offload.done(needed):
+            node = node_map[node_id]
+            node_type = node.get('data', {}).get('typeLabel')
+            config = node.get('data', {}).get('config', {})
+            if isinstance(outcome, BrokenProcessPool): # Worker died: run it here instead
+                execution_log.append(f"⚠️ [Step {node_id}] Worker process failed, running {node_type} in-process")
+                try:
+                    outcome = (self._run_node(node_id, node, [], input_df, node_map, {}, execution_log), None, [], None)
+                except Exception as e:
+                    outcome = e
+            if isinstance(outcome, Exception):
+                self._node_failed(node_id, node_type, outcome, started, execution_log, events)
+                continue
+            output_df, output, log, ms = outcome
+            execution_log.extend(log)
+            if ms is not None: execution_log.append(f"🧵 [Step {node_id}] {node_type} ran in a worker process ({ms:.0f} ms)")
+            self._snapshot(node_id, node_type, config, output_df, output, started, node_outputs, events)
+
+    def _node_output(self, node_id, node_type, config, output_df):
+        """What the report/panel receives for a node: shape, preview (or chart payload), stats and side outputs."""
+        output = None
         
-        stats_dict = {}
-        if final_df is not None:
-            final_df = final_df.replace([np.inf, -np.inf], np.nan).where(pd.notnull(final_df), None)
-            try: stats_dict = final_df.describe(include=[np.number]).to_dict()
-            except: pass
-
-        return { "status": "success", "logs": execution_log, "node_outputs": node_outputs, "final_output": {"rows": len(final_df) if final_df is not None else 0, "preview": final_df.head(100).to_dict(orient='records') if final_df is not None else [], "stats": stats_dict} }
-
-    def _load_data(self, node, parents, map):
+        if output_df is not None and not output_df.empty:
+            safe_df = output_df.replace([np.inf, -np.inf], np.nan).where(pd.notnull(output_df), None)
+            is_display = any(x in node_type for x in DISPLAY_NODES)
+            custom_image = self.context_data.get(f"{node_id}_image")
+            # node_outputs[node_id] = {
+            #     "id": node_id, "type": node_type, "config": config,
+            #     "rows": len(safe_df), "columns": list(safe_df.columns),
+            #     "preview": safe_df.head(100).to_dict(orient='records')
+            # }
+            chart_df, chart_meta = self.context_data.get(f"{node_id}_chart", (None, None))
+            if chart_df is not None: # Charts ship their reduced frame, computed from every row
+                preview = chart_df.replace([np.inf, -np.inf], np.nan).astype(object).where(chart_df.notna(), None).to_dict(orient='records')
+            else:
+                preview = safe_df.head(100).to_dict(orient='records') if is_display else []
+            output = {
+                "id": node_id, "type": node_type, "config": config,
+                "rows": len(safe_df), "columns": list(safe_df.columns),
+                "preview": preview,
+                "stats": safe_df.describe().to_dict() if not safe_df.empty else {},
+                "image": custom_image # <--- CRITICAL: Pass to frontend
+            }
+            if f"{node_id}_memory" in self.context_data: output["memory"] = self.context_data[f"{node_id}_memory"]
+            if f"{node_id}_clusters" in self.context_data: output["clusters"] = self.context_data[f"{node_id}_clusters"]
+            if f"{node_id}_approx" in self.context_data: output["approx"] = self.context_data[f"{node_id}_approx"]
+            if f"{node_id}_estimate" in self.context_data: output["estimate"] = self.context_data[f"{node_id}_estimate"]
+            if f"{node_id}_refresh" in self.context_data: output["refresh"] = self.context_data[f"{node_id}_refresh"]
+            if chart_meta: output["chart"] = chart_meta
+
+        return output
+
+    def _finished_event(self, node_id, node_type, df, output, started, preview_rows=5):
+        """node_finished event: shape, timing and the first rows (or the chart payload's) of a node's output."""
+        event = {"event": "node_finished", "node_id": node_id, "type": node_type, "status": "ok",
+                 "ms": round((time.perf_counter() - started) * 1000, 1), "rows": 0, "columns": [], "preview": []}
+        if df is None: return event
+        event.update(rows=len(df), columns=[str(c) for c in df.columns])
+        if output and output.get("chart"): event.update(preview=output["preview"][:preview_rows], chart=output["chart"])
+        else:
+            head = df.head(preview_rows).replace([np.inf, -np.inf], np.nan)
+            event["preview"] = head.astype(object).where(head.notna(), None).to_dict(orient='records')
+        if output and output.get("image"): event["image"] = output["image"]
+        return event
+
+    def _source(self, node, parents, map):
+        """(path, sheet, is_excel) of the file a Read Data node reads, or None."""
         config = node['data'].get('config', {})
         # 1. Check direct config
         if config.get('selectedFile'):
             path = config['selectedFile']['path']
             if not os.path.exists(path): path = os.path.join("temp_uploads", os.path.basename(path))
-            if path.endswith('.xlsx'): return pd.read_excel(path, sheet_name=config.get('selectedSheet', 0))
-            return pd.read_csv(path)
+            return path, config.get('selectedSheet', 0), path.endswith('.xlsx')
         
         # 2. Check Parent Config (Upload Node)
         if parents:
@@ -580,96 +813,118 @@ class WorkflowEngine:
                 if files:
                     path = files[0]['path']
                     if not os.path.exists(path): path = os.path.join("temp_uploads", os.path.basename(path))
-                    return pd.read_csv(path) if path.endswith('.csv') else pd.read_excel(path)
-        return pd.DataFrame()
-
-    def _apply_multi_filter(self, df, conditions):
-        for cond in conditions:
-            col, op, val = cond.get('column'), cond.get('operator'), cond.get('value')
-            if not col: continue
-            if op == 'contains': df = df[df[col].astype(str).str.contains(str(val), na=False)]
-            else:
-                try: num_val = float(val)
-                except: num_val = val
-                if op == '==': df = df[df[col] == num_val]
-                elif op == '!=': df = df[df[col] != num_val]
-                elif op == '>': df = df[pd.to_numeric(df[col], errors='coerce') > num_val]
-                elif op == '<': df = df[pd.to_numeric(df[col], errors='coerce') < num_val]
+                    return path, 0, not path.endswith('.csv')
+        return None
+
+    def _load_data(self, node, parents, map, node_id=None):
+        source = self._source(node, parents, map)
+        if not source: return pd.DataFrame()
+        path, sheet, is_excel = source
+        if node_id and incremental_engine.enabled(path, is_excel): # Only the appended tail is parsed (see incremental_engine)
+            df, delta, info = incremental_engine.load(path, sheet)
+            lineage = info.pop("lineage")
+            if lineage:
+                self.lineage[node_id] = lineage
+                if delta is not None: self.deltas[node_id] = delta
+            self.context_data[f"{node_id}_refresh"] = info
+        else:
+            df = pd.read_excel(path, sheet_name=sheet) if is_excel else pd.read_csv(path)
+        try: # Keep a sample for the preview pass of later progressive runs
+            sample_engine.remember(path, sheet, df, node['data'].get('config', {}).get('sampleStratify'))
+        except Exception as e:
+            print(f"⚠️ Could not store a sample of {path}: {e}")
+        return df
+
+    def _incremental(self, node_id, node, parent_id, input_df, execution_log):
+        """
+        (True, output) for a node fed by a tracked source: row-wise nodes also run on the appended rows, mergeable
+        nodes merge them into their saved state (see incremental_engine). (False, None): run the node normally.
+        """
+        node_type = node.get('data', {}).get('typeLabel')
+        config = node.get('data', {}).get('config', {})
+        lineage, delta = self.lineage[parent_id].child(node), self.deltas.get(parent_id)
+        if node_type in ROW_WISE:
+            output_df = self._run_node(node_id, node, [parent_id], input_df, {}, {}, execution_log)
+            if output_df is not None:
+                self.lineage[node_id] = lineage
+                if delta is not None: self.deltas[node_id] = self._run_node(node_id, node, [parent_id], delta, {}, {}, [])
+            return True, output_df
+        if input_df is None or not incremental_engine.mergeable(node_type, config, input_df): return False, None
+
+        state = lineage.previous() if delta is not None else None
+        if state is not None:
+            state = incremental_engine.merge(node_type, config, state, incremental_engine.partial(node_type, config, delta, self.typed.numeric))
+            execution_log.append(f"♻️ [Step {node_id}] {node_type} updated from {len(delta)} appended rows")
+        else: # First run, or the saved state does not cover the rows before the delta
+            state = incremental_engine.partial(node_type, config, input_df, self.typed.numeric)
+            execution_log.append(f"✅ [Step {node_id}] {node_type} computed over {len(input_df)} rows")
+        lineage.save(state)
+        if node_type == 'KPI Card': return True, kpi_frame(config, incremental_engine.kpi_value(config, state))
+        return True, incremental_engine.finalize(node_type, config, state)
+
+    def _load_sample(self, node_id, node, parents, map):
+        """Read Data in a preview pass: a sample of the source (see sample_engine)."""
+        source = self._source(node, parents, map)
+        if not source: return pd.DataFrame()
+        df, info = sample_engine.load_sample(*source, k=self.sample_rows)
+        self.samples[node_id] = info
         return df
 
+    def _apply_multi_input(self, node_id, node_type, config, ports, log):
+        frames = {p: [self.context_data[s] for s in srcs if self.context_data.get(s) is not None] for p, srcs in ports.items()}
+        if node_type == 'Concatenate':
+            if not frames['inputs']:
+                log.append(f"⚠️ [Step {node_id}] Skipped 'Concatenate': No input data from previous steps.")
+                return None
+            axis = config.get('axis', 'rows')
+            out = concat_frames(frames['inputs'], axis, config.get('ignore_index', True))
+            log.append(f"✅ [Step {node_id}] Concatenated {len(frames['inputs'])} inputs ({axis}): {len(out)} rows x {len(out.columns)} columns")
+            return out
+
+        left, right = frames['left'][:1], frames['right'][:1]
+        if not (left and right):
+            connected = left or right
+            log.append(f"⚠️ [Step {node_id}] Merge/Join needs a 'left' and a 'right' input; "
+                       + ("passing the connected input through." if connected else "no input data from previous steps."))
+            return connected[0] if connected else None
+        how = config.get('how', 'inner')
+        try:
+            left_on, right_on = join_keys(config)
+            out, info = merge_frames(left[0], right[0], how, left_on, right_on, config.get('validate'),
+                                     tuple(config.get('suffixes') or ('_x', '_y')))
+        except (ValueError, KeyError) as e:
+            log.append(f"❌ [Step {node_id}] Merge/Join: {e}")
+            return None
+        keys = f"on {left_on}" if left_on == right_on else f"on {left_on} = {right_on}" if left_on else "on the index"
+        log.append(f"✅ [Step {node_id}] {how.capitalize()} join {keys}: {len(left[0])} x {len(right[0])} -> {len(out)} rows "
+                   f"({info['strategy']}, {info['build']} side hashed)")
+        return out
+
+    def _chart_note(self, node_id):
+        """' (reducer: N -> M points)' for the log when a chart payload was reduced."""
+        _, meta = self.context_data.get(f"{node_id}_chart", (None, None))
+        if not meta or meta["reducer"] == "none": return ""
+        return f" ({meta['reducer']}: {meta['source_rows']} -> {meta['points']} points)"
+
+    def _apply_multi_filter(self, df, conditions, logic='AND'):
+        # Compiled once per config, evaluated as a single boolean mask (see filter_engine)
+        return compile_conditions(conditions, logic).apply(df, ColumnCoercer(df, self.typed))
+
     def _apply_group(self, df, config):
         cols = config.get('groupColumns', [])
         # Fallback if user used single select
         if not cols and config.get('groupColumn'): cols = [config.get('groupColumn')]
-        
-        aggs = config.get('aggregations', [])
-        
         if not cols: return df
-        
-        # If no aggs defined, default to count
-        if not aggs:
-            return df.groupby(cols).size().reset_index(name='Count')
-
-        agg_dict = {}
-        for agg in aggs:
-            if agg.get('column') and agg.get('func'):
-                # Pandas agg dict
-                c = agg['column']
-                f = agg['func']
-                if c in agg_dict:
-                    if isinstance(agg_dict[c], list): agg_dict[c].append(f)
-                    else: agg_dict[c] = [agg_dict[c], f]
-                else:
-                    agg_dict[c] = f
+        # One factorization + one aggregation pass (see aggregation_engine); no aggregations -> Count
+        return aggregate(df, cols, config.get('aggregations', []), sort=config.get('sort', True))
 
-        grouped = df.groupby(cols).agg(agg_dict).reset_index()
-        
-        # Flatten MultiIndex columns if created
-        if isinstance(grouped.columns, pd.MultiIndex):
-            grouped.columns = ['_'.join(col).strip() if col[1] else col[0] for col in grouped.columns.values]
-            
-        return grouped
     def _apply_date_range_filter(self, df, date_ranges):
         """
         Applies a list of date range conditions to the DataFrame.
         Each item in date_ranges is expected to be: 
         {'column': 'date_col', 'startDate': '2023-01-01', 'endDate': '2023-12-31'}
+        Ranges on missing columns are skipped; each column is parsed to datetime once.
         """
-        
-        # 1. Start with a boolean series that includes all rows
-        combined_mask = pd.Series(True, index=df.index) 
-
-        for range_item in date_ranges:
-            column = range_item.get('column')
-            start_date = range_item.get('startDate')
-            end_date = range_item.get('endDate')
-
-            if not column or not start_date or not end_date:
-                # Skip incomplete conditions
-                continue
-
-            # Ensure the column is in datetime format for comparison
-            # Handle potential errors during conversion (e.g., if the column isn't a valid date)
-            try:
-                date_series = pd.to_datetime(df[column])
-            except KeyError:
-                # Column not found, skip this rule
-                continue
-            except Exception as e:
-                # Failed to convert column to datetime, raise error or skip
-                print(f"Warning: Column '{column}' could not be converted to datetime. Error: {e}")
-                continue
-
-            # 2. Create the mask for the current date range condition: (date >= start) AND (date <= end)
-            start_mask = date_series >= start_date
-            end_mask = date_series <= end_date
-            
-            # This range's specific mask
-            range_mask = start_mask & end_mask
-            
-            # 3. Combine with the master mask using the AND operator (default for sequential filters)
-            combined_mask = combined_mask & range_mask
-
-        # 4. Apply the final combined mask to filter the DataFrame
-        return df[combined_mask]
+        valid_ranges = [r for r in date_ranges if r.get('column') in df.columns]
+        return compile_date_ranges(valid_ranges).apply(df, ColumnCoercer(df, self.typed))
 engine = WorkflowEngine()
\ No newline at end of file
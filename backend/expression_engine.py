@@ -0,0 +1,486 @@
+import ast
+import difflib
+import operator
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# =========================================================================
+# SAFE EXPRESSION COMPILER (Calculated Field)
+# =========================================================================
+# Replaces eval(). Expressions use Python syntax but only a whitelisted subset
+# of it is accepted: the text is parsed with ast, translated to a small IR,
+# type-checked against the input schema and then evaluated as whole-column
+# NumPy / pandas operations. Nothing is ever executed by the interpreter.
+#
+# Column references:   Price   df['Unit Price']   df.Price   col('Unit Price')
+# Operators:           + - * / // % **   == != < <= > >=   and or not   in [..]
+#                      & | ~ are read as and / or / not (legacy pandas masks)
+# Conditionals:        a if cond else b   iif(cond, a, b)   where(cond, a, b)
+# Functions:           see FUNCTIONS below; x.upper(), x.str.upper(), x.dt.year
+#                      and x.fillna(0) are accepted as aliases of the call form.
+#
+# Compiled expressions are cached on their text (LRU), so re-running a flow
+# does not re-parse. Several calculations in one node share one column
+# environment and are assigned to the frame in a single step.
+
+MAX_EXPRESSION_CHARS = 2000
+MAX_DEPTH = 60
+MAX_COMPILED = 256
+
+_cache_lock = threading.Lock()
+_compiled = OrderedDict()
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+# --- VALUE HELPERS ---
+
+def _is_text(v):
+    if isinstance(v, str): return True
+    if isinstance(v, pd.Series):
+        return (pd.api.types.is_object_dtype(v) or pd.api.types.is_string_dtype(v)
+                or isinstance(v.dtype, pd.CategoricalDtype))
+    return False
+
+
+def _is_dt(v):
+    if isinstance(v, (pd.Timestamp, pd.Timedelta)): return True
+    return isinstance(v, pd.Series) and (pd.api.types.is_datetime64_any_dtype(v) or pd.api.types.is_timedelta64_dtype(v))
+
+
+def _num(v):
+    if isinstance(v, pd.Series):
+        if pd.api.types.is_numeric_dtype(v) or pd.api.types.is_bool_dtype(v):
+            return v.to_numpy(dtype='float64', na_value=np.nan)
+        return pd.to_numeric(v, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    if isinstance(v, str):
+        try: return float(v)
+        except ValueError: return np.nan
+    return v
+
+
+def _bool(v):
+    if isinstance(v, pd.Series): return v.to_numpy(dtype=bool, na_value=False)
+    if isinstance(v, np.ndarray): return v.astype(bool) if v.dtype != bool else v
+    return bool(v)
+
+
+class ColumnEnv:
+    """Columns of one frame, each fetched and converted once per evaluation."""
+
+    def __init__(self, df, typed=None):
+        self.df = df
+        self.index = df.index
+        self.typed = typed
+        self.extra = {}
+        self._cache = {}
+
+    def get(self, name):
+        if name in self.extra: return self.extra[name]
+        if name not in self._cache:
+            s = self.df[name]
+            if isinstance(s.dtype, np.dtype) and (pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s)):
+                arr = s.to_numpy()
+                if arr.dtype.kind in 'iuf' and arr.dtype.itemsize < 8: # Downcast columns: widen so Qty * Price cannot overflow
+                    arr = arr.astype('float64' if arr.dtype.kind == 'f' else 'int64')
+                self._cache[name] = arr
+            elif pd.api.types.is_numeric_dtype(s): # Nullable Int64/Float64
+                self._cache[name] = s.to_numpy(dtype='float64', na_value=np.nan)
+            else:
+                self._cache[name] = s
+        return self._cache[name]
+
+    def series(self, v):
+        if isinstance(v, pd.Series): return v
+        if np.ndim(v) == 0: return pd.Series([v] * len(self.index), index=self.index)
+        return pd.Series(v, index=self.index)
+
+    def text(self, v):
+        if isinstance(v, str): return v
+        if _is_text(v): return v if not isinstance(v.dtype, pd.CategoricalDtype) else v.astype(str)
+        s = self.series(v)
+        return s.astype(str).where(s.notna())
+
+    def dates(self, v):
+        if isinstance(v, str): return pd.Timestamp(v)
+        if isinstance(v, pd.Series) and pd.api.types.is_datetime64_any_dtype(v): return v
+        s = self.series(v)
+        if self.typed is not None: return self.typed.datetime(s)
+        return pd.to_datetime(s, errors='coerce')
+
+
+# --- OPERATORS ---
+
+BIN_OPS = {ast.Add: ('+', operator.add), ast.Sub: ('-', operator.sub), ast.Mult: ('*', operator.mul),
+           ast.Div: ('/', operator.truediv), ast.FloorDiv: ('//', operator.floordiv), ast.Mod: ('%', operator.mod),
+           ast.Pow: ('**', operator.pow)}
+CMP_OPS = {ast.Eq: ('==', operator.eq), ast.NotEq: ('!=', operator.ne), ast.Lt: ('<', operator.lt),
+           ast.LtE: ('<=', operator.le), ast.Gt: ('>', operator.gt), ast.GtE: ('>=', operator.ge)}
+BIN_FUNCS = {sym: fn for sym, fn in BIN_OPS.values()}
+CMP_FUNCS = {sym: fn for sym, fn in CMP_OPS.values()}
+
+
+def _binop(env, op, a, b):
+    if op == '+' and (_is_text(a) or _is_text(b)): return env.text(a) + env.text(b)
+    if _is_dt(a) or _is_dt(b):
+        if isinstance(a, str): a = pd.Timestamp(a)
+        if isinstance(b, str): b = pd.Timestamp(b)
+        return BIN_FUNCS[op](a, b)
+    if op == '**': a = np.asarray(_num(a), dtype='float64') # int ** negative int is an error in NumPy
+    return BIN_FUNCS[op](_num(a), _num(b))
+
+
+def _compare(env, op, a, b):
+    fn = CMP_FUNCS[op]
+    if _is_dt(a) or _is_dt(b): out = fn(env.dates(a), env.dates(b))
+    elif (_is_text(a) and _is_text(b)) or ((_is_text(a) or _is_text(b)) and op in ('==', '!=')):
+        a, b = env.text(a), env.text(b)
+        if isinstance(a, str) and isinstance(b, str): return fn(a, b)
+        out = fn(a, b)
+    else: return fn(_num(a), _num(b))
+    return _bool(out)
+
+
+def _round(env, x, n=0): return np.round(_num(x), int(n))
+def _substr(env, x, start, length=None):
+    start = int(start)
+    return env.text(x).str.slice(start, None if length is None else start + int(length))
+def _coalesce(env, *args):
+    out = env.series(args[0])
+    for a in args[1:]: out = out.fillna(env.series(a))
+    return out
+def _date_diff(env, end, start, unit='days'):
+    unit = {'day': 'D', 'days': 'D', 'hour': 'h', 'hours': 'h', 'minute': 'min', 'minutes': 'min',
+            'second': 's', 'seconds': 's', 'week': 'W', 'weeks': 'W'}.get(str(unit).lower())
+    if unit is None: raise ExpressionError("date_diff unit must be days, hours, minutes, seconds or weeks")
+    delta = env.dates(end) - env.dates(start)
+    return delta / pd.Timedelta(1, unit=unit)
+def _extreme(reduce):
+    return lambda env, *args: reduce.reduce(np.broadcast_arrays(*[np.asarray(_num(a), dtype='float64') for a in args]))
+def _dt_part(attr):
+    return lambda env, x: getattr(env.dates(x).dt, attr).to_numpy(dtype='float64', na_value=np.nan)
+
+
+# name -> (min args, max args, argument kind, result kind, impl(env, *args))
+# Kinds: num, text, date, bool, any.
+FUNCTIONS = {
+    # Numeric
+    'abs': (1, 1, 'num', 'num', lambda env, x: np.abs(_num(x))),
+    'round': (1, 2, 'num', 'num', _round),
+    'sqrt': (1, 1, 'num', 'num', lambda env, x: np.sqrt(_num(x))),
+    'log': (1, 1, 'num', 'num', lambda env, x: np.log(_num(x))),
+    'log10': (1, 1, 'num', 'num', lambda env, x: np.log10(_num(x))),
+    'exp': (1, 1, 'num', 'num', lambda env, x: np.exp(_num(x))),
+    'floor': (1, 1, 'num', 'num', lambda env, x: np.floor(_num(x))),
+    'ceil': (1, 1, 'num', 'num', lambda env, x: np.ceil(_num(x))),
+    'min': (2, 8, 'num', 'num', _extreme(np.fmin)),
+    'max': (2, 8, 'num', 'num', _extreme(np.fmax)),
+    'to_number': (1, 1, None, 'num', lambda env, x: _num(env.series(x))),
+    # Nulls / conditionals
+    'isnull': (1, 1, None, 'bool', lambda env, x: env.series(x).isna().to_numpy()),
+    'notnull': (1, 1, None, 'bool', lambda env, x: env.series(x).notna().to_numpy()),
+    'coalesce': (2, 8, None, 'same', _coalesce),
+    'iif': (3, 3, None, 'branch', None), # Lowered to the conditional IR node
+    'where': (3, 3, None, 'branch', None),
+    # Text
+    'upper': (1, 1, 'text', 'text', lambda env, x: env.text(x).str.upper()),
+    'lower': (1, 1, 'text', 'text', lambda env, x: env.text(x).str.lower()),
+    'strip': (1, 1, 'text', 'text', lambda env, x: env.text(x).str.strip()),
+    'length': (1, 1, 'text', 'num', lambda env, x: env.text(x).str.len().to_numpy(dtype='float64', na_value=np.nan)),
+    'contains': (2, 2, 'text', 'bool', lambda env, x, s: _bool(env.text(x).str.contains(str(s), regex=False, na=False))),
+    'startswith': (2, 2, 'text', 'bool', lambda env, x, s: _bool(env.text(x).str.startswith(str(s), na=False))),
+    'endswith': (2, 2, 'text', 'bool', lambda env, x, s: _bool(env.text(x).str.endswith(str(s), na=False))),
+    'replace': (3, 3, 'text', 'text', lambda env, x, old, new: env.text(x).str.replace(str(old), str(new), regex=False)),
+    'substr': (2, 3, 'text', 'text', _substr),
+    'concat': (2, 16, None, 'text', lambda env, *args: _concat(env, args)),
+    'to_text': (1, 1, None, 'text', lambda env, x: env.text(x)),
+    # Dates
+    'to_date': (1, 1, 'date', 'date', lambda env, x: env.dates(x)),
+    'year': (1, 1, 'date', 'num', _dt_part('year')),
+    'month': (1, 1, 'date', 'num', _dt_part('month')),
+    'day': (1, 1, 'date', 'num', _dt_part('day')),
+    'hour': (1, 1, 'date', 'num', _dt_part('hour')),
+    'weekday': (1, 1, 'date', 'num', _dt_part('weekday')),
+    'quarter': (1, 1, 'date', 'num', _dt_part('quarter')),
+    'date_diff': (2, 3, 'date', 'num', _date_diff),
+    'today': (0, 0, None, 'date', lambda env: pd.Timestamp.today().normalize()),
+}
+
+
+def _concat(env, args):
+    out = env.text(args[0])
+    for a in args[1:]: out = out + env.text(a)
+    return out
+
+
+# Method / accessor spellings accepted for pandas-style expressions
+METHOD_ALIASES = {'fillna': 'coalesce', 'isna': 'isnull', 'notna': 'notnull', 'len': 'length', 'startsWith': 'startswith',
+                  'weekday': 'weekday', 'dayofweek': 'weekday', 'slice': 'substr'}
+ACCESSORS = {'str', 'dt'}
+ATTRIBUTE_FUNCS = {'year', 'month', 'day', 'hour', 'weekday', 'dayofweek', 'quarter'} # x.dt.year without ()
+
+
+# =========================================================================
+# PARSER: python ast -> IR tuples
+# =========================================================================
+# ('const', v) ('col', name) ('list', [v]) ('bin', op, a, b) ('neg', a) ('not', a)
+# ('cmp', op, a, b) ('in', a, values, negate) ('bool', 'and'|'or', [args])
+# ('if', cond, a, b) ('call', name, [args])
+
+def _dunder(name):
+    return name.startswith('__') and name.endswith('__') # Bare names / df.attr only: df['__x__'] stays a column
+
+
+class _Parser:
+    def __init__(self):
+        self.columns = []
+
+    def parse(self, text):
+        if len(text) > MAX_EXPRESSION_CHARS: raise ExpressionError(f"Expression longer than {MAX_EXPRESSION_CHARS} characters")
+        try: tree = ast.parse(text.strip(), mode='eval')
+        except SyntaxError as e: raise ExpressionError(f"Syntax error at column {e.offset}: {e.msg}")
+        return self.visit(tree.body, 0)
+
+    def _column(self, name):
+        if name not in self.columns: self.columns.append(name)
+        return ('col', name)
+
+    def visit(self, node, depth):
+        if depth > MAX_DEPTH: raise ExpressionError("Expression is nested too deeply")
+        v = lambda n: self.visit(n, depth + 1)
+
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool, type(None))): raise ExpressionError(f"Unsupported literal {node.value!r}")
+            return ('const', node.value)
+        if isinstance(node, ast.Name):
+            if node.id == 'df': raise ExpressionError("Use df['Column'] to reference a column")
+            if _dunder(node.id): raise ExpressionError(f"Unsupported name '{node.id}'")
+            return self._column(node.id)
+        if isinstance(node, ast.Subscript): # df['Col']
+            key = node.slice.value if isinstance(node.slice, ast.Constant) else None
+            if isinstance(node.value, ast.Name) and node.value.id == 'df' and isinstance(key, str): return self._column(key)
+            raise ExpressionError("Only df['Column'] subscripts are allowed")
+        if isinstance(node, ast.Attribute):
+            if _dunder(node.attr): raise ExpressionError(f"Unsupported attribute '.{node.attr}'")
+            if isinstance(node.value, ast.Name) and node.value.id == 'df': return self._column(node.attr) # df.Col
+            if node.attr in ATTRIBUTE_FUNCS: return ('call', METHOD_ALIASES.get(node.attr, node.attr), [self._receiver(node.value, depth)])
+            raise ExpressionError(f"Unsupported attribute '.{node.attr}'")
+        if isinstance(node, (ast.List, ast.Tuple)):
+            items = [v(e) for e in node.elts]
+            if any(i[0] != 'const' for i in items): raise ExpressionError("Lists may only contain literal values")
+            return ('list', [i[1] for i in items])
+        if isinstance(node, ast.BinOp):
+            if isinstance(node.op, (ast.BitAnd, ast.BitOr)): # Legacy pandas masks: (df['a'] > 1) & (df['b'] < 2)
+                return ('bool', 'and' if isinstance(node.op, ast.BitAnd) else 'or', [v(node.left), v(node.right)])
+            if type(node.op) not in BIN_OPS: raise ExpressionError(f"Unsupported operator {type(node.op).__name__}")
+            return ('bin', BIN_OPS[type(node.op)][0], v(node.left), v(node.right))
+        if isinstance(node, ast.UnaryOp):
+            if isinstance(node.op, ast.USub): return ('neg', v(node.operand))
+            if isinstance(node.op, ast.UAdd): return v(node.operand)
+            if isinstance(node.op, (ast.Not, ast.Invert)): return ('not', v(node.operand)) # ~mask, as pandas flows write it
+            raise ExpressionError("Unsupported unary operator")
+        if isinstance(node, ast.BoolOp):
+            return ('bool', 'and' if isinstance(node.op, ast.And) else 'or', [v(x) for x in node.values])
+        if isinstance(node, ast.Compare):
+            parts, left = [], v(node.left)
+            for op, comp in zip(node.ops, node.comparators):
+                right = v(comp)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if right[0] != 'list': raise ExpressionError("'in' needs a literal list, e.g. Region in ['EU', 'US']")
+                    parts.append(('in', left, right[1], isinstance(op, ast.NotIn)))
+                elif type(op) in CMP_OPS: parts.append(('cmp', CMP_OPS[type(op)][0], left, right))
+                else: raise ExpressionError(f"Unsupported comparison {type(op).__name__}")
+                left = right
+            return parts[0] if len(parts) == 1 else ('bool', 'and', parts) # a < b < c
+        if isinstance(node, ast.IfExp):
+            return ('if', v(node.test), v(node.body), v(node.orelse))
+        if isinstance(node, ast.Call):
+            if node.keywords: raise ExpressionError("Keyword arguments are not supported")
+            args = [v(a) for a in node.args]
+            if isinstance(node.func, ast.Name): name = node.func.id
+            elif isinstance(node.func, ast.Attribute): # x.upper() / x.str.upper() / x.fillna(0)
+                name = node.func.attr
+                args = [self._receiver(node.func.value, depth)] + args
+            else: raise ExpressionError("Unsupported call")
+            if name == 'col':
+                if len(args) != 1 or args[0][0] != 'const' or not isinstance(args[0][1], str): raise ExpressionError("col() takes one column name")
+                return self._column(args[0][1])
+            name = METHOD_ALIASES.get(name, name)
+            if name not in FUNCTIONS: raise ExpressionError(f"Unknown function '{name}'. Available: {', '.join(sorted(FUNCTIONS))}")
+            lo, hi = FUNCTIONS[name][:2]
+            if not lo <= len(args) <= hi: raise ExpressionError(f"{name}() takes {lo}-{hi} arguments, got {len(args)}")
+            if name in ('iif', 'where'): return ('if', args[0], args[1], args[2])
+            return ('call', name, args)
+        raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+    def _receiver(self, node, depth):
+        if isinstance(node, ast.Attribute) and node.attr in ACCESSORS: node = node.value # Drop .str / .dt
+        return self.visit(node, depth + 1)
+
+
+# =========================================================================
+# TYPE CHECK + EVALUATION
+# =========================================================================
+
+def dtype_kind(dtype):
+    d = str(dtype) if dtype is not None else 'unknown'
+    if d.startswith(('int', 'float', 'uint', 'Int', 'Float', 'UInt')): return 'num'
+    if d in ('bool', 'boolean'): return 'bool'
+    if d.startswith('datetime'): return 'date'
+    if d in ('object', 'str', 'string', 'category') or d.startswith('string'): return 'text'
+    return 'any'
+
+
+KIND_DTYPES = {'num': 'float64', 'text': 'object', 'date': 'datetime64[ns]', 'bool': 'bool', 'any': 'unknown'}
+
+
+class CompiledExpression:
+    def __init__(self, text, ir, columns):
+        self.text = text
+        self.ir = ir
+        self.columns = columns
+
+    # --- CHECK ---
+
+    def check(self, schema):
+        """Result kind of the expression for a {column: dtype} schema; raises ExpressionError listing every problem."""
+        errors = []
+        kind = self._kind(self.ir, schema, errors)
+        if errors: raise ExpressionError("; ".join(dict.fromkeys(errors)))
+        return kind
+
+    def _kind(self, node, schema, errors):
+        tag = node[0]
+        k = lambda n: self._kind(n, schema, errors)
+        if tag == 'const':
+            v = node[1]
+            return 'any' if v is None else 'bool' if isinstance(v, bool) else 'text' if isinstance(v, str) else 'num'
+        if tag == 'col':
+            if node[1] in schema: return dtype_kind(schema[node[1]])
+            close = difflib.get_close_matches(str(node[1]), [str(c) for c in schema], n=1, cutoff=0.75)
+            errors.append(f"Unknown column '{node[1]}'" + (f" (did you mean '{close[0]}'?)" if close else ""))
+            return 'any'
+        if tag == 'list': return 'any'
+        if tag == 'bin':
+            a, b = k(node[2]), k(node[3])
+            if node[1] == '+' and 'text' in (a, b): return 'text'
+            if 'date' in (a, b): return 'any' if (a, b) == ('date', 'date') else 'date' # date - date is a timedelta
+            if 'text' in (a, b): errors.append(f"Operator '{node[1]}' cannot be applied to text")
+            return 'num'
+        if tag == 'neg':
+            if k(node[1]) == 'text': errors.append("Cannot negate text")
+            return 'num'
+        if tag in ('not', 'cmp', 'in', 'bool'):
+            for child in (node[1:] if tag != 'bool' else node[2]):
+                if isinstance(child, tuple): k(child)
+            return 'bool'
+        if tag == 'if':
+            k(node[1])
+            a, b = k(node[2]), k(node[3])
+            return a if a == b or b == 'any' else b if a == 'any' else 'any'
+        if tag == 'call':
+            name, args = node[1], node[2]
+            _, _, arg_kind, result, _ = FUNCTIONS[name]
+            kinds = [k(a) for a in args]
+            if arg_kind and kinds:
+                first = kinds[0]
+                ok = first in (arg_kind, 'any') or (arg_kind == 'num' and first == 'bool') or (arg_kind == 'date' and first == 'text')
+                if arg_kind == 'text' and first != 'text': ok = True # Numbers/dates are formatted as text
+                if not ok: errors.append(f"{name}() expects {arg_kind}, got {first}")
+            if result == 'same': return kinds[0] if len(set(kinds) - {'any'}) <= 1 else 'any'
+            return result
+        return 'any'
+
+    # --- EVALUATE ---
+
+    def evaluate(self, env):
+        with np.errstate(all='ignore'): # x/0 -> inf, log(-1) -> nan, like pandas
+            return self._eval(self.ir, env)
+
+    def _eval(self, node, env):
+        tag = node[0]
+        e = lambda n: self._eval(n, env)
+        if tag == 'const': return node[1]
+        if tag == 'col': return env.get(node[1])
+        if tag == 'bin': return _binop(env, node[1], e(node[2]), e(node[3]))
+        if tag == 'neg':
+            v = e(node[1])
+            return -v if _is_dt(v) else -_num(v)
+        if tag == 'not': return np.logical_not(_bool(e(node[1])))
+        if tag == 'cmp': return _compare(env, node[1], e(node[2]), e(node[3]))
+        if tag == 'in':
+            v, values, negate = e(node[1]), node[2], node[3]
+            if _is_text(v): hit = _bool(env.series(v).isin([str(x) for x in values]))
+            else: hit = np.isin(_num(v), [x for x in values if not isinstance(x, str)])
+            return np.logical_not(hit) if negate else hit
+        if tag == 'bool':
+            masks = [_bool(e(n)) for n in node[2]]
+            return (np.logical_and if node[1] == 'and' else np.logical_or).reduce(np.broadcast_arrays(*masks))
+        if tag == 'if':
+            cond, a, b = _bool(e(node[1])), e(node[2]), e(node[3])
+            if any(isinstance(x, pd.Series) or isinstance(x, str) for x in (a, b)):
+                return env.series(a).where(env.series(cond).astype(bool), env.series(b))
+            return np.where(cond, a, b)
+        if tag == 'call':
+            args = [a[1] if a[0] in ('const', 'list') else e(a) for a in node[2]]
+            return FUNCTIONS[node[1]][4](env, *args)
+        raise ExpressionError(f"Cannot evaluate {tag}")
+
+
+def compile_expression(text) -> CompiledExpression:
+    """Parses and caches an expression (keyed on its text). Raises ExpressionError."""
+    text = str(text or '').strip()
+    if not text: raise ExpressionError("Empty expression")
+    with _cache_lock:
+        if text in _compiled:
+            _compiled.move_to_end(text)
+            return _compiled[text]
+    parser = _Parser()
+    compiled = CompiledExpression(text, parser.parse(text), parser.columns)
+    with _cache_lock:
+        _compiled[text] = compiled
+        while len(_compiled) > MAX_COMPILED: _compiled.popitem(last=False)
+    return compiled
+
+
+# =========================================================================
+# CALCULATED FIELD NODE
+# =========================================================================
+
+def calculations_from_config(config):
+    """[(newColumn, expression)] from config.calculations plus the legacy single newColumn/expression pair."""
+    calcs = [(c.get('newColumn'), c.get('expression')) for c in config.get('calculations') or [] if isinstance(c, dict)]
+    if config.get('newColumn') or config.get('expression'): calcs.insert(0, (config.get('newColumn'), config.get('expression')))
+    return calcs
+
+
+def check_calculations(calcs, schema):
+    """Validates every calculation against the schema; later ones may use earlier outputs. Returns (errors, out_schema)."""
+    errors, out = [], dict(schema)
+    for name, expression in calcs:
+        if not name or not expression:
+            errors.append("Each calculation needs a 'newColumn' name and an 'expression'")
+            continue
+        try:
+            out[name] = KIND_DTYPES[compile_expression(expression).check(out)]
+        except ExpressionError as e:
+            errors.append(f"'{name}': {e}")
+            out[name] = 'unknown'
+    return errors, out
+
+
+def evaluate_calculations(df, calcs, typed=None):
+    """All calculations over one shared column environment, assigned to a single copy of df."""
+    env = ColumnEnv(df, typed)
+    results = {}
+    for name, expression in calcs:
+        value = compile_expression(expression).evaluate(env)
+        if isinstance(value, pd.Series) and not value.index.equals(df.index): value = value.to_numpy()
+        results[name] = value
+        env.extra[name] = value # Later calculations can reference earlier ones
+    return df.assign(**results)
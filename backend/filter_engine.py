@@ -0,0 +1,235 @@
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr as ne
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
+# =========================================================================
+# COMPILED FILTER ENGINE (Filter Rows / Filter Date)
+# =========================================================================
+# Conditions are compiled once into a tree of AND/OR groups and evaluated
+# into a single boolean mask; the DataFrame is sliced exactly once.
+# Each column is coerced (to numeric / datetime / string) at most once per
+# evaluation no matter how many conditions reference it. Purely numeric trees
+# are handed to numexpr as one expression when it is installed.
+#
+# Condition formats (all optional beyond column/operator/value):
+#   {"column": "City", "operator": "==", "value": "New York"}
+#   {"column": "TAT", "operator": "between", "value": [1, 5]}   # or "1,5" / value + value2
+#   {"column": "Region", "operator": "in", "value": ["EU", "US"]} # or "EU, US"
+#   {"logic": "OR", "conditions": [...]}                           # nested group
+# Filter Rows config may set "logic": "OR" for the top level (default AND).
+
+OPERATORS = {'==', '!=', '>', '<', '>=', '<=', 'contains', 'in', 'not in', 'between', 'startswith', 'endswith',
+             'is null', 'not null'}
+OPERATOR_ALIASES = {'=': '==', 'equals': '==', 'not equals': '!=', 'is not null': 'not null', 'isnull': 'is null',
+                    'notnull': 'not null', 'starts with': 'startswith', 'ends with': 'endswith', 'not_in': 'not in'}
+NUMERIC_OPS = {'>', '<', '>=', '<=', 'between'}
+
+_cache_lock = threading.Lock()
+_compiled = OrderedDict()
+MAX_COMPILED = 256
+
+
+def _to_number(val):
+    try: return float(val)
+    except (TypeError, ValueError): return None
+
+
+def _to_list(val):
+    if isinstance(val, (list, tuple)): return list(val)
+    if val is None: return []
+    return [v.strip() for v in str(val).split(',') if v.strip()]
+
+
+class ColumnCoercer:
+    """
+    Per-evaluation cache: each (column, kind) is converted once and reused by every condition.
+    With a run-wide TypedColumnCache the numeric/datetime conversions are shared with other nodes too.
+    """
+
+    def __init__(self, df, typed=None):
+        self.df = df
+        self.typed = typed
+        self._cache = {}
+
+    def get(self, col, kind):
+        key = (col, kind)
+        if key not in self._cache:
+            s = self.df[col]
+            if kind == 'raw': out = s
+            elif kind == 'numeric':
+                if self.typed is not None: out = self.typed.numeric(s)
+                else: out = s if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s) else pd.to_numeric(s, errors='coerce')
+                out = out.to_numpy(dtype='float64', na_value=np.nan)
+            elif kind == 'datetime':
+                if self.typed is not None: out = self.typed.datetime(s)
+                else: out = s if pd.api.types.is_datetime64_any_dtype(s) else pd.to_datetime(s, errors='coerce')
+            elif kind == 'str': out = s.astype(str)
+            else: raise ValueError(kind)
+            self._cache[key] = out
+        return self._cache[key]
+
+
+class Leaf:
+    def __init__(self, cond):
+        self.column = cond.get('column')
+        op = str(cond.get('operator', '==')).strip().lower()
+        self.op = OPERATOR_ALIASES.get(op, op)
+        if self.op not in OPERATORS: raise ValueError(f"Unsupported filter operator '{cond.get('operator')}'")
+        self.value = cond.get('value')
+        self.num = _to_number(self.value)
+
+        if self.op == 'between':
+            bounds = _to_list(self.value) if cond.get('value2') is None else [self.value, cond.get('value2')]
+            if len(bounds) != 2: raise ValueError(f"'between' on {self.column} needs two values")
+            self.bounds = bounds
+            self.num_bounds = [_to_number(b) for b in bounds]
+        elif self.op in ('in', 'not in'):
+            self.values = _to_list(self.value)
+            nums = [_to_number(v) for v in self.values]
+            self.num_values = nums if all(n is not None for n in nums) else None
+
+    def numeric_only(self, coercer):
+        """True when this leaf can be expressed as a numexpr comparison on a float array."""
+        if self.op in NUMERIC_OPS:
+            return self.num is not None if self.op != 'between' else None not in self.num_bounds
+        if self.op in ('==', '!='):
+            return self.num is not None and pd.api.types.is_numeric_dtype(coercer.df[self.column])
+        return False
+
+    def mask(self, coercer):
+        col, op = self.column, self.op
+        if op == 'is null': return coercer.get(col, 'raw').isna().to_numpy()
+        if op == 'not null': return coercer.get(col, 'raw').notna().to_numpy()
+        if op == 'contains': return coercer.get(col, 'str').str.contains(str(self.value), regex=False, na=False).to_numpy()
+        if op == 'startswith': return coercer.get(col, 'str').str.startswith(str(self.value), na=False).to_numpy()
+        if op == 'endswith': return coercer.get(col, 'str').str.endswith(str(self.value), na=False).to_numpy()
+
+        if op in ('in', 'not in'):
+            raw = coercer.get(col, 'raw')
+            if self.num_values is not None and pd.api.types.is_numeric_dtype(raw): hit = np.isin(coercer.get(col, 'numeric'), self.num_values)
+            else: hit = coercer.get(col, 'str').isin([str(v) for v in self.values]).to_numpy()
+            return ~hit if op == 'not in' else hit
+
+        if op == 'between':
+            lo, hi = self.num_bounds
+            if lo is not None and hi is not None:
+                arr = coercer.get(col, 'numeric')
+                return (arr >= lo) & (arr <= hi)
+            arr = coercer.get(col, 'datetime')
+            return ((arr >= pd.Timestamp(self.bounds[0])) & (arr <= pd.Timestamp(self.bounds[1]))).to_numpy()
+
+        if op in ('==', '!='):
+            raw = coercer.get(col, 'raw')
+            if self.num is not None and pd.api.types.is_numeric_dtype(raw): hit = coercer.get(col, 'numeric') == self.num
+            elif pd.api.types.is_numeric_dtype(raw): hit = np.zeros(len(raw), dtype=bool) # Text value vs numeric column
+            elif isinstance(self.value, str): hit = (raw == self.value).to_numpy(dtype=bool, na_value=False)
+            else: hit = (coercer.get(col, 'str') == str(self.value)).to_numpy(dtype=bool, na_value=False)
+            return ~hit if op == '!=' else hit
+
+        # > < >= <= : numeric when the value is a number, else datetime
+        if self.num is not None: arr, ref = coercer.get(col, 'numeric'), self.num
+        else: arr, ref = coercer.get(col, 'datetime').to_numpy(), np.datetime64(pd.Timestamp(self.value))
+        if op == '>': return arr > ref
+        if op == '<': return arr < ref
+        if op == '>=': return arr >= ref
+        return arr <= ref
+
+    def ne_expr(self, name):
+        if self.op == 'between':
+            return f"(({name} >= {self.num_bounds[0]!r}) & ({name} <= {self.num_bounds[1]!r}))"
+        return f"({name} {self.op} {self.num!r})"
+
+
+class Group:
+    def __init__(self, logic, children):
+        self.logic = 'OR' if str(logic).upper() == 'OR' else 'AND'
+        self.children = children
+
+    def leaves(self):
+        for c in self.children:
+            if isinstance(c, Group): yield from c.leaves()
+            else: yield c
+
+    def mask(self, coercer):
+        masks = [c.mask(coercer) for c in self.children]
+        if not masks: return np.ones(len(coercer.df), dtype=bool)
+        if len(masks) == 1: return masks[0]
+        return (np.logical_or if self.logic == 'OR' else np.logical_and).reduce(masks)
+
+    def ne_expr(self, names):
+        parts = [c.ne_expr(names) if isinstance(c, Group) else c.ne_expr(names[id(c)]) for c in self.children]
+        if not parts: return "True"
+        return "(" + (" | " if self.logic == 'OR' else " & ").join(parts) + ")"
+
+
+class CompiledFilter:
+    def __init__(self, root: Group):
+        self.root = root
+        self.columns = sorted({leaf.column for leaf in root.leaves()})
+
+    def mask(self, df, coercer=None):
+        coercer = coercer or ColumnCoercer(df)
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing: raise KeyError(f"Column(s) not found: {missing}")
+
+        leaves = list(self.root.leaves())
+        if HAS_NUMEXPR and leaves and all(l.numeric_only(coercer) for l in leaves):
+            names, local = {}, {}
+            for l in leaves:
+                var = f"c{self.columns.index(l.column)}"
+                names[id(l)] = var
+                local[var] = coercer.get(l.column, 'numeric')
+            return ne.evaluate(self.root.ne_expr(names), local_dict=local)
+        return self.root.mask(coercer)
+
+    def apply(self, df, coercer=None):
+        if not self.columns: return df
+        return df[self.mask(df, coercer)]
+
+
+def _build(items, logic):
+    children = []
+    for item in items or []:
+        if not isinstance(item, dict): continue
+        if 'conditions' in item:
+            children.append(_build(item['conditions'], item.get('logic', 'AND')))
+        elif item.get('column'):
+            children.append(Leaf(item))
+    return Group(logic, children)
+
+
+def _cached(key, builder):
+    with _cache_lock:
+        if key in _compiled:
+            _compiled.move_to_end(key)
+            return _compiled[key]
+    compiled = builder()
+    with _cache_lock:
+        _compiled[key] = compiled
+        while len(_compiled) > MAX_COMPILED: _compiled.popitem(last=False)
+    return compiled
+
+
+def compile_conditions(conditions, logic='AND') -> CompiledFilter:
+    """Compiles Filter Rows conditions (cached on the config JSON)."""
+    key = ('rows', logic, json.dumps(conditions, sort_keys=True, default=str))
+    return _cached(key, lambda: CompiledFilter(_build(conditions, logic)))
+
+
+def compile_date_ranges(date_ranges) -> CompiledFilter:
+    """Filter Date ranges -> AND of inclusive datetime 'between' leaves; incomplete ranges are skipped."""
+    def build():
+        leaves = [Leaf({'column': r['column'], 'operator': 'between', 'value': [r['startDate'], r['endDate']]})
+                  for r in date_ranges or [] if r.get('column') and r.get('startDate') and r.get('endDate')]
+        for l in leaves: l.num_bounds = [None, None] # Always compare as dates
+        return CompiledFilter(Group('AND', leaves))
+    return _cached(('dates', json.dumps(date_ranges, sort_keys=True, default=str)), build)
@@ -0,0 +1,72 @@
+import os
+import json
+
+from schema_inference import topological_order
+
+# =========================================================================
+# FLOW OPTIMIZER (runs before execution)
+# =========================================================================
+# Two rewrites of the node graph, both output-preserving:
+#   1. Common-subexpression elimination: walking in topological order, a
+#      node's signature is its typeLabel, its config (minus presentation
+#      keys) and the canonical ids of its inputs per port. A node whose
+#      signature was already seen is merged into the first one; nodes
+#      downstream of a merged node then see identical inputs too, so whole
+#      repeated prefixes (the same Filter Rows / Group By off one hub)
+#      collapse into one chain.
+#   2. Dead-node elimination: nodes whose output reaches no display or
+#      export node (and is not the flow's final output) are not run.
+# The engine runs the rewritten graph and then hands every merged node
+# its twin's output; the plan says what was eliminated.
+
+FLOW_OPTIMIZE = os.getenv("FLOW_OPTIMIZE", "1") != "0"
+PRESENTATION_KEYS = {"label", "title", "reportWidth", "dashboardOrder", "description"} # Never change a node's data
+EXPORT_NODES = {"Export CSV"}
+
+
+def signature(node, inputs):
+    data = node.get("data", {})
+    config = {k: v for k, v in (data.get("config") or {}).items() if k not in PRESENTATION_KEYS}
+    return json.dumps([data.get("typeLabel"), config, inputs], sort_keys=True, default=str)
+
+
+def optimize_flow(nodes, edges, is_output, keep=()):
+    """
+    (nodes, edges, plan) with duplicates merged and dead nodes dropped; is_output(typeLabel) marks display/export
+    nodes, `keep` ids are live regardless. plan: {"merged": {node: twin}, "skipped": [ids], "before", "after"}.
+    The flow is returned unchanged (plan None) when it has a cycle.
+    """
+    node_map = {n["id"]: n for n in nodes}
+    order = topological_order(nodes, edges)
+    if len(order) < len(node_map): return nodes, edges, None
+
+    incoming = {}
+    for e in edges: incoming.setdefault(e.get("target"), []).append(e)
+    canonical, seen, merged = {}, {}, {}
+    for nid in order:
+        inputs = [[canonical.get(e.get("source"), e.get("source")), e.get("targetHandle")] for e in incoming.get(nid, [])]
+        sig = signature(node_map[nid], inputs)
+        if sig in seen: merged[nid] = seen[sig]
+        else: seen[sig] = nid
+        canonical[nid] = seen[sig]
+
+    # Live: everything upstream of an output (after merging, a merged output keeps its twin's inputs alive)
+    parents = {}
+    for e in edges:
+        if e.get("target") in node_map and e.get("target") not in merged:
+            parents.setdefault(e["target"], []).append(canonical.get(e.get("source"), e.get("source")))
+    roots = [canonical[nid] for nid in order if nid in keep or is_output(node_map[nid].get("data", {}).get("typeLabel") or "")]
+    live, stack = set(), roots
+    while stack:
+        nid = stack.pop()
+        if nid in live: continue
+        live.add(nid)
+        stack.extend(parents.get(nid, []))
+    skipped = [nid for nid in order if canonical[nid] not in live] # A twin of a dead node is dead too
+    for nid in skipped: merged.pop(nid, None)
+
+    dropped = set(merged) | set(skipped)
+    new_nodes = [n for n in nodes if n["id"] not in dropped]
+    new_edges = [{**e, "source": canonical.get(e.get("source"), e.get("source"))} for e in edges
+                 if e.get("target") not in dropped and canonical.get(e.get("source"), e.get("source")) not in dropped]
+    return new_nodes, new_edges, {"merged": merged, "skipped": skipped, "before": len(nodes), "after": len(new_nodes)}
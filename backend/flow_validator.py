@@ -0,0 +1,330 @@
+import uuid
+import difflib
+from typing import List, Dict, Any, Optional
+
+from schema_inference import infer_node_schema, infer_multi_input_schema, source_schema, topological_order, unique_columns
+from join_engine import INPUT_PORTS, input_ports
+from expression_engine import calculations_from_config, check_calculations
+
+# =========================================================================
+# LOCAL FLOW VALIDATOR (replaces the LLM Validator agent)
+# =========================================================================
+# Deterministic, in-process checks of an Executor flow:
+#   1. JSON shape (nodes/edges lists, ids, data.typeLabel)
+#   2. Known typeLabel and valid config keys
+#   3. Edges point at real nodes, every node is reachable from source_id
+#   4. No cycles
+#   5. Referenced columns exist in the schema flowing into each node
+#      (propagated with schema_inference, the same pass the /api/schema endpoint uses)
+# Common faults are repaired in place. Only flows that are still broken after
+# repair are reported as FAIL and sent back to the Executor.
+
+COMMON_KEYS = {"label", "title", "reportWidth", "dashboardOrder", "height", "width", "maxWords", "description"}
+
+# typeLabel -> allowed config keys (None = free-form), column keys, column-list keys, nested column keys
+NODE_SPECS: Dict[str, Dict[str, Any]] = {
+    # --- INPUTS ---
+    "Read Data": {"keys": {"selectedFile", "selectedSheet", "optimizeMemory", "sampleStratify"}},
+    "Upload File": {"keys": {"uploadedFiles"}},
+    "Google Drive": {"keys": None},
+    "SQL Database": {"keys": None},
+    "MongoDB": {"keys": None},
+    "OneDrive": {"keys": None},
+    "Stream / Kafka": {"keys": None},
+    "Export CSV": {"keys": {"filename", "fileName"}},
+    # --- EXPLORATION ---
+    "Preview Data": {"keys": {"n", "mode"}},
+    "Sample Data": {"keys": {"n", "mode"}},
+    "Get Data Types": {"keys": set()},
+    "Get Shape": {"keys": set()},
+    "Describe Stats": {"keys": set()},
+    "Correlation": {"keys": {"columns", "method"}, "lists": ["columns"]},
+    # --- CLEANING ---
+    "Copy Data": {"keys": set()},
+    "Drop Duplicates": {"keys": {"keep", "columns"}, "lists": ["columns"]},
+    "Fill N/A": {"keys": {"method", "value", "column", "columns", "rules"}, "cols": ["column"], "lists": ["columns"],
+                 "nested": {"rules": "column"}},
+    "Drop Null": {"keys": {"subset", "how"}, "lists": ["subset"]},
+    "Replace Value": {"keys": {"column", "oldValue", "newValue", "replacements"}, "cols": ["column"],
+                      "nested": {"replacements": "column"}},
+    "Rename Columns": {"keys": {"oldName", "newName"}, "cols": ["oldName"]},
+    "Change Data Type": {"keys": {"column", "columns", "dtype", "casts"}, "cols": ["column"], "lists": ["columns"],
+                         "nested": {"casts": "column"}},
+    "Merge/Join": {"keys": {"how", "on", "left_on", "right_on", "validate", "suffixes"}},
+    "Concatenate": {"keys": {"axis", "ignore_index"}},
+    # --- FILTERING ---
+    "Filter Rows": {"keys": {"conditions", "logic"}, "nested": {"conditions": "column"}},
+    "Filter Date": {"keys": {"dateRanges"}, "nested": {"dateRanges": "column"}},
+    "Select Columns": {"keys": {"columns", "column"}, "lists": ["columns"]},
+    "List Columns": {"keys": {"columns", "column"}, "lists": ["columns"]},
+    "Value Counts": {"keys": {"column", "approximate", "topN"}, "cols": ["column"]},
+    # --- GROUPING ---
+    "Group By": {"keys": {"groupColumns", "groupColumn", "aggregations", "sort"}, "cols": ["groupColumn"],
+                 "lists": ["groupColumns"], "nested": {"aggregations": "column"}},
+    "Pivot Table": {"keys": {"index", "columns", "values", "aggFunc"}, "cols": ["index", "columns", "values"]},
+    # --- TRANSFORMATION ---
+    "Standard Scaler": {"keys": {"columns"}, "lists": ["columns"]},
+    "One-Hot Encoding": {"keys": {"column"}, "cols": ["column"]},
+    "Calculated Field": {"keys": {"newColumn", "expression", "calculations"}},
+    "Trend Analysis": {"keys": {"dateColumn", "valueColumn", "period", "agg"}, "cols": ["dateColumn", "valueColumn"]},
+    # --- SORTING ---
+    "Sort Data": {"keys": {"column", "order"}, "cols": ["column"]},
+    "Rank": {"keys": {"column", "method", "order"}, "cols": ["column"]},
+    # --- TEXT / AI ---
+    "Sentiment Analysis": {"keys": {"column", "threshold"}, "cols": ["column"]},
+    "Clustering": {"keys": {"columns", "k", "scale", "maxK"}, "lists": ["columns"]},
+    "Forecast": {"keys": {"dateColumn", "valueColumn", "periods", "groupColumn", "freq", "agg"}, "cols": ["dateColumn", "valueColumn", "groupColumn"]},
+    "Word Count": {"keys": {"column"}, "cols": ["column"]},
+    "N-Grams": {"keys": {"column", "n"}, "cols": ["column"]},
+    "Word Cloud": {"keys": {"column"}, "cols": ["column"]},
+    # --- VISUALIZATION ---
+    "KPI Card": {"keys": {"column", "operation", "approximate"}, "cols": ["column"]},
+    "Bar Chart": {"keys": {"column", "yAxis", "topN"}, "cols": ["column"], "soft": ["yAxis"]},
+    "Line Chart": {"keys": {"column", "yAxis", "downsample"}, "cols": ["column"], "soft": ["yAxis"]},
+    "Pie/Donut Chart": {"keys": {"column", "yAxis", "topN"}, "cols": ["column"], "soft": ["yAxis"]},
+    "Area Chart": {"keys": {"column", "yAxis", "downsample"}, "cols": ["column"], "soft": ["yAxis"]},
+    "Histogram": {"keys": {"column", "yAxis", "bins"}, "cols": ["column"], "soft": ["yAxis"]},
+    "Scatter Plot": {"keys": {"column", "yAxis", "colorBy"}, "cols": ["column", "yAxis"], "soft": ["colorBy"]},
+    "Heatmap": {"keys": {"column", "yAxis"}, "cols": ["column", "yAxis"]},
+}
+
+TYPE_ALIASES = {
+    "Pie Chart": "Pie/Donut Chart", "Donut Chart": "Pie/Donut Chart", "Change Type": "Change Data Type",
+    "Merge": "Merge/Join", "Join": "Merge/Join", "Concat": "Concatenate", "Filter": "Filter Rows",
+    "Drop Nulls": "Drop Null", "Group": "Group By", "Sort": "Sort Data", "KPI": "KPI Card",
+    "Scatter Chart": "Scatter Plot", "Preview": "Preview Data", "Time Forecast": "Forecast",
+}
+
+DISPLAY_TYPES = {
+    'Preview Data', 'Sample Data', 'Describe Stats', 'Get Data Types', 'Correlation', 'Bar Chart', 'Line Chart',
+    'Pie/Donut Chart', 'Histogram', 'Scatter Plot', 'Heatmap', 'Sentiment Analysis', 'Forecast', 'Clustering',
+    'KPI Card', 'Pivot Table', 'Rank', 'Area Chart', 'Value Counts', 'Get Shape', 'N-Grams', 'Word Count',
+    'Word Cloud', 'Export CSV'
+}
+
+
+class FlowValidator:
+    def validate(self, flow, source_id, columns: Optional[List[str]] = None, external_ids=None):
+        """
+        Returns {"status": "PASS" | "REPAIRED" | "FAIL", "errors", "repairs", "warnings", "flow"}.
+        The returned flow is the (possibly repaired) copy; the input is not mutated.
+        external_ids are nodes already on the canvas that edges may legitimately start from.
+        """
+        external = set(external_ids or []) | {source_id}
+        errors, repairs, warnings = [], [], []
+        result = lambda status, f: {"status": status, "errors": errors, "repairs": repairs, "warnings": warnings, "flow": f}
+
+        # 1. JSON shape
+        if not isinstance(flow, dict) or not isinstance(flow.get("nodes"), list) or not flow["nodes"]:
+            errors.append("Flow must be an object with a non-empty 'nodes' list.")
+            return result("FAIL", flow)
+        raw_edges = flow.get("edges") if isinstance(flow.get("edges"), list) else []
+        if not isinstance(flow.get("edges"), list): repairs.append("Missing 'edges' list replaced with [].")
+
+        nodes, seen = [], set()
+        for n in flow["nodes"]:
+            if not isinstance(n, dict):
+                repairs.append("Dropped non-object node entry.")
+                continue
+            n = dict(n)
+            data = dict(n.get("data") or {})
+            if not n.get("id") or n["id"] in seen:
+                n["id"] = f"node_{uuid.uuid4().hex[:6]}"
+                repairs.append(f"Assigned new id {n['id']} to node with missing/duplicate id.")
+            if not data.get("typeLabel"):
+                data["typeLabel"] = data.get("label") or n.get("label") or ""
+            if not isinstance(data.get("config"), dict): data["config"] = {}
+            data["config"] = dict(data["config"])
+            n["data"] = data
+            seen.add(n["id"])
+            nodes.append(n)
+
+        # 2. Known typeLabel + config keys
+        for n in nodes:
+            self._check_type(n, errors, repairs)
+
+        # 3. Edges + reachability
+        ids = {n["id"] for n in nodes}
+        edges, pairs = [], set()
+        for e in raw_edges:
+            if not isinstance(e, dict): continue
+            s, t = e.get("source"), e.get("target")
+            if s not in ids and s not in external or t not in ids or s == t or (s, t) in pairs:
+                repairs.append(f"Dropped invalid edge {s} -> {t}.")
+                continue
+            pairs.add((s, t))
+            edges.append({**e, "id": e.get("id") or f"e_{uuid.uuid4().hex[:6]}"})
+
+        if len(nodes) > 1 and not any(e["source"] in ids for e in edges):
+            # No internal wiring at all: chain nodes in the order given (what _apply_layout used to do)
+            for a, b in zip(nodes, nodes[1:]):
+                edges.append({"id": f"e_{uuid.uuid4().hex[:6]}", "source": a["id"], "target": b["id"]})
+                pairs.add((a["id"], b["id"]))
+            repairs.append("Flow had no internal edges; chained nodes sequentially.")
+
+        # 4. Cycles (drop the edge that closes each cycle)
+        edges = self._break_cycles(nodes, edges, repairs)
+
+        incoming = {n["id"]: 0 for n in nodes}
+        for e in edges: incoming[e["target"]] += 1
+        for n in nodes:
+            if incoming[n["id"]] == 0 and n["id"] not in external:
+                edges.insert(0, {"id": f"e_anchor_{uuid.uuid4().hex[:4]}", "source": source_id, "target": n["id"]})
+                repairs.append(f"Connected orphan node {n['id']} ({n['data']['typeLabel']}) to source {source_id}.")
+
+        # 5. Columns along every path
+        base = dict(columns) if isinstance(columns, dict) else ({c: "unknown" for c in columns} if columns else None)
+        self._check_columns(nodes, edges, source_id, base, errors, repairs)
+
+        # Termination: leaves should be display nodes
+        sources = {e["source"] for e in edges}
+        for n in nodes:
+            if n["id"] not in sources and n["data"]["typeLabel"] not in DISPLAY_TYPES:
+                warnings.append(f"Path ends at non-visual node {n['id']} ({n['data']['typeLabel']}).")
+
+        fixed = {**flow, "nodes": nodes, "edges": edges}
+        if errors: return result("FAIL", fixed)
+        return result("REPAIRED" if repairs else "PASS", fixed)
+
+    # --- CHECKS ---
+
+    def _check_type(self, n, errors, repairs):
+        data = n["data"]
+        type_label = str(data["typeLabel"]).strip()
+        if type_label not in NODE_SPECS:
+            fixed = TYPE_ALIASES.get(type_label)
+            if not fixed:
+                close = difflib.get_close_matches(type_label, list(NODE_SPECS.keys()), n=1, cutoff=0.8)
+                fixed = close[0] if close else None
+            if not fixed:
+                errors.append(f"Node {n['id']}: unknown typeLabel '{type_label}'.")
+                return
+            repairs.append(f"Node {n['id']}: typeLabel '{type_label}' -> '{fixed}'.")
+            type_label = fixed
+        data["typeLabel"] = type_label
+
+        allowed = NODE_SPECS[type_label]["keys"]
+        if allowed is None: return
+        for key in list(data["config"].keys()):
+            if key not in allowed and key not in COMMON_KEYS:
+                del data["config"][key]
+                repairs.append(f"Node {n['id']}: removed unknown config key '{key}' for {type_label}.")
+
+    def _break_cycles(self, nodes, edges, repairs):
+        adj = {n["id"]: [] for n in nodes}
+        for e in edges:
+            if e["source"] in adj: adj[e["source"]].append(e)
+        state, back = {}, set()
+        for start in adj:
+            if start in state: continue
+            stack = [(start, iter(adj[start]))]
+            state[start] = 1
+            while stack:
+                node, it = stack[-1]
+                e = next(it, None)
+                if e is None:
+                    state[node] = 2
+                    stack.pop()
+                    continue
+                t = e["target"]
+                if state.get(t) == 1: back.add(id(e))
+                elif t not in state:
+                    state[t] = 1
+                    stack.append((t, iter(adj[t])))
+        if back:
+            repairs.append(f"Removed {len(back)} edge(s) that created a cycle.")
+        return [e for e in edges if id(e) not in back]
+
+    def _check_columns(self, nodes, edges, source_id, base_schema, errors, repairs):
+        node_map = {n["id"]: n for n in nodes}
+        parents, incoming = {}, {}
+        for e in edges:
+            parents.setdefault(e["target"], []).append(e["source"])
+            incoming.setdefault(e["target"], []).append(e)
+
+        schema, unique = {source_id: base_schema}, {}
+        for nid in topological_order(nodes, edges):
+            node = node_map[nid]
+            type_label = node["data"]["typeLabel"]
+            config = node["data"]["config"]
+            preds = parents.get(nid) or [source_id]
+            if type_label == "Read Data":
+                schema[nid] = base_schema or source_schema(node, preds, node_map) or None
+                continue
+
+            if type_label in INPUT_PORTS:
+                ports = {p: [schema.get(src) for src in srcs] for p, srcs in input_ports(type_label, incoming.get(nid, [])).items()}
+                if type_label == "Merge/Join": self._check_join_columns(node, config, ports, errors, repairs)
+                schema[nid] = infer_multi_input_schema(type_label, config, ports)
+                continue
+
+            in_schema = schema.get(preds[0]) # engine reads predecessors[0]
+            if in_schema is not None and type_label in NODE_SPECS:
+                self._check_node_columns(node, type_label, config, list(in_schema.keys()), errors, repairs)
+            schema[nid] = infer_node_schema(type_label, config, in_schema, unique.get(preds[0], frozenset()))
+            unique[nid] = unique_columns(type_label, config, unique.get(preds[0], frozenset()))
+
+    def _check_node_columns(self, node, type_label, config, in_cols, errors, repairs):
+        spec = NODE_SPECS[type_label]
+
+        def fix(value, soft=False):
+            if value in in_cols: return value, True
+            match = self._closest(value, in_cols)
+            if match:
+                repairs.append(f"Node {node['id']}: column '{value}' -> '{match}'.")
+                return match, True
+            if not soft:
+                errors.append(f"Node {node['id']} ({type_label}): column '{value}' not found. Available: {in_cols[:20]}")
+            return value, False
+
+        for key in spec.get("cols", []):
+            if config.get(key): config[key] = fix(config[key])[0]
+        for key in spec.get("soft", []):
+            if config.get(key):
+                value, ok = fix(config[key], soft=True)
+                if ok: config[key] = value
+                else:
+                    del config[key]
+                    repairs.append(f"Node {node['id']}: dropped {key} '{value}' (not in schema).")
+        for key in spec.get("lists", []):
+            if isinstance(config.get(key), list):
+                fixed = [fix(v, soft=True) for v in config[key]]
+                kept = [v for v, ok in fixed if ok]
+                if len(kept) < len(fixed):
+                    repairs.append(f"Node {node['id']}: dropped unknown columns from {key}.")
+                if not kept and fixed:
+                    errors.append(f"Node {node['id']} ({type_label}): none of {config[key]} exist.")
+                config[key] = kept
+        for key, col_key in spec.get("nested", {}).items():
+            for item in config.get(key) or []:
+                if isinstance(item, dict) and item.get(col_key):
+                    item[col_key] = fix(item[col_key])[0]
+        if type_label == "Calculated Field":
+            for err in check_calculations(calculations_from_config(config), dict.fromkeys(in_cols, "unknown"))[0]:
+                errors.append(f"Node {node['id']} (Calculated Field): {err}")
+
+    def _check_join_columns(self, node, config, ports, errors, repairs):
+        """on must exist on both inputs, left_on / right_on on their own side."""
+        left, right = (ports["left"] or [None])[0], (ports["right"] or [None])[0]
+        for key, sides in (("on", (left, right)), ("left_on", (left,)), ("right_on", (right,))):
+            values = config.get(key)
+            if not values or any(s is None for s in sides): continue
+            fixed = []
+            for value in ([values] if isinstance(values, str) else values):
+                matches = [value if value in s else self._closest(value, list(s)) for s in sides]
+                if any(m is None for m in matches) or len(set(matches)) > 1:
+                    errors.append(f"Node {node['id']} (Merge/Join): {key} column '{value}' not found in every input.")
+                elif matches[0] != value:
+                    repairs.append(f"Node {node['id']}: column '{value}' -> '{matches[0]}'.")
+                fixed.append(matches[0] or value)
+            config[key] = fixed[0] if isinstance(values, str) else fixed
+
+    def _closest(self, value, cols):
+        low = {str(c).lower().strip(): c for c in cols}
+        key = str(value).lower().strip()
+        if key in low: return low[key]
+        close = difflib.get_close_matches(key, list(low.keys()), n=1, cutoff=0.85)
+        return low[close[0]] if close else None
+
+
+validator = FlowValidator()
@@ -0,0 +1,190 @@
+import os
+import atexit
+import hashlib
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    HAS_STATSMODELS = True
+except ImportError:
+    HAS_STATSMODELS = False
+
+# =========================================================================
+# FORECASTING (Forecast node)
+# =========================================================================
+# 1. One groupby over (group, period) resamples every series at once; gaps
+#    inside a series are filled (0 for sum/count, interpolated otherwise).
+# 2. Each series is fingerprinted (values, start, frequency, model spec).
+#    Fitted models are kept in an in-process LRU keyed on the fingerprint,
+#    so forecasting unchanged data again (any horizon) skips the fit.
+# 3. Series not in the cache are fitted with Holt-Winters exponential
+#    smoothing (damped trend, seasonal when there are two full seasons),
+#    across a process pool once there are FORECAST_PARALLEL_MIN of them.
+#    Without statsmodels, or for very short series, a linear trend is used.
+# Output: per group, the history followed by `periods` forecast rows
+# (Type = Actual / Forecast) with a ~95% interval on the forecast rows.
+
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", str(min(4, os.cpu_count() or 1))))
+FORECAST_PARALLEL_MIN = int(os.getenv("FORECAST_PARALLEL_MIN", "4"))
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "256"))
+MIN_HOLT_POINTS = 8
+Z95 = 1.96
+
+FREQS = {'H': 'h', 'D': 'D', 'W': 'W', 'M': 'MS', 'Q': 'QS', 'Y': 'YS'}
+SEASONS = {'h': 24, 'D': 7, 'W': 52, 'MS': 12, 'QS': 4}
+AGGS = ('sum', 'mean', 'count', 'min', 'max')
+
+_lock = threading.Lock()
+_pool = None
+_models = OrderedDict()
+
+
+class _TrendModel:
+    """Least-squares line; the fallback for short series or without statsmodels."""
+
+    def __init__(self, y):
+        x = np.arange(len(y))
+        self.coef = np.polyfit(x, y, 1) if len(y) > 1 else np.array([0.0, y[0] if len(y) else 0.0])
+        self.n = len(y)
+        self.sigma = float(np.std(y - np.polyval(self.coef, x))) if len(y) > 2 else 0.0
+
+    def forecast(self, periods):
+        return np.polyval(self.coef, np.arange(self.n, self.n + periods))
+
+
+class _HoltModel:
+    """Fitted Holt-Winters results plus the residual spread used for the interval."""
+
+    def __init__(self, fit):
+        self.fit = fit
+        self.sigma = float(np.nanstd(fit.resid))
+
+    def forecast(self, periods):
+        return np.asarray(self.fit.forecast(periods), dtype=float)
+
+
+def _fit(args):
+    """(values, season) -> fitted model. Runs in the worker processes."""
+    y, season = args
+    if not HAS_STATSMODELS or len(y) < MIN_HOLT_POINTS or np.ptp(y) == 0: return _TrendModel(y)
+    seasonal = season if season and len(y) >= 2 * season + 1 else None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore') # Convergence chatter on short/noisy series
+            return _HoltModel(ExponentialSmoothing(y, trend='add', damped_trend=True, seasonal='add' if seasonal else None,
+                                                   seasonal_periods=seasonal, initialization_method='estimated').fit())
+    except Exception:
+        return _TrendModel(y)
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=FORECAST_WORKERS)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def fingerprint(values, start, freq, season):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{start}|{freq}|{season}|{HAS_STATSMODELS}\x00".encode())
+    h.update(np.ascontiguousarray(values, dtype='float64').tobytes())
+    return h.hexdigest()
+
+
+def _cached(key):
+    with _lock:
+        model = _models.get(key)
+        if model is not None: _models.move_to_end(key)
+        return model
+
+
+def _remember(key, model):
+    with _lock:
+        _models[key] = model
+        while len(_models) > FORECAST_CACHE_SIZE: _models.popitem(last=False)
+
+
+def fit_models(jobs):
+    """{key: (values, season)} -> ({key: model}, workers used). Cached models are not refitted."""
+    models = {k: m for k in jobs if (m := _cached(k)) is not None}
+    missing = [k for k in jobs if k not in models]
+    workers = 1
+    if missing and FORECAST_WORKERS > 1 and len(missing) >= FORECAST_PARALLEL_MIN:
+        try:
+            fitted = list(_get_pool().map(_fit, [jobs[k] for k in missing]))
+            workers = FORECAST_WORKERS
+        except Exception as e: # Broken pool (e.g. worker killed): fit in-process
+            print(f"⚠️ Forecast pool failed, fitting in-process: {e}")
+            fitted = [_fit(jobs[k]) for k in missing]
+    else:
+        fitted = [_fit(jobs[k]) for k in missing]
+    for k, m in zip(missing, fitted):
+        _remember(k, m)
+        models[k] = m
+    return models, (workers if missing else 0)
+
+
+def resample(df, date_col, value_col, freq, agg='sum', group_col=None, typed=None):
+    """One groupby over (group, period) -> {group: Series indexed by a gap-free period range}."""
+    dates = typed.datetime(df[date_col]) if typed else pd.to_datetime(df[date_col], errors='coerce')
+    values = (typed.numeric(df[value_col]) if typed else pd.to_numeric(df[value_col], errors='coerce')) if value_col else pd.Series(1.0, index=df.index)
+    keep = dates.notna()
+    frame = pd.DataFrame({'d': dates[keep], 'v': values[keep]})
+    frame['g'] = df.loc[keep, group_col] if group_col else 'All'
+    grouped = frame.groupby(['g', pd.Grouper(key='d', freq=freq)], observed=True, sort=True)['v'].agg(agg)
+
+    series = {}
+    for g, s in grouped.groupby(level=0, sort=False):
+        s = s.droplevel(0)
+        full = s.reindex(pd.date_range(s.index.min(), s.index.max(), freq=freq))
+        series[g] = full.fillna(0) if agg in ('sum', 'count') else full.interpolate(limit_direction='both')
+    return series
+
+
+def forecast_frame(df, date_col, value_col=None, periods=30, freq='D', agg='sum', group_col=None, typed=None):
+    """
+    Returns (DataFrame[date, (group), value, Type, Lower, Upper], info).
+    info: {"groups", "fitted", "cached", "workers", "freq"}.
+    """
+    freq = FREQS.get(str(freq).upper(), freq)
+    agg = agg if agg in AGGS else 'sum'
+    value_name = value_col or 'Count'
+    periods = max(1, int(periods))
+    season = SEASONS.get(freq)
+    series = resample(df, date_col, value_col, freq, agg if value_col else 'count', group_col, typed)
+
+    jobs, keys = {}, {}
+    for g, s in series.items():
+        y = s.to_numpy(dtype='float64')
+        keys[g] = fingerprint(y, s.index[0], freq, season)
+        jobs[keys[g]] = (y, season)
+    before = sum(1 for k in jobs if _cached(k) is not None)
+    models, workers = fit_models(jobs)
+
+    parts = []
+    for g, s in series.items():
+        model = models[keys[g]]
+        pred = model.forecast(periods)
+        spread = Z95 * model.sigma * np.sqrt(np.arange(1, periods + 1))
+        future = pd.date_range(s.index[-1], periods=periods + 1, freq=freq)[1:]
+        part = pd.DataFrame({
+            date_col: np.concatenate([s.index.to_numpy(), future.to_numpy()]),
+            value_name: np.concatenate([s.to_numpy(dtype='float64'), pred]),
+            'Type': ['Actual'] * len(s) + ['Forecast'] * periods,
+            'Lower': np.concatenate([np.full(len(s), np.nan), pred - spread]),
+            'Upper': np.concatenate([np.full(len(s), np.nan), pred + spread]),
+        })
+        if group_col: part.insert(1, group_col, g)
+        parts.append(part)
+
+    out = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=[date_col, value_name, 'Type', 'Lower', 'Upper'])
+    info = {"groups": len(series), "fitted": len(jobs) - before, "cached": before, "workers": workers, "freq": freq}
+    return out, info
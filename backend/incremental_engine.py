@@ -0,0 +1,300 @@
+import os
+import io
+import json
+import uuid
+import pickle
+import shutil
+import hashlib
+import threading
+
+import pandas as pd
+
+from memory_optimizer import HAS_PYARROW
+from aggregation_engine import agg_plan
+from flow_optimizer import signature
+from data_paths import data_path
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    from node_pool import write_frame, read_frame
+
+# =========================================================================
+# INCREMENTAL REFRESH (append-only CSV sources)
+# =========================================================================
+# Every full load of a CSV source stores, in INCREMENTAL_DIR/<source>/:
+#   state.json  byte offset consumed (the file size, at a line end), the
+#               SHA-256 of every byte before it, inode, mtime, dtypes
+#   *.arrow     the parsed rows, one Arrow segment per load (compacted past
+#               INCREMENTAL_MAX_SEGMENTS)
+# On the next load the file is read once: the prefix is hashed and must
+# match (same inode, mtime not earlier), then the same running hash takes
+# in the new tail and becomes the next fingerprint, so an append never
+# hashes anything twice. A matching file is read from the segments plus its
+# tail, parsed alone; the tail is the run's delta. Anything else (edited,
+# replaced, truncated, a tail whose dtypes would change the columns) is a
+# full reload and a new generation. Off by default (INCREMENTAL=1 enables
+# it): the prefix is still read and hashed on every load.
+# Downstream of a tracked source, row-wise nodes (ROW_WISE) also run on the
+# delta, and mergeable nodes (Group By sum/count/mean/min/max/size, Value
+# Counts, KPI Card sum/count/avg/min/max, Get Shape) keep a partial state in
+# nodes/<lineage>.pkl: when it covers exactly the rows before the delta, the
+# delta's partial is merged into it instead of re-aggregating every row.
+# The lineage key is the node's config and that of everything upstream, so
+# editing the flow simply starts a new state.
+
+INCREMENTAL = os.getenv("INCREMENTAL", "0") == "1"
+INCREMENTAL_DIR = os.getenv("INCREMENTAL_DIR", data_path("incremental"))
+INCREMENTAL_MAX_SEGMENTS = int(os.getenv("INCREMENTAL_MAX_SEGMENTS", "8"))
+HASH_CHUNK = 8 * 2 ** 20
+ROW_WISE = {'Filter Rows', 'Filter Date', 'Drop Null', 'Select Columns', 'List Columns', 'Rename Columns'}
+MERGEABLE_FUNCS = {'sum': 'sum', 'count': 'sum', 'size': 'sum', 'min': 'min', 'max': 'max'} # Partial -> how partials combine
+KPI_OPS = {'sum', 'count', 'avg', 'min', 'max'}
+
+_lock = threading.Lock()
+_source_locks = {}
+
+
+def _source_lock(sdir):
+    with _lock: return _source_locks.setdefault(sdir, threading.Lock())
+
+
+def prefix_hash(f, offset):
+    """Running SHA-256 of the first `offset` bytes of an open file (left positioned at `offset`)."""
+    h = hashlib.sha256()
+    f.seek(0)
+    left = offset
+    while left > 0:
+        chunk = f.read(min(HASH_CHUNK, left))
+        if not chunk: break
+        h.update(chunk)
+        left -= len(chunk)
+    return h
+
+
+class Lineage:
+    """Where a node's rows come from: its source's generation, the byte range the run's delta covers, a config key."""
+
+    def __init__(self, sdir, generation, start, end, key):
+        self.sdir, self.generation, self.start, self.end, self.key = sdir, generation, start, end, key
+
+    def child(self, node):
+        key = hashlib.sha256(signature(node, [self.key]).encode()).hexdigest()[:32]
+        return Lineage(self.sdir, self.generation, self.start, self.end, key)
+
+    def _path(self):
+        return os.path.join(self.sdir, "nodes", f"{self.key}.pkl")
+
+    def previous(self):
+        """The node's partial state for exactly the rows before this run's delta, or None."""
+        if self.start is None: return None
+        try:
+            with open(self._path(), "rb") as f: saved = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return saved["state"] if (saved["generation"], saved["offset"]) == (self.generation, self.start) else None
+
+    def save(self, state):
+        os.makedirs(os.path.dirname(self._path()), exist_ok=True)
+        tmp = f"{self._path()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f: pickle.dump({"generation": self.generation, "offset": self.end, "state": state}, f)
+        os.replace(tmp, self._path())
+
+
+def enabled(path, is_excel):
+    return INCREMENTAL and HAS_PYARROW and not is_excel and bool(path)
+
+
+def _read_state(sdir):
+    try:
+        with open(os.path.join(sdir, "state.json")) as f: return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(sdir, state):
+    tmp = os.path.join(sdir, f"state.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w") as f: json.dump(state, f)
+    os.replace(tmp, os.path.join(sdir, "state.json"))
+
+
+def _parse_tail(header, tail, state):
+    """The appended rows, parsed with the stored header and dtypes; None if they would not fit."""
+    dtypes = state["dtypes"]
+    text = {c: t for c, t in dtypes.items() if t in ("object", "str", "string")} # Numbers in a text column stay text
+    frame = pd.read_csv(io.BytesIO(header + tail), dtype=text or None)
+    if list(map(str, frame.columns)) != list(dtypes): return None
+    for col, dtype in dtypes.items():
+        t = frame[col].dtype
+        if str(t) == dtype: continue
+        numeric = pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t)
+        if numeric and dtype.startswith(("int", "float")): continue # int/float mix: the concat widens like a full read
+        if frame[col].isna().all(): frame[col] = frame[col].astype(dtype)
+        else: return None
+    return frame
+
+
+def _write_segment(sdir, df):
+    return os.path.basename(write_frame(df, sdir))
+
+
+def load(path, sheet=0):
+    """
+    (frame, delta, info) of a CSV source. delta holds the rows appended since the last load (empty when the file is
+    unchanged) or is None after a full read; info: {"mode": "full" | "append" | "unchanged", "rows", "new_rows",
+    "read_bytes", "size", "lineage": Lineage of the source, or None when the file cannot be tracked}.
+    """
+    sdir = os.path.join(INCREMENTAL_DIR, hashlib.sha256(repr((os.path.abspath(path), str(sheet))).encode()).hexdigest())
+    with _source_lock(sdir):
+        state, st = _read_state(sdir), os.stat(path)
+        size = st.st_size
+        if state and state.get("inode") == st.st_ino and st.st_mtime_ns >= state.get("mtime_ns", 0) and state["offset"] <= size \
+                and all(os.path.exists(os.path.join(sdir, s)) for s in state["segments"]):
+            with open(path, "rb") as f:
+                header = f.readline()
+                h = prefix_hash(f, state["offset"])
+                tail = f.read(size - state["offset"]) if h.hexdigest() == state["fingerprint"] else None
+            frame_tail = _parse_tail(header, tail, state) if tail else None
+            if tail == b"" or frame_tail is not None:
+                segments = [read_frame(os.path.join(sdir, s)) for s in state["segments"]]
+                prefix = segments[0] if len(segments) == 1 else pd.concat(segments, ignore_index=True)
+                if not tail: # Unchanged
+                    info = {"mode": "unchanged", "rows": len(prefix), "new_rows": 0, "read_bytes": 0, "size": size}
+                    return prefix, prefix.iloc[:0], {**info, "lineage": Lineage(sdir, state["generation"], size, size, state["generation"])}
+                frame = pd.concat([prefix, frame_tail], ignore_index=True)
+                start = state["offset"]
+                h.update(tail)
+                tracked = _append(sdir, state, frame, frame_tail, tail.endswith(b"\n"), os.stat(path), size, h.hexdigest())
+                info = {"mode": "append", "rows": len(frame), "new_rows": len(frame_tail), "read_bytes": size - start, "size": size}
+                lineage = Lineage(sdir, state["generation"], start, size, state["generation"]) if tracked else None
+                return frame, frame_tail, {**info, "lineage": lineage}
+
+        frame = pd.read_csv(path)
+        generation = _track(sdir, frame, path, st)
+        info = {"mode": "full", "rows": len(frame), "new_rows": len(frame), "read_bytes": size, "size": size}
+        return frame, None, {**info, "lineage": Lineage(sdir, generation, None, size, generation) if generation else None}
+
+
+def _track(sdir, frame, path, st):
+    """Starts a new generation for a fully read file; returns its id (None when the file cannot be tracked)."""
+    shutil.rmtree(sdir, ignore_errors=True) # Old segments and node states belong to another version of the file
+    size = st.st_size
+    with open(path, "rb") as f:
+        h = prefix_hash(f, size)
+        f.seek(max(0, size - 1))
+        ends_line = f.read(1) == b"\n"
+    now = os.stat(path)
+    if not size or not ends_line or (now.st_size, now.st_mtime_ns) != (size, st.st_mtime_ns): # Unterminated, or changed while read
+        return None
+    try:
+        os.makedirs(sdir, exist_ok=True)
+        segment = _write_segment(sdir, frame)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OSError) as e:
+        print(f"⚠️ Incremental refresh disabled for {path}: {e}")
+        shutil.rmtree(sdir, ignore_errors=True)
+        return None
+    generation = uuid.uuid4().hex
+    _write_state(sdir, {"path": os.path.abspath(path), "generation": generation, "offset": size, "fingerprint": h.hexdigest(),
+                        "inode": st.st_ino, "mtime_ns": st.st_mtime_ns,
+                        "dtypes": {str(c): str(t) for c, t in frame.dtypes.items()}, "segments": [segment]})
+    return generation
+
+
+def _append(sdir, state, frame, tail, ends_line, st, size, digest):
+    """Records the appended tail as a new segment; False (and untracked) when it cannot be followed further."""
+    if not ends_line or st.st_size != size: # An unterminated last line could still grow; a file still growing is re-read
+        shutil.rmtree(sdir, ignore_errors=True)
+        return False
+    old = list(state["segments"])
+    try:
+        segments = old + [_write_segment(sdir, tail)]
+        if len(segments) > INCREMENTAL_MAX_SEGMENTS: segments = [_write_segment(sdir, frame)] # Compact
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, OSError):
+        shutil.rmtree(sdir, ignore_errors=True)
+        return False
+    _write_state(sdir, {**state, "offset": size, "fingerprint": digest, "mtime_ns": st.st_mtime_ns,
+                        "dtypes": {str(c): str(t) for c, t in frame.dtypes.items()}, "segments": segments})
+    for s in set(old) - set(segments): os.unlink(os.path.join(sdir, s)) # Mapped readers keep their pages
+    return True
+
+
+# --- MERGEABLE NODE STATES ---
+
+def _group_spec(config):
+    keys = config.get('groupColumns', []) or ([config['groupColumn']] if config.get('groupColumn') else [])
+    aggs = [a for a in config.get('aggregations') or [] if a.get('column') and a.get('func')]
+    return keys, aggs
+
+
+def mergeable(node_type, config, df):
+    """True when the node's output can be rebuilt from partial states of row ranges of df."""
+    if node_type == 'Get Shape': return True
+    if node_type == 'Value Counts': return bool(config.get('column')) and config['column'] in df.columns and not config.get('approximate')
+    if node_type == 'KPI Card':
+        col = config.get('column')
+        return not col or (col in df.columns and config.get('operation', 'count') in KPI_OPS)
+    if node_type == 'Group By':
+        keys, aggs = _group_spec(config)
+        if not keys or any(k not in df.columns for k in keys) or any(a['column'] not in df.columns for a in aggs): return False
+        try: return all(f in MERGEABLE_FUNCS or f == 'mean' for _, _, f in agg_plan(aggs, keys))
+        except ValueError: return False
+    return False
+
+
+def _partials(config):
+    """[(partial column, source column, func)] a Group By keeps per group: mean is kept as sum + count."""
+    keys, aggs = _group_spec(config)
+    if not aggs: return [("p_size", keys[0], "size")]
+    parts = {}
+    for _, col, func in agg_plan(aggs, keys):
+        for f in (("sum", "count") if func == "mean" else (func,)): parts[f"p_{col}_{f}"] = (col, f)
+    return [(name, col, f) for name, (col, f) in parts.items()]
+
+
+def partial(node_type, config, df, numeric):
+    """Partial state of one row range; numeric(series) is the run's numeric coercion (KPI Card)."""
+    if node_type == 'Get Shape': return {"rows": len(df), "columns": df.shape[1]}
+    if node_type == 'Value Counts': return df[config['column']].value_counts(sort=False) # First-appearance order
+    if node_type == 'KPI Card':
+        if not config.get('column'): return {"rows": len(df)}
+        s = numeric(df[config['column']])
+        return {"rows": len(df), "count": s.count(), "sum": s.sum(), "min": s.min(), "max": s.max()}
+    keys, _ = _group_spec(config)
+    named = {name: (col, f) for name, col, f in _partials(config)}
+    return df.groupby(keys, sort=False, observed=True, dropna=True).agg(**named).reset_index()
+
+
+def merge(node_type, config, a, b):
+    if node_type == 'Get Shape': return {"rows": a["rows"] + b["rows"], "columns": b["columns"]}
+    if node_type == 'Value Counts': return pd.concat([a, b]).groupby(level=0, sort=False).sum()
+    if node_type == 'KPI Card':
+        if "sum" not in a: return {"rows": a["rows"] + b["rows"]}
+        pick = lambda f, x, y: x if pd.isna(y) else y if pd.isna(x) else f(x, y)
+        return {"rows": a["rows"] + b["rows"], "count": a["count"] + b["count"], "sum": a["sum"] + b["sum"],
+                "min": pick(min, a["min"], b["min"]), "max": pick(max, a["max"], b["max"])}
+    keys, _ = _group_spec(config)
+    how = {name: MERGEABLE_FUNCS[f] for name, _, f in _partials(config)}
+    return pd.concat([a, b], ignore_index=True).groupby(keys, sort=False, observed=True).agg(how).reset_index()
+
+
+def kpi_value(config, state):
+    op = config.get('operation', 'count')
+    if "sum" not in state: return state["rows"]
+    if op == 'avg': return state["sum"] / state["count"] if state["count"] else float('nan')
+    return state[op]
+
+
+def finalize(node_type, config, state):
+    """The node's output frame from a (merged) partial state, as the node itself would have produced it."""
+    if node_type == 'Get Shape': return pd.DataFrame([{'Rows': state["rows"], 'Columns': state["columns"]}])
+    if node_type == 'Value Counts':
+        col = config['column']
+        return state.sort_values(ascending=False, kind='stable').rename('count').rename_axis(col).reset_index(name='Count')
+    keys, aggs = _group_spec(config)
+    result = state[keys].copy()
+    if not aggs: result['Count'] = state["p_size"]
+    for name, col, func in agg_plan(aggs, keys):
+        result[name] = state[f"p_{col}_sum"] / state[f"p_{col}_count"] if func == "mean" else state[f"p_{col}_{func}"]
+    if config.get('sort', True) and len(result):
+        try: result = result.sort_values(keys).reset_index(drop=True)
+        except TypeError: pass
+    return result
@@ -0,0 +1,231 @@
+import re
+import uuid
+import difflib
+from typing import List, Dict, Optional, Callable
+
+# =========================================================================
+# RULE-BASED FAST PATH
+# =========================================================================
+# Common chat templates ("value counts of Status", "top 10 Agent by TAT",
+# "trend of Created by month", "filter City == New York") are matched locally
+# against the known columns and turned straight into a flow using the same
+# node schemas the Executor agent is given in EXECUTOR_INSTRUCTIONS.
+# Anything we are not sure about returns None so the LLM agents take over.
+
+# Period-end resample aliases ('M'/'Q'/'Y' are rejected by pandas >= 3)
+PERIODS = {"day": "D", "daily": "D", "week": "W", "weekly": "W", "month": "ME", "monthly": "ME",
+           "quarter": "QE", "quarterly": "QE", "year": "YE", "yearly": "YE"}
+
+PERIOD_NAMES = {"D": "Day", "W": "Week", "ME": "Month", "QE": "Quarter", "YE": "Year"}
+
+FILTER_OPS = {"==": "==", "=": "==", "is": "==", "equals": "==", "!=": "!=", "is not": "!=",
+              ">": ">", "<": "<", "contains": "contains"}
+
+DATE_HINTS = ("date", "time", "created", "opened", "closed", "resolved", "updated", "_at", " at")
+COUNT_WORDS = ("count", "counts", "volume", "number", "tickets", "records", "rows", "frequency")
+
+VALUE_COUNTS_RE = re.compile(
+    r"^(?:show|get|give me|display|what is|what are)?\s*(?:the|me)?\s*"
+    r"(?:value counts?|counts?|distribution|breakdown|frequency)\s+(?:of|for|by|per)\s+(?P<col>.+)$")
+TOP_N_RE = re.compile(
+    r"^(?:show|get|give me|display|list)?\s*(?:the|me)?\s*top\s+(?P<n>\d+)\s+(?P<x>.+?)\s+by\s+(?P<y>.+)$")
+TREND_RE = re.compile(
+    r"^(?:show|get|give me|display|plot)?\s*(?:the|me)?\s*(?:trend|timeline|time series)\s+(?:of|for)\s+"
+    r"(?P<z>.+?)\s+(?:by|per|over)\s+(?P<period>day|daily|week|weekly|month|monthly|quarter|quarterly|year|yearly)$")
+FILTER_RE = re.compile(
+    r"^(?:filter|show|keep|only)\s+(?:rows\s+)?(?:where\s+)?(?P<col>.+?)\s*"
+    r"(?P<op>==|!=|=|>|<|\bis not\b|\bis\b|\bequals\b|\bcontains\b)\s*(?P<val>.+)$")
+
+
+def _norm(text):
+    return re.sub(r"[^a-z0-9]", "", str(text).lower())
+
+
+def _new_id():
+    return f"node_{uuid.uuid4().hex[:6]}"
+
+
+class IntentMatcher:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    # --- PUBLIC API ---
+
+    def match(self, text, columns: List[str], file_info=None, add_reader=False,
+              known_values: Optional[Callable[[], Dict[str, List[str]]]] = None):
+        """
+        Returns {"intent", "nodes", "edges"} for a recognised template, or None
+        when the request should fall through to the LLM agents. known_values is
+        only called by templates that need exact value spellings (filters).
+        """
+        flow = None
+        if text and columns:
+            try:
+                flow = self._match(text, columns, known_values or dict)
+            except Exception as e:
+                print(f"⚠️ Fast Path Error: {e}")
+                flow = None
+
+        if not flow:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if add_reader and file_info:
+            self._prepend_reader(flow, file_info)
+        self._wire(flow)
+        print(f"⚡ Fast Path Hit ({flow['intent']}). Hit ratio: {self.hit_ratio():.0%}")
+        return flow
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hit_ratio(), 4)}
+
+    # --- MATCHING ---
+
+    def _match(self, text, columns, known_values):
+        clean = " ".join(text.strip().rstrip("?.!").split())
+        lowered = clean.lower()
+
+        m = TOP_N_RE.match(lowered)
+        if m: return self._top_n(clean, m, columns)
+
+        m = TREND_RE.match(lowered)
+        if m: return self._trend(clean, m, columns)
+
+        m = VALUE_COUNTS_RE.match(lowered)
+        if m: return self._value_counts(clean, m, columns)
+
+        m = FILTER_RE.match(lowered)
+        if m: return self._filter(clean, m, columns, known_values)
+        return None
+
+    def _value_counts(self, text, m, columns):
+        col = self._resolve_column(self._span(text, m, "col"), columns)
+        if not col: return None
+        return {"intent": "VALUE_COUNTS", "nodes": [
+            self._node("Value Counts", f"Value Counts: {col}", {"column": col}),
+            self._node("Bar Chart", f"{col} Distribution", {
+                "column": col, "yAxis": "Count", "title": f"{col} Distribution",
+                "dashboardOrder": 1, "reportWidth": "half"}),
+        ]}
+
+    def _top_n(self, text, m, columns):
+        n = int(m.group("n"))
+        x_col = self._resolve_column(self._span(text, m, "x"), columns)
+        y_text = self._span(text, m, "y")
+        if not x_col or n <= 0: return None
+
+        y_col = self._resolve_column(y_text, columns)
+        if y_col and y_col != x_col:
+            nodes = [
+                self._node("Group By", f"Group By: {x_col}", {
+                    "groupColumns": [x_col], "aggregations": [{"column": y_col, "func": "sum"}]}),
+                self._node("Sort Data", f"Sort: {y_col}", {"column": y_col, "order": "desc"}),
+            ]
+            y_axis = y_col
+        elif _norm(y_text) in COUNT_WORDS:
+            nodes = [self._node("Value Counts", f"Value Counts: {x_col}", {"column": x_col})]
+            y_axis = "Count"
+        else:
+            return None
+
+        title = f"Top {n} {x_col} by {y_axis}"
+        nodes += [
+            self._node("Preview Data", f"Top {n}", {"n": str(n), "mode": "head", "reportWidth": "half", "title": title}),
+            self._node("Bar Chart", title, {
+                "column": x_col, "yAxis": y_axis, "title": title, "dashboardOrder": 1, "reportWidth": "half"}),
+        ]
+        return {"intent": "TOP_N", "nodes": nodes}
+
+    def _trend(self, text, m, columns):
+        period = PERIODS[m.group("period")]
+        target = self._resolve_column(self._span(text, m, "z"), columns)
+        if not target: return None
+
+        if self._looks_like_date(target):
+            date_col, value_col = target, None
+        else:
+            date_cols = [c for c in columns if self._looks_like_date(c)]
+            if len(date_cols) != 1: return None # Ambiguous time axis -> let the agents decide
+            date_col, value_col = date_cols[0], target
+
+        config = {"dateColumn": date_col, "period": period, "agg": "sum" if value_col else "count"}
+        if value_col: config["valueColumn"] = value_col
+        y_axis = value_col or "Count"
+        title = f"{y_axis} Trend by {PERIOD_NAMES[period]}"
+        return {"intent": "TREND", "nodes": [
+            self._node("Trend Analysis", f"Trend: {date_col}", config),
+            self._node("Line Chart", title, {
+                "column": date_col, "yAxis": y_axis, "title": title, "dashboardOrder": 1, "reportWidth": "full"}),
+        ]}
+
+    def _filter(self, text, m, columns, known_values):
+        col = self._resolve_column(self._span(text, m, "col"), columns)
+        if not col: return None
+        op = FILTER_OPS.get(m.group("op").strip())
+        value = self._span(text, m, "val").strip().strip("'\"")
+        if not op or not value: return None
+
+        # Exact Matching rule: snap to the spelling/casing found in the data when we have it
+        for v in known_values().get(col, []):
+            if v.lower() == value.lower():
+                value = v
+                break
+
+        return {"intent": "FILTER", "nodes": [
+            self._node("Filter Rows", f"Filter: {col}", {
+                "conditions": [{"column": col, "operator": op, "value": value}]}),
+            self._node("Preview Data", "Filtered Rows", {
+                "n": "200", "mode": "head", "reportWidth": "full", "title": f"{col} {op} {value}"}),
+        ]}
+
+    # --- HELPERS ---
+
+    def _span(self, text, m, group):
+        # Regexes run on the lowered text; slice the original to keep user casing
+        return text[m.start(group):m.end(group)].strip()
+
+    def _resolve_column(self, phrase, columns):
+        """Exact (normalised) match first, then a single confident fuzzy match. Otherwise None."""
+        phrase = re.sub(r"^(?:the|column)\s+", "", phrase.strip(), flags=re.IGNORECASE).strip("'\"` ")
+        key = _norm(phrase)
+        if not key: return None
+
+        lookup = {}
+        for c in columns:
+            lookup.setdefault(_norm(c), []).append(c)
+        if key in lookup and len(lookup[key]) == 1:
+            return lookup[key][0]
+
+        close = difflib.get_close_matches(key, list(lookup.keys()), n=2, cutoff=0.85)
+        if len(close) == 1 and len(lookup[close[0]]) == 1:
+            return lookup[close[0]][0]
+        return None
+
+    def _looks_like_date(self, col):
+        low = str(col).lower()
+        return any(h in low for h in DATE_HINTS)
+
+    def _node(self, type_label, label, config):
+        return {"id": _new_id(), "type": "custom",
+                "data": {"label": label, "typeLabel": type_label, "config": config}}
+
+    def _prepend_reader(self, flow, file_info):
+        reader = self._node("Read Data", "Read Data", {
+            "selectedFile": {"name": file_info.get("name"), "path": file_info.get("path")}})
+        flow["nodes"].insert(0, reader)
+
+    def _wire(self, flow):
+        nodes = flow["nodes"]
+        flow["edges"] = [
+            {"id": f"e_{uuid.uuid4().hex[:6]}", "source": a["id"], "target": b["id"]}
+            for a, b in zip(nodes, nodes[1:])
+        ]
+
+
+matcher = IntentMatcher()
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+import asyncio
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database as db
+import sample_engine
+from run_events import hub
+
+# =========================================================================
+# BACKGROUND WORKFLOW RUNS (/api/jobs)
+# =========================================================================
+# A submitted workflow becomes a row in the `runs` table and a task on a
+# local pool of JOB_WORKERS threads; the HTTP request returns the run id at
+# once and clients poll status / result (or cancel) by id.
+#   queued -> running -> succeeded | failed | cancelled | timed_out
+# Each run executes on its own WorkflowEngine, so concurrent runs never
+# share context. The engine calls back before every node: that is where
+# per-node progress is written and where cancellation and the run's
+# wall-clock limit are checked. Checks are cooperative: a node that is
+# already running finishes before the run stops.
+# Progressive runs (mode="progressive") whose sources are big enough first
+# execute on samples (sample_engine); that approximate result, flagged
+# "sampled" (sums and counts scaled to full-scale estimates), is stored as
+# the run's preview and announced with a preview_ready event, then the exact run follows on the same worker.
+# Every state change and node is also published on the run's event
+# channel (run_events) for clients following it live.
+# Finished runs keep their result for JOB_RESULT_TTL_S seconds. On start,
+# runs still queued from a previous process are queued again; runs that
+# were mid-execution are marked failed.
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "900"))
+JOB_RESULT_TTL_S = float(os.getenv("JOB_RESULT_TTL_S", "3600"))
+JOB_PURGE_INTERVAL_S = 60
+FINAL_STATES = ('succeeded', 'failed', 'cancelled', 'timed_out')
+MODES = ('exact', 'progressive')
+
+
+class RunStopped(Exception):
+    """Raised from the progress hook to stop a run between two nodes."""
+
+    def __init__(self, status, reason):
+        super().__init__(reason)
+        self.status = status
+
+
+class JobQueue:
+    """Runs workflows in the background; state lives in the runs table, cancel flags in memory."""
+
+    def __init__(self, engine_factory, encode=None, workers=JOB_WORKERS):
+        self.engine_factory = engine_factory
+        self.encode = encode or (lambda result: result) # Makes a result JSON-safe before it is stored
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._cancel = {} # run id -> Event, for runs queued or running in this process
+        self._purged_at = 0.0
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="flow-run")
+                atexit.register(self._pool.shutdown, wait=False, cancel_futures=True)
+            return self._pool
+
+    def _enqueue(self, run_id):
+        with self._lock: self._cancel[run_id] = threading.Event()
+        hub.open(run_id).publish({"event": "run_queued", "run_id": run_id})
+        self._get_pool().submit(self._run, run_id)
+
+    def _finished(self, run_id):
+        run = db.get_run(run_id)
+        if run and run["status"] in FINAL_STATES:
+            hub.publish(run_id, {"event": "run_finished", "run_id": run_id, "status": run["status"], "error": run["error"],
+                                 "done_nodes": run["done_nodes"], "total_nodes": run["total_nodes"]})
+
+    def submit(self, nodes, edges, user_id=None, timeout=None, mode='exact'):
+        self.purge()
+        run_id = uuid.uuid4().hex
+        timeout = min(float(timeout), JOB_TIMEOUT_S) if timeout else JOB_TIMEOUT_S
+        db.create_run(run_id, user_id, {"nodes": nodes, "edges": edges}, timeout, time.time(), mode if mode in MODES else 'exact')
+        self._enqueue(run_id)
+        return run_id
+
+    def status(self, run_id):
+        self.purge()
+        return db.get_run(run_id)
+
+    def result(self, run_id):
+        self.purge()
+        return db.get_run(run_id, with_result=True)
+
+    def cancel(self, run_id):
+        """True when the run was queued or running; queued runs are cancelled at once."""
+        if not db.request_run_cancel(run_id): return False
+        with self._lock: event = self._cancel.get(run_id)
+        if event: event.set()
+        now = time.time() # A run still waiting for a worker never starts; a running one stops at its next node
+        if db.finish_run(run_id, 'cancelled', now, now + JOB_RESULT_TTL_S, error="Cancelled before start", from_states=('queued',)):
+            self._finished(run_id)
+        return True
+
+    def purge(self):
+        now = time.time()
+        if now - self._purged_at < JOB_PURGE_INTERVAL_S: return 0
+        self._purged_at = now
+        return db.purge_expired_runs(now)
+
+    def recover(self):
+        """Re-queues runs left queued by a previous process; runs it left mid-execution are failed."""
+        now = time.time()
+        for run_id, status in db.get_runs_by_status(('queued', 'running')):
+            if status == 'queued': self._enqueue(run_id)
+            else: db.finish_run(run_id, 'failed', now, now + JOB_RESULT_TTL_S, error="Interrupted by a server restart")
+
+    @staticmethod
+    def _worth_preview(nodes):
+        """Whether any source file is big enough for a sampled preview pass to pay off."""
+        for n in nodes:
+            config = n.get('data', {}).get('config', {}) or {}
+            files = [config.get('selectedFile')] + list(config.get('uploadedFiles') or [])
+            if any(f and sample_engine.worth_sampling(f.get('path', '')) for f in files): return True
+        return False
+
+    def _preview(self, run_id, request, check):
+        """The sampled pass of a progressive run: its result becomes the run's preview."""
+        started = time.perf_counter()
+        preview = asyncio.run(self.engine_factory().execute_flow(request["nodes"], request["edges"], progress=check,
+                                                                   events=lambda payload: hub.publish(run_id, {**payload, "sampled": True}),
+                                                                   sample_rows=sample_engine.SAMPLE_ROWS))
+        ms = round((time.perf_counter() - started) * 1000, 1)
+        preview["preview_ms"], preview["within_target"] = ms, ms <= sample_engine.SAMPLE_TARGET_MS
+        db.update_run(run_id, preview=self.encode(preview))
+        hub.publish(run_id, {"event": "preview_ready", "run_id": run_id, "ms": ms, "within_target": preview["within_target"],
+                             "sampled": preview.get("sampled")})
+
+    def _run(self, run_id):
+        with self._lock: event = self._cancel.get(run_id)
+        try:
+            run = db.get_run(run_id, with_result=True)
+            started = time.time()
+            if run is None or not db.start_run(run_id, started): return # Cancelled (or purged) while waiting
+            deadline = started + (run["timeout"] or JOB_TIMEOUT_S)
+            hub.publish(run_id, {"event": "run_started", "run_id": run_id})
+            types = {n.get('id'): n.get('data', {}).get('typeLabel') for n in run["request"]["nodes"]}
+            state = {"progress": [], "done": 0, "tick": time.perf_counter()}
+
+            def check(order=(), index=0):
+                if index < len(order): # index == len(order) is the call after the last node
+                    if event is not None and event.is_set(): raise RunStopped('cancelled', "Cancelled by user")
+                    if time.time() > deadline: raise RunStopped('timed_out', f"Exceeded the {run['timeout']:g}s time limit")
+
+            def progress(order, index):
+                now = time.perf_counter()
+                steps = state["progress"]
+                if not steps: steps.extend({"id": nid, "type": types.get(nid), "state": "pending"} for nid in order)
+                if index > 0:
+                    steps[index - 1].update(state="done", ms=round((now - state["tick"]) * 1000, 1))
+                state["tick"], state["done"] = now, index
+                check(order, index)
+                if index < len(steps): steps[index]["state"] = "running"
+                db.update_run(run_id, total_nodes=len(steps), done_nodes=index,
+                              current_node=order[index] if index < len(order) else None, progress=steps)
+
+            if run["mode"] == 'progressive' and self._worth_preview(run["request"]["nodes"]):
+                try: self._preview(run_id, run["request"], check)
+                except RunStopped: raise
+                except Exception as e: print(f"⚠️ Run {run_id}: preview pass failed ({e}), running the exact pass") # Optional: never fails the run
+            result = asyncio.run(self.engine_factory().execute_flow(run["request"]["nodes"], run["request"]["edges"], progress=progress,
+                                                                      events=lambda payload: hub.publish(run_id, payload)))
+            now = time.time()
+            db.finish_run(run_id, 'succeeded' if result.get("status") == "success" else 'failed', now, now + JOB_RESULT_TTL_S,
+                          result=self.encode(result), error=result.get("message"))
+        except RunStopped as e:
+            now = time.time()
+            db.update_run(run_id, done_nodes=state["done"], progress=state["progress"]) # Nodes finished before the stop
+            db.finish_run(run_id, e.status, now, now + JOB_RESULT_TTL_S, error=str(e))
+            print(f"🛑 Run {run_id} stopped: {e}")
+        except Exception as e:
+            now = time.time()
+            db.finish_run(run_id, 'failed', now, now + JOB_RESULT_TTL_S, error=str(e))
+            print(f"❌ Run {run_id} failed: {e}")
+        finally:
+            with self._lock: self._cancel.pop(run_id, None)
+            self._finished(run_id)
@@ -0,0 +1,279 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from memory_optimizer import HAS_PYARROW, format_bytes
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# =========================================================================
+# MULTI-INPUT NODES (Merge/Join, Concatenate)
+# =========================================================================
+# Inputs arrive on named ports: the edge's targetHandle ('left' / 'right' on
+# Merge/Join, 'inputs' on Concatenate). Edges without a handle (older saved
+# flows, AI-built flows) fill the free ports in edge order.
+#
+# Merge/Join
+# 1. Keys are factorized on the smaller ("build") side only and the larger
+#    side is probed against that small hash table, i.e. the small side is
+#    broadcast and the big side is never hashed or sorted. Multi-column keys
+#    are folded into a single int64 code, one column at a time.
+# 2. The exact output row count is known from the code counts before anything
+#    is materialized: joins above JOIN_MEMORY_BUDGET_MB (in practice, keys
+#    that are accidentally many-to-many) are refused with the numbers.
+# 3. validate ('one_to_one', 'one_to_many', 'many_to_one') is checked on the
+#    codes; the error names an offending key.
+# 4. inner / left / right joins are assembled with one take per side. outer
+#    joins (key-sorted output) and index joins go through pandas.merge once
+#    the checks above have passed.
+# Output matches pandas.merge: column order, suffixes and dtypes, with rows
+# in the documented order (left rows for inner/left, right rows for right).
+#
+# Concatenate stacks any number of inputs. Inputs without rows are skipped,
+# a single remaining input is passed through without a copy, category
+# columns keep their dtype (union of the categories) and Arrow-backed
+# columns are appended chunk-wise by pandas.
+
+JOIN_MEMORY_BUDGET_MB = int(os.getenv("JOIN_MEMORY_BUDGET_MB", "2048"))
+
+INPUT_PORTS = {'Merge/Join': ('left', 'right'), 'Concatenate': ('inputs',)}
+JOIN_TYPES = ('inner', 'left', 'right', 'outer')
+VALIDATE_ALIASES = {'1:1': 'one_to_one', '1:m': 'one_to_many', 'm:1': 'many_to_one', 'm:m': 'many_to_many'}
+
+
+def input_ports(type_label, incoming):
+    """{port: [source ids]} of a multi-input node, from its incoming edges (in edge order)."""
+    ports = INPUT_PORTS[type_label]
+    if len(ports) == 1: return {ports[0]: [e['source'] for e in incoming]}
+    wired, loose = {p: [] for p in ports}, []
+    for e in incoming:
+        (wired[e['targetHandle']] if e.get('targetHandle') in wired else loose).append(e['source'])
+    for p in ports:
+        if not wired[p] and loose: wired[p].append(loose.pop(0))
+    return wired
+
+
+def join_keys(config):
+    """(left_on, right_on) column lists; both empty means join on the index."""
+    as_list = lambda v: [v] if isinstance(v, str) else list(v or [])
+    on = as_list(config.get('on'))
+    if on: return on, on
+    left_on, right_on = as_list(config.get('left_on')), as_list(config.get('right_on'))
+    if len(left_on) != len(right_on):
+        raise ValueError(f"left_on {left_on} and right_on {right_on} must list the same number of columns")
+    return left_on, right_on
+
+
+def join_columns(left_cols, right_cols, left_on, right_on, suffixes=('_x', '_y')):
+    """
+    Output names as pandas.merge builds them: (left names, right columns kept, right names).
+    A key with the same name on both sides appears once; other shared names get the suffixes.
+    """
+    shared_keys = {l for l, r in zip(left_on, right_on) if l == r}
+    kept = [c for c in right_cols if c not in shared_keys]
+    overlap = set(left_cols) & set(kept)
+    lsuf, rsuf = suffixes
+    return ([f"{c}{lsuf}" if c in overlap else c for c in left_cols], kept,
+            [f"{c}{rsuf}" if c in overlap else c for c in kept])
+
+
+def _key_arrays(df, cols, side):
+    if not cols: return [df.index]
+    missing = [c for c in cols if c not in df.columns]
+    if missing: raise ValueError(f"Join column(s) {missing} not found in the {side} input")
+    return [df[c] for c in cols]
+
+
+def _check_key_types(left_keys, right_keys, left_on, right_on):
+    numeric = lambda k: pd.api.types.is_numeric_dtype(k.dtype) and not pd.api.types.is_bool_dtype(k.dtype)
+    for lk, rk, ln, rn in zip(left_keys, right_keys, left_on or ['index'], right_on or ['index']):
+        if numeric(lk) != numeric(rk) and pd.api.types.is_string_dtype(rk if numeric(lk) else lk):
+            raise ValueError(f"Cannot join '{ln}' ({lk.dtype}) with '{rn}' ({rk.dtype}): "
+                             f"convert one side with Change Data Type first")
+
+
+def _lookup(uniques, values):
+    """Position of every value in uniques (-1 when absent). Arrow-backed keys are probed by Arrow's hash kernel."""
+    if HAS_PYARROW and isinstance(values.dtype, (pd.StringDtype, pd.ArrowDtype)):
+        try:
+            arr = pa.array(values.array)
+            found = pc.index_in(arr, value_set=pa.array(uniques.array).cast(arr.type), skip_nulls=False)
+            return found.fill_null(-1).to_numpy(zero_copy_only=False).astype(np.int64)
+        except (pa.ArrowException, TypeError):
+            pass
+    return pd.Index(uniques).get_indexer(values)
+
+
+def _encode(build_keys, probe_keys):
+    """
+    int64 codes 0..n-1 for the build rows and the matching code (-1 when absent) for the probe rows.
+    Null is a key value like any other, as in pandas.merge.
+    """
+    build = probe = None
+    for bk, pk in zip(build_keys, probe_keys):
+        b, uniques = pd.factorize(bk, use_na_sentinel=False)
+        p = _lookup(uniques, pk)
+        if build is None:
+            build, probe = b, p
+            continue
+        width = len(uniques)
+        build, folded = pd.factorize(build * width + b)
+        probe = pd.Index(folded).get_indexer(np.where((probe < 0) | (p < 0), -1, probe * width + p))
+    return np.asarray(build, dtype=np.int64), np.asarray(probe, dtype=np.int64)
+
+
+def _is_unique(keys):
+    if len(keys) == 1: return pd.Index(keys[0]).is_unique
+    return not pd.MultiIndex.from_arrays(keys).has_duplicates
+
+
+def _duplicate_example(keys):
+    """(most repeated key, its count) for error messages."""
+    counts = pd.DataFrame({i: np.asarray(k) for i, k in enumerate(keys)}).value_counts(dropna=False)
+    value = counts.index[0]
+    value = tuple(v.item() if hasattr(v, 'item') else v for v in value) if isinstance(value, tuple) else value
+    return (value[0] if isinstance(value, tuple) and len(value) == 1 else value), int(counts.iloc[0])
+
+
+def _validate(validate, sides):
+    """sides: {'left': (keys, unique-or-None), 'right': ...}; raises ValueError on a cardinality mismatch."""
+    validate = VALIDATE_ALIASES.get(validate, validate)
+    if not validate or validate == 'many_to_many': return
+    if validate not in ('one_to_one', 'one_to_many', 'many_to_one'):
+        raise ValueError(f"Unknown validate option '{validate}'")
+    must_be_unique = {'one_to_one': ('left', 'right'), 'one_to_many': ('left',), 'many_to_one': ('right',)}[validate]
+    for side in must_be_unique:
+        keys, unique = sides[side]
+        if unique is None: unique = _is_unique(keys)
+        if not unique:
+            value, count = _duplicate_example(keys)
+            raise ValueError(f"Join keys are not unique in the {side} input ({value!r} appears {count} times); "
+                             f"expected {validate}")
+
+
+def _take(df, rows, names):
+    """Rows of df by position (-1 -> missing, upcasting like pandas.merge), renamed to names."""
+    if len(rows) and rows.min() < 0:
+        columns = {i: df.iloc[:, i].array.take(rows, allow_fill=True) for i in range(df.shape[1])}
+        out = pd.DataFrame(columns, index=pd.RangeIndex(len(rows)))
+    else:
+        out = df.take(rows).reset_index(drop=True)
+    out.columns = names
+    return out
+
+
+def merge_frames(left, right, how='inner', left_on=(), right_on=(), validate=None, suffixes=('_x', '_y'),
+                 budget_mb=None):
+    """
+    pandas.merge(left, right, how, left_on, right_on, suffixes) with factorized keys, a broadcast build
+    side, cardinality validation and a memory budget. Returns (frame, info).
+    """
+    if how not in JOIN_TYPES: raise ValueError(f"Unsupported join type '{how}'")
+    left_on, right_on, suffixes = list(left_on), list(right_on), tuple(suffixes)
+    left_keys, right_keys = _key_arrays(left, left_on, 'left'), _key_arrays(right, right_on, 'right')
+    _check_key_types(left_keys, right_keys, left_on, right_on)
+
+    # 1. Hash the smaller side, probe with the larger one
+    build_side = 'right' if len(right) <= len(left) else 'left'
+    build_keys, probe_keys = (right_keys, left_keys) if build_side == 'right' else (left_keys, right_keys)
+    build, probe = _encode(build_keys, probe_keys)
+    n_codes = int(build.max()) + 1 if len(build) else 0
+    counts = np.bincount(build, minlength=n_codes)
+    matched = probe >= 0
+    per_row = np.where(matched, counts[np.where(matched, probe, 0)] if n_codes else 0, 0)
+    hit = np.zeros(n_codes, dtype=bool)
+    hit[probe[matched]] = True
+
+    # 2. Exact output size before materializing anything
+    keep_probe = how == 'outer' or how == ('left' if build_side == 'right' else 'right')
+    keep_build = how == 'outer' or how == build_side
+    probe_alone = int((per_row == 0).sum()) if keep_probe else 0
+    build_alone = int(counts[~hit].sum()) if keep_build else 0
+    rows = int(per_row.sum()) + probe_alone + build_alone
+    row_bytes = sum(df.memory_usage(index=False).sum() / max(len(df), 1) for df in (left, right))
+    budget = (JOIN_MEMORY_BUDGET_MB if budget_mb is None else budget_mb) * 1024 ** 2
+    if rows * row_bytes > budget:
+        raise ValueError(f"Join would produce {rows:,} rows (~{format_bytes(rows * row_bytes)}, budget "
+                         f"{format_bytes(budget)}); the keys are probably many-to-many. Check the join columns "
+                         f"or raise JOIN_MEMORY_BUDGET_MB")
+
+    # 3. Cardinality (the build side's uniqueness is free from the counts)
+    build_unique = bool(counts.max() <= 1) if n_codes else True
+    _validate(validate, {build_side: (build_keys, build_unique),
+                         ('left' if build_side == 'right' else 'right'): (probe_keys, None)})
+
+    info = {"rows": rows, "build": build_side, "strategy": "broadcast"}
+    if how == 'outer' or not left_on or any(lk.dtype != rk.dtype for lk, rk in zip(left_keys, right_keys)):
+        # Key-sorted (outer), index-aligned and dtype-coerced key output: pandas assembles it, checks already ran
+        info["strategy"] = "pandas"
+        kwargs = dict(on=left_on) if left_on and left_on == right_on else \
+            dict(left_on=left_on, right_on=right_on) if left_on else dict(left_index=True, right_index=True)
+        return pd.merge(left, right, how=how, suffixes=suffixes, **kwargs), info
+
+    # 4. Row pairs in probe order: every probe row once per matching build row (-1: no match, kept)
+    if build_unique: # Lookup join: one build row per code
+        row_of = np.full(n_codes + 1, -1) # code -1 reads the trailing -1
+        row_of[build] = np.arange(len(build))
+        probe_rows = np.arange(len(probe)) if keep_probe else np.flatnonzero(matched)
+        build_rows = row_of[probe[probe_rows]]
+    else:
+        order = np.append(np.argsort(build, kind='stable'), -1)
+        starts = np.concatenate(([0], np.cumsum(counts)))
+        reps = np.maximum(per_row, 1) if keep_probe else per_row
+        probe_rows = np.repeat(np.arange(len(probe)), reps)
+        offsets = np.arange(len(probe_rows)) - np.repeat(np.cumsum(reps) - reps, reps)
+        pos = np.repeat(np.where(matched, starts[np.where(matched, probe, 0)], 0), reps) + offsets
+        build_rows = order[np.where(np.repeat(per_row, reps) > 0, pos, len(order) - 1)]
+    if build_alone:
+        alone = np.flatnonzero(~hit[build])
+        build_rows = np.concatenate((build_rows, alone))
+        probe_rows = np.concatenate((probe_rows, np.full(len(alone), -1)))
+
+    left_rows, right_rows = (probe_rows, build_rows) if build_side == 'right' else (build_rows, probe_rows)
+    lead = right_rows if how == 'right' else left_rows # pandas keeps the row order of this side
+    if build_side == ('right' if how == 'right' else 'left') or build_alone:
+        sort = np.argsort(lead, kind='stable')
+        left_rows, right_rows = left_rows[sort], right_rows[sort]
+
+    left_names, right_kept, right_names = join_columns(list(left.columns), list(right.columns), left_on, right_on, suffixes)
+    out_left = _take(left, left_rows, left_names)
+    if how == 'right':
+        # Shared key columns come from the right side, where every row has a value
+        for l, r in zip(left_on, right_on):
+            if l == r: out_left[left_names[left.columns.get_loc(l)]] = right[r].take(right_rows).array
+    out_right = _take(right[right_kept], right_rows, right_names)
+    return pd.concat([out_left, out_right], axis=1), info
+
+
+def _unique_names(names):
+    seen, out = {}, []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        out.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return out
+
+
+def concat_frames(frames, axis='rows', ignore_index=True):
+    """Stacks frames (axis 'rows') or places them side by side (axis 'columns', duplicate names get _2, _3...)."""
+    frames = [f for f in frames if f is not None]
+    if not frames: return None
+    if axis in ('columns', 1, '1'):
+        out = pd.concat([f.reset_index(drop=True) for f in frames] if ignore_index else frames, axis=1)
+        out.columns = _unique_names(list(out.columns))
+        return out
+
+    seen = {c for f in frames if len(f) for c in f.columns}
+    frames = [f for f in frames if len(f) or not set(f.columns) <= seen] or frames[:1]
+    if len(frames) == 1: return frames[0].reset_index(drop=True) if ignore_index else frames[0]
+
+    # Category columns with different categories would fall back to object: align them on the union
+    shared = set(frames[0].columns).intersection(*(f.columns for f in frames[1:]))
+    for col in shared:
+        dtypes = [f[col].dtype for f in frames]
+        if all(isinstance(d, pd.CategoricalDtype) for d in dtypes) and len(set(dtypes)) > 1:
+            categories = pd.api.types.union_categoricals([f[col] for f in frames], ignore_order=True).categories
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return pd.concat(frames, ignore_index=ignore_index)
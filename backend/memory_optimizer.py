@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# =========================================================================
+# MEMORY-OPTIMIZED INGESTION (opt-in, Read Data)
+# =========================================================================
+# Enabled per node with config.optimizeMemory (true | "aggressive") or for
+# every Read Data node with OPTIMIZE_MEMORY=1.
+#   - low-cardinality string columns  -> category
+#   - integer columns                 -> smallest integer type that holds them
+#   - other string columns            -> Arrow-backed strings (NaN semantics)
+#   - float64 -> float32 only in "aggressive" mode: float32 storage changes
+#     mean/std in the last digits, so it is not part of the default mode.
+# The engine keeps results identical on optimized frames: groupbys use
+# observed=True, value counts go through value_counts() below and the
+# expression engine widens small ints before arithmetic.
+
+OPTIMIZE_MEMORY = os.getenv("OPTIMIZE_MEMORY", "0").lower() in ("1", "true", "yes")
+CATEGORY_MAX_RATIO = 0.5 # distinct / non-null values
+CATEGORY_MAX_DISTINCT = 50_000
+
+
+def optimize_mode(config):
+    """None (off), 'safe' or 'aggressive' for a Read Data config."""
+    value = config.get('optimizeMemory', OPTIMIZE_MEMORY)
+    if value == 'aggressive': return 'aggressive'
+    return 'safe' if value in (True, 'true', 'safe', 1) else None
+
+
+def _text_dtype():
+    if not HAS_PYARROW: return None
+    try: return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError: return None # pandas < 2.3: string[pyarrow] uses pd.NA, which changes comparison results
+
+
+def _optimize_column(s, mode):
+    if pd.api.types.is_bool_dtype(s) or isinstance(s.dtype, pd.CategoricalDtype): return s
+    if pd.api.types.is_integer_dtype(s) and isinstance(s.dtype, np.dtype):
+        return pd.to_numeric(s, downcast='unsigned' if s.dtype.kind == 'u' else 'integer')
+    if pd.api.types.is_float_dtype(s) and isinstance(s.dtype, np.dtype):
+        if mode != 'aggressive' or s.dtype.itemsize <= 4: return s
+        return s.astype('float32')
+    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+        if pd.api.types.infer_dtype(s, skipna=True) != 'string': return s # Mixed values stay as they are
+        non_null = int(s.notna().sum())
+        distinct = s.nunique(dropna=True)
+        if non_null and distinct <= CATEGORY_MAX_DISTINCT and distinct / non_null <= CATEGORY_MAX_RATIO:
+            return s.astype('category')
+        text = _text_dtype()
+        if text is not None and s.dtype != text: return s.astype(text)
+    return s
+
+
+def optimize_frame(df, mode='safe'):
+    """
+    Returns (optimized_df, report). report is one entry per column:
+    {"column", "before", "after" (bytes), "dtype_before", "dtype_after"}.
+    """
+    before = df.memory_usage(deep=True, index=False)
+    out = df.copy(deep=False)
+    for col in df.columns:
+        out[col] = _optimize_column(df[col], mode)
+    after = out.memory_usage(deep=True, index=False)
+    report = [{"column": str(col), "before": int(before[col]), "after": int(after[col]),
+               "dtype_before": str(df[col].dtype), "dtype_after": str(out[col].dtype)} for col in df.columns]
+    return out, report
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB": return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+
+def summarize_report(report):
+    before = sum(r["before"] for r in report)
+    after = sum(r["after"] for r in report)
+    changed = [f"{r['column']}: {r['dtype_before']}->{r['dtype_after']}" for r in report if r["dtype_before"] != r["dtype_after"]]
+    return f"{format_bytes(before)} -> {format_bytes(after)}" + (f" ({', '.join(changed[:8])}{', ...' if len(changed) > 8 else ''})" if changed else "")
+
+
+def value_counts(series):
+    """
+    Series.value_counts() with the ordering of a plain column for category columns too:
+    pandas lists unobserved categories and breaks ties by category order instead of first appearance.
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype): return series.value_counts()
+    codes = pd.Series(series.cat.codes.to_numpy())
+    counts = codes[codes >= 0].value_counts()
+    index = pd.Index(series.cat.categories.take(counts.index.to_numpy()), name=series.name)
+    return pd.Series(counts.to_numpy(), index=index, name='count')
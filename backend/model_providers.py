@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+# Optional Gemini Import
+try:
+    import google.generativeai as genai
+    HAS_GEMINI = True
+except ImportError:
+    HAS_GEMINI = False
+
+# Optional OpenAI Import
+try:
+    from openai import OpenAI
+    HAS_OPENAI = True
+except ImportError:
+    HAS_OPENAI = False
+    print("⚠️ OpenAI library not found. (pip install openai)")
+
+# =========================================================================
+# MODEL PROVIDERS
+# =========================================================================
+# Every provider exposes complete(agent_type, system_instruction, prompt) and
+# returns the raw model text, or None when it could not produce an answer.
+# JSON parsing and agent-specific fallbacks stay in MultiAgentWorkFlow.
+#
+#   live   -> Gemini first, OpenAI fallback (the original hybrid behaviour)
+#   record -> live + every prompt/response appended to a JSONL file
+#   replay -> answers from a recording, with simulated latency (no network)
+#   mock   -> replay that falls back to canned answers on unknown prompts
+
+
+def prompt_key(agent_type, prompt):
+    return hashlib.sha256(f"{agent_type}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class ModelProvider:
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, agent_type, system_instruction, prompt) -> Optional[str]:
+        raise NotImplementedError
+
+
+class GeminiProvider(ModelProvider):
+    name = "gemini"
+
+    def __init__(self, api_key, model_name="models/gemini-2.5-flash"):
+        super().__init__()
+        self.model_name = model_name
+        genai.configure(api_key=api_key)
+
+    def get_model(self, system_instruction):
+        return genai.GenerativeModel(model_name=self.model_name, system_instruction=system_instruction)
+
+    def complete(self, agent_type, system_instruction, prompt):
+        self.calls += 1
+        model = self.get_model(system_instruction)
+        res = model.generate_content(f"{prompt}\n\nIMPORTANT: Return VALID JSON ONLY. No Markdown.")
+        return res.text
+
+
+class OpenAIProvider(ModelProvider):
+    name = "openai"
+
+    def __init__(self, api_key, model_name="gpt-4o"):
+        super().__init__()
+        self.model_name = model_name
+        self.client = OpenAI(api_key=api_key)
+
+    def complete(self, agent_type, system_instruction, prompt):
+        self.calls += 1
+        response = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": system_instruction or "You are a helpful AI."},
+                {"role": "user", "content": f"{prompt}\n\nReturn JSON ONLY."}
+            ],
+            temperature=0.2,
+            response_format={ "type": "json_object" }
+        )
+        return response.choices[0].message.content
+
+
+class LiveProvider(ModelProvider):
+    """Hybrid call: Gemini with retries -> OpenAI fallback -> None."""
+    name = "live"
+
+    def __init__(self, gemini=None, openai=None, retries=2):
+        super().__init__()
+        self.gemini = gemini
+        self.openai = openai
+        self.retries = retries
+
+    def complete(self, agent_type, system_instruction, prompt):
+        self.calls += 1
+        # 1. Try Gemini
+        if self.gemini:
+            for attempt in range(self.retries):
+                try:
+                    return self.gemini.complete(agent_type, system_instruction, prompt)
+                except Exception as e:
+                    error_msg = str(e).lower()
+                    if "429" in error_msg or "quota" in error_msg:
+                        print(f"⚠️ Gemini Quota Exceeded. Switching to OpenAI...")
+                        break # Break to try OpenAI
+
+                    print(f"⚠️ Gemini Error (Attempt {attempt+1}): {e}")
+                    time.sleep(1)
+
+        # 2. Try OpenAI Fallback
+        if self.openai:
+            print(f"🔄 Activating OpenAI Fallback for {agent_type}...")
+            try:
+                return self.openai.complete(agent_type, system_instruction, prompt)
+            except Exception as e:
+                print(f"❌ OpenAI Connection Error: {e}")
+        return None
+
+
+class RecordingProvider(ModelProvider):
+    """Wraps another provider and appends every prompt/response pair to a JSONL file."""
+    name = "record"
+
+    def __init__(self, inner: ModelProvider, path):
+        super().__init__()
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def complete(self, agent_type, system_instruction, prompt):
+        self.calls += 1
+        started = time.perf_counter()
+        text = self.inner.complete(agent_type, system_instruction, prompt)
+        record = {
+            "key": prompt_key(agent_type, prompt),
+            "agent_type": agent_type,
+            "prompt": prompt,
+            "response": text,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "provider": self.inner.name,
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        return text
+
+
+class LatencyModel:
+    """
+    Parses specs like "fixed:0.2", "uniform:0.1,0.6", "normal:0.8,0.2",
+    "lognormal:-0.5,0.4" or "recorded" (replay the captured latency). Seconds.
+    """
+
+    def __init__(self, spec="fixed:0", seed=None):
+        self.spec = spec or "fixed:0"
+        self.kind, _, raw = self.spec.partition(":")
+        self.params = [float(p) for p in raw.split(",") if p.strip()]
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, recorded_ms=None):
+        with self._lock:
+            if self.kind == "recorded": delay = (recorded_ms or 0) / 1000
+            elif self.kind == "uniform": delay = self.rng.uniform(*self.params)
+            elif self.kind == "normal": delay = self.rng.gauss(*self.params)
+            elif self.kind == "lognormal": delay = self.rng.lognormvariate(*self.params)
+            else: delay = self.params[0] if self.params else 0.0
+        return max(delay, 0.0)
+
+
+class ReplayProvider(ModelProvider):
+    """
+    Serves answers from a recording file, keyed on (agent_type, prompt).
+    With mock=True unknown prompts get a canned answer instead of None,
+    so the whole agent pipeline runs on an offline machine.
+    """
+    name = "replay"
+
+    def __init__(self, path=None, latency: LatencyModel = None, mock=False):
+        super().__init__()
+        self.latency = latency or LatencyModel()
+        self.mock = mock
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip(): continue
+                    rec = json.loads(line)
+                    self.records[rec["key"]] = rec # Last recording of a prompt wins
+        if mock: self.name = "mock"
+
+    def complete(self, agent_type, system_instruction, prompt):
+        rec = self.records.get(prompt_key(agent_type, prompt))
+        with self._lock:
+            self.calls += 1
+            if rec: self.hits += 1
+            else: self.misses += 1
+
+        time.sleep(self.latency.sample(rec.get("latency_ms") if rec else None))
+        if rec: return rec.get("response")
+        if self.mock: return json.dumps(MOCK_RESPONSES.get(agent_type, {}))
+        return None
+
+    def stats(self):
+        return {"calls": self.calls, "hits": self.hits, "misses": self.misses}
+
+
+MOCK_RESPONSES = {
+    "manager": {"action": "GENERATE", "response_text": "Understood. Building the flow."},
+    "planner": {"category": "Single Insight", "reasoning": "Mock plan", "steps": ["Show Preview"]},
+    "executor": {
+        "nodes": [{"id": "mock_preview", "type": "custom", "data": {
+            "label": "Preview Data", "typeLabel": "Preview Data", "config": {"n": "20", "mode": "head"}}}],
+        "edges": []
+    },
+    "validator": {"status": "PASS", "corrected_flow": None},
+    "Column_Mapper": {"Domain": "Mock", "required_columns": []},
+}
+
+
+def build_provider(mode=None):
+    """Builds the provider chain from MODEL_PROVIDER / MODEL_RECORD_PATH / MODEL_REPLAY_LATENCY."""
+    mode = (mode or os.getenv("MODEL_PROVIDER", "live")).lower()
+    record_path = os.getenv("MODEL_RECORD_PATH", "agent_recordings.jsonl")
+
+    if mode in ("replay", "mock"):
+        seed = os.getenv("MODEL_REPLAY_SEED")
+        latency = LatencyModel(os.getenv("MODEL_REPLAY_LATENCY", "fixed:0"), int(seed) if seed else None)
+        return ReplayProvider(record_path, latency, mock=(mode == "mock"))
+
+    gemini = None
+    gemini_key = os.getenv("GOOGLE_API_KEY")
+    if gemini_key and HAS_GEMINI:
+        gemini = GeminiProvider(gemini_key)
+    else:
+        print("⚠️ WARNING: GOOGLE_API_KEY not found.")
+
+    openai = None
+    openai_key = os.getenv("OPENAI_API_KEY")
+    if openai_key and HAS_OPENAI:
+        try:
+            openai = OpenAIProvider(openai_key)
+        except Exception as e:
+            print(f"⚠️ OpenAI Init Failed: {e}")
+
+    live = LiveProvider(gemini, openai)
+    if mode == "record":
+        return RecordingProvider(live, record_path)
+    return live
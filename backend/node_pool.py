@@ -0,0 +1,145 @@
+import os
+import time
+import atexit
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from memory_optimizer import HAS_PYARROW
+
+if HAS_PYARROW:
+    import pyarrow as pa
+
+# =========================================================================
+# PROCESS-POOL NODE EXECUTION (CPU-heavy nodes)
+# =========================================================================
+# Text, ML and heavy aggregation nodes hold the GIL, so they run in a pool
+# of NODE_WORKERS processes while the engine moves on to the next node;
+# sibling branches of the DAG (the spokes of a report) therefore run side
+# by side, one core each. A node's result is only waited for when a node
+# that reads it comes up, or at the end of the run.
+# Frames cross the process boundary as Arrow IPC files in shared memory
+# (NODE_SHM_DIR, /dev/shm by default), never pickled: the parent writes an
+# input once (however many workers read it) and workers memory-map it, and
+# results come back the same way, so the reading side maps the pages
+# instead of copying them. Files are unlinked as soon as they are mapped or
+# when the run ends; mapped pages stay valid until the frame is released.
+# Offloading applies to single-input nodes with at least
+# NODE_OFFLOAD_MIN_ROWS rows; inputs Arrow cannot hold (mixed-type object
+# columns) and a broken pool fall back to running in-process, and such an
+# output is sent back pickled instead.
+
+NODE_WORKERS = int(os.getenv("NODE_WORKERS", str(min(4, os.cpu_count() or 1))))
+NODE_OFFLOAD_MIN_ROWS = int(os.getenv("NODE_OFFLOAD_MIN_ROWS", "50000"))
+NODE_SHM_DIR = os.getenv("NODE_SHM_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+CPU_HEAVY = {'Sentiment Analysis', 'Clustering', 'Forecast', 'N-Grams', 'Word Cloud',
+             'Group By', 'Pivot Table', 'Trend Analysis'}
+SAME_AS_INPUT = "input" # A worker result that is the input frame unchanged (e.g. Word Cloud) is not sent back
+
+_lock = threading.Lock()
+_pool = None
+
+
+def write_frame(df, directory):
+    """Arrow IPC file holding df (index included); returns its path."""
+    table = pa.Table.from_pandas(df)
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".arrow")
+    with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, table.schema) as writer: writer.write_table(table)
+    return path
+
+
+def read_frame(path, unlink=False):
+    """DataFrame over a memory-mapped Arrow IPC file; numeric and string columns keep pointing at the mapping."""
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if unlink: os.unlink(path) # The mapping outlives the name
+    return table.to_pandas(split_blocks=True)
+
+
+def _init_worker():
+    # Parallelism is across nodes here: the engines' own pools would oversubscribe the cores
+    import text_engine, forecast_engine, clustering_engine, sentiment_engine
+    text_engine.TEXT_WORKERS = forecast_engine.FORECAST_WORKERS = clustering_engine.CLUSTER_WORKERS = 1
+    sentiment_engine.SENTIMENT_WORKERS = 1
+    text_engine._pool = forecast_engine._pool = clustering_engine._pool = sentiment_engine._pool = None
+
+
+def _run_in_worker(args):
+    """
+    (output path | SAME_AS_INPUT | None, node output, log lines, ms) of one node; an output frame Arrow cannot hold
+    comes back pickled in place of the path. Runs in the worker processes.
+    """
+    node_id, node, parent_id, in_path, out_dir = args
+    from engine import WorkflowEngine # Imported here: engine imports this module
+    started = time.perf_counter()
+    input_df = read_frame(in_path)
+    engine, log = WorkflowEngine(), []
+    data = node.get('data', {})
+    output_df = engine._run_node(node_id, node, [parent_id], input_df, {}, {}, log)
+    output = engine._node_output(node_id, data.get('typeLabel'), data.get('config', {}), output_df)
+    if output_df is None: path = None
+    elif output_df is input_df: path = SAME_AS_INPUT
+    else:
+        try: path = write_frame(output_df, out_dir)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError): path = output_df
+    return path, output, log, round((time.perf_counter() - started) * 1000, 1)
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=NODE_WORKERS, initializer=_init_worker)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+class NodeOffloader:
+    """One run's offloaded nodes: the shared-memory directory, exported inputs and pending futures."""
+
+    def __init__(self):
+        self.dir = tempfile.mkdtemp(prefix="dataflow-", dir=NODE_SHM_DIR)
+        self.inputs = {} # producing node id -> exported file
+        self.pending = {} # node id -> (future, input frame, started)
+
+    @staticmethod
+    def enabled():
+        return HAS_PYARROW and NODE_WORKERS > 1
+
+    def accepts(self, node_type, input_df, predecessors):
+        return node_type in CPU_HEAVY and len(predecessors) == 1 and input_df is not None and len(input_df) >= NODE_OFFLOAD_MIN_ROWS
+
+    def submit(self, node_id, node, parent_id, input_df, started):
+        """False when the input cannot be exported (the caller runs the node itself)."""
+        try:
+            if parent_id not in self.inputs: self.inputs[parent_id] = write_frame(input_df, self.dir)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return False
+        future = _get_pool().submit(_run_in_worker, (node_id, node, parent_id, self.inputs[parent_id], self.dir))
+        self.pending[node_id] = (future, input_df, started)
+        return True
+
+    def done(self, needed=None):
+        """
+        [(node id, input frame, started, outcome)] for the pending nodes that have finished, after waiting for those
+        in `needed` (every pending node when None). outcome is (output frame, node output, log, ms) or the exception.
+        """
+        wanted = list(self.pending) if needed is None else [n for n in needed if n in self.pending]
+        if wanted: wait([self.pending[n][0] for n in wanted])
+        ready = [n for n, (f, _, _) in self.pending.items() if f.done()]
+        results = []
+        for node_id in ready:
+            future, input_df, started = self.pending.pop(node_id)
+            try:
+                path, output, log, ms = future.result()
+                if not isinstance(path, str): output_df = path # None, or a frame sent back pickled
+                else: output_df = input_df if path == SAME_AS_INPUT else read_frame(path, unlink=True)
+                results.append((node_id, input_df, started, (output_df, output, log, ms)))
+            except Exception as e:
+                results.append((node_id, input_df, started, e))
+        return results
+
+    def close(self):
+        for future, _, _ in self.pending.values(): future.cancel()
+        self.pending.clear()
+        shutil.rmtree(self.dir, ignore_errors=True)
@@ -0,0 +1,85 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+# =========================================================================
+# RUN EVENTS (live per-node progress for /api/jobs/{id}/ws and /events)
+# =========================================================================
+# Every background run gets a channel: an append-only list of events
+#   run_queued, run_started, node_started, node_finished (rows, columns,
+#   ms, a few preview rows), ..., run_finished (status, error)
+# numbered by `seq`. Worker threads publish; WebSocket / SSE handlers
+# replay the history from any seq and then wait for new events, so a
+# client that connects late or reconnects misses nothing. Waiters are
+# woken with call_soon_threadsafe on their own event loop. Channels of
+# finished runs are kept (oldest evicted first) up to EVENT_HISTORY_RUNS.
+
+EVENT_HISTORY_RUNS = int(os.getenv("EVENT_HISTORY_RUNS", "200"))
+EVENT_KEEPALIVE_S = float(os.getenv("EVENT_KEEPALIVE_S", "15"))
+
+
+class RunChannel:
+    """Events of one run; closed by its run_finished event."""
+
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    def publish(self, event):
+        with self._lock:
+            if self.closed: return # Nothing follows run_finished
+            self.events.append({**event, "seq": len(self.events), "ts": time.time()})
+            self.closed = event["event"] == "run_finished"
+            waiters, self._waiters = self._waiters, []
+        for loop, wake in waiters: loop.call_soon_threadsafe(wake.set)
+
+    async def stream(self, after=0, keepalive=EVENT_KEEPALIVE_S):
+        """Events with seq >= after, then new ones as they arrive; None after `keepalive` seconds of silence."""
+        loop = asyncio.get_running_loop()
+        while True:
+            wake = asyncio.Event()
+            with self._lock:
+                batch, done = self.events[after:], self.closed
+                if not batch and not done: self._waiters.append((loop, wake))
+            if batch:
+                after += len(batch)
+                for event in batch: yield event
+                continue
+            if done: return
+            try:
+                await asyncio.wait_for(wake.wait(), keepalive)
+            except asyncio.TimeoutError:
+                with self._lock:
+                    if (loop, wake) in self._waiters: self._waiters.remove((loop, wake))
+                yield None
+
+
+class EventHub:
+    """run id -> RunChannel, bounded: the oldest finished channels are dropped first."""
+
+    def __init__(self, keep=EVENT_HISTORY_RUNS):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._channels = OrderedDict()
+
+    def open(self, run_id):
+        with self._lock:
+            channel = self._channels.setdefault(run_id, RunChannel())
+            if len(self._channels) > self.keep:
+                for old in [k for k, c in self._channels.items() if c.closed][:len(self._channels) - self.keep]:
+                    del self._channels[old]
+            return channel
+
+    def get(self, run_id):
+        with self._lock: return self._channels.get(run_id)
+
+    def publish(self, run_id, event):
+        channel = self.get(run_id)
+        if channel is not None: channel.publish(event)
+
+
+hub = EventHub()
@@ -0,0 +1,171 @@
+import os
+import io
+import math
+import pickle
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import file_signature, HEADER_SAMPLE_ROWS
+from aggregation_engine import agg_plan, normalize_func
+from data_paths import data_path
+
+# =========================================================================
+# SAMPLES FOR PROGRESSIVE EXECUTION (preview pass of /api/jobs mode=progressive)
+# =========================================================================
+# A progressive run first executes the flow on a sample of every source
+# file, so the user sees approximate outputs (flagged as sampled) within
+# SAMPLE_TARGET_MS, then the exact run replaces them. The sample comes from:
+#   stored  taken when the file was last loaded in full (any run): a uniform
+#           sample, or stratified on the Read Data node's sampleStratify
+#           column; kept in SAMPLE_DIR keyed by path + mtime + size, so an
+#           edited file never reuses an old sample
+#   blocks  CSV files never loaded yet: SAMPLE_BLOCKS evenly spaced byte
+#           blocks, whole lines only, parsed in one read_csv call
+#   head    anything else (Excel, CSV that block reads cannot parse)
+# Files under SAMPLE_MIN_BYTES are not worth a preview pass.
+# Sums and counts computed from a sample are scaled up by 1 / fraction so
+# the preview shows full-scale estimates; where the fraction is unknown
+# (head samples, joins of two samples) they are flagged as not estimable.
+
+SAMPLE_ROWS = int(os.getenv("SAMPLE_ROWS", "20000"))
+SAMPLE_MIN_BYTES = int(os.getenv("SAMPLE_MIN_BYTES", str(20 * 2 ** 20)))
+SAMPLE_TARGET_MS = float(os.getenv("SAMPLE_TARGET_MS", "2000"))
+SAMPLE_DIR = os.getenv("SAMPLE_DIR", data_path("samples"))
+SAMPLE_BLOCKS = 64
+SEED = 42
+ADDITIVE_FUNCS = {'sum', 'count', 'size'}
+
+
+def bottom_k(chunks, k, seed=SEED):
+    """
+    Uniform sample of k rows from a stream of frames, in their original order: every row gets a random key and the
+    k smallest keys win (a reservoir that can also merge samples of separate chunks).
+    """
+    rng = np.random.default_rng(seed)
+    best, keys = None, np.empty(0)
+    for chunk in chunks:
+        frame = chunk if best is None else pd.concat([best, chunk])
+        fk = np.concatenate([keys, rng.random(len(chunk))])
+        if len(frame) > k:
+            idx = np.sort(np.argpartition(fk, k)[:k])
+            frame, fk = frame.iloc[idx], fk[idx]
+        best, keys = frame, fk
+    return best
+
+
+def stratified(df, k, column, seed=SEED):
+    """About k rows with every value of `column` represented in proportion to its size (at least one row each)."""
+    if column not in df.columns or len(df) <= k: return bottom_k([df], k, seed)
+    codes, uniques = pd.factorize(df[column], use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    quota = np.maximum(1, np.round(sizes * k / len(df))).astype(np.int64)
+    keys = np.random.default_rng(seed).random(len(df))
+    rank = pd.Series(keys).groupby(codes).rank(method='first').to_numpy() # Random position within the stratum
+    return df.iloc[np.flatnonzero(rank <= quota[codes])]
+
+
+def _key(path, sheet):
+    return hashlib.sha256(repr(file_signature(path) + (str(sheet),)).encode()).hexdigest()
+
+
+def worth_sampling(path):
+    try: return os.path.getsize(path) >= SAMPLE_MIN_BYTES
+    except OSError: return False
+
+
+def remember(path, sheet, df, stratify=None, k=SAMPLE_ROWS):
+    """Stores a sample of a fully loaded source (once per file version)."""
+    if not worth_sampling(path) or len(df) <= k: return
+    target = os.path.join(SAMPLE_DIR, f"{_key(path, sheet)}.pkl")
+    if os.path.exists(target): return
+    sample = stratified(df, k, stratify) if stratify else bottom_k([df], k)
+    info = {"method": "stored", "stratify": stratify if stratify in df.columns else None, "source_rows": len(df)}
+    os.makedirs(SAMPLE_DIR, exist_ok=True)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f: pickle.dump((sample, info), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+
+
+def stored(path, sheet):
+    try:
+        with open(os.path.join(SAMPLE_DIR, f"{_key(path, sheet)}.pkl"), "rb") as f: return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def block_sample_csv(path, k, blocks=SAMPLE_BLOCKS):
+    """(frame, estimated total rows): about k whole lines from evenly spaced blocks of a CSV file."""
+    size = os.path.getsize(path)
+    per_block = max(1, math.ceil(k / blocks))
+    seen, lines = set(), []
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        for i in range(blocks):
+            f.seek(start + (size - start) * i // blocks)
+            if i: f.readline() # Land on a line boundary
+            for _ in range(per_block):
+                at = f.tell()
+                line = f.readline()
+                if not line: break
+                if at not in seen:
+                    seen.add(at)
+                    lines.append(line if line.endswith(b"\n") else line + b"\n")
+    frame = pd.read_csv(io.BytesIO(header + b"".join(lines)))
+    avg = sum(map(len, lines)) / len(lines) if lines else 1
+    return frame, int((size - start) / avg)
+
+
+def load_sample(path, sheet, is_excel, k=SAMPLE_ROWS):
+    """(frame, info {"method", "rows", "source_rows", "fraction", ...}) for the preview pass."""
+    kept = stored(path, sheet)
+    if kept is not None:
+        frame, info = kept
+    elif not is_excel:
+        try:
+            frame, total = block_sample_csv(path, k)
+            info = {"method": "blocks", "source_rows": total, "estimated": True}
+        except Exception as e: # Quoted newlines and the like: read the head instead
+            print(f"⚠️ Block sample failed ({path}): {e}")
+            frame, info = pd.read_csv(path, nrows=k), {"method": "head", "source_rows": None}
+    else:
+        frame, info = pd.read_excel(path, sheet_name=sheet, nrows=max(k, HEADER_SAMPLE_ROWS)), {"method": "head", "source_rows": None}
+    rows = len(frame)
+    total = info.get("source_rows")
+    return frame.reset_index(drop=True), {**info, "rows": rows, "fraction": round(rows / total, 6) if total else None}
+
+
+def additive_columns(node_type, config, df):
+    """Columns of an aggregating node's output that grow with the number of rows (sums, counts, row totals)."""
+    if node_type == 'Get Shape': cols = ['Rows']
+    elif node_type == 'Value Counts': cols = ['Count']
+    elif node_type == 'N-Grams': cols = ['Frequency']
+    elif node_type == 'KPI Card':
+        cols = list(df.columns) if not config.get('column') or config.get('operation', 'count') in ADDITIVE_FUNCS else []
+    elif node_type == 'Trend Analysis':
+        agg = config.get('agg', 'count')
+        cols = ['Count'] if agg == 'count' else [config.get('valueColumn')] if agg in ADDITIVE_FUNCS else []
+    elif node_type == 'Group By':
+        keys = config.get('groupColumns') or ([config['groupColumn']] if config.get('groupColumn') else [])
+        aggs = [a for a in config.get('aggregations') or [] if a.get('column') and a.get('func')]
+        if not keys: cols = []
+        elif not aggs: cols = ['Count']
+        else: cols = [name for name, _, func in agg_plan(aggs, keys) if func in ADDITIVE_FUNCS]
+    elif node_type == 'Pivot Table':
+        index = config.get('index')
+        additive = config.get('values') and normalize_func(config.get('aggFunc', 'sum')) in ADDITIVE_FUNCS
+        cols = [c for c in df.columns if c != index] if index and additive else []
+    else: cols = []
+    return [c for c in cols if c in df.columns]
+
+
+def scale_up(df, columns, factor):
+    """Sample-scale sums and counts as full-scale estimates: multiplied by factor (1 / fraction), counts kept whole."""
+    out = df.copy()
+    for c in columns:
+        values = pd.to_numeric(out[c], errors='coerce')
+        whole = pd.api.types.is_integer_dtype(values) and values.notna().all()
+        out[c] = (values * factor).round().astype('int64') if whole else values * factor
+    return out
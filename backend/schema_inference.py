@@ -0,0 +1,374 @@
+from collections import deque
+from typing import Dict, Optional, Callable
+
+from dataset_cache import get_file_schema
+from expression_engine import calculations_from_config, check_calculations
+from aggregation_engine import agg_plan, PERCENTILE_RE
+from cleaning_engine import cast_plan
+from join_engine import INPUT_PORTS, input_ports, join_keys, join_columns
+
+# =========================================================================
+# STATIC SCHEMA PROPAGATION
+# =========================================================================
+# Each node type declares how it turns its input schema into its output
+# schema, so the column list + dtypes of every node can be computed from the
+# cached file headers alone, without executing the flow.
+#
+# A schema is an ordered {column: dtype_name} dict. None means "unknown"
+# (e.g. Pivot Table / One-Hot Encoding, whose columns depend on data values);
+# nothing downstream of an unknown schema is checked.
+# Alongside the schema, the columns known to be unique per row (the key of
+# a Group By / Value Counts / Trend / Pivot output) are tracked: a chart on
+# such an X passes its input through instead of aggregating, as the engine
+# does.
+
+UNKNOWN = "unknown"
+
+SCHEMA_RULES: Dict[str, Callable] = {}
+MULTI_INPUT_RULES: Dict[str, Callable] = {} # type -> fn(config, {port: [schema, ...]})
+
+AGG_DTYPES = {"count": "int64", "nunique": "int64", "size": "int64", "mean": "float64", "median": "float64",
+              "std": "float64", "var": "float64"}
+CAST_DTYPES = {"int": "int64", "float": "float64", "datetime": "datetime64[ns]", "str": "object"}
+CHART_TYPES = ('Bar Chart', 'Line Chart', 'Pie/Donut Chart', 'Area Chart')
+# Nodes that only drop/reorder rows or add columns: a unique column stays unique
+KEEPS_UNIQUE = {'Preview Data', 'Sample Data', 'Filter Rows', 'Filter Date', 'Sort Data', 'Drop Duplicates', 'Drop Null',
+                'Copy Data', 'Export CSV', 'Select Columns', 'List Columns', 'Rank', 'Calculated Field', 'Word Count',
+                'Sentiment Analysis', 'Clustering'}
+
+
+def schema_rule(*type_labels):
+    def register(fn):
+        for t in type_labels: SCHEMA_RULES[t] = fn
+        return fn
+    return register
+
+
+def _is_numeric(dtype):
+    return dtype is not None and (dtype.startswith(("int", "float", "uint", "Int", "Float")) or dtype == "bool")
+
+
+# --- RULES ---
+
+@schema_rule('Preview Data', 'Sample Data', 'Filter Rows', 'Filter Date', 'Sort Data', 'Drop Duplicates', 'Drop Null',
+             'Copy Data', 'Export CSV', 'Replace Value', 'Fill N/A', 'Describe Stats', 'Correlation')
+def _passthrough(config, schema):
+    return dict(schema)
+
+
+@schema_rule('Select Columns', 'List Columns')
+def _select(config, schema):
+    cols = config.get('columns') or []
+    return {c: schema[c] for c in cols if c in schema} if isinstance(cols, list) else {}
+
+
+@schema_rule('Rename Columns')
+def _rename(config, schema):
+    old, new = config.get('oldName'), config.get('newName')
+    if not (old and new): return dict(schema)
+    return {(new if c == old else c): t for c, t in schema.items()}
+
+
+@schema_rule('Change Data Type')
+def _change_type(config, schema):
+    out = dict(schema)
+    for col, dtype in cast_plan(config).items():
+        if col in out and dtype in CAST_DTYPES: out[col] = CAST_DTYPES[dtype]
+    return out
+
+
+@schema_rule('Group By')
+def _group(config, schema):
+    keys = config.get('groupColumns') or ([config['groupColumn']] if config.get('groupColumn') else [])
+    if not keys: return dict(schema)
+    out = {k: schema.get(k, UNKNOWN) for k in keys}
+    aggs = [a for a in config.get('aggregations') or [] if a.get('column') and a.get('func')]
+    if not aggs:
+        out['Count'] = 'int64'
+        return out
+    for name, c, f in agg_plan(aggs, keys): # Same output names as the engine
+        src = schema.get(c, UNKNOWN)
+        if f in AGG_DTYPES or PERCENTILE_RE.match(f): out[name] = AGG_DTYPES.get(f, "float64")
+        elif f == 'sum': out[name] = src if _is_numeric(src) else 'object'
+        else: out[name] = src
+    return out
+
+
+@schema_rule('Pivot Table')
+def _pivot(config, schema):
+    idx, cols, vals = config.get('index'), config.get('columns'), config.get('values')
+    if not (idx and vals and idx in schema and vals in schema): return dict(schema)
+    if cols: return None # One output column per distinct value of `columns`
+    return {idx: schema[idx], vals: 'float64'}
+
+
+@schema_rule('Value Counts')
+def _value_counts(config, schema):
+    col = config.get('column')
+    if not col: return dict(schema)
+    return {col: schema.get(col, UNKNOWN), 'Count': 'int64'}
+
+
+@schema_rule('Trend Analysis')
+def _trend(config, schema):
+    date_col = config.get('dateColumn')
+    if not date_col: return dict(schema)
+    if config.get('agg', 'count') == 'count': return {date_col: 'datetime64[ns]', 'Count': 'int64'}
+    return {date_col: 'datetime64[ns]', config.get('valueColumn'): 'float64'}
+
+
+@schema_rule(*CHART_TYPES)
+def _chart(config, schema):
+    # Charts aggregate non-unique X (the usual case) to X + summed Y / Count; unique X is handled in infer_node_schema
+    x, y = config.get('column'), config.get('yAxis')
+    if not x or x not in schema: return dict(schema)
+    if y and y in schema: return {x: schema[x], y: 'float64'}
+    return {x: schema[x], 'Count': 'int64'}
+
+
+@schema_rule('Histogram')
+def _histogram(config, schema):
+    # Numeric X is binned (label + bin edges); other X is counted per value
+    x, y = config.get('column'), config.get('yAxis')
+    if not x or x not in schema: return dict(schema)
+    if not _is_numeric(schema[x]) and not (schema[x] or '').startswith('datetime'): return {x: schema[x], 'Count': 'int64'}
+    return {x: 'object', (y if y in schema else 'Count'): 'float64' if y in schema else 'int64', 'Bin Start': 'float64', 'Bin End': 'float64'}
+
+
+@schema_rule('Heatmap')
+def _heatmap(config, schema):
+    x, y = config.get('column'), config.get('yAxis')
+    if x not in schema or y not in schema: return dict(schema)
+    return {x: 'object', y: 'object', 'Count': 'int64'}
+
+
+@schema_rule('Scatter Plot')
+def _scatter(config, schema):
+    out = dict(schema)
+    for key in ('column', 'yAxis'):
+        if config.get(key) in out: out[config[key]] = 'float64'
+    return out
+
+
+@schema_rule('Standard Scaler')
+def _scaler(config, schema):
+    out = dict(schema)
+    for c in config.get('columns') or []:
+        if c in out: out[c] = 'float64'
+    return out
+
+
+@schema_rule('One-Hot Encoding')
+def _one_hot(config, schema):
+    return None if config.get('column') in schema else dict(schema)
+
+
+@schema_rule('Sentiment Analysis')
+def _sentiment(config, schema):
+    if config.get('column') not in schema: return dict(schema)
+    return {**schema, 'Polarity': 'float64', 'Subjectivity': 'float64', 'Sentiment': 'object'}
+
+
+@schema_rule('Clustering')
+def _clustering(config, schema):
+    return {**schema, 'Cluster': 'Int64'}
+
+
+@schema_rule('Forecast')
+def _forecast(config, schema):
+    date_col, value_col, group_col = config.get('dateColumn'), config.get('valueColumn'), config.get('groupColumn')
+    if date_col not in schema: return dict(schema)
+    out = {date_col: 'datetime64[ns]'}
+    if group_col in schema: out[group_col] = schema[group_col]
+    return {**out, (value_col or 'Count'): 'float64', 'Type': 'object', 'Lower': 'float64', 'Upper': 'float64'}
+
+
+@schema_rule('Word Count')
+def _word_count(config, schema):
+    return {**schema, 'Word_Count': 'int64'} if config.get('column') in schema else dict(schema)
+
+
+@schema_rule('Rank')
+def _rank(config, schema):
+    col = config.get('column')
+    return {**schema, f'{col}_rank': 'float64'} if col else dict(schema)
+
+
+@schema_rule('Calculated Field')
+def _calculated(config, schema):
+    # Result dtypes come from the expression type checker; invalid calculations are 'unknown'
+    calcs = [(n, e) for n, e in calculations_from_config(config) if n and e]
+    return check_calculations(calcs, schema)[1]
+
+
+@schema_rule('KPI Card')
+def _kpi(config, schema):
+    col, op = config.get('column'), config.get('operation', 'count')
+    if not col: return {config.get('label') or "Total Rows": 'int64'}
+    return {config.get('label') or f"{op} {col}": 'int64' if op == 'distinct' else 'float64'}
+
+
+@schema_rule('Get Shape')
+def _shape(config, schema):
+    return {'Rows': 'int64', 'Columns': 'int64'}
+
+
+@schema_rule('Get Data Types')
+def _dtypes(config, schema):
+    return {'Column': 'object', 'Type': 'object'}
+
+
+@schema_rule('N-Grams')
+def _ngrams(config, schema):
+    return {'N-Gram': 'object', 'Frequency': 'int64'} if config.get('column') in schema else dict(schema)
+
+
+@schema_rule('Word Cloud')
+def _word_cloud(config, schema):
+    return {'Status': 'object'}
+
+
+# --- MULTI-INPUT RULES ---
+
+def _merge_schema(config, ports):
+    if not (ports['left'] and ports['right']): # The engine passes the connected input through
+        connected = ports['left'] or ports['right']
+        return dict(connected[0]) if connected and connected[0] is not None else None
+    left, right = ports['left'][0], ports['right'][0]
+    if left is None or right is None: return None
+    left_on, right_on = join_keys(config)
+    suffixes = tuple(config.get('suffixes') or ('_x', '_y'))
+    left_names, right_kept, right_names = join_columns(list(left), list(right), left_on, right_on, suffixes)
+    out = dict(zip(left_names, left.values()))
+    out.update((name, right[c]) for name, c in zip(right_names, right_kept))
+    return out
+
+
+def _concat_schema(config, ports):
+    schemas = ports['inputs']
+    if not schemas or any(s is None for s in schemas): return None
+    if config.get('axis', 'rows') in ('columns', 1, '1'):
+        out, seen = {}, {}
+        for s in schemas:
+            for c, t in s.items():
+                seen[c] = seen.get(c, 0) + 1
+                out[c if seen[c] == 1 else f"{c}_{seen[c]}"] = t # Same renaming as join_engine.concat_frames
+        return out
+    out = {}
+    for s in schemas:
+        for c, t in s.items(): out[c] = t if out.get(c, t) == t else 'object'
+    return out
+
+
+MULTI_INPUT_RULES.update({'Merge/Join': _merge_schema, 'Concatenate': _concat_schema})
+
+
+def infer_multi_input_schema(type_label, config, port_schemas):
+    """Output schema of a Merge/Join or Concatenate node from {port: [input schema, ...]}."""
+    try:
+        return MULTI_INPUT_RULES[type_label](config or {}, port_schemas)
+    except Exception:
+        return None
+
+
+# --- PASS ---
+
+def infer_node_schema(type_label, config, schema: Optional[Dict[str, str]], unique=frozenset()) -> Optional[Dict[str, str]]:
+    """
+    Output schema of one node. Unregistered types pass their input through, like the engine does.
+    unique: input columns known to be unique per row (see unique_columns).
+    """
+    if schema is None: return None
+    if type_label in CHART_TYPES and (config or {}).get('column') in unique: return dict(schema) # Already aggregated: passed through
+    rule = SCHEMA_RULES.get(type_label)
+    if not rule: return dict(schema)
+    try:
+        return rule(config or {}, schema)
+    except Exception:
+        return None
+
+
+def unique_columns(type_label, config, unique=frozenset()):
+    """Columns of a node's output known to hold each value once, given those of its input."""
+    config = config or {}
+    if type_label == 'Group By':
+        keys = config.get('groupColumns') or ([config['groupColumn']] if config.get('groupColumn') else [])
+        if keys: return frozenset(keys) if len(keys) == 1 else frozenset()
+    elif type_label == 'Pivot Table':
+        if config.get('index') and config.get('values'): return frozenset([config['index']])
+    elif type_label in CHART_TYPES or type_label == 'Value Counts':
+        if config.get('column'): return unique if config['column'] in unique else frozenset([config['column']])
+    elif type_label == 'Trend Analysis':
+        if config.get('dateColumn'): return frozenset([config['dateColumn']])
+    elif type_label == 'Rename Columns':
+        old, new = config.get('oldName'), config.get('newName')
+        return frozenset(new if c == old and new else c for c in unique)
+    elif type_label not in KEEPS_UNIQUE:
+        return frozenset()
+    return unique # Passed through (or the node's config leaves the input unchanged)
+
+
+def topological_order(nodes, edges):
+    """Kahn's algorithm over the flow's own nodes (edges from outside nodes are ignored)."""
+    ids = [n["id"] for n in nodes]
+    indeg = {nid: 0 for nid in ids}
+    children = {nid: [] for nid in ids}
+    for e in edges:
+        if e.get("source") in indeg and e.get("target") in indeg:
+            indeg[e["target"]] += 1
+            children[e["source"]].append(e["target"])
+    queue = deque(nid for nid in ids if indeg[nid] == 0)
+    order = []
+    while queue:
+        nid = queue.popleft()
+        order.append(nid)
+        for c in children[nid]:
+            indeg[c] -= 1
+            if indeg[c] == 0: queue.append(c)
+    return order
+
+
+def source_schema(node, parents, node_map):
+    """Schema produced by an input node, from the cached file header (mirrors engine._load_data)."""
+    config = node.get('data', {}).get('config', {}) or {}
+    if config.get('selectedFile'):
+        return get_file_schema(config['selectedFile'].get('path'), config.get('selectedSheet', 0))
+    if parents:
+        p_node = node_map.get(parents[0], {})
+        if p_node.get('data', {}).get('typeLabel') == 'Upload File':
+            files = p_node['data'].get('config', {}).get('uploadedFiles')
+            if files: return get_file_schema(files[0].get('path'))
+    return {}
+
+
+def infer_flow_schema(nodes, edges, input_schemas: Optional[Dict[str, Dict[str, str]]] = None):
+    """
+    Returns {node_id: schema or None} for every node of the flow.
+    input_schemas seeds schemas for nodes outside the flow (e.g. the canvas source node).
+    """
+    node_map = {n['id']: n for n in nodes}
+    parents, incoming = {}, {}
+    for e in edges:
+        parents.setdefault(e.get('target'), []).append(e.get('source'))
+        incoming.setdefault(e.get('target'), []).append(e)
+
+    schemas, unique = dict(input_schemas or {}), {}
+    for nid in topological_order(nodes, edges):
+        node = node_map[nid]
+        data = node.get('data', {})
+        type_label = data.get('typeLabel')
+        preds = parents.get(nid, [])
+        if type_label == 'Read Data':
+            schemas[nid] = source_schema(node, preds, node_map)
+        elif type_label in ('Upload File', 'SQL Database', 'MongoDB', 'OneDrive', 'Stream / Kafka', 'Google Drive'):
+            schemas[nid] = None
+        elif type_label in INPUT_PORTS:
+            ports = input_ports(type_label, incoming.get(nid, []))
+            schemas[nid] = infer_multi_input_schema(type_label, data.get('config', {}),
+                                                    {p: [schemas.get(s) for s in srcs] for p, srcs in ports.items()})
+        else:
+            in_schema = schemas.get(preds[0]) if preds else None # engine reads predecessors[0]
+            in_unique = unique.get(preds[0], frozenset()) if preds else frozenset()
+            schemas[nid] = infer_node_schema(type_label, data.get('config', {}), in_schema, in_unique)
+            unique[nid] = unique_columns(type_label, data.get('config', {}), in_unique)
+    return {nid: schemas.get(nid) for nid in node_map}
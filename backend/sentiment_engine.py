@@ -0,0 +1,149 @@
+import os
+import atexit
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data_paths import data_path
+
+try:
+    from textblob import TextBlob
+    from importlib.metadata import version
+    HAS_TEXTBLOB = True
+    SCORER = f"textblob-{version('textblob')}"
+except ImportError:
+    HAS_TEXTBLOB = False
+    SCORER = None
+
+# =========================================================================
+# SENTIMENT SCORING (Sentiment Analysis node)
+# =========================================================================
+# Ticket text is highly repetitive, so every distinct text is scored once:
+# 1. The column is factorized; only the distinct texts go further.
+# 2. Each text is looked up in a persistent SQLite cache keyed on a hash of
+#    the scorer version and the text, so reruns and other flows reuse scores.
+# 3. The texts still missing are scored with TextBlob in batches, spread over
+#    a process pool above SENTIMENT_PARALLEL_MIN texts (TextBlob is pure
+#    Python; threads would serialize on the GIL).
+# 4. The scores are expanded back to the rows through the factorize codes.
+# Null texts get null scores and no label.
+
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH", data_path("sentiment_cache.db"))
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", str(min(4, os.cpu_count() or 1))))
+SENTIMENT_PARALLEL_MIN = int(os.getenv("SENTIMENT_PARALLEL_MIN", "2000"))
+SENTIMENT_BATCH = 500
+SQL_CHUNK = 900 # Stay under SQLite's bound-parameter limit
+
+_lock = threading.Lock()
+_pool = None
+
+
+def _score_batch(texts):
+    """[(polarity, subjectivity)] for a list of texts. Runs in the worker processes."""
+    out = []
+    for text in texts:
+        s = TextBlob(text).sentiment
+        out.append((s.polarity, s.subjectivity))
+    return out
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SENTIMENT_WORKERS)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def text_key(text):
+    return hashlib.blake2b(f"{SCORER}\x00{text}".encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    """hash -> (polarity, subjectivity), persisted in SQLite."""
+
+    def __init__(self, path=SENTIMENT_CACHE_PATH):
+        self.path = path
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sentiment_scores "
+                         "(text_hash TEXT PRIMARY KEY, polarity REAL, subjectivity REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_many(self, keys):
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), SQL_CHUNK):
+                chunk = keys[i:i + SQL_CHUNK]
+                rows = conn.execute(f"SELECT text_hash, polarity, subjectivity FROM sentiment_scores "
+                                    f"WHERE text_hash IN ({','.join('?' * len(chunk))})", chunk)
+                found.update((h, (p, s)) for h, p, s in rows)
+        return found
+
+    def put_many(self, scores):
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO sentiment_scores VALUES (?, ?, ?)",
+                             [(h, p, s) for h, (p, s) in scores.items()])
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    with _lock:
+        if _cache is None: _cache = SentimentCache()
+        return _cache
+
+
+def _score_missing(texts):
+    """Scores in input order; batches go to the process pool when there are enough of them."""
+    batches = [texts[i:i + SENTIMENT_BATCH] for i in range(0, len(texts), SENTIMENT_BATCH)]
+    if SENTIMENT_WORKERS > 1 and len(texts) >= SENTIMENT_PARALLEL_MIN:
+        try:
+            return [score for batch in _get_pool().map(_score_batch, batches) for score in batch], SENTIMENT_WORKERS
+        except Exception as e: # Broken pool (e.g. worker killed): score in-process
+            print(f"⚠️ Sentiment pool failed, scoring in-process: {e}")
+    return [score for batch in batches for score in _score_batch(batch)], 1
+
+
+def label(polarity, threshold=0.0):
+    """Positive / Negative / Neutral from polarity; NaN -> None."""
+    pos, neg = polarity > threshold, polarity < -threshold
+    return pd.Series(np.select([pos, neg, np.isnan(polarity)], ['Positive', 'Negative', None], 'Neutral'), dtype=object)
+
+
+def score_sentiment(series, threshold=0.0, cache=None):
+    """
+    Returns (DataFrame[Polarity, Subjectivity, Sentiment] aligned with series, stats).
+    stats: {"rows", "distinct", "cached", "scored", "workers"}.
+    """
+    if not HAS_TEXTBLOB: raise RuntimeError("'textblob' is not installed")
+    cache = cache or get_cache()
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = [str(t) for t in uniques]
+    keys = [text_key(t) for t in texts]
+
+    known = cache.get_many(keys)
+    missing = [i for i, k in enumerate(keys) if k not in known]
+    workers = 0
+    if missing:
+        scores, workers = _score_missing([texts[i] for i in missing])
+        fresh = {keys[i]: s for i, s in zip(missing, scores)}
+        cache.put_many(fresh)
+        known.update(fresh)
+
+    table = np.array([known[k] for k in keys] + [(np.nan, np.nan)], dtype=float) # Row -1 (null text) -> NaN
+    rows = table[codes]
+    out = pd.DataFrame({'Polarity': rows[:, 0], 'Subjectivity': rows[:, 1]}, index=series.index)
+    out['Sentiment'] = label(rows[:, 0], threshold).to_numpy()
+    stats = {"rows": len(series), "distinct": len(texts), "cached": len(texts) - len(missing), "scored": len(missing),
+             "workers": workers}
+    return out, stats
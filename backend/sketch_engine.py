@@ -0,0 +1,177 @@
+import os
+import math
+from functools import reduce
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from memory_optimizer import value_counts
+
+# =========================================================================
+# SKETCHES (approximate KPI Card / Value Counts, config.approximate)
+# =========================================================================
+# Fixed-size summaries of a column, each with a known error bound:
+#   HyperLogLog    distinct count, 2**SKETCH_HLL_BITS registers
+#                  (~1.04 / sqrt(registers) relative standard error)
+#   Heavy hitters  Misra-Gries summary of SKETCH_COUNTERS counters (the
+#                  deterministic sibling of space-saving): every reported
+#                  count is at most max_error below the true count, and any
+#                  value more frequent than rows / SKETCH_COUNTERS is listed
+#   t-digest       quantiles from <= SKETCH_DELTA / 2 centroids, most precise
+#                  in the tails; the bound is the quantile's value interval
+# All three are mergeable: a column is cut into SKETCH_CHUNK_ROWS chunks,
+# each chunk is sketched on its own (on a thread pool past one chunk; the
+# numpy kernels release the GIL) and the sketches are merged, so memory is
+# bounded by one chunk whatever the column size.
+
+SKETCH_HLL_BITS = int(os.getenv("SKETCH_HLL_BITS", "14"))
+SKETCH_COUNTERS = int(os.getenv("SKETCH_COUNTERS", "1000"))
+SKETCH_DELTA = int(os.getenv("SKETCH_DELTA", "200"))
+SKETCH_CHUNK_ROWS = int(os.getenv("SKETCH_CHUNK_ROWS", "1000000"))
+SKETCH_WORKERS = int(os.getenv("SKETCH_WORKERS", str(min(4, os.cpu_count() or 1))))
+Z95 = 1.96
+QUANTILE_OPS = {"median": 0.5, "p90": 0.9, "p95": 0.95, "p99": 0.99} # KPI Card operations
+
+
+class HyperLogLog:
+    def __init__(self, bits=SKETCH_HLL_BITS):
+        self.bits = bits
+        self.registers = np.zeros(2 ** bits, dtype=np.uint8)
+
+    def update(self, series):
+        h = pd.util.hash_pandas_object(series.dropna(), index=False).to_numpy(dtype=np.uint64)
+        if len(h) == 0: return self
+        idx = (h >> np.uint64(64 - self.bits)).astype(np.int64)
+        rest = (h << np.uint64(self.bits)) >> np.uint64(32) # Next 32 bits: position of the first 1 bit
+        rank = np.where(rest > 0, 32 - np.floor(np.log2(np.maximum(rest, 1).astype(np.float64))), 33).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        return m * math.log(m / zeros) if raw <= 2.5 * m and zeros else raw # Linear counting for small sets
+
+    def rel_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+
+class HeavyHitters:
+    def __init__(self, capacity=SKETCH_COUNTERS):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.max_error = 0
+        self.rows = 0
+
+    def _absorb(self, counts, rows, error=0):
+        merged = self.counts.add(counts, fill_value=0) if len(self.counts) else counts.astype('int64')
+        self.rows += rows
+        self.max_error += error
+        if len(merged) > self.capacity: # Misra-Gries merge: drop the (capacity+1)-th count from every counter
+            merged = merged.sort_values(ascending=False, kind='stable')
+            cut = int(merged.iloc[self.capacity])
+            merged = merged.iloc[:self.capacity] - cut
+            merged = merged[merged > 0]
+            self.max_error += cut
+        self.counts = merged.astype('int64')
+
+    def update(self, series):
+        counts = value_counts(series.dropna())
+        self._absorb(counts[counts > 0], int(series.notna().sum()))
+        return self
+
+    def merge(self, other):
+        self._absorb(other.counts, other.rows, other.max_error)
+        return self
+
+    def top(self, k):
+        return self.counts.sort_values(ascending=False, kind='stable').iloc[:k]
+
+
+class TDigest:
+    def __init__(self, delta=SKETCH_DELTA):
+        self.delta = delta
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min, self.max = math.inf, -math.inf
+
+    def _compress(self, m, w):
+        """Centroids of sorted points m (weights w): one per unit step of the scale function."""
+        total = w.sum()
+        q = (np.cumsum(w) - w / 2) / total
+        k = self.delta / (2 * math.pi) * np.arcsin(2 * q - 1) + self.delta / 4 # Scale k1: unit steps are narrow in the tails
+        bucket = np.floor(k).astype(np.int64)
+        bucket -= bucket[0]
+        sums = np.bincount(bucket, weights=w * m)
+        counts = np.bincount(bucket, weights=w)
+        keep = counts > 0
+        return sums[keep] / counts[keep], counts[keep]
+
+    def _absorb(self, means, weights):
+        m = np.concatenate([self.means, means])
+        w = np.concatenate([self.weights, weights])
+        if len(m) == 0: return
+        order = np.argsort(m, kind='stable')
+        self.means, self.weights = self._compress(m[order], w[order])
+
+    def update(self, series):
+        v = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64')
+        v = v[np.isfinite(v)]
+        if len(v):
+            self.min, self.max = min(self.min, float(v.min())), max(self.max, float(v.max()))
+            self._absorb(*self._compress(np.sort(v), np.ones(len(v)))) # Raw values: plain sort, then centroids
+        return self
+
+    def merge(self, other):
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._absorb(other.means, other.weights)
+        return self
+
+    def quantile(self, q):
+        """(value, low, high): the interpolated estimate, bounded by the means either side of its centroid."""
+        if len(self.means) == 0: return (math.nan,) * 3
+        cum = np.cumsum(self.weights)
+        total = cum[-1]
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        value = float(np.interp(q * total, np.concatenate([[0.0], cum - self.weights / 2, [total]]), values))
+        i = min(int(np.searchsorted(cum, q * total)), len(self.means) - 1) + 1 # Covering centroid, in `values`
+        return value, float(min(values[i - 1], value)), float(max(values[i + 1], value))
+
+
+def build(series, make, chunk_rows=SKETCH_CHUNK_ROWS):
+    """One sketch of a column: chunks sketched separately (in parallel past one chunk), then merged."""
+    chunks = [series.iloc[i:i + chunk_rows] for i in range(0, len(series), chunk_rows)] or [series]
+    if len(chunks) > 1 and SKETCH_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=SKETCH_WORKERS) as pool: sketches = list(pool.map(lambda c: make().update(c), chunks))
+    else:
+        sketches = [make().update(c) for c in chunks]
+    return reduce(lambda a, b: a.merge(b), sketches)
+
+
+def approx_distinct(series):
+    hll = build(series, HyperLogLog)
+    est = hll.estimate()
+    err = Z95 * hll.rel_error()
+    return int(round(est)), {"method": "hyperloglog", "registers": len(hll.registers), "rel_error_95": round(err, 4),
+                             "low": int(est * (1 - err)), "high": int(math.ceil(est * (1 + err)))}
+
+
+def approx_quantile(series, q):
+    digest = build(series, TDigest)
+    value, low, high = digest.quantile(q)
+    return value, {"method": "t-digest", "q": q, "centroids": int(len(digest.means)), "low": low, "high": high}
+
+
+def approx_value_counts(series, k=100):
+    """(counts of the k most frequent values, info): counts are lower bounds, at most max_error under the truth."""
+    sketch = build(series, HeavyHitters)
+    distinct, hll_info = approx_distinct(series)
+    info = {"method": "misra-gries", "counters": sketch.capacity, "rows": sketch.rows, "max_error": int(sketch.max_error),
+            "distinct": distinct, "distinct_rel_error_95": hll_info["rel_error_95"]}
+    return sketch.top(k), info
@@ -0,0 +1,63 @@
+"""aggregate / pivot against DataFrame.groupby(...).agg / pivot_table."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregation_engine
+from aggregation_engine import aggregate, pivot
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 5000
+    return pd.DataFrame({'City': rng.choice(['Pune', 'Delhi', 'Agra', None], n), 'Tier': rng.integers(1, 4, n),
+                         'Sales': rng.normal(100, 20, n).round(2), 'Qty': rng.integers(0, 50, n)})
+
+
+@pytest.fixture(params=[False, True], ids=['serial', 'partitioned'])
+def parallel(request, monkeypatch):
+    if request.param:
+        monkeypatch.setattr(aggregation_engine, "AGG_PARALLEL_ROWS", 0)
+        monkeypatch.setattr(aggregation_engine, "AGG_WORKERS", 3)
+    return request.param
+
+
+def test_count_only(df, parallel):
+    expected = df.groupby(['City', 'Tier']).size().reset_index(name='Count')
+    pd.testing.assert_frame_equal(aggregate(df, ['City', 'Tier'], []), expected)
+
+
+def test_one_func_per_column(df, parallel):
+    aggs = [{'column': 'Sales', 'func': 'sum'}, {'column': 'Qty', 'func': 'max'}]
+    expected = df.groupby('City').agg({'Sales': 'sum', 'Qty': 'max'}).reset_index()
+    pd.testing.assert_frame_equal(aggregate(df, ['City'], aggs), expected)
+
+
+def test_several_funcs_per_column(df, parallel):
+    aggs = [{'column': 'Sales', 'func': f} for f in ('sum', 'mean', 'min', 'nunique')] + [{'column': 'Qty', 'func': 'count'}]
+    expected = df.groupby(['City', 'Tier']).agg({'Sales': ['sum', 'mean', 'min', 'nunique'], 'Qty': ['count']})
+    expected.columns = [f"{c}_{f}" for c, f in expected.columns]
+    pd.testing.assert_frame_equal(aggregate(df, ['City', 'Tier'], aggs), expected.reset_index(), check_exact=False)
+
+
+def test_percentile(df, parallel):
+    expected = df.groupby('Tier')['Sales'].quantile(0.9).rename('Sales').reset_index()
+    pd.testing.assert_frame_equal(aggregate(df, ['Tier'], [{'column': 'Sales', 'func': 'p90'}]), expected)
+
+
+def test_aggregate_of_a_group_key_keeps_the_key(df, parallel):
+    out = aggregate(df, ['City'], [{'column': 'City', 'func': 'count'}])
+    expected = df.groupby('City')['City'].count().rename('City_count').reset_index()
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_unsorted_keeps_first_appearance(df):
+    out = aggregate(df, ['City'], [{'column': 'Qty', 'func': 'sum'}], sort=False)
+    expected = df.groupby('City', sort=False)['Qty'].sum().reset_index()
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_pivot_matches_pivot_table(df):
+    expected = df.pivot_table(index='City', columns='Tier', values='Qty', aggfunc='sum').reset_index()
+    pd.testing.assert_frame_equal(pivot(df, 'City', 'Tier', 'Qty', 'sum'), expected, check_names=False)
@@ -0,0 +1,107 @@
+"""Chart reducers: downsampled lines keep their end points and extremes, top-N keeps every total."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from chart_engine import lttb, minmax, reduce_line, top_n, reduce_histogram, reduce_scatter, OTHER
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(0, 1, 20000))
+    y[7321] = y.max() + 500 # One spike and one dip that only a few buckets see
+    y[15002] = y.min() - 500
+    return np.arange(len(y), dtype='float64'), y
+
+
+@pytest.mark.parametrize('n_out', [3, 10, 101, 1000])
+def test_lttb_keeps_end_points_and_spikes(series, n_out):
+    x, y = series
+    idx = lttb(x, y, n_out)
+    assert len(idx) == n_out and idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+    if n_out > 3: assert {7321, 15002} <= set(idx)
+
+
+@pytest.mark.parametrize('n_out', [4, 10, 101, 1000])
+def test_minmax_keeps_end_points_and_every_bucket_extreme(series, n_out):
+    _, y = series
+    idx = minmax(y, n_out)
+    assert len(idx) <= n_out and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert {int(np.argmax(y)), int(np.argmin(y))} <= set(idx)
+    bounds = np.linspace(0, len(y), (n_out - 2) // 2 + 1).astype(np.int64)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        assert y[lo:hi].max() in y[idx] and y[lo:hi].min() in y[idx]
+
+
+@pytest.mark.parametrize('reducer', [lambda x, y: lttb(x, y, 50), lambda x, y: minmax(y, 50)], ids=['lttb', 'minmax'])
+def test_short_series_untouched(reducer):
+    x = np.arange(40, dtype='float64')
+    np.testing.assert_array_equal(reducer(x, np.sin(x)), np.arange(40))
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+def test_reduce_line_sorts_by_x_and_keeps_range(method):
+    rng = np.random.default_rng(1)
+    dates = pd.date_range('2024-01-01', periods=5000, freq='h')
+    df = pd.DataFrame({'When': dates, 'Sales': rng.normal(100, 10, 5000)}).sample(frac=1, random_state=1)
+    df.loc[df.index[:50], 'Sales'] = np.nan
+    out, meta = reduce_line(df, 'When', 'Sales', method, max_points=200)
+    kept = df.dropna()
+    assert meta == {"reducer": method, "points": len(out), "source_rows": len(kept)} and len(out) <= 200
+    assert out['When'].is_monotonic_increasing
+    assert out['When'].iloc[0] == kept['When'].min() and out['When'].iloc[-1] == kept['When'].max()
+    if method == 'minmax': assert (out['Sales'].min(), out['Sales'].max()) == (kept['Sales'].min(), kept['Sales'].max())
+
+
+def test_reduce_line_small_frame_is_not_reduced():
+    df = pd.DataFrame({'x': [3, 1, 2], 'y': [30, 10, 20]})
+    out, meta = reduce_line(df, 'x', 'y')
+    assert meta["reducer"] == "none" and out['x'].tolist() == [1, 2, 3]
+
+
+# --- top_n ---
+
+def test_top_n_other_holds_the_rest():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({'City': [f"c{i}" for i in range(300)], 'Sales': rng.integers(1, 10000, 300)})
+    out, meta = top_n(df, 'City', 'Sales', n=20)
+    head = df.nlargest(20, 'Sales', keep='first')
+    assert len(out) == 21 and out['City'].iloc[-1] == OTHER
+    assert set(out['City'].iloc[:-1]) == set(head['City'])
+    assert out['Sales'].iloc[-1] == df['Sales'].sum() - head['Sales'].sum()
+    assert out['Sales'].sum() == df['Sales'].sum()
+    assert meta == {"reducer": "top_n", "points": 21, "source_rows": 300, "other_rows": 280}
+
+
+def test_top_n_numeric_axis_stays_in_axis_order():
+    df = pd.DataFrame({'Year': range(2000, 2030), 'Sales': np.arange(30)[::-1] * 1.5})
+    out, _ = top_n(df, 'Year', 'Sales', n=5)
+    assert out['Year'].tolist() == [2000, 2001, 2002, 2003, 2004, OTHER]
+    assert out['Sales'].sum() == pytest.approx(df['Sales'].sum())
+
+
+def test_top_n_fits_untouched_and_drops_missing_values():
+    df = pd.DataFrame({'City': ['a', 'b', 'c'], 'Sales': [1.0, None, 3.0]})
+    out, meta = top_n(df, 'City', 'Sales', n=5)
+    assert out['City'].tolist() == ['a', 'c'] and meta["reducer"] == "none"
+
+
+# --- Histogram / scatter totals ---
+
+def test_histogram_counts_every_row():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({'Sales': rng.normal(100, 20, 50000), 'Qty': rng.integers(0, 5, 50000)})
+    out, meta = reduce_histogram(df, 'Sales', bins=30)
+    assert len(out) == 30 and out['Count'].sum() == 50000 == meta["source_rows"]
+    weighted, _ = reduce_histogram(df, 'Sales', 'Qty', bins=30)
+    assert weighted['Qty'].sum() == df['Qty'].sum()
+
+
+def test_scatter_grid_counts_every_point():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({'x': rng.normal(size=5000), 'y': rng.normal(size=5000)})
+    out, meta = reduce_scatter(df, 'x', 'y', max_points=1000, grid=16)
+    assert meta["reducer"] == "histogram2d" and out['Count'].sum() == 5000 and len(out) <= 16 * 16
@@ -0,0 +1,192 @@
+"""fill_na / replace_values / change_types against the original single-column Fill N/A, Replace Value and Change Data Type nodes."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cleaning_engine import fill_plan, fill_na, replace_rules, replace_values, cast_plan, change_types
+from typed_columns import TypedColumnCache
+
+
+# --- The original nodes, one column per node (ffill/bfill through the ffill()/bfill() methods) ---
+
+def legacy_fill(df, config):
+    method, fill_value, target = config.get('method', 'value'), config.get('value'), config.get('column')
+    out = df.copy()
+    for col in [c for c in ([target] if target else df.columns.tolist()) if c in df.columns]:
+        if method == 'value':
+            if fill_value is not None and fill_value != '':
+                try: out[col] = out[col].fillna(fill_value)
+                except Exception: pass
+        elif method in ('ffill', 'bfill'):
+            out[col] = getattr(out[col], method)()
+        elif method in ('mean', 'median', 'mode', 'min', 'max') and pd.api.types.is_numeric_dtype(out[col]):
+            if method == 'mode':
+                impute = out[col].mode().iloc[0] if not out[col].mode().empty else None
+            else:
+                impute = getattr(out[col], method)()
+            if impute is not None: out[col] = out[col].fillna(impute)
+    return out
+
+
+def legacy_replace(df, config):
+    col, old_val, new_val = config.get('column'), config.get('oldValue'), config.get('newValue')
+    out = df.copy()
+    if out[col].dtype == 'int64' or out[col].dtype == 'float64':
+        try:
+            old_val = float(old_val)
+            new_val = float(new_val)
+            out[col] = out[col].replace(old_val, new_val)
+        except: pass
+    if out[col].dtype == 'object' or out[col].dtype == 'string':
+        old_val, new_val = str(old_val), str(new_val)
+        out[col] = out[col].replace(old_val, new_val)
+    out[col] = out[col].replace(old_val, new_val)
+    return out
+
+
+def legacy_cast(df, config):
+    col, dtype = config.get('column'), config.get('dtype')
+    out = df.copy()
+    if dtype == 'int': out[col] = pd.to_numeric(out[col], errors='coerce').fillna(0).astype(int)
+    elif dtype == 'float': out[col] = pd.to_numeric(out[col], errors='coerce')
+    elif dtype == 'datetime': out[col] = pd.to_datetime(out[col], errors='coerce')
+    elif dtype == 'str': out[col] = out[col].astype(str)
+    return out
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 500
+    frame = pd.DataFrame({
+        'Sales': rng.normal(100, 20, n).round(2),
+        'Level': rng.integers(0, 5, n).astype(float),
+        'Qty': rng.integers(0, 50, n),
+        'Status': rng.choice(['Open', 'Closed', 'Pending'], n).astype(object),
+        'Code': rng.integers(0, 1000, n).astype(str).astype(object),
+        'Date': rng.choice(['2024-01-05', '2024-02-10', 'not a date'], n).astype(object),
+        'Empty': np.full(n, np.nan),
+    })
+    for col in ('Sales', 'Level', 'Status', 'Code', 'Date'):
+        frame.loc[rng.random(n) < 0.1, col] = None
+    return frame
+
+
+def _fill(df, config):
+    return fill_na(df, fill_plan(config, df.columns))[0]
+
+
+# --- Fill N/A ---
+
+@pytest.mark.parametrize('config', [
+    {'method': 'value', 'value': 0},
+    {'method': 'value', 'value': 'missing', 'column': 'Status'},
+    {'method': 'value', 'value': ''},
+    {'method': 'ffill'},
+    {'method': 'bfill', 'column': 'Level'},
+    {'method': 'mean'},
+    {'method': 'median', 'column': 'Sales'},
+    {'method': 'mode'},
+    {'method': 'min'},
+    {'method': 'max', 'column': 'Status'},
+], ids=lambda c: '-'.join(str(v) for v in c.values()))
+def test_fill_single_column_config_matches_legacy(df, config):
+    pd.testing.assert_frame_equal(_fill(df, config), legacy_fill(df, config))
+
+
+def test_fill_rules_match_one_legacy_node_per_column(df):
+    rules = [{'column': 'Sales', 'method': 'mean'}, {'column': 'Level', 'method': 'mode'},
+             {'column': 'Status', 'method': 'value', 'value': 'Unknown'}, {'column': 'Code', 'method': 'ffill'},
+             {'column': 'Date', 'method': 'bfill'}, {'column': 'Empty', 'method': 'median'}]
+    expected = df
+    for rule in rules: expected = legacy_fill(expected, rule)
+    out, filled = fill_na(df, fill_plan({'rules': rules}, df.columns))
+    pd.testing.assert_frame_equal(out, expected)
+    assert filled == ['Sales', 'Level', 'Status', 'Code', 'Date', 'Empty'] # An all-null median is NaN: a no-op fill, as before
+
+
+def test_fill_columns_list_with_one_method(df):
+    expected = legacy_fill(legacy_fill(df, {'method': 'max', 'column': 'Sales'}), {'method': 'max', 'column': 'Level'})
+    pd.testing.assert_frame_equal(_fill(df, {'method': 'max', 'columns': ['Sales', 'Level', 'Nope']}), expected)
+
+
+def test_fill_rejected_value_skips_only_that_column(df):
+    df['Flag'] = pd.array([True, None] * (len(df) // 2), dtype='boolean')
+    config = {'method': 'value', 'value': 'x'}
+    out, filled = fill_na(df, fill_plan(config, df.columns))
+    pd.testing.assert_frame_equal(out, legacy_fill(df, config))
+    assert 'Flag' not in filled and 'Status' in filled
+
+
+def test_fill_category_column_like_its_object_column(df):
+    out = _fill(df.astype({'Status': 'category'}), {'method': 'value', 'value': 'Unknown'})
+    expected = legacy_fill(df, {'method': 'value', 'value': 'Unknown'})
+    pd.testing.assert_series_equal(out['Status'].astype(expected['Status'].dtype), expected['Status'])
+
+
+# --- Replace Value ---
+
+@pytest.mark.parametrize('config', [
+    {'column': 'Status', 'oldValue': 'Open', 'newValue': 'Active'},
+    {'column': 'Code', 'oldValue': 42, 'newValue': 'forty-two'},
+    {'column': 'Level', 'oldValue': '3', 'newValue': '30'},
+    {'column': 'Qty', 'oldValue': 7, 'newValue': 70},
+    {'column': 'Level', 'oldValue': 'three', 'newValue': 'x'},
+], ids=lambda c: f"{c['column']}-{c['oldValue']}")
+def test_replace_single_column_config_matches_legacy(df, config):
+    out, replaced = replace_values(df, replace_rules(config))
+    pd.testing.assert_frame_equal(out, legacy_replace(df, config))
+    assert replaced == [config['column']]
+
+
+def test_replacements_match_one_legacy_node_per_rule(df):
+    replacements = [{'column': 'Status', 'oldValue': 'Open', 'newValue': 'Active'},
+                    {'column': 'Status', 'oldValue': 'Closed', 'newValue': 'Done'},
+                    {'column': 'Level', 'oldValue': '1', 'newValue': '10'},
+                    {'column': 'Code', 'oldValue': '5', 'newValue': 'five'}]
+    config = {'column': 'Qty', 'oldValue': '0', 'newValue': '-1', 'replacements': replacements}
+    expected = df
+    for rule in [config] + replacements: expected = legacy_replace(expected, rule)
+    out, replaced = replace_values(df, replace_rules(config))
+    pd.testing.assert_frame_equal(out, expected)
+    assert replaced == ['Qty', 'Status', 'Level', 'Code']
+
+
+def test_replace_skips_missing_columns(df):
+    out, replaced = replace_values(df, replace_rules({'replacements': [{'column': 'Nope', 'oldValue': 'a', 'newValue': 'b'}]}))
+    assert out is df and replaced == []
+
+
+# --- Change Data Type ---
+
+@pytest.mark.parametrize('config', [
+    {'column': 'Code', 'dtype': 'int'},
+    {'column': 'Sales', 'dtype': 'int'},
+    {'column': 'Code', 'dtype': 'float'},
+    {'column': 'Status', 'dtype': 'float'},
+    {'column': 'Date', 'dtype': 'datetime'},
+    {'column': 'Level', 'dtype': 'str'},
+], ids=lambda c: f"{c['column']}-{c['dtype']}")
+def test_cast_single_column_config_matches_legacy(df, config):
+    out, cast, failed = change_types(df, cast_plan(config), TypedColumnCache())
+    pd.testing.assert_frame_equal(out, legacy_cast(df, config))
+    assert cast == [config['column']] and failed == {}
+
+
+def test_casts_match_one_legacy_node_per_column(df):
+    casts = [{'column': 'Code', 'dtype': 'int'}, {'column': 'Level', 'dtype': 'int'}, {'column': 'Sales', 'dtype': 'str'},
+             {'column': 'Date', 'dtype': 'datetime'}, {'column': 'Status', 'dtype': 'float'}]
+    expected = df
+    for rule in casts: expected = legacy_cast(expected, rule)
+    out, cast, failed = change_types(df, cast_plan({'casts': casts}), TypedColumnCache())
+    pd.testing.assert_frame_equal(out, expected)
+    assert sorted(cast) == sorted(r['column'] for r in casts) and failed == {}
+
+
+def test_cast_columns_list_and_failures(df):
+    plan = cast_plan({'columns': ['Code', 'Qty'], 'dtype': 'float', 'casts': [{'column': 'Nope', 'dtype': 'int'},
+                                                                              {'column': 'Status', 'dtype': 'complex'}]})
+    out, cast, failed = change_types(df, plan, TypedColumnCache())
+    expected = legacy_cast(legacy_cast(df, {'column': 'Code', 'dtype': 'float'}), {'column': 'Qty', 'dtype': 'float'})
+    pd.testing.assert_frame_equal(out, expected)
+    assert cast == ['Code', 'Qty'] and set(failed) == {'Nope', 'Status'}
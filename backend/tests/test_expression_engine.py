@@ -0,0 +1,104 @@
+"""Calculated Field expressions: unsafe syntax is rejected, legacy df[...] flows match the old eval, nulls propagate."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from expression_engine import ExpressionError, compile_expression, evaluate_calculations, check_calculations
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'Price': [10.0, None, 3.5, 8.0], 'Unit Price': [2, 4, 1, 5], 'Qty': [1, 2, 3, 4],
+                         'Name': ['pen', None, 'ink', 'Pad']})
+
+
+def calc(df, expression):
+    return evaluate_calculations(df, [('out', expression)])['out']
+
+
+@pytest.mark.parametrize("expression", [
+    "__import__('os').system('echo hi')",
+    "__builtins__",
+    "open('/etc/passwd')",
+    "getattr(Price, 'real')",
+    "Price.__class__",
+    "Price.__class__.__bases__",
+    "df.__dict__",
+    "df['Price'].__class__",
+    "(lambda: 1)()",
+    "(lambda x: x)(Price)",
+    "[p for p in Price]",
+    "{p for p in Price}",
+    "{p: 1 for p in Price}",
+    "sum(p for p in Price)",
+    "Price[0]",
+    "Price.apply(len)",
+    "upper(Name, bad=1)",
+    "df",
+])
+def test_unsafe_expressions_are_rejected(expression):
+    with pytest.raises(ExpressionError):
+        compile_expression(expression)
+
+
+def test_rejected_before_anything_runs(df, monkeypatch):
+    import builtins
+    monkeypatch.setattr(builtins, "__import__", lambda *a, **k: pytest.fail("import attempted"))
+    with pytest.raises(ExpressionError):
+        evaluate_calculations(df, [('out', "__import__('os')")])
+
+
+@pytest.mark.parametrize("expression", [
+    "df['Price'] * df['Qty']",
+    "df['Price'] * df['Unit Price'] + 1",
+    "df.Price / df.Qty",
+    "df.Qty ** 2 - df['Unit Price']",
+    "df['Price'] > 5",
+    "(df['Qty'] > 1) & (df['Price'] < 9)",
+    "(df['Qty'] > 3) | ~(df['Price'] > 5)",
+    "df['Name'].str.upper()",
+    "df['Price'].fillna(0)",
+])
+def test_legacy_forms_match_the_old_eval(df, expression):
+    expected = eval(expression, {}, {'df': df.copy()}) # The baseline Calculated Field, on a trusted expression
+    result = calc(df, expression)
+    pd.testing.assert_series_equal(pd.Series(result, name='out').astype(expected.dtype), expected.rename('out'), check_dtype=False)
+
+
+def test_bare_and_col_references_equal_the_legacy_form(df):
+    legacy = calc(df, "df['Unit Price'] * df.Qty")
+    pd.testing.assert_series_equal(calc(df, "col('Unit Price') * Qty"), legacy)
+
+
+def test_nulls_propagate_through_arithmetic_and_text(df):
+    assert calc(df, "Price * Qty + 1").isna().tolist() == [False, True, False, False]
+    assert calc(df, "upper(Name)").isna().tolist() == [False, True, False, False]
+    assert pd.isna(calc(df, "Name + '!'")[1])
+
+
+def test_null_comparisons_are_false(df):
+    assert calc(df, "Price > 0").tolist() == [True, False, True, True]
+    assert calc(df, "isnull(Price)").tolist() == [False, True, False, False]
+
+
+@pytest.mark.parametrize("expression", ["coalesce(Price, 0)", "Price.fillna(0)", "coalesce(Price, Qty * 0)"])
+def test_coalesce_fills_nulls(df, expression):
+    assert calc(df, expression).tolist() == [10.0, 0.0, 3.5, 8.0]
+
+
+def test_coalesce_falls_through_several_arguments():
+    frame = pd.DataFrame({'a': [None, None, 1.0], 'b': [None, 2.0, 5.0]})
+    assert calc(frame, "coalesce(a, b, -1)").tolist() == [-1.0, 2.0, 1.0]
+    assert calc(pd.DataFrame({'s': ['x', None]}), "coalesce(s, 'none')").tolist() == ['x', 'none']
+
+
+def test_check_reports_unknown_columns_and_type_errors():
+    errors, schema = check_calculations([('a', "Prce * 2"), ('b', "upper(Qty) - 1")], {'Price': 'float64', 'Qty': 'int64'})
+    assert "did you mean 'Price'" in errors[0]
+    assert "cannot be applied to text" in errors[1]
+    assert schema['a'] == schema['b'] == 'unknown'
+
+
+def test_later_calculations_see_earlier_ones(df):
+    out = evaluate_calculations(df, [('total', "Price * Qty"), ('with_tax', "total * 1.5")])
+    np.testing.assert_allclose(out['with_tax'], df['Price'] * df['Qty'] * 1.5)
@@ -0,0 +1,184 @@
+"""Compiled Filter Rows / Filter Date masks against the original row-by-row filters and plain pandas masks."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import filter_engine
+from filter_engine import compile_conditions, compile_date_ranges, ColumnCoercer, OPERATORS
+from typed_columns import TypedColumnCache
+
+
+# --- The original Filter Rows / Filter Date code ---
+
+def legacy_filter(df, conditions):
+    for cond in conditions:
+        col, op, val = cond.get('column'), cond.get('operator'), cond.get('value')
+        if not col: continue
+        if op == 'contains': df = df[df[col].astype(str).str.contains(str(val), na=False)]
+        else:
+            try: num_val = float(val)
+            except: num_val = val
+            if op == '==': df = df[df[col] == num_val]
+            elif op == '!=': df = df[df[col] != num_val]
+            elif op == '>': df = df[pd.to_numeric(df[col], errors='coerce') > num_val]
+            elif op == '<': df = df[pd.to_numeric(df[col], errors='coerce') < num_val]
+    return df
+
+
+def legacy_date_filter(df, date_ranges):
+    combined = pd.Series(True, index=df.index)
+    for r in date_ranges:
+        column, start, end = r.get('column'), r.get('startDate'), r.get('endDate')
+        if not column or not start or not end: continue
+        dates = pd.to_datetime(df[column])
+        combined = combined & (dates >= start) & (dates <= end)
+    return df[combined]
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 2000
+    frame = pd.DataFrame({
+        'City': rng.choice(['Pune', 'Delhi', 'Agra', 'New Delhi', 'a.c'], n).astype(object),
+        'Sales': rng.normal(100, 20, n).round(2),
+        'Qty': rng.integers(0, 50, n),
+        'Date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 366, n), unit='D'),
+    })
+    frame.loc[rng.random(n) < 0.05, 'City'] = None
+    frame.loc[rng.random(n) < 0.05, 'Sales'] = np.nan
+    return frame
+
+
+@pytest.fixture(params=[False, True], ids=['numpy', 'numexpr'])
+def numexpr(request, monkeypatch):
+    if request.param and not filter_engine.HAS_NUMEXPR: pytest.skip("numexpr is not installed")
+    monkeypatch.setattr(filter_engine, 'HAS_NUMEXPR', request.param)
+    return request.param
+
+
+def _filter(df, conditions, logic='AND'):
+    return compile_conditions(conditions, logic).apply(df, ColumnCoercer(df, TypedColumnCache()))
+
+
+# --- Every operator against its plain pandas mask ---
+
+def _expected(df):
+    city, sales, date = df['City'], df['Sales'], df['Date']
+    return {
+        '==': ({'column': 'City', 'operator': '==', 'value': 'Pune'}, city == 'Pune'),
+        '!=': ({'column': 'Qty', 'operator': '!=', 'value': '7'}, df['Qty'] != 7),
+        '>': ({'column': 'Sales', 'operator': '>', 'value': '110'}, sales > 110),
+        '<': ({'column': 'Date', 'operator': '<', 'value': '2024-03-01'}, date < '2024-03-01'),
+        '>=': ({'column': 'Qty', 'operator': '>=', 'value': 40}, df['Qty'] >= 40),
+        '<=': ({'column': 'Sales', 'operator': '<=', 'value': '90.5'}, sales <= 90.5),
+        'contains': ({'column': 'City', 'operator': 'contains', 'value': 'Delhi'}, city.str.contains('Delhi', regex=False, na=False)),
+        'in': ({'column': 'City', 'operator': 'in', 'value': 'Pune, Agra'}, city.isin(['Pune', 'Agra'])),
+        'not in': ({'column': 'Qty', 'operator': 'not in', 'value': [1, 2, 3]}, ~df['Qty'].isin([1, 2, 3])),
+        'between': ({'column': 'Sales', 'operator': 'between', 'value': '90,110'}, sales.between(90, 110)),
+        'startswith': ({'column': 'City', 'operator': 'startswith', 'value': 'New'}, city.str.startswith('New', na=False)),
+        'endswith': ({'column': 'City', 'operator': 'endswith', 'value': 'hi'}, city.str.endswith('hi', na=False)),
+        'is null': ({'column': 'Sales', 'operator': 'is null'}, sales.isna()),
+        'not null': ({'column': 'City', 'operator': 'not null'}, city.notna()),
+    }
+
+
+@pytest.mark.parametrize('op', sorted(OPERATORS))
+def test_every_operator(df, op, numexpr):
+    cond, mask = _expected(df)[op]
+    pd.testing.assert_frame_equal(_filter(df, [cond]), df[mask.astype(bool)])
+
+
+def test_every_operator_is_covered(df):
+    assert set(_expected(df)) == OPERATORS
+
+
+def test_between_dates_and_value2(df):
+    out = _filter(df, [{'column': 'Date', 'operator': 'between', 'value': '2024-02-01', 'value2': '2024-02-29'}])
+    pd.testing.assert_frame_equal(out, df[df['Date'].between('2024-02-01', '2024-02-29')])
+
+
+def test_unknown_operator_is_rejected(df):
+    with pytest.raises(ValueError, match="Unsupported filter operator"):
+        _filter(df, [{'column': 'City', 'operator': 'like', 'value': 'P%'}])
+
+
+# --- The original operators against the original filter ---
+
+@pytest.mark.parametrize('conditions', [
+    [{'column': 'City', 'operator': '==', 'value': 'Pune'}],
+    [{'column': 'City', 'operator': '!=', 'value': 'Pune'}],
+    [{'column': 'Qty', 'operator': '==', 'value': '7'}],
+    [{'column': 'Sales', 'operator': '>', 'value': '100'}, {'column': 'Qty', 'operator': '<', 'value': 25}],
+    [{'column': 'City', 'operator': 'contains', 'value': 'Delhi'}, {'column': 'Sales', 'operator': '<', 'value': 120}],
+    [{'column': '', 'operator': '==', 'value': 'x'}, {'column': 'Qty', 'operator': '!=', 'value': 3}],
+], ids=['eq-text', 'ne-text', 'eq-number', 'gt-and-lt', 'contains-and-lt', 'blank-column'])
+def test_matches_legacy_filter(df, conditions, numexpr):
+    pd.testing.assert_frame_equal(_filter(df, conditions), legacy_filter(df, conditions))
+
+
+# --- AND / OR logic ---
+
+def test_or_logic(df, numexpr):
+    conditions = [{'column': 'Sales', 'operator': '>', 'value': 130}, {'column': 'Qty', 'operator': '<', 'value': 2}]
+    pd.testing.assert_frame_equal(_filter(df, conditions, 'OR'), df[(df['Sales'] > 130) | (df['Qty'] < 2)])
+    pd.testing.assert_frame_equal(_filter(df, conditions, 'and'), df[(df['Sales'] > 130) & (df['Qty'] < 2)])
+
+
+def test_nested_groups(df, numexpr):
+    conditions = [{'column': 'City', 'operator': 'in', 'value': ['Pune', 'Agra']},
+                  {'logic': 'OR', 'conditions': [{'column': 'Sales', 'operator': '>', 'value': 120},
+                                                 {'column': 'Qty', 'operator': '==', 'value': 0}]}]
+    expected = df['City'].isin(['Pune', 'Agra']) & ((df['Sales'] > 120) | (df['Qty'] == 0))
+    pd.testing.assert_frame_equal(_filter(df, conditions), df[expected])
+
+
+def test_empty_or_blank_conditions_keep_every_row(df):
+    assert _filter(df, []) is df
+    assert _filter(df, [{'column': '', 'operator': '==', 'value': 1}], 'OR') is df
+
+
+# --- contains is literal ---
+
+@pytest.mark.parametrize('value', ['a.c', '(', 'De.hi', '[P]'])
+def test_contains_is_literal_not_regex(df, value):
+    out = _filter(df, [{'column': 'City', 'operator': 'contains', 'value': value}])
+    pd.testing.assert_frame_equal(out, df[df['City'].astype(str).str.contains(value, regex=False)])
+
+
+def test_contains_on_numbers_matches_text(df):
+    out = _filter(df, [{'column': 'Qty', 'operator': 'contains', 'value': '4'}])
+    pd.testing.assert_frame_equal(out, legacy_filter(df, [{'column': 'Qty', 'operator': 'contains', 'value': '4'}]))
+
+
+# --- Filter Date ---
+
+def _dates(df, ranges):
+    return compile_date_ranges(ranges).apply(df, ColumnCoercer(df, TypedColumnCache()))
+
+
+@pytest.mark.parametrize('as_text', [False, True], ids=['datetime', 'text'])
+def test_date_ranges_match_legacy(df, as_text):
+    df = df.assign(Date=df['Date'].dt.strftime('%Y-%m-%d').astype(object)) if as_text else df
+    ranges = [{'column': 'Date', 'startDate': '2024-03-01', 'endDate': '2024-06-30'},
+              {'column': 'Date', 'startDate': '2024-05-15', 'endDate': '2024-12-31'},
+              {'column': 'Date', 'startDate': '2024-01-01', 'endDate': ''}]
+    pd.testing.assert_frame_equal(_dates(df, ranges), legacy_date_filter(df, ranges))
+
+
+def test_date_range_bounds_are_inclusive(df):
+    day = df['Date'].iloc[0]
+    out = _dates(df, [{'column': 'Date', 'startDate': str(day.date()), 'endDate': str(day.date())}])
+    pd.testing.assert_frame_equal(out, df[df['Date'] == day])
+
+
+def test_date_range_numeric_looking_bounds_compare_as_dates():
+    frame = pd.DataFrame({'Year': ['2019-06-01', '2020-06-01', '2021-06-01']})
+    out = _dates(frame, [{'column': 'Year', 'startDate': '2020', 'endDate': '2021'}])
+    assert out['Year'].tolist() == ['2020-06-01']
+
+
+def test_unparseable_dates_are_dropped_not_raised():
+    frame = pd.DataFrame({'Date': ['2024-01-05', 'not a date', '2024-02-10']})
+    out = _dates(frame, [{'column': 'Date', 'startDate': '2024-01-01', 'endDate': '2024-12-31'}])
+    assert out['Date'].tolist() == ['2024-01-05', '2024-02-10']
@@ -0,0 +1,100 @@
+"""optimize_flow: identical spokes merged, nodes feeding no output skipped, `keep` ids kept, cyclic flows untouched."""
+from flow_optimizer import EXPORT_NODES, optimize_flow, signature
+
+
+def is_output(node_type):
+    return 'Chart' in node_type or node_type == 'Data Preview' or node_type in EXPORT_NODES
+
+
+def node(nid, type_label, **config):
+    return {"id": nid, "data": {"typeLabel": type_label, "config": config}}
+
+
+def edge(source, target, handle=None):
+    return {"id": f"{source}-{target}", "source": source, "target": target, **({"targetHandle": handle} if handle else {})}
+
+
+def ids(nodes):
+    return [n["id"] for n in nodes]
+
+
+def hub_flow():
+    """read -> two identical filter / group spokes -> one chart each."""
+    nodes = [node("read", "Read Data", fileName="sales.csv"),
+             node("f1", "Filter Rows", conditions=[{"column": "City", "operator": "==", "value": "Pune"}], label="Pune"),
+             node("f2", "Filter Rows", conditions=[{"column": "City", "operator": "==", "value": "Pune"}], label="Pune again"),
+             node("g1", "Group By", groupColumns=["Month"]),
+             node("g2", "Group By", groupColumns=["Month"]),
+             node("c1", "Bar Chart", x="Month", y="Count"),
+             node("c2", "Line Chart", x="Month", y="Count")]
+    edges = [edge("read", "f1"), edge("read", "f2"), edge("f1", "g1"), edge("f2", "g2"), edge("g1", "c1"), edge("g2", "c2")]
+    return nodes, edges
+
+
+def test_identical_spokes_are_merged_into_one_chain():
+    nodes, edges = hub_flow()
+    new_nodes, new_edges, plan = optimize_flow(nodes, edges, is_output)
+    assert plan["merged"] == {"f2": "f1", "g2": "g1"} and plan["skipped"] == []
+    assert (plan["before"], plan["after"]) == (7, 5)
+    assert ids(new_nodes) == ["read", "f1", "g1", "c1", "c2"]
+    assert sorted((e["source"], e["target"]) for e in new_edges) == [("f1", "g1"), ("g1", "c1"), ("g1", "c2"), ("read", "f1")]
+
+
+def test_presentation_keys_do_not_split_twins_but_config_does():
+    nodes, edges = hub_flow()
+    nodes[2]["data"]["config"]["conditions"] = [{"column": "City", "operator": "==", "value": "Delhi"}]
+    _, _, plan = optimize_flow(nodes, edges, is_output)
+    assert plan["merged"] == {}
+    assert signature(node("a", "Sort", column="x", label="A"), []) == signature(node("b", "Sort", column="x", label="B"), [])
+
+
+def test_inputs_are_compared_per_port():
+    nodes = [node("l", "Read Data", fileName="a.csv"), node("r", "Read Data", fileName="b.csv"),
+             node("m1", "Merge/Join", how="inner", on="id"), node("m2", "Merge/Join", how="inner", on="id"),
+             node("p1", "Data Preview"), node("p2", "Data Preview")]
+    edges = [edge("l", "m1", "left"), edge("r", "m1", "right"), edge("r", "m2", "left"), edge("l", "m2", "right"),
+             edge("m1", "p1"), edge("m2", "p2")]
+    _, _, plan = optimize_flow(nodes, edges, is_output)
+    assert plan["merged"] == {} # Same inputs, swapped sides: not the same join
+
+
+def test_dead_branches_are_skipped():
+    nodes, edges = hub_flow()
+    nodes.append(node("s", "Sort Data", column="Sales"))
+    nodes.append(node("s2", "Drop Duplicates"))
+    edges += [edge("read", "s"), edge("s", "s2")]
+    new_nodes, new_edges, plan = optimize_flow(nodes, edges, is_output)
+    assert plan["skipped"] == ["s", "s2"]
+    assert "s" not in ids(new_nodes) and all(e["target"] not in ("s", "s2") for e in new_edges)
+
+
+def test_keep_ids_stay_live_with_their_inputs():
+    nodes, edges = hub_flow()
+    nodes += [node("s", "Sort Data", column="Sales"), node("s2", "Drop Duplicates")]
+    edges += [edge("read", "s"), edge("s", "s2")]
+    new_nodes, _, plan = optimize_flow(nodes, edges, is_output, keep={"s2"})
+    assert plan["skipped"] == [] and {"s", "s2"} <= set(ids(new_nodes))
+
+
+def test_kept_duplicate_stays_merged_into_its_live_twin():
+    nodes, edges = hub_flow()
+    nodes = [n for n in nodes if n["id"] != "c2"]
+    edges = [e for e in edges if e["target"] != "c2"]
+    new_nodes, _, plan = optimize_flow(nodes, edges, is_output, keep={"g2"})
+    assert plan["merged"] == {"f2": "f1", "g2": "g1"} and plan["skipped"] == []
+    assert ids(new_nodes) == ["read", "f1", "g1", "c1"]
+
+
+def test_twin_of_a_dead_node_is_dead_too():
+    nodes = [node("read", "Read Data"), node("a", "Sort Data", column="x"), node("b", "Sort Data", column="x"),
+             node("p", "Data Preview")]
+    edges = [edge("read", "a"), edge("read", "b"), edge("read", "p")]
+    _, _, plan = optimize_flow(nodes, edges, is_output)
+    assert plan["skipped"] == ["a", "b"] and plan["merged"] == {}
+
+
+def test_cyclic_flow_is_returned_unchanged():
+    nodes, edges = hub_flow()
+    edges.append(edge("g1", "f1"))
+    new_nodes, new_edges, plan = optimize_flow(nodes, edges, is_output)
+    assert plan is None and new_nodes is nodes and new_edges is edges
@@ -0,0 +1,102 @@
+"""Incremental refresh against a full recompute: appended loads and merged node states equal a fresh read."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import incremental_engine
+from aggregation_engine import aggregate
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_engine, "INCREMENTAL", True)
+    monkeypatch.setattr(incremental_engine, "INCREMENTAL_DIR", str(tmp_path / "state"))
+
+
+def rows(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'g': rng.choice(list('abcd'), n), 'v': rng.normal(size=n).round(3), 'i': rng.integers(0, 100, n)})
+
+
+def append(path, df):
+    df.to_csv(path, index=False, header=False, mode='a')
+
+
+def test_append_and_unchanged_loads_equal_a_full_read(tmp_path):
+    path = str(tmp_path / "src.csv")
+    rows(500, 0).to_csv(path, index=False)
+    frame, delta, info = incremental_engine.load(path)
+    assert info["mode"] == "full" and delta is None
+
+    append(path, rows(40, 1))
+    frame, delta, info = incremental_engine.load(path)
+    assert info["mode"] == "append" and len(delta) == 40
+    pd.testing.assert_frame_equal(frame, pd.read_csv(path))
+
+    frame, delta, info = incremental_engine.load(path)
+    assert info["mode"] == "unchanged" and delta.empty
+    pd.testing.assert_frame_equal(frame, pd.read_csv(path))
+
+
+def test_edited_prefix_is_read_again(tmp_path):
+    path = str(tmp_path / "src.csv")
+    rows(200, 2).to_csv(path, index=False)
+    incremental_engine.load(path)
+    with open(path, "r+b") as f: # Same size and inode: the first value of the first row changed in place
+        f.seek(len(f.readline()))
+        f.write(b"z")
+    frame, _, info = incremental_engine.load(path)
+    assert info["mode"] == "full"
+    pd.testing.assert_frame_equal(frame, pd.read_csv(path))
+
+
+def test_widened_dtype_is_read_again(tmp_path):
+    path = str(tmp_path / "src.csv")
+    rows(100, 3).to_csv(path, index=False)
+    incremental_engine.load(path)
+    with open(path, "a") as f: f.write("a,0.5,not a number\n")
+    frame, _, info = incremental_engine.load(path)
+    assert info["mode"] == "full"
+    pd.testing.assert_frame_equal(frame, pd.read_csv(path))
+
+
+GROUP = {'groupColumns': ['g'], 'aggregations': [{'column': 'v', 'func': 'sum'}, {'column': 'v', 'func': 'mean'},
+                                                 {'column': 'i', 'func': 'max'}, {'column': 'i', 'func': 'count'}]}
+
+
+@pytest.mark.parametrize("node_type, config", [
+    ('Group By', GROUP),
+    ('Group By', {'groupColumns': ['g', 'i']}),
+    ('Group By', {'groupColumn': 'g', 'aggregations': [{'column': 'g', 'func': 'count'}]}),
+    ('Value Counts', {'column': 'g'}),
+    ('Get Shape', {}),
+])
+def test_merged_states_equal_a_full_recompute(node_type, config):
+    parts = [rows(300, 4), rows(50, 5), rows(7, 6)]
+    full = pd.concat(parts, ignore_index=True)
+    assert incremental_engine.mergeable(node_type, config, full)
+    state = incremental_engine.partial(node_type, config, parts[0], pd.to_numeric)
+    for part in parts[1:]:
+        state = incremental_engine.merge(node_type, config, state, incremental_engine.partial(node_type, config, part, pd.to_numeric))
+    out = incremental_engine.finalize(node_type, config, state)
+
+    if node_type == 'Group By':
+        keys = config.get('groupColumns') or [config['groupColumn']]
+        expected = aggregate(full, keys, config.get('aggregations', []))
+    elif node_type == 'Value Counts':
+        expected = full['g'].value_counts().rename_axis('g').reset_index(name='Count')
+    else:
+        expected = pd.DataFrame([{'Rows': len(full), 'Columns': full.shape[1]}])
+    pd.testing.assert_frame_equal(out, expected, check_exact=False)
+
+
+@pytest.mark.parametrize("op", ['sum', 'count', 'avg', 'min', 'max'])
+def test_kpi_state_equals_a_full_recompute(op):
+    parts = [rows(200, 7), rows(30, 8)]
+    config = {'column': 'v', 'operation': op}
+    state = incremental_engine.merge('KPI Card', config, *(incremental_engine.partial('KPI Card', config, p, pd.to_numeric) for p in parts))
+    v = pd.concat(parts)['v']
+    expected = {'sum': v.sum(), 'count': v.count(), 'avg': v.mean(), 'min': v.min(), 'max': v.max()}[op]
+    assert incremental_engine.kpi_value(config, state) == pytest.approx(expected)
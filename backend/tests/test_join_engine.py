@@ -0,0 +1,58 @@
+"""merge_frames against pandas.merge: same rows, row order, column names and dtypes."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from join_engine import merge_frames
+
+
+def frames(rng, n_left=300, n_right=40, unique_right=True):
+    keys = np.arange(50) if unique_right else rng.integers(0, 30, n_right)
+    right = pd.DataFrame({'k': rng.permutation(keys)[:n_right], 'w': rng.normal(size=n_right), 'v': rng.integers(0, 9, n_right)})
+    left = pd.DataFrame({'k': rng.integers(0, 60, n_left), 'v': rng.normal(size=n_left), 'name': rng.choice(['a', 'b', None], n_left)})
+    return left, right
+
+
+@pytest.mark.parametrize("how", ['inner', 'left', 'right', 'outer'])
+@pytest.mark.parametrize("unique_right", [True, False])
+def test_single_key(how, unique_right):
+    left, right = frames(np.random.default_rng(0), unique_right=unique_right)
+    out, _ = merge_frames(left, right, how, ['k'], ['k'])
+    pd.testing.assert_frame_equal(out, pd.merge(left, right, how=how, on='k'))
+
+
+@pytest.mark.parametrize("how", ['inner', 'left', 'right'])
+def test_small_left_side_is_hashed(how):
+    right, left = frames(np.random.default_rng(1))
+    out, info = merge_frames(left, right, how, ['k'], ['k'])
+    assert info["build"] == 'left'
+    pd.testing.assert_frame_equal(out, pd.merge(left, right, how=how, on='k'))
+
+
+@pytest.mark.parametrize("how", ['inner', 'left'])
+def test_string_keys_with_different_names(how):
+    rng = np.random.default_rng(2)
+    left = pd.DataFrame({'city': rng.choice(['x', 'y', 'z', 'q'], 200), 'v': np.arange(200)})
+    right = pd.DataFrame({'City': ['x', 'y', 'z'], 'pop': [1, 2, 3], 'v': [7, 8, 9]})
+    out, _ = merge_frames(left, right, how, ['city'], ['City'], suffixes=('_l', '_r'))
+    pd.testing.assert_frame_equal(out, pd.merge(left, right, how=how, left_on='city', right_on='City', suffixes=('_l', '_r')))
+
+
+def test_multi_column_keys():
+    rng = np.random.default_rng(3)
+    left = pd.DataFrame({'a': rng.integers(0, 4, 100), 'b': rng.choice(['p', 'q'], 100), 'x': rng.normal(size=100)})
+    right = pd.DataFrame({'a': [0, 1, 2, 3] * 2, 'b': ['p'] * 4 + ['q'] * 4, 'y': np.arange(8)})
+    out, _ = merge_frames(left, right, 'left', ['a', 'b'], ['a', 'b'])
+    pd.testing.assert_frame_equal(out, pd.merge(left, right, how='left', on=['a', 'b']))
+
+
+def test_validate_rejects_duplicate_keys():
+    left, right = frames(np.random.default_rng(4), unique_right=False)
+    with pytest.raises(ValueError):
+        merge_frames(left, right, 'left', ['k'], ['k'], validate='m:1')
+
+
+def test_memory_budget():
+    left = pd.DataFrame({'k': np.zeros(2000, dtype=int)})
+    with pytest.raises(ValueError, match="budget"):
+        merge_frames(left, left.copy(), 'inner', ['k'], ['k'], budget_mb=1)
@@ -0,0 +1,131 @@
+"""Sketch estimates against exact answers: within their reported bounds, and chunked builds matching whole-column ones."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketch_engine
+from sketch_engine import HyperLogLog, HeavyHitters, TDigest, build, approx_distinct, approx_quantile, approx_value_counts
+
+
+@pytest.fixture(params=[1, 3], ids=['serial', 'threaded'])
+def workers(request, monkeypatch):
+    monkeypatch.setattr(sketch_engine, "SKETCH_WORKERS", request.param)
+    return request.param
+
+
+def _zipf(n, seed=0, distinct=20000):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.minimum(rng.zipf(1.3, n), distinct)).map(lambda v: f"v{v}")
+
+
+# --- Within the reported bounds ---
+
+@pytest.mark.parametrize('n_distinct', [10, 900, 30000, 250000])
+def test_distinct_within_bounds(n_distinct):
+    rng = np.random.default_rng(n_distinct)
+    series = pd.Series(rng.permutation(np.repeat(np.arange(n_distinct), 3)))
+    estimate, info = approx_distinct(series)
+    assert info["low"] <= n_distinct <= info["high"]
+    assert info["low"] <= estimate <= info["high"]
+
+
+def test_distinct_ignores_nulls_and_counts_text():
+    series = pd.Series(['a', 'b', None, 'a', 'c', np.nan] * 100)
+    assert approx_distinct(series)[0] == 3
+
+
+@pytest.mark.parametrize('q', [0.01, 0.25, 0.5, 0.9, 0.95, 0.99])
+@pytest.mark.parametrize('dist', ['normal', 'lognormal', 'integers'])
+def test_quantile_within_bounds(dist, q):
+    rng = np.random.default_rng(1)
+    values = {'normal': lambda: rng.normal(100, 15, 200000), 'lognormal': lambda: rng.lognormal(3, 1, 200000),
+              'integers': lambda: rng.integers(0, 50, 200000).astype(float)}[dist]()
+    value, info = approx_quantile(pd.Series(values), q)
+    exact = float(np.quantile(values, q))
+    assert info["low"] <= exact <= info["high"]
+    assert info["low"] <= value <= info["high"]
+
+
+def test_quantile_skips_text_and_nulls():
+    series = pd.Series([1, 2, 'x', None, 3, np.inf, 4, 5], dtype=object)
+    value, info = approx_quantile(series, 0.5)
+    assert value == 3 and info["low"] <= 3 <= info["high"]
+
+
+def test_value_counts_within_max_error():
+    series = _zipf(300000)
+    exact = series.value_counts()
+    top, info = approx_value_counts(series, k=50)
+    assert info["rows"] == len(series) and info["max_error"] > 0 # More distinct values than counters
+    for value, count in top.items():
+        assert exact[value] - info["max_error"] <= count <= exact[value]
+    # Every value above rows / counters is listed
+    frequent = exact[exact > len(series) / info["counters"]]
+    assert set(frequent.index) <= set(build(series, HeavyHitters).counts.index)
+    assert list(top.index[:10]) == list(exact.index[:10])
+
+
+def test_value_counts_exact_below_capacity():
+    series = pd.Series(np.random.default_rng(2).choice(['Pune', 'Delhi', 'Agra'], 10000))
+    top, info = approx_value_counts(series, k=10)
+    assert info["max_error"] == 0
+    pd.testing.assert_series_equal(top, series.value_counts(), check_names=False, check_index_type=False)
+
+
+# --- Chunk sketches merged == the whole column ---
+
+def test_hll_merge_equals_whole(workers):
+    series = pd.Series(np.random.default_rng(3).integers(0, 50000, 120000))
+    whole = HyperLogLog().update(series)
+    merged = build(series, HyperLogLog, chunk_rows=7000)
+    np.testing.assert_array_equal(merged.registers, whole.registers)
+    assert merged.estimate() == whole.estimate()
+
+
+def test_heavy_hitters_merge_equals_whole_below_capacity(workers):
+    series = pd.Series(np.random.default_rng(4).integers(0, 500, 120000))
+    whole = HeavyHitters().update(series)
+    merged = build(series, HeavyHitters, chunk_rows=7000)
+    pd.testing.assert_series_equal(merged.counts.sort_index(), whole.counts.sort_index(), check_names=False)
+    assert merged.rows == whole.rows and merged.max_error == whole.max_error == 0
+
+
+def test_heavy_hitters_merged_bound_holds_past_capacity(workers):
+    series = _zipf(200000, seed=5)
+    exact = series.value_counts()
+    merged = build(series, lambda: HeavyHitters(200), chunk_rows=9000)
+    assert merged.rows == len(series)
+    for value, count in merged.counts.items():
+        assert exact[value] - merged.max_error <= count <= exact[value]
+    assert set(exact[exact > len(series) / 200].index) <= set(merged.counts.index)
+
+
+@pytest.mark.parametrize('q', [0.05, 0.5, 0.95])
+def test_tdigest_merge_matches_whole(workers, q):
+    values = np.random.default_rng(6).normal(0, 1, 150000)
+    series = pd.Series(values)
+    whole = TDigest().update(series)
+    merged = build(series, TDigest, chunk_rows=10000)
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+    assert merged.weights.sum() == whole.weights.sum() == len(values)
+    exact = float(np.quantile(values, q))
+    value, low, high = merged.quantile(q)
+    assert low <= exact <= high
+    assert value == pytest.approx(whole.quantile(q)[0], abs=0.02)
+
+
+# --- Empty and all-null columns ---
+
+@pytest.mark.parametrize('series', [pd.Series([], dtype=float), pd.Series([None, np.nan] * 50, dtype=object)],
+                         ids=['empty', 'all-null'])
+def test_empty_and_all_null(series, workers):
+    distinct, info = approx_distinct(series)
+    assert distinct == 0 and info["low"] == 0 and info["high"] == 0
+
+    value, info = approx_quantile(series, 0.5)
+    assert math.isnan(value) and math.isnan(info["low"]) and math.isnan(info["high"]) and info["centroids"] == 0
+
+    top, info = approx_value_counts(series)
+    assert top.empty and info["rows"] == 0 and info["max_error"] == 0 and info["distinct"] == 0
@@ -0,0 +1,52 @@
+"""top_terms against a plain Counter over CountVectorizer's tokens, on the exact, bounded and refined paths."""
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+import text_engine
+from text_engine import top_terms
+
+
+def reference(series, n, k):
+    analyze = CountVectorizer(ngram_range=(n, n), stop_words='english').build_analyzer()
+    counts = Counter(chain.from_iterable(analyze(str(t)) for t in series.dropna()))
+    return sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+
+def corpus(seed, rows=3000, vocab=300):
+    rng = np.random.default_rng(seed)
+    words = [f"w{i:03d}" for i in range(vocab)]
+    texts = [" ".join(rng.choice(words, 4)) for _ in range(rows)]
+    texts[::50] = [None] * len(texts[::50])
+    return pd.Series(texts)
+
+
+@pytest.mark.parametrize("n", [1, 2])
+@pytest.mark.parametrize("k", [5, 20, 50])
+def test_chunked_matches_counter(monkeypatch, n, k):
+    monkeypatch.setattr(text_engine, "TEXT_CHUNK_ROWS", 200)
+    monkeypatch.setattr(text_engine, "TEXT_KEEP_TERMS", 5)
+    series = corpus(n * 100 + k)
+    terms, info = top_terms(series, n, k)
+    assert info["chunks"] > 1
+    assert [(t, int(c)) for t, c in terms] == reference(series, n, k)
+
+
+def test_single_chunk_matches_counter():
+    series = corpus(7, rows=500)
+    assert [(t, int(c)) for t, c in top_terms(series, 1, 30)[0]] == reference(series, 1, 30)
+
+
+def test_tie_at_the_cut_is_refined(monkeypatch):
+    # Chunk 1 keeps bb..ee (3 each) and drops aa (2); chunk 2 holds the third aa. The bounds allow aa up to exactly the
+    # cut, and aa ties with bb: it must win alphabetically, so the bounds alone cannot settle the top-1
+    monkeypatch.setattr(text_engine, "TEXT_CHUNK_ROWS", 2)
+    monkeypatch.setattr(text_engine, "TEXT_KEEP_TERMS", 1)
+    series = pd.Series(["bb cc dd ee aa", "bb cc dd ee aa", "bb cc dd ee", "aa"])
+    terms, info = top_terms(series, 1, 1)
+    assert terms == reference(series, 1, 1) == [("aa", 3)]
+    assert "refined" in info
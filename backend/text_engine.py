@@ -0,0 +1,195 @@
+import os
+import atexit
+import threading
+from collections import Counter
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction import FeatureHasher
+from sklearn.feature_extraction.text import CountVectorizer
+
+from memory_optimizer import HAS_PYARROW
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# =========================================================================
+# TEXT STATISTICS (N-Grams, Word Cloud, Word Count)
+# =========================================================================
+# Term counting for a text column with bounded memory:
+# 1. The column is factorized; each distinct text is tokenized once and
+#    weighted by how often it occurs.
+# 2. The distinct texts are cut into chunks of TEXT_CHUNK_ROWS. A single
+#    chunk is counted exactly. Otherwise each chunk is counted on its own
+#    and sends back only its TEXT_KEEP_TERMS heaviest terms, the largest
+#    count it dropped, and its totals hashed into 2**TEXT_HASH_BITS buckets
+#    (a fixed-size array, whatever the vocabulary). A term's count is at
+#    most its bucket total, and at most its kept counts plus the dropped
+#    maximum of every chunk that did not keep it.
+# 3. When those bounds prove the merged top-k, that is the answer. When
+#    they do not, the texts are counted again, keeping only the terms in
+#    buckets heavy enough to reach the top-k. The result is exact either way.
+# 4. Chunks run on a process pool above TEXT_PARALLEL_MIN distinct texts
+#    (tokenizing is pure Python; threads would serialize on the GIL).
+# Tokens follow CountVectorizer: lowercased words of 2+ characters with
+# English stop words removed before n-grams are formed. Ties are ordered
+# alphabetically. Word counts scan the UTF-8 bytes with numpy (ASCII
+# columns) or Arrow's regex kernel, with Python's whitespace set, so they
+# equal len(str(x).split()); nulls have none.
+
+TEXT_CHUNK_ROWS = int(os.getenv("TEXT_CHUNK_ROWS", "20000"))
+TEXT_HASH_BITS = int(os.getenv("TEXT_HASH_BITS", "20"))
+TEXT_WORKERS = int(os.getenv("TEXT_WORKERS", str(min(4, os.cpu_count() or 1))))
+TEXT_PARALLEL_MIN = int(os.getenv("TEXT_PARALLEL_MIN", "20000"))
+TEXT_KEEP_TERMS = int(os.getenv("TEXT_KEEP_TERMS", "10000"))
+WORD_PATTERN = r'[^\s\x0b\x1c-\x1f\x85\p{Z}]+' # Everything str.split() treats as whitespace
+WORD_COUNT_CHUNK = 1_000_000
+ASCII_SPACE = np.zeros(256, dtype=bool)
+ASCII_SPACE[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = True
+
+_lock = threading.Lock()
+_pool = None
+
+
+@lru_cache(maxsize=8)
+def _analyzer(n, stop_words):
+    return CountVectorizer(ngram_range=(n, n), stop_words=stop_words).build_analyzer()
+
+
+def _count_chunk(args):
+    """Exact weighted term counts of one chunk."""
+    texts, weights, n, stop_words = args
+    analyze, counts = _analyzer(n, stop_words), Counter()
+    counts.update(chain.from_iterable(analyze(t) for t, w in zip(texts, weights) if w == 1)) # Counter.update runs in C
+    for text, w in zip(texts, weights):
+        if w > 1:
+            for term in analyze(text): counts[term] += w
+    return counts
+
+
+def _buckets(terms, bits):
+    """Hash bucket of every term, as FeatureHasher assigns them."""
+    if not terms: return np.empty(0, dtype=np.int64)
+    return FeatureHasher(n_features=2 ** bits, input_type='string', alternate_sign=False).transform([[t] for t in terms]).indices
+
+
+def _summarize_chunk(args):
+    """(kept {term: count}, largest dropped count, bucket ids, bucket totals) of one chunk. Runs in the worker processes."""
+    texts, weights, n, stop_words, bits, keep = args
+    counts = _count_chunk((texts, weights, n, stop_words))
+    hashed = FeatureHasher(n_features=2 ** bits, input_type='pair', alternate_sign=False).transform([counts.items()]) if counts else None
+    top = counts.most_common(keep + 1)
+    dropped = top[keep][1] if len(top) > keep else 0
+    ids, sums = (hashed.indices, hashed.data.round().astype(np.int64)) if hashed is not None else (np.empty(0, dtype=np.int64),) * 2
+    return dict(top[:keep]), dropped, ids, sums
+
+
+def _refine_chunk(args):
+    """Exact counts of the chunk's terms that fall in the candidate buckets."""
+    texts, weights, n, stop_words, bits, candidates = args
+    counts = _count_chunk((texts, weights, n, stop_words))
+    terms = list(counts)
+    keep = np.isin(_buckets(terms, bits), candidates)
+    return {t: counts[t] for t, k in zip(terms, keep) if k}
+
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=TEXT_WORKERS)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _map(fn, jobs, parallel):
+    """(results, workers): the process pool when parallel, in-process otherwise or if the pool breaks."""
+    if parallel and TEXT_WORKERS > 1 and len(jobs) > 1:
+        try:
+            return list(_get_pool().map(fn, jobs)), TEXT_WORKERS
+        except Exception as e: # Broken pool (e.g. worker killed)
+            print(f"⚠️ Text pool failed, counting in-process: {e}")
+    return [fn(job) for job in jobs], 1
+
+
+def _ranked(counts, k):
+    return sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+
+def top_terms(series, n=1, k=50, stop_words='english'):
+    """
+    The k most frequent n-grams of a text column (nulls skipped).
+    Returns ([(term, count)] by count desc, info {"rows", "distinct", "chunks", "workers"}; "refined" buckets
+    when a second counting pass was needed).
+    """
+    codes, uniques = pd.factorize(series.dropna())
+    texts = [str(t) for t in uniques]
+    weights = np.bincount(codes, minlength=len(texts)).tolist()
+    chunks = [(texts[i:i + TEXT_CHUNK_ROWS], weights[i:i + TEXT_CHUNK_ROWS]) for i in range(0, len(texts), TEXT_CHUNK_ROWS)]
+    parallel = len(texts) >= TEXT_PARALLEL_MIN
+    info = {"rows": int(series.notna().sum()), "distinct": len(texts), "chunks": len(chunks), "workers": 1}
+
+    if len(chunks) <= 1:
+        counts = _count_chunk((*chunks[0], n, stop_words)) if chunks else Counter()
+        return _ranked(counts, k), info
+
+    bits, keep = TEXT_HASH_BITS, max(TEXT_KEEP_TERMS, 4 * k)
+    summaries, info["workers"] = _map(_summarize_chunk, [(t, w, n, stop_words, bits, keep) for t, w in chunks], parallel)
+    totals, partial, covered = np.zeros(2 ** bits, dtype=np.int64), Counter(), Counter()
+    for kept, dropped, ids, sums in summaries:
+        np.add.at(totals, ids, sums)
+        partial.update(kept)
+        if dropped: covered.update(dict.fromkeys(kept, dropped))
+    dropped_sum = sum(d for _, d, _, _ in summaries) # What the chunks that did not keep a term could still hold
+
+    top = _ranked(partial, k)
+    cut = top[-1][1] if len(top) == k else 0
+    terms = list(partial)
+    where = _buckets(terms, bits)
+    unseen = totals.copy() # Bucket mass not accounted for by the kept counts
+    np.add.at(unseen, where, -np.fromiter((partial[t] for t in terms), dtype=np.int64, count=len(terms)))
+    upper = {t: partial[t] + min(dropped_sum - covered[t], int(r)) for t, r in zip(terms, unseen[where])}
+    chosen = {t for t, _ in top}
+    proven = (all(upper[t] == partial[t] for t in chosen)
+              and all(u < cut for t, u in upper.items() if t not in chosen) # A tie at the cut may sort first: refine it
+              and min(dropped_sum, int(unseen.max(initial=0))) < cut) # Terms no chunk kept
+    if proven: return top, info
+
+    candidates = np.flatnonzero(totals >= max(cut, 1)) # Every term that could still reach (or tie) the top-k
+    partials, _ = _map(_refine_chunk, [(t, w, n, stop_words, bits, candidates) for t, w in chunks], parallel)
+    counts = Counter()
+    for p in partials: counts.update(p)
+    info["refined"] = int(len(candidates))
+    return _ranked(counts, k), info
+
+
+def _ascii_words(arr):
+    """Word counts of an ASCII large_string array straight from its offsets and bytes."""
+    offsets = np.frombuffer(arr.buffers()[1], dtype=np.int64)[arr.offset:arr.offset + len(arr) + 1]
+    data = np.frombuffer(arr.buffers()[2], dtype=np.uint8)[offsets[0]:offsets[-1]] if arr.buffers()[2] else np.empty(0, np.uint8)
+    offsets = offsets - offsets[0]
+    space = ASCII_SPACE.take(data)
+    before = np.empty(len(data), dtype=bool) # Whether the previous byte ends a word; every string starts fresh
+    before[:1] = True
+    before[1:] = space[:-1]
+    before[offsets[:-1][offsets[:-1] < len(data)]] = True
+    starts = np.flatnonzero(before & ~space) # Byte position of every word's first character
+    return np.searchsorted(starts, offsets[1:]) - np.searchsorted(starts, offsets[:-1])
+
+
+def word_counts(series):
+    """len(str(x).split()) for every row; nulls have 0 words."""
+    text = series.astype(str).where(series.notna(), '')
+    if not HAS_PYARROW: return text.str.split().str.len().to_numpy(dtype=np.int64)
+    out = np.empty(len(text), dtype=np.int64)
+    for start in range(0, len(text), WORD_COUNT_CHUNK):
+        part = pa.array(text.iloc[start:start + WORD_COUNT_CHUNK], type=pa.large_string())
+        if isinstance(part, pa.ChunkedArray): part = part.combine_chunks()
+        if pc.all(pc.string_is_ascii(part)).as_py() is not False: counts = _ascii_words(part)
+        else: counts = pc.count_substring_regex(part, WORD_PATTERN).to_numpy(zero_copy_only=False)
+        out[start:start + len(part)] = counts
+    return out
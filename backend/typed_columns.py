@@ -0,0 +1,118 @@
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError: # pandas < 2.2
+    from pandas.core.tools.datetimes import guess_datetime_format
+
+# =========================================================================
+# TYPED COLUMN CACHE
+# =========================================================================
+# The same text column used to be re-parsed by Filter Date, Trend Analysis,
+# Change Data Type (to_datetime) and by KPI Card, charts, Scatter Plot and
+# Filter Rows (to_numeric) on every branch of a flow. This cache stores the
+# coerced version the first time it is needed, keyed by the identity of the
+# column's underlying buffer, so every node and spoke that sees the same
+# buffer reuses it. The source array is pinned in the entry so its address
+# cannot be recycled while the cache is alive (one cache per run).
+#
+# Datetime formats are guessed from a sample of the column and then applied
+# explicitly, which is much faster than per-element inference. A format is
+# remembered per column name so all branches parse the same way, but it is
+# only reused for another buffer (a merged or concatenated frame) when it
+# parses that column's own sample; otherwise the format is guessed again.
+
+DATE_SAMPLE = 50 # Non-null values (spread over the column) checked to confirm a guessed format
+
+
+def _buffer_key(values):
+    """Stable identity of the memory behind a column (views of the same block share it)."""
+    if isinstance(values, np.ndarray):
+        return ('np', values.__array_interface__['data'][0], values.shape, values.strides, values.dtype.str)
+    pa_array = getattr(values, '_pa_array', None)
+    if pa_array is not None: # Arrow-backed (string[pyarrow], ArrowDtype)
+        addrs = tuple((chunk.offset, len(chunk)) + tuple(b.address for b in chunk.buffers() if b is not None) for chunk in pa_array.chunks)
+        return ('arrow', addrs, len(values), str(values.dtype)) # Slices of one buffer differ by offset
+    data = getattr(values, '_data', None) # Masked (Int64/Float64/boolean) and Categorical codes
+    if isinstance(data, np.ndarray):
+        return ('masked', data.__array_interface__['data'][0], len(values), str(values.dtype))
+    codes = getattr(values, '_codes', None)
+    if isinstance(codes, np.ndarray):
+        return ('cat', codes.__array_interface__['data'][0], len(values), id(values.dtype))
+    return ('obj', id(values), len(values))
+
+
+class TypedColumnCache:
+    def __init__(self):
+        self._entries = {}
+        self.formats = {}
+        self.hits = 0
+        self.conversions = 0
+        self._lock = threading.Lock()
+
+    def _get(self, series, kind, convert):
+        values = series._values
+        key = (kind, _buffer_key(values))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2].equals(series.index):
+                self.hits += 1
+                return entry[1]
+        out = convert(series)
+        with self._lock:
+            self.conversions += 1
+            self._entries[key] = (values, out, series.index) # values pinned -> address stays valid
+        return out
+
+    # --- PUBLIC API ---
+
+    def numeric(self, series):
+        """pd.to_numeric(series, errors='coerce'), computed once per buffer."""
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series): return series
+        return self._get(series, 'numeric', lambda s: pd.to_numeric(s, errors='coerce'))
+
+    def datetime(self, series):
+        """pd.to_datetime(series, errors='coerce') with a per-column format detected once."""
+        if pd.api.types.is_datetime64_any_dtype(series): return series
+        return self._get(series, 'datetime', self._parse_dates)
+
+    def stats(self):
+        return {"hits": self.hits, "conversions": self.conversions, "formats": dict(self.formats)}
+
+    # --- DATES ---
+
+    def detect_format(self, series):
+        name = series.name
+        values = series.dropna()
+        if values.empty: return self.formats.setdefault(name, None)
+        step = max(1, len(values) // DATE_SAMPLE)
+        sample = values.iloc[::step].head(DATE_SAMPLE).astype(str)
+        # 01/02/2020 is ambiguous: the column's known format first, then month-first, then day-first
+        known = self.formats.get(name)
+        candidates = ([lambda: known] if known else []) + [lambda d=d: guess_datetime_format(sample.iloc[0], dayfirst=d) for d in (False, True)]
+        fmt = None
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning) # dayfirst guesses warn on ISO dates
+            for candidate in candidates: # Guessed lazily: a day-first guess only when month-first fails
+                guess = candidate()
+                if not guess: continue
+                try:
+                    pd.to_datetime(sample, format=guess)
+                    fmt = guess
+                    break
+                except (ValueError, TypeError): continue
+        self.formats[name] = fmt
+        return fmt
+
+    def _parse_dates(self, series):
+        if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+            return pd.to_datetime(series, errors='coerce')
+        fmt = self.detect_format(series)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning) # "Could not infer format" noise
+            if fmt: return pd.to_datetime(series, format=fmt, errors='coerce')
+            return pd.to_datetime(series, errors='coerce')
@@ -80,6 +80,16 @@ useEffect(() => {
       }
       if (!foundCols || foundCols.length === 0) foundCols = globalColumns;
       setAvailableColumns(foundCols || []);
+
+      // Not executed yet: ask the backend to propagate the schema statically
+      if (parentEdges.length > 0 && !executionResult?.node_outputs?.[parentEdges[0].source]) {
+          workflowAPI.inferSchema(nodes, edges)
+            .then(res => {
+                const cols = res?.schemas?.[parentEdges[0].source]?.columns;
+                if (cols && cols.length) setAvailableColumns(cols);
+            })
+            .catch(err => console.warn("Schema inference failed:", err));
+      }
   }, [node, edges, executionResult, globalColumns, nodes]);
 // --- 3. UTILS ---
   const handleFileUpload = async (e: React.ChangeEvent<HTMLInputElement>) => {
@@ -235,6 +245,28 @@ return (
                         value={node.data.typeLabel === 'Rename Columns' ? config.newName : config.newValue} 
                         onChange={(e) => handleChange(node.data.typeLabel === 'Rename Columns' ? 'newName' : 'newValue', e.target.value)} />
                 </div>
+                {node.data.typeLabel === 'Replace Value' && (
+                    <div>
+                        <div className="flex justify-between items-center mb-2">
+                            <label className="text-xs font-bold text-gray-400 uppercase">More Replacements</label>
+                            <button onClick={() => addListItem('replacements', { column: '', oldValue: '', newValue: '' })} className="text-[10px] bg-blue-600 px-2 py-1 rounded text-white flex items-center gap-1"><Plus size={10}/> Add</button>
+                        </div>
+                        {(config.replacements || []).map((rule: any, idx: number) => (
+                            <div key={idx} className="flex gap-2 mb-2">
+                                <select className="flex-1 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                    value={rule.column} onChange={(e) => updateListItem('replacements', idx, 'column', e.target.value)}>
+                                    <option value="">Column...</option>
+                                    {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                                </select>
+                                <input type="text" placeholder="Old" className="w-20 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                    value={rule.oldValue || ''} onChange={(e) => updateListItem('replacements', idx, 'oldValue', e.target.value)} />
+                                <input type="text" placeholder="New" className="w-20 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                    value={rule.newValue || ''} onChange={(e) => updateListItem('replacements', idx, 'newValue', e.target.value)} />
+                                <button onClick={() => removeListItem('replacements', idx)} className="text-red-400 hover:text-red-300"><Trash2 size={14}/></button>
+                            </div>
+                        ))}
+                    </div>
+                )}
             </div>
         )}
         {node.data.typeLabel === 'Filter Date' && (
@@ -307,6 +339,11 @@ return (
             <div className="space-y-4">
                 <div className="flex justify-between items-center">
                     <label className="text-xs font-bold text-gray-400 uppercase">Conditions</label>
+                    <select className="bg-[#1e293b] border border-gray-600 rounded p-1 text-[10px] text-white"
+                        value={config.logic || 'AND'} onChange={(e) => handleChange('logic', e.target.value)}>
+                        <option value="AND">Match All (AND)</option>
+                        <option value="OR">Match Any (OR)</option>
+                    </select>
                     <button onClick={() => addListItem('conditions', { column: '', operator: '==', value: '' })} className="text-[10px] bg-blue-600 px-2 py-1 rounded text-white flex items-center gap-1 hover:bg-blue-500"><Plus size={10}/> Add Rule</button>
                 </div>
                 {(config.conditions || []).map((cond: any, idx: number) => (
@@ -324,7 +361,14 @@ return (
                                 <option value="!=">Not Equals</option>
                                 <option value=">">Greater</option>
                                 <option value="<">Less</option>
+                                <option value=">=">Greater or Equal</option>
+                                <option value="<=">Less or Equal</option>
                                 <option value="contains">Contains</option>
+                                <option value="startswith">Starts With</option>
+                                <option value="in">In List (a, b, c)</option>
+                                <option value="between">Between (low, high)</option>
+                                <option value="is null">Is Empty</option>
+                                <option value="not null">Is Not Empty</option>
                             </select>
                             <input type="text" className="w-2/3 bg-[#1e293b] border border-gray-600 rounded p-1.5 text-xs text-white"
                                 placeholder="Value" value={cond.value} onChange={(e) => updateListItem('conditions', idx, 'value', e.target.value)} />
@@ -388,6 +432,11 @@ return (
                                 <option value="mean">Avg</option>
                                 <option value="max">Max</option>
                                 <option value="min">Min</option>
+                                <option value="median">Median</option>
+                                <option value="nunique">Distinct</option>
+                                <option value="p90">P90</option>
+                                <option value="first">First</option>
+                                <option value="last">Last</option>
                             </select>
                             <button onClick={() => removeListItem('aggregations', idx)} className="text-red-400 hover:text-red-300"><Trash2 size={14}/></button>
                         </div>
@@ -459,7 +508,9 @@ return (
         {(node.data.typeLabel === 'Merge/Join' || node.data.typeLabel === 'Concatenate') && (
             <div className="space-y-3">
                 <div className="text-xs text-gray-500 bg-blue-900/20 p-2 rounded">
-                    Note: Ensure two separate flows connect to this node for it to work.
+                    {node.data.typeLabel === 'Merge/Join'
+                        ? 'Note: Connect the left dataset to the top input (L) and the right dataset to the bottom input (R).'
+                        : 'Note: Connect every dataset to stack to the input of this node.'}
                 </div>
                 {node.data.typeLabel === 'Merge/Join' && (
                     <>
@@ -477,6 +528,14 @@ return (
                             <option value="">Index (Default)</option>
                             {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
                         </select>
+                        <label className="text-xs font-bold text-gray-400 uppercase">Check Keys</label>
+                        <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                            onChange={(e) => handleChange('validate', e.target.value)} value={config.validate || ''}>
+                            <option value="">No check</option>
+                            <option value="many_to_one">Many-to-one (right keys unique)</option>
+                            <option value="one_to_many">One-to-many (left keys unique)</option>
+                            <option value="one_to_one">One-to-one (both unique)</option>
+                        </select>
                     </>
                 )}
                 {node.data.typeLabel === 'Concatenate' && (
@@ -510,6 +569,29 @@ return (
                     <option value="datetime">Datetime</option>
                     <option value="category">Category</option>
                 </select>
+                <div>
+                    <div className="flex justify-between items-center mb-2">
+                        <label className="text-xs font-bold text-gray-400 uppercase">More Columns</label>
+                        <button onClick={() => addListItem('casts', { column: '', dtype: 'float' })} className="text-[10px] bg-blue-600 px-2 py-1 rounded text-white flex items-center gap-1"><Plus size={10}/> Add</button>
+                    </div>
+                    {(config.casts || []).map((rule: any, idx: number) => (
+                        <div key={idx} className="flex gap-2 mb-2">
+                            <select className="flex-1 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                value={rule.column} onChange={(e) => updateListItem('casts', idx, 'column', e.target.value)}>
+                                <option value="">Column...</option>
+                                {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                            </select>
+                            <select className="w-24 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                value={rule.dtype} onChange={(e) => updateListItem('casts', idx, 'dtype', e.target.value)}>
+                                <option value="str">String</option>
+                                <option value="int">Integer</option>
+                                <option value="float">Float</option>
+                                <option value="datetime">Datetime</option>
+                            </select>
+                            <button onClick={() => removeListItem('casts', idx)} className="text-red-400 hover:text-red-300"><Trash2 size={14}/></button>
+                        </div>
+                    ))}
+                </div>
             </div>
         )}
 
@@ -554,6 +636,37 @@ return (
                     <option value="">All Columns</option>
                     {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
                 </select>
+                <div>
+                    <div className="flex justify-between items-center mb-2">
+                        <label className="text-xs font-bold text-gray-400 uppercase">Per-Column Rules</label>
+                        <button onClick={() => addListItem('rules', { column: '', method: 'mean', value: '' })} className="text-[10px] bg-blue-600 px-2 py-1 rounded text-white flex items-center gap-1"><Plus size={10}/> Add</button>
+                    </div>
+                    {(config.rules || []).map((rule: any, idx: number) => (
+                        <div key={idx} className="flex gap-2 mb-2">
+                            <select className="flex-1 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                value={rule.column} onChange={(e) => updateListItem('rules', idx, 'column', e.target.value)}>
+                                <option value="">Column...</option>
+                                {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                            </select>
+                            <select className="w-24 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                value={rule.method} onChange={(e) => updateListItem('rules', idx, 'method', e.target.value)}>
+                                <option value="value">Value</option>
+                                <option value="mean">Mean</option>
+                                <option value="median">Median</option>
+                                <option value="mode">Mode</option>
+                                <option value="min">Min</option>
+                                <option value="max">Max</option>
+                                <option value="ffill">Fwd Fill</option>
+                                <option value="bfill">Back Fill</option>
+                            </select>
+                            {rule.method === 'value' && (
+                                <input type="text" placeholder="Value" className="w-20 bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                                    value={rule.value || ''} onChange={(e) => updateListItem('rules', idx, 'value', e.target.value)} />
+                            )}
+                            <button onClick={() => removeListItem('rules', idx)} className="text-red-400 hover:text-red-300"><Trash2 size={14}/></button>
+                        </div>
+                    ))}
+                </div>
             </div>
         )}
         {/* COPY DATA (Simple Info) */}
@@ -653,6 +766,18 @@ return (
                         <span>No columns found. Connect to 'Read Data' first.</span>
                     </div>
                 )}
+                <label className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer">
+                    <input type="checkbox" checked={!!config.approximate}
+                        onChange={(e) => handleChange('approximate', e.target.checked)} />
+                    Approximate (top values from a sketch, for huge columns)
+                </label>
+                {config.approximate && (
+                    <>
+                        <label className="text-xs font-bold text-gray-400 uppercase">Top N Values</label>
+                        <input type="number" min={1} className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                            onChange={(e) => handleChange('topN', parseInt(e.target.value) || undefined)} value={config.topN || 100} />
+                    </>
+                )}
             </div>
         )}
         
@@ -683,6 +808,21 @@ return (
                         </select>
                     </>
                 )}
+                <label className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer">
+                    <input type="checkbox" checked={!!config.optimizeMemory}
+                        onChange={(e) => handleChange('optimizeMemory', e.target.checked)} />
+                    Optimize memory (categories, smaller ints, Arrow strings)
+                </label>
+                {config.selectedFile?.columns?.length > 0 && (
+                    <>
+                        <label className="text-xs font-bold text-gray-400 uppercase">Preview Sample Stratified By</label>
+                        <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                            onChange={(e) => handleChange('sampleStratify', e.target.value || undefined)} value={config.sampleStratify || ''}>
+                            <option value="">Uniform sample</option>
+                            {config.selectedFile.columns.map((c:string) => <option key={c} value={c}>{c}</option>)}
+                        </select>
+                    </>
+                )}
             </div>
         )}
         {node.data.typeLabel === 'AI Assistant' && (
@@ -724,7 +864,7 @@ return (
 
                 {/* Expression Input */}
                 <label className="text-xs font-bold text-gray-400 uppercase">Calculation Expression</label>
-                <div className="text-[10px] text-gray-500 mb-1">Use 'df' to reference the DataFrame (e.g., df['Price'] * df['Qty']).</div>
+                <div className="text-[10px] text-gray-500 mb-1">Reference columns by name or as df['Col'] (e.g., Price * Qty, iif(Qty &gt; 10, 'bulk', 'retail'), year(df['Order Date'])).</div>
                 <textarea 
                     rows={3} // Use a textarea for multi-line expressions
                     placeholder="df['Column1'] / df['Column2']" 
@@ -805,8 +945,86 @@ return (
                 </div>
             </div>
         )}
+        {/* CLUSTERING */}
+        {node.data.typeLabel === 'Clustering' && (
+            <div className="space-y-3">
+                <label className="text-xs font-bold text-gray-400 uppercase">Feature Columns</label>
+                <div className="w-full bg-[#0f172a] border border-gray-700 rounded-lg p-2 h-40 overflow-y-auto custom-scrollbar space-y-1">
+                    {availableColumns.map((c) => (
+                        <label key={c} className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer">
+                            <input type="checkbox" checked={(config.columns || []).includes(c)}
+                                onChange={(e) => {
+                                    const current = config.columns || [];
+                                    handleChange('columns', e.target.checked ? [...current, c] : current.filter((col: string) => col !== c));
+                                }} />
+                            {c}
+                        </label>
+                    ))}
+                </div>
+                <label className="text-xs font-bold text-gray-400 uppercase">Clusters (k)</label>
+                <div className="flex gap-2">
+                    <input type="number" min={1} disabled={config.k === 'auto'}
+                        className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white disabled:opacity-40"
+                        value={config.k === 'auto' ? '' : (config.k ?? 3)} onChange={(e) => handleChange('k', parseInt(e.target.value) || 3)} />
+                    <label className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer whitespace-nowrap">
+                        <input type="checkbox" checked={config.k === 'auto'} onChange={(e) => handleChange('k', e.target.checked ? 'auto' : 3)} />
+                        Auto
+                    </label>
+                </div>
+                {config.k === 'auto' && (
+                    <>
+                        <label className="text-xs font-bold text-gray-400 uppercase">Max k</label>
+                        <input type="number" min={2} className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                            value={config.maxK ?? 8} onChange={(e) => handleChange('maxK', parseInt(e.target.value) || 8)} />
+                    </>
+                )}
+                <label className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer">
+                    <input type="checkbox" checked={config.scale !== false} onChange={(e) => handleChange('scale', e.target.checked)} />
+                    Standardize columns before clustering
+                </label>
+                <div className="text-[10px] text-gray-500 px-1">* Adds a Cluster column. Empty selection uses every numeric column.</div>
+            </div>
+        )}
+        {/* FORECAST */}
+        {node.data.typeLabel === 'Forecast' && (
+            <div className="space-y-3">
+                <label className="text-xs font-bold text-gray-400 uppercase">Date Column</label>
+                <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                    onChange={(e) => handleChange('dateColumn', e.target.value)} value={config.dateColumn || ''}>
+                    <option value="">-- Select --</option>
+                    {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                </select>
+                <label className="text-xs font-bold text-gray-400 uppercase">Value Column</label>
+                <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                    onChange={(e) => handleChange('valueColumn', e.target.value)} value={config.valueColumn || ''}>
+                    <option value="">-- Count Rows --</option>
+                    {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                </select>
+                <label className="text-xs font-bold text-gray-400 uppercase">Forecast Each (optional)</label>
+                <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                    onChange={(e) => handleChange('groupColumn', e.target.value)} value={config.groupColumn || ''}>
+                    <option value="">-- Single Series --</option>
+                    {availableColumns.map(c => <option key={c} value={c}>{c}</option>)}
+                </select>
+                <div className="grid grid-cols-3 gap-2">
+                    <select className="bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                        onChange={(e) => handleChange('freq', e.target.value)} value={config.freq || 'D'}>
+                        <option value="H">Hourly</option><option value="D">Daily</option><option value="W">Weekly</option>
+                        <option value="M">Monthly</option><option value="Q">Quarterly</option><option value="Y">Yearly</option>
+                    </select>
+                    <select className="bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                        onChange={(e) => handleChange('agg', e.target.value)} value={config.agg || 'sum'}>
+                        <option value="sum">Sum</option><option value="mean">Mean</option><option value="count">Count</option>
+                        <option value="min">Min</option><option value="max">Max</option>
+                    </select>
+                    <input type="number" min={1} title="Periods ahead" className="bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
+                        value={config.periods ?? 30} onChange={(e) => handleChange('periods', parseInt(e.target.value) || 30)} />
+                </div>
+                <div className="text-[10px] text-gray-500 px-1">* Frequency, aggregation and periods ahead. Unchanged series reuse their fitted model.</div>
+            </div>
+        )}
         {/* --- GOOGLE DRIVE CONFIG --- */}
-        
+
         {/* 2. KPI CARD */}
         {node.data.typeLabel === 'KPI Card' && (
             <div className="space-y-3">
@@ -824,7 +1042,19 @@ return (
                     <option value="avg">Average</option>
                     <option value="min">Min</option>
                     <option value="max">Max</option>
+                    <option value="distinct">Distinct Count</option>
+                    <option value="median">Median</option>
+                    <option value="p90">90th Percentile</option>
+                    <option value="p95">95th Percentile</option>
+                    <option value="p99">99th Percentile</option>
                 </select>
+                {['distinct', 'median', 'p90', 'p95', 'p99'].includes(config.operation) && (
+                    <label className="flex items-center gap-2 text-xs text-gray-300 cursor-pointer">
+                        <input type="checkbox" checked={!!config.approximate}
+                            onChange={(e) => handleChange('approximate', e.target.checked)} />
+                        Approximate (sketch, reports error bounds)
+                    </label>
+                )}
             </div>
         )}
         {/* --- CHART CONFIGURATION (Universal for all Charts) --- */}
@@ -885,7 +1115,7 @@ return (
             </div>
         )}
         {/* GENERIC FALLBACK FOR OTHER NODES */}
-        {!isChartNode && node.data.typeLabel !== 'Value Counts' && node.data.typeLabel !== 'Pivot Table' && ['Sort Data', 'Rename Columns', 'Change Data Type', 'Select Columns', 'KPI Card'].includes(node.data.typeLabel) && (
+        {!isChartNode && node.data.typeLabel !== 'Value Counts' && node.data.typeLabel !== 'Pivot Table' && ['Sort Data', 'Rename Columns', 'Change Data Type', 'Select Columns', 'KPI Card', 'Sentiment Analysis'].includes(node.data.typeLabel) && (
              <div className="space-y-3">
                 <label className="text-xs font-bold text-gray-400 uppercase">Target Column</label>
                 <select className="w-full bg-[#0f172a] border border-gray-700 rounded p-2 text-xs text-white"
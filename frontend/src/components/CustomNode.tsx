@@ -6,6 +6,15 @@ import {
   BarChart3, PieChart,ScatterChart, Activity, Map, LayoutGrid, LayoutDashboard, Box, AreaChart, Globe, Server, AlignLeft, Sigma, BrainCircuit, Wand2
 } from 'lucide-react';
 
+// Live run state (set from run events while the flow executes)
+const RUN_RING: Record<string, string> = {
+  running: 'ring-2 ring-amber-400 animate-pulse',
+  ok: 'ring-2 ring-green-500',
+  error: 'ring-2 ring-red-500',
+  merged: 'ring-2 ring-sky-500', // Identical to another node: its output was reused (flow optimizer)
+  skipped: 'opacity-50', // Feeds no display/export node: not run
+};
+
 const CustomNode = ({ id, data, selected }: any) => {
   const stepNumber = id.split('_')[1] || '?';
   const isSource = data.typeLabel?.includes('Source') || data.typeLabel?.includes('Connect') || data.typeLabel === 'Upload File' || data.typeLabel.includes('GCP') || data.typeLabel.includes('Azure') || data.typeLabel.includes('MongoDB');
@@ -54,6 +63,7 @@ const CustomNode = ({ id, data, selected }: any) => {
     <div className={`
       relative px-4 py-3 shadow-xl rounded-lg min-w-[180px] transition-all
       ${selected ? 'ring-2 ring-blue-500 bg-[#1e293b] border-transparent' : 'border border-gray-700 bg-[#1f2937] hover:border-gray-500'}
+      ${!selected && data.run ? RUN_RING[data.run.status] || '' : ''}
     `}>
       {/* Step Number Badge */}
       <div className="absolute -top-3 -left-3 w-6 h-6 bg-blue-600 rounded-full flex items-center justify-center text-[10px] font-bold text-white border-2 border-[#0f172a] shadow-md z-10">
@@ -79,10 +89,26 @@ const CustomNode = ({ id, data, selected }: any) => {
           <AlertCircle size={12} className="text-yellow-500 animate-pulse" />
         )}
       </div>
+      {data.run && data.run.status !== 'running' && (
+        <div className={`mt-1 text-[9px] truncate max-w-[160px] ${data.run.status === 'error' ? 'text-red-400' : 'text-gray-500'}`} title={data.run.message}>
+          {data.run.status === 'error' ? data.run.message
+            : data.run.status === 'merged' ? `Same as step ${String(data.run.mergedInto).split('_')[1] || data.run.mergedInto}`
+            : data.run.status === 'skipped' ? 'Skipped: feeds no output'
+            : `${data.run.sampled ? 'sample: ' : ''}${(data.run.rows ?? 0).toLocaleString()} rows · ${data.run.ms} ms`}
+        </div>
+      )}
       
       {/* Handles */}
-      {!isSource && (
-        <Handle type="target" position={Position.Left} className="!w-3 !h-3 !bg-blue-500 !border-2 !border-[#0f172a] !-left-[7px]" />
+      {!isSource && data.typeLabel === 'Merge/Join' ? (
+        <>
+          {/* Named input ports: the backend joins targetHandle 'left' with 'right' */}
+          <Handle type="target" id="left" position={Position.Left} style={{ top: '35%' }} className="!w-3 !h-3 !bg-blue-500 !border-2 !border-[#0f172a] !-left-[7px]" />
+          <Handle type="target" id="right" position={Position.Left} style={{ top: '70%' }} className="!w-3 !h-3 !bg-purple-500 !border-2 !border-[#0f172a] !-left-[7px]" />
+          <span className="absolute left-2 top-[35%] -translate-y-1/2 text-[8px] font-bold text-blue-400">L</span>
+          <span className="absolute left-2 top-[70%] -translate-y-1/2 text-[8px] font-bold text-purple-400">R</span>
+        </>
+      ) : !isSource && (
+        <Handle type="target" id={data.typeLabel === 'Concatenate' ? 'inputs' : undefined} position={Position.Left} className="!w-3 !h-3 !bg-blue-500 !border-2 !border-[#0f172a] !-left-[7px]" />
       )}
       <Handle type="source" position={Position.Right} className="!w-3 !h-3 !bg-blue-500 !border-2 !border-[#0f172a] !-right-[7px]" />
     </div>
@@ -5,6 +5,7 @@ import {
   BarChart3, Table as TableIcon, 
   Activity, Layers, AlertCircle, PieChart, Cloud, ImageOff
 } from 'lucide-react';
+import { artifactUrl } from '../utils/api';
 
 const REPORT_ALLOWLIST = [
     'KPI Card', 
@@ -71,10 +72,35 @@ const ReportPage = () => {
 
   // --- CHART WIDGET ---
   const ChartWidget = ({ node }: any) => {
-      const { type, config, preview } = node;
-      const validData = Array.isArray(preview) ? preview.slice(0, 50) : [];
+      const { type, config, preview, chart } = node;
+      // Reduced payloads (node.chart) are already bounded server-side and cover every row
+      const validData = Array.isArray(preview) ? (chart ? preview : preview.slice(0, 50)) : [];
       if (validData.length === 0) return <div className="h-full flex items-center justify-center text-gray-500"><AlertCircle className="mr-2"/>No Data</div>;
 
+      // HEATMAP (long form: x label, y label, Count)
+      if (type === 'Heatmap' && chart?.x_labels) {
+          const cells: Record<string, number> = {};
+          validData.forEach((d: any) => { cells[`${d[config.column]}|${d[config.yAxis]}`] = Number(d.Count) || 0; });
+          const peak = Math.max(...Object.values(cells), 1);
+          return (
+              <div className="h-full w-full p-4 overflow-auto custom-scrollbar">
+                  <div className="grid gap-px text-[9px] text-gray-400 font-mono" style={{ gridTemplateColumns: `80px repeat(${chart.y_labels.length}, minmax(14px, 1fr))` }}>
+                      <div></div>
+                      {chart.y_labels.map((y: string) => <div key={y} className="truncate text-center" title={y}>{y}</div>)}
+                      {chart.x_labels.map((x: string) => (
+                          <React.Fragment key={x}>
+                              <div className="truncate pr-1" title={x}>{x}</div>
+                              {chart.y_labels.map((y: string) => {
+                                  const v = cells[`${x}|${y}`] || 0;
+                                  return <div key={y} className="h-4 rounded-sm" style={{ background: `rgba(59,130,246,${v ? 0.15 + 0.85 * v / peak : 0.04})` }} title={`${x} / ${y}: ${v}`}></div>;
+                              })}
+                          </React.Fragment>
+                      ))}
+                  </div>
+              </div>
+          );
+      }
+
       const keys = Object.keys(validData[0]);
       const xKey = config.column || keys[0];
       const yKey = config.yAxis || keys.find(k => typeof validData[0][k] === 'number') || keys[1];
@@ -186,6 +212,9 @@ const ReportPage = () => {
       const isChart = type.includes('Chart') || type.includes('Plot') || type.includes('gram') || type.includes('Forecast') || type.includes('Map');
       const isWordCloud = type === 'Word Cloud';
       const isTable = !isKPI && !isChart && !isWordCloud;
+      // Clustering shows its per-cluster summary (size, share, centroids) instead of the labelled rows
+      const tableRows = node.clusters || node.preview;
+      const tableCols = node.clusters ? Object.keys(node.clusters[0] || {}) : columns;
 
       if (isKPI) return <div className="col-span-12 md:col-span-3"><KPICard data={node.preview} config={node.config} /></div>;
 
@@ -204,7 +233,7 @@ const ReportPage = () => {
                   {isWordCloud ? (
                       node.image ? (
                           <div className="w-full h-full flex items-center justify-center p-4">
-                              <img src={node.image} alt="Word Cloud" className="max-w-full max-h-full object-contain" />
+                              <img src={artifactUrl(node.image)} alt="Word Cloud" className="max-w-full max-h-full object-contain" />
                           </div>
                       ) : (
                           <div className="w-full h-full flex flex-col items-center justify-center text-gray-500 gap-2">
@@ -220,12 +249,12 @@ const ReportPage = () => {
                       <div className="w-full h-full overflow-auto custom-scrollbar">
                           <table className="w-full text-xs text-left border-collapse min-w-max">
                               <thead className="bg-[#0f172a] text-gray-300 sticky top-0 z-10 shadow-sm">
-                                  <tr>{columns.map((c:string)=><th key={c} className="p-3 font-semibold border-b border-gray-700 whitespace-nowrap">{c}</th>)}</tr>
+                                  <tr>{tableCols.map((c:string)=><th key={c} className="p-3 font-semibold border-b border-gray-700 whitespace-nowrap">{c}</th>)}</tr>
                               </thead>
                               <tbody className="divide-y divide-gray-800">
-                                  {node.preview.slice(0, 100).map((row:any, i:number) => (
+                                  {tableRows.slice(0, 100).map((row:any, i:number) => (
                                       <tr key={i} className="hover:bg-blue-500/5 transition-colors group">
-                                          {columns.map((c:string)=><td key={c} className="p-3 text-gray-400 border-r border-gray-800/30 whitespace-nowrap max-w-[200px] truncate group-hover:text-gray-200">{String(row[c])}</td>)}
+                                          {tableCols.map((c:string)=><td key={c} className="p-3 text-gray-400 border-r border-gray-800/30 whitespace-nowrap max-w-[200px] truncate group-hover:text-gray-200">{String(row[c])}</td>)}
                                       </tr>
                                   ))}
                               </tbody>
@@ -4,7 +4,7 @@ import {
   AlertTriangle, ChevronDown, BarChart3, Table as TableIcon, 
   Filter, Loader2, X, List, CheckSquare, Square
 } from 'lucide-react';
-import { workflowAPI } from '../utils/api';
+import { workflowAPI, artifactUrl } from '../utils/api';
 
 interface RightPanelProps {
 executionResult: any;
@@ -127,7 +127,7 @@ const NodeOutputCard = ({ nodeData, startExpanded = false }: { nodeData: any, st
                     {nodeData.type === 'Word Cloud' ? (
                          nodeData.image ? (
                             <div className="p-4 flex justify-center">
-                                <img src={nodeData.image} alt="Word Cloud" className="rounded shadow-sm max-h-[200px]" />
+                                <img src={artifactUrl(nodeData.image)} alt="Word Cloud" className="rounded shadow-sm max-h-[200px]" />
                             </div>
                          ) : <div className="text-xs text-center p-4 text-gray-500">Image Generation Failed</div>
                     ) : isChart ? (
@@ -280,7 +280,6 @@ const handleSendMessage = async () => {
 
     // 2. Gather Data Context
     let contextCols: string[] = [];
-    let contextPreview: any[] = [];
     let contextStats: any = {};
     const primaryNodeId = contextNodeIds.length > 0 ? contextNodeIds[0] : null;
 
@@ -288,7 +287,6 @@ const handleSendMessage = async () => {
         const output = executionResult?.node_outputs?.[primaryNodeId];
         if (output) {
             contextCols = output.columns || [];
-            contextPreview = output.preview || [];
             contextStats = output.stats || {};
         } else {
             const n = allNodes?.find(x => x.id === primaryNodeId);
@@ -305,8 +303,8 @@ const handleSendMessage = async () => {
             user_id: userId || 0, // Fallback if 0 (Guest)
             flow_id: flowId || null,
             context: {
+                // Row values are summarised server-side from the uploaded file's cached profile
                 columns: contextCols,
-                dataPreview: contextPreview,
                 dataStats: contextStats,
                 selectedNode: primaryNodeId ? { id: primaryNodeId } : null,
                 currentNodes: allNodes // Important for Modification
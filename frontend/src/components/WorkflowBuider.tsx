@@ -12,7 +12,7 @@ import ReactFlow, {
   Edge
 } from 'reactflow';
 import 'reactflow/dist/style.css';
-import { Play, Save, LayoutGrid, LogOut, FileText, ChevronLeft, Loader2 } from 'lucide-react';
+import { Play, Save, LayoutGrid, LogOut, FileText, ChevronLeft, Loader2, Square } from 'lucide-react';
 import { useNavigate, useLocation } from 'react-router-dom';
 import { workflowAPI } from '../utils/api';
 import ConfigPanel from './ConfigPanel';
@@ -35,6 +35,7 @@ const [fileColumns, setFileColumns] = useState<string[]>([]);
 const [selectedNode, setSelectedNode] = useState<any>(null);
 const [executionResult, setExecutionResult] = useState<any>(null);
 const [isExecuting, setIsExecuting] = useState(false);
+const [runState, setRunState] = useState<any>(null); // Latest status of the background run (per-node progress)
 const [flowName, setFlowName] = useState("Untitled Flow");
 
 // NEW: Track Flow ID for AI Memory
@@ -101,17 +102,34 @@ const userId = parseInt(localStorage.getItem('userId') || '0');
   const runFlow = async (currentNodes: Node[], currentEdges: Edge[]) => {
       setIsExecuting(true);
       try {
-          // Pass the CURRENT state of nodes/edges to backend
-          const result = await workflowAPI.executeWorkflow(currentNodes, currentEdges);
+          // Pass the CURRENT state of nodes/edges to backend; runs as a background job so it can be followed and cancelled
+          setNodes((nds) => nds.map((n) => ({ ...n, data: { ...n.data, run: undefined } })));
+          // Progressive: big sources are previewed on a sample first, then the exact result replaces it
+          const result = await workflowAPI.runJob(currentNodes, currentEdges, {
+            onProgress: setRunState, onEvent: handleRunEvent, onPreview: setExecutionResult, userId: userId || undefined, mode: 'progressive',
+          });
           setExecutionResult(result);
           return result;
       } catch (error) {
           console.error("Auto-Run Failed:", error);
       } finally {
           setIsExecuting(false);
+          setRunState(null);
       }
   };
 
+  // Light nodes up as the run reaches them: running -> ok / error, with rows and time
+  const handleRunEvent = (event: any) => {
+      if (event.event !== 'node_started' && event.event !== 'node_finished') return;
+      if (event.sampled && event.event === 'node_started') return; // Preview pass: keep the ring for the exact run
+      const run = event.event === 'node_started'
+        ? { status: 'running' }
+        : { status: event.status, rows: event.rows, ms: event.ms, preview: event.preview, message: event.message, mergedInto: event.merged_into, sampled: event.sampled };
+      setNodes((nds) => nds.map((n) => n.id === event.node_id ? { ...n, data: { ...n.data, run } } : n));
+  };
+
+  const handleCancelRun = () => { if (runState?.run_id) workflowAPI.cancelJob(runState.run_id); };
+
   // --- 5. SAVE CONFIG & AUTO-RUN ---
   const handleSaveConfig = async (nodeId: string, newConfig: any) => {
     // 1. Update the Node State first
@@ -200,8 +218,16 @@ const userId = parseInt(localStorage.getItem('userId') || '0');
             <div className="h-6 w-px bg-gray-700 mx-2"></div>
             <button onClick={handleManualExecute} disabled={isExecuting} className="flex items-center gap-2 bg-blue-600 hover:bg-blue-500 text-white px-4 py-1.5 rounded text-xs font-bold disabled:opacity-50 shadow-lg">
                 {isExecuting ? <Loader2 className="animate-spin" size={14}/> : <Play size={14} fill="currentColor" />}
-                {isExecuting ? 'Processing...' : 'Execute'}
+                {isExecuting ? (runState?.total_nodes ? `Processing ${runState.done_nodes}/${runState.total_nodes}...` : 'Processing...') : 'Execute'}
             </button>
+            {isExecuting && executionResult?.sampled && (
+                <span className="text-[10px] text-amber-400" title="Outputs computed on a sample of each source; the exact run is still going">
+                    Sampled preview · refining…
+                </span>
+            )}
+            {isExecuting && runState?.run_id && (
+                <button onClick={handleCancelRun} title="Stop after the current node" className="flex items-center gap-2 bg-[#0f172a] border border-gray-700 hover:bg-red-900/40 text-gray-300 px-3 py-1.5 rounded text-xs"><Square size={12} /> Cancel</button>
+            )}
         </div>
       </div>
 
@@ -7,6 +7,10 @@ export const apiClient = axios.create({
   headers: { 'Content-Type': 'application/json' },
 });
 
+// Rendered images come back as /api/artifacts/<sha256>.png paths (cacheable, ETag'd); older results inline data: URLs
+export const artifactUrl = (src?: string | null) =>
+  !src ? '' : (src.startsWith('data:') || /^https?:/.test(src) ? src : `${API_BASE_URL}${src}`);
+
 export const workflowAPI = {
   checkHealth: async () => {
     try { return (await apiClient.get('/')).data; } 
@@ -26,6 +30,41 @@ export const workflowAPI = {
   },
 
   executeWorkflow: async (nodes: any[], edges: any[]) => (await apiClient.post('/api/execute', { nodes, edges })).data,
+  // Background runs: submit returns a run id; status carries per-node progress; result is kept for a while after finishing
+  submitJob: async (nodes: any[], edges: any[], userId?: number, timeout?: number, mode: 'exact' | 'progressive' = 'exact') =>
+    (await apiClient.post('/api/jobs', { nodes, edges, user_id: userId, timeout, mode })).data,
+  getJob: async (runId: string) => (await apiClient.get(`/api/jobs/${runId}`)).data,
+  getJobResult: async (runId: string) => (await apiClient.get(`/api/jobs/${runId}/result`)).data,
+  cancelJob: async (runId: string) => (await apiClient.post(`/api/jobs/${runId}/cancel`)).data,
+  listJobs: async (uid: number) => (await apiClient.get(`/api/jobs/user/${uid}`)).data,
+  // Live run events (node_started / node_finished with rows, ms, preview / run_finished); returns a function that stops listening
+  watchJob: (runId: string, onEvent: (event: any) => void) => {
+    const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/api/jobs/${runId}/ws`);
+    socket.onmessage = (msg) => onEvent(JSON.parse(msg.data));
+    return () => socket.close();
+  },
+  // Submit + poll until the run finishes; onProgress sees every status snapshot (run_id, done_nodes, total_nodes, progress[]),
+  // onEvent every live event as it happens, onPreview the sampled result of a progressive run before the exact one
+  runJob: async (nodes: any[], edges: any[], opts: { onProgress?: (run: any) => void, onEvent?: (event: any) => void,
+                 onPreview?: (result: any) => void, userId?: number, mode?: 'exact' | 'progressive', intervalMs?: number } = {}) => {
+    const { run_id } = await workflowAPI.submitJob(nodes, edges, opts.userId, undefined, opts.mode);
+    const stop = opts.onEvent ? workflowAPI.watchJob(run_id, opts.onEvent) : undefined;
+    let previewed = false;
+    try {
+      for (;;) {
+        const run = await workflowAPI.getJob(run_id);
+        opts.onProgress?.({ ...run, run_id });
+        if (!['queued', 'running'].includes(run.status)) return await workflowAPI.getJobResult(run_id);
+        if (run.preview_ready && !previewed && opts.onPreview) {
+          previewed = true;
+          opts.onPreview(await workflowAPI.getJobResult(run_id)); // 202 + the sampled result while the exact run continues
+        }
+        await new Promise((resolve) => setTimeout(resolve, opts.intervalMs ?? 500));
+      }
+    } finally { stop?.(); }
+  },
+  // NEW: Per-node output columns/dtypes without running the flow
+  inferSchema: async (nodes: any[], edges: any[]) => (await apiClient.post('/api/schema', { nodes, edges })).data,
  // UPDATED: Save Flow returns flow_id
   saveFlow: async (uid: number, name: string, nodes: any[], edges: any[], flowId?: number) => 
     (await apiClient.post('/api/flows/save', { user_id: uid, name, nodes, edges, flow_id: flowId })).data,